@@ -48,6 +48,13 @@ from openai import OpenAI
 
 # Import the modular process_video function
 from ingest_manager import process_video
+from pipeline_dag import PipelineDAG, PipelineError, Deadline
+from checkpoint_store import CheckpointStore
+from job_profiler import JobProfiler
+from metrics import (get_registry, meter_youtube_quota, record_cache_stats,
+                     LLM_LATENCY, LLM_TOKENS, LLM_ERRORS, STAGE_DURATION)
+from video_records import TranscriptCacheMissing, VideoRecord, compact_videos_data, transcript_excerpt
+from task_pools import get_task_pools, WORKLOAD_CPU, WORKLOAD_IO
 
 # Import premium analysis modules
 from premium.ml_models.ctr_predictor import CTRPredictor
@@ -56,6 +63,7 @@ from premium.ml_models.viral_predictor import ViralPredictor
 from premium.ml_models.content_clusterer import ContentClusteringEngine
 from premium.thumbnail_optimizer import ThumbnailOptimizer
 from premium.thumbnail_extractor import ThumbnailFeatureExtractor
+from premium.cpu_tasks import cluster_content
 from premium.competitor_analyzer import CompetitorAnalyzer
 from premium.publish_optimizer import PublishTimeOptimizer
 from premium.data_collector import YouTubeDataCollector
@@ -67,6 +75,15 @@ from premium.growth_pattern_analyzer import GrowthPatternAnalyzer
 from premium.ml_models.sentiment_engine import SentimentEngine
 from premium.market_intelligence import MarketIntelligence
 from premium.ml_models.optimization_scorer import OptimizationScorer
+from premium.db.comment_store import get_comment_store
+from premium.db.channel_snapshot_cache import get_channel_snapshot_cache
+from premium.db.thumbnail_cache import get_thumbnail_cache
+from premium.db.thumbnail_index import get_thumbnail_index
+from premium.vision_workers import get_vision_pool
+from premium.transcript_store import get_transcript_store
+
+# Local (Ollama) inference endpoint for --ai local
+OLLAMA_URL = os.getenv('OLLAMA_URL', 'http://localhost:11434').rstrip('/')
 
 # Language instructions for AI prompts
 LANGUAGE_INSTRUCTIONS = {
@@ -158,6 +175,11 @@ def get_channel_id(youtube, handle: str) -> tuple[str, str]:
     return channel_id, channel_title
 
 
+def handle_key(handle: str) -> str:
+    """Normalized channel handle used as a snapshot cache key."""
+    return handle.strip().lstrip('@').lower()
+
+
 def get_uploads_playlist_id(youtube, channel_id: str) -> str:
     """Get the 'Uploads' playlist ID for a channel."""
     request = youtube.channels().list(
@@ -292,6 +314,24 @@ def count_questions(comments: list) -> int:
     return count
 
 
+def job_video_ids(videos_data: list) -> list:
+    """Video ids of the ingested videos (comment store partition keys)."""
+    return [v['video_info'].get('video_id') or v['video_info'].get('id') for v in videos_data]
+
+
+def collect_comments(videos_data: list) -> list:
+    """Flatten the ingested comments for the signal filter as {video, text, likes}."""
+    all_comments = []
+    for v in videos_data:
+        for comment in v['comments']:
+            all_comments.append({
+                'video': v['video_info']['title'],
+                'text': comment['text'],
+                'likes': comment['likes']
+            })
+    return all_comments
+
+
 def filter_high_signal_comments(comments: list) -> list:
     """
     PHASE 1: Signal-to-Noise Pre-Filter (Python only, no AI cost).
@@ -357,46 +397,53 @@ def filter_high_signal_comments(comments: list) -> list:
 
 def fetch_competitor_videos(youtube, competitors: list) -> dict:
     """
-    Fetch top recent video titles from competitor channels in parallel.
+    Fetch top recent video titles from competitor channels in parallel (shared I/O pool).
     """
-    from concurrent.futures import ThreadPoolExecutor, as_completed
-    
     comp_data = {}
     print("\n⚔️ Analyzing Competitors (Parallel Fetch)...")
     print_progress(30, "Analyzing Competitors")
 
     
+    # Shared with other jobs: overlapping competitors are fetched once
+    snapshots = get_channel_snapshot_cache()
+    
     def fetch_single(comp):
         try:
-            cid, title = get_channel_id(youtube, comp)
+            cid, title = snapshots.get_or_fetch('channel', handle_key(comp), lambda: get_channel_id(youtube, comp))
             # get uploads playlist
-            ch_resp = youtube.channels().list(id=cid, part='contentDetails').execute()
-            uploads_id = ch_resp['items'][0]['contentDetails']['relatedPlaylists']['uploads']
+            uploads_id = snapshots.get_or_fetch('playlist', cid, lambda: get_uploads_playlist_id(youtube, cid))
             
             # get last 25 videos
-            gov_resp = youtube.playlistItems().list(
-                playlistId=uploads_id, part='snippet', maxResults=25
-            ).execute()
+            def fetch_titles():
+                gov_resp = youtube.playlistItems().list(
+                    playlistId=uploads_id, part='snippet', maxResults=25
+                ).execute()
+                return [item['snippet']['title'] for item in gov_resp['items']]
             
-            titles = [item['snippet']['title'] for item in gov_resp['items']]
+            titles = snapshots.get_or_fetch('videos', f"{uploads_id}:titles:25", fetch_titles, cache_if=bool)
             return title, titles, None
         except Exception as e:
             return None, None, str(e)
 
-    with ThreadPoolExecutor(max_workers=8) as executor:
-        futures = {executor.submit(fetch_single, comp): comp for comp in competitors}
-        for future in as_completed(futures):
-            comp = futures[future]
-            title, titles, error = future.result()
-            if title:
-                comp_data[title] = titles
-                print(f"   • ✓ {title} ({comp})")
-            else:
-                print(f"   • ⚠️ Failed: {comp} - {error}")
+    for comp, (title, titles, error) in zip(competitors, get_task_pools().map(WORKLOAD_IO, fetch_single, competitors)):
+        if title:
+            comp_data[title] = titles
+            print(f"   • ✓ {title} ({comp})")
+        else:
+            print(f"   • ⚠️ Failed: {comp} - {error}")
                 
     return comp_data
 
 
+def record_llm_call(provider: str, started: float, prompt_tokens: int = 0, completion_tokens: int = 0):
+    """Latency and token usage of one LLM call (exported via the job's metrics line)."""
+    LLM_LATENCY.observe(time.perf_counter() - started, provider=provider)
+    if prompt_tokens:
+        LLM_TOKENS.inc(prompt_tokens, provider=provider, kind='prompt')
+    if completion_tokens:
+        LLM_TOKENS.inc(completion_tokens, provider=provider, kind='completion')
+
+
 def call_ai_model(client, prompt: str, model_type: str = "openai", gemini_model_name: str = None) -> dict:
     """
     Abstracts API calls for OpenAI vs Gemini.
@@ -405,6 +452,7 @@ def call_ai_model(client, prompt: str, model_type: str = "openai", gemini_model_
     if not gemini_model_name:
         gemini_model_name = os.getenv("GEMINI_MODEL", DEFAULT_GEMINI_MODEL)
 
+    started = time.perf_counter()
     try:
         if model_type == "openai":
             response = client.chat.completions.create(
@@ -413,6 +461,8 @@ def call_ai_model(client, prompt: str, model_type: str = "openai", gemini_model_
                 response_format={"type": "json_object"},
                 temperature=0.3
             )
+            usage = getattr(response, 'usage', None)
+            record_llm_call(model_type, started, getattr(usage, 'prompt_tokens', 0), getattr(usage, 'completion_tokens', 0))
             return json.loads(response.choices[0].message.content)
             
         elif model_type == "gemini":
@@ -420,6 +470,8 @@ def call_ai_model(client, prompt: str, model_type: str = "openai", gemini_model_
             model = client.GenerativeModel(gemini_model_name,
                                          generation_config={"response_mime_type": "application/json"})
             response = model.generate_content(prompt)
+            usage = getattr(response, 'usage_metadata', None)
+            record_llm_call(model_type, started, getattr(usage, 'prompt_token_count', 0), getattr(usage, 'candidates_token_count', 0))
             return json.loads(response.text)
             
         elif model_type == "groq":
@@ -430,12 +482,14 @@ def call_ai_model(client, prompt: str, model_type: str = "openai", gemini_model_
                 response_format={"type": "json_object"},
                 temperature=0.3
             )
+            usage = getattr(response, 'usage', None)
+            record_llm_call(model_type, started, getattr(usage, 'prompt_tokens', 0), getattr(usage, 'completion_tokens', 0))
             return json.loads(response.choices[0].message.content)
             
         elif model_type == "local":
             # Ollama local inference
             try:
-                response = requests.post('http://localhost:11434/api/chat', json={
+                response = requests.post(f'{OLLAMA_URL}/api/chat', json={
                     "model": "llama3",
                     "messages": [{"role": "user", "content": prompt + "\n\nRESPOND IN JSON ONLY."}],
                     "format": "json",
@@ -443,7 +497,9 @@ def call_ai_model(client, prompt: str, model_type: str = "openai", gemini_model_
                     "options": {"temperature": 0.3}
                 })
                 if response.status_code == 200:
-                    content = response.json().get('message', {}).get('content', '{}')
+                    body = response.json()
+                    record_llm_call(model_type, started, body.get('prompt_eval_count', 0), body.get('eval_count', 0))
+                    content = body.get('message', {}).get('content', '{}')
                     # Clean potential markdown code blocks if Ollama includes them
                     if "```json" in content:
                         content = content.replace("```json", "").replace("```", "")
@@ -456,6 +512,7 @@ def call_ai_model(client, prompt: str, model_type: str = "openai", gemini_model_
                 return {}
             
     except Exception as e:
+        LLM_ERRORS.inc(provider=model_type)
         print(f"   ⚠️ AI Call Failed ({model_type}): {e}")
         return {}
 
@@ -516,7 +573,7 @@ OUTPUT JSON (only include pain points you found evidence for):
 """.format(language_instruction=LANGUAGE_INSTRUCTIONS.get(language, LANGUAGE_INSTRUCTIONS['en']))
     result = call_ai_model(client, prompt, model_type, gemini_model)
     if not result:
-        return {"pain_points": []}
+        return None  # LLM failure: the caller must not checkpoint it
     return result
 
 
@@ -524,6 +581,7 @@ def cluster_pain_points(client, all_pain_points: list, channel_name: str, model_
     """
     PHASE 2B (REDUCE): Cluster similar pain points without inventing new concepts.
     Enhanced to track engagement metrics and filter low-quality gaps.
+    Returns None when the LLM call fails, so the phase is not checkpointed.
     """
     # Flatten all pain points from batches with full engagement data
     flat_points = []
@@ -609,7 +667,7 @@ ONLY include gaps where mention_count >= 3 AND is_actionable = true.
         result['clustered_pain_points'] = filtered_gaps
         result['filtered_count'] = len(result['clustered_pain_points'])
     
-    return result if result else {"clustered_pain_points": []}
+    return result if result else None
 
 
 def verify_gaps_against_content(client, pain_points: list, transcripts: list, model_type: str = "openai", gemini_model: str = DEFAULT_GEMINI_MODEL, language: str = "en") -> dict:
@@ -619,6 +677,7 @@ def verify_gaps_against_content(client, pain_points: list, transcripts: list, mo
     This is the 'sellable' feature that proves gaps are real.
     
     Enhanced to preserve video_potential data from clustering step.
+    Returns None when the LLM call fails, so the phase is not checkpointed.
     """
     # Prepare pain points summary with full context
     pain_text = ""
@@ -694,36 +753,37 @@ OUTPUT JSON:
                 if not gap.get('mention_count'):
                     gap['mention_count'] = original.get('mention_count', 1)
     
-    return result if result else {"verified_gaps": []}
+    return result if result else None
 
 
 
 
 
-def analyze_with_ai(ai_client, videos_data: list[dict], channel_name: str, competitors_data: dict, model_type: str = "openai", gemini_model: str = DEFAULT_GEMINI_MODEL, language: str = "en") -> dict:
+def analyze_with_ai(ai_client, videos_data: list[dict], channel_name: str, competitors_data: dict, model_type: str = "openai", gemini_model: str = DEFAULT_GEMINI_MODEL, language: str = "en", comment_store=None, channel_id: str = None, checkpoints: CheckpointStore = None, deadline: Deadline = None) -> dict:
     """
     ANALYTICAL EXTRACTION PIPELINE (4 Phases):
     1. Signal-to-Noise Filter (Python)
     2. Pain Point Extraction (AI)
     3. Gap Verification (AI)
     4. Title Generation for Verified Gaps Only (AI)
+    
+    With a CheckpointStore, each AI phase (extraction, clustering, verification,
+    trends, titles) is restored from checkpoint when its inputs are unchanged.
+    With a Deadline, the optional trends phase is skipped when time is short.
     """
+    checkpoints = checkpoints or CheckpointStore()
+    deadline = deadline or Deadline()
+    
     # =========================================================
     # PHASE 1: SIGNAL-TO-NOISE FILTER (Python only, no AI cost)
     # =========================================================
-    all_comments = []
+    all_comments = collect_comments(videos_data)
     transcripts_summary = []
     
     for v in videos_data:
-        for comment in v['comments']:
-            all_comments.append({
-                'video': v['video_info']['title'],
-                'text': comment['text'],
-                'likes': comment['likes']
-            })
         transcripts_summary.append({
             'title': v['video_info']['title'],
-            'transcript_excerpt': v['transcript'][:3000]
+            'transcript_excerpt': transcript_excerpt(v, 3000)
         })
     
     total_raw_comments = len(all_comments)
@@ -731,13 +791,20 @@ def analyze_with_ai(ai_client, videos_data: list[dict], channel_name: str, compe
     # Apply signal filter
     print(f"\n📊 PHASE 1: Signal-to-Noise Filter...")
     total_question_comments = count_questions(all_comments)
-    high_signal_comments = filter_high_signal_comments(all_comments)
+    # The store holds this job's partitions in memory right after ingest, so reading them costs no I/O
+    video_ids = job_video_ids(videos_data)
+    store_backed = comment_store is not None and bool(channel_id) and comment_store.has_job_videos(channel_id, video_ids)
+    high_signal_comments = [] if store_backed else filter_high_signal_comments(all_comments)
     
     # Apply ML Sentiment Analysis (New)
     try:
         print("   🧠 Running DistilBERT Sentiment Analysis...")
         sentiment_engine = SentimentEngine()
-        high_signal_comments = sentiment_engine.analyze_batch(high_signal_comments)
+        if store_backed:
+            high_signal_comments = sentiment_engine.analyze_from_store(
+                comment_store, [channel_id], video_ids, select=filter_high_signal_comments)
+        else:
+            high_signal_comments = sentiment_engine.analyze_batch(high_signal_comments)
         
         # Calculate sentiment stats
         sentiments = [c.get('sentiment', 'NEUTRAL') for c in high_signal_comments]
@@ -750,6 +817,8 @@ def analyze_with_ai(ai_client, videos_data: list[dict], channel_name: str, compe
         
     except Exception as e:
         print(f"   ⚠️ Sentiment Analysis failed: {e}")
+        if store_backed and not high_signal_comments:
+            high_signal_comments = filter_high_signal_comments(all_comments)
 
     if not high_signal_comments:
         print("   ⚠️ No high-signal comments found. Falling back to top liked comments.")
@@ -781,19 +850,33 @@ def analyze_with_ai(ai_client, videos_data: list[dict], channel_name: str, compe
         print(f"   🔹 Batch {b_id}: Analyzing {len(b_comments)} comments...")
         return extract_batch_signals(ai_client, b_comments, channel_name, b_id, model_type, gemini_model, language)
     
-    with ThreadPoolExecutor(max_workers=5) as executor:
-        futures = {executor.submit(process_pain_batch, arg): arg for arg in batch_args}
-        for future in as_completed(futures):
+    failed_batches = []
+    
+    def extract_all_batches():
+        pools = get_task_pools()
+        futures = [pools.submit(WORKLOAD_IO, process_pain_batch, arg) for arg in batch_args]
+        for (_, b_id), future in zip(batch_args, futures):
             try:
                 result = future.result()
                 if result:
                     all_pain_results.append(result)
+                else:
+                    failed_batches.append(b_id)
             except Exception as e:
+                failed_batches.append(b_id)
                 print(f"   ⚠️ Batch analysis failed: {e}")
+        return all_pain_results
+    
+    # A run with failed batches continues on the partial list but is not checkpointed
+    all_pain_results = checkpoints.cached('ai:pain_points', [high_signal_comments, channel_name], extract_all_batches,
+                                          valid=lambda _: not failed_batches)
     
     # Cluster pain points
     print(f"\n📉 PHASE 2B: Clustering Pain Points...")
-    clustered = cluster_pain_points(ai_client, all_pain_results, channel_name, model_type, gemini_model, language)
+    clustered = checkpoints.cached(
+        'ai:clustering', [all_pain_results, channel_name],
+        lambda: cluster_pain_points(ai_client, all_pain_results, channel_name, model_type, gemini_model, language))
+    clustered = clustered or {"clustered_pain_points": []}
     pain_points = clustered.get('clustered_pain_points', [])
     print(f"   ✓ Found {len(pain_points)} distinct user struggles")
     
@@ -803,7 +886,10 @@ def analyze_with_ai(ai_client, videos_data: list[dict], channel_name: str, compe
     print(f"\n🔎 PHASE 3: Verifying Gaps Against Creator's Content...")
     print_progress(65, "Finding Gaps")
 
-    verified = verify_gaps_against_content(ai_client, pain_points, transcripts_summary, model_type, gemini_model, language)
+    verified = checkpoints.cached(
+        'ai:verification', [pain_points, transcripts_summary],
+        lambda: verify_gaps_against_content(ai_client, pain_points, transcripts_summary, model_type, gemini_model, language))
+    verified = verified or {"verified_gaps": []}
     verified_gaps = verified.get('verified_gaps', [])
     
     # Separate by status
@@ -820,7 +906,12 @@ def analyze_with_ai(ai_client, videos_data: list[dict], channel_name: str, compe
     # =========================================================
     actionable_gaps = true_gaps + under_explained
     
-    if actionable_gaps:
+    if actionable_gaps and not deadline.has(TRENDS_MIN_SECONDS):
+        deadline.skip('market_trends')
+        for gap in actionable_gaps:
+            gap['trend_score'] = 0
+            gap['trend_trajectory'] = 'UNKNOWN'
+    elif actionable_gaps:
         print(f"\n📈 PHASE 3.5: Checking Market Trends for {len(actionable_gaps)} opportunities...")
         
         # Initialize Market Intelligence
@@ -828,7 +919,8 @@ def analyze_with_ai(ai_client, videos_data: list[dict], channel_name: str, compe
         
         # Get keywords from gaps
         trend_keywords = [g.get('topic_keyword', '')[:50] for g in actionable_gaps[:12]]  # Check top 12
-        trends_data = market_intel.analyze_market_trends(trend_keywords)
+        trends_data = checkpoints.cached('ai:trends', [trend_keywords],
+                                         lambda: market_intel.analyze_market_trends(trend_keywords))
         
         # Enrich gaps with trend data
         for gap in actionable_gaps:
@@ -919,7 +1011,8 @@ OUTPUT JSON:
     }}
 }}
 """
-        final_result = call_ai_model(ai_client, title_prompt, model_type, gemini_model)
+        final_result = checkpoints.cached('ai:titles', [title_prompt],
+                                          lambda: call_ai_model(ai_client, title_prompt, model_type, gemini_model))
         
         # FALLBACK: Ensure top_opportunity is never empty
         if not final_result:
@@ -1030,30 +1123,102 @@ OUTPUT JSON:
     }
 
 
-def run_premium_analysis(
-    youtube, 
-    channel_id: str,
-    channel_name: str,
-    videos_data: list,
-    tier: str = "starter",
-    ai_client=None,
-    model_type: str = "gemini",
-    gemini_model: str = "gemini-2.0-flash",
-    results: dict = None,
-    niche: str = "General"
-) -> dict:
-    """
-    Run premium analysis modules based on subscription tier.
-    
-    Tier access:
-    - starter: CTR Prediction (basic), Thumbnail Optimizer (basic), 3 competitors
-    - pro: All starter + Views Forecasting, Content Clustering, Publish Time, 10 competitors
-    - enterprise: All pro + 100 competitors, advanced everything
-    """
-    print(f"\n🌟 Running Premium Analysis (Tier: {tier.upper()} | Optimized Parallel)...")
-    print_progress(78, "Premium Analysis")
+# Premium tier limits
+PREMIUM_TIER_LIMITS = {
+    'free': {
+        'video_count': 3,
+        'hook_video_count': 2,
+        'competitors': 0,
+        'advanced_thumbnail': False,
+        'thumbnail_vision': False,  # OCR/face thumbnail features (vision worker pool)
+        'views_forecast': False,
+        'clustering': False,
+        'publish_time': False,
+        'ml_predictor': False,
+        'max_gaps': 3,  # Top 3 gaps only for free tier
+        'max_comments': 100,  # Limited comment analysis
+    },
+    'starter': {
+        'video_count': 10,
+        'hook_video_count': 5,
+        'competitors': 3,  # Fixed: was 1, should be 3 per pricing plan
+        'advanced_thumbnail': False,
+        'thumbnail_vision': True,
+        'views_forecast': False,
+        'clustering': False,
+        'publish_time': True,
+        'ml_predictor': False,
+        'max_gaps': None,  # Unlimited
+        'max_comments': None,  # Unlimited
+    },
+    'pro': {
+        'video_count': 25,
+        'hook_video_count': 10,
+        'competitors': 10,  # Fixed: was 5, should be 10 per pricing plan
+        'advanced_thumbnail': True,
+        'thumbnail_vision': True,
+        'views_forecast': True,
+        'clustering': True,
+        'publish_time': True,
+        'ml_predictor': True,
+        'max_gaps': None,
+        'max_comments': None,
+    },
+    'enterprise': {
+        'video_count': 100,
+        'hook_video_count': 25,
+        'competitors': 100,
+        'advanced_thumbnail': True,
+        'thumbnail_vision': True,
+        'views_forecast': True,
+        'clustering': True,
+        'publish_time': True,
+        'ml_predictor': True,
+        'max_gaps': None,
+        'max_comments': None,
+    }
+}
+
+
+# Seconds that must remain before the job deadline to start optional work
+TRENDS_MIN_SECONDS = 90
+COLOR_MIN_SECONDS = 30
+OPTIONAL_STAGE_MIN_SECONDS = {
+    'competitor_videos': 60,
+    'premium:competitor_intel': 120,
+    'premium:hook_analysis': 90,
+}
+
+# Dominant workload of each premium task: 'io' tasks wait on APIs/LLMs,
+# 'cpu' tasks are bound by local computation (their heavy kernels run on
+# the shared process pool, see task_pools.py)
+PREMIUM_TASK_WORKLOAD = {
+    'ctr_prediction': WORKLOAD_CPU,
+    'thumbnail_analysis': WORKLOAD_IO,
+    'views_forecast': WORKLOAD_CPU,
+    'competitor_intel': WORKLOAD_IO,
+    'content_clusters': WORKLOAD_CPU,
+    'publish_times': WORKLOAD_CPU,
+    'hook_analysis': WORKLOAD_IO,
+    'satisfaction_signals': WORKLOAD_CPU,
+    'growth_patterns': WORKLOAD_CPU,
+}
+
+
+def get_tier_limits(tier: str, video_count: int) -> dict:
+    """Resolve premium limits for a tier, disabling modules that need more videos."""
+    limits = dict(PREMIUM_TIER_LIMITS.get(tier, PREMIUM_TIER_LIMITS['starter']))
     
-    premium_data = {
+    # Robustness checks
+    if video_count < 2:
+        if limits.get('views_forecast'): limits['views_forecast'] = False
+        if limits.get('clustering'): limits['clustering'] = False
+    return limits
+
+
+def empty_premium_data(tier: str) -> dict:
+    """Premium result skeleton; every module key starts as None."""
+    return {
         'tier': tier,
         'ctr_prediction': None,
         'thumbnail_analysis': None,
@@ -1067,97 +1232,63 @@ def run_premium_analysis(
         'satisfaction_signals': None,
         'growth_patterns': None,
     }
+
+
+def build_premium_tasks(
+    channel_id: str,
+    channel_name: str,
+    videos_data: list,
+    tier: str,
+    limits: dict,
+    ai_client=None,
+    gemini_model: str = "gemini-2.0-flash",
+    niche: str = "General",
+    pools=None,
+    deadline: Deadline = None,
+    comment_store=None
+) -> dict:
+    """
+    Build the independent premium tasks, keyed by their premium_data key.
+    Each task returns (key, result) and never raises. None of them need the
+    LLM gap analysis, so the pipeline can run them alongside it.
     
-    # Tier limits
-    TIER_LIMITS = {
-        'free': {
-            'video_count': 3,
-            'hook_video_count': 2,
-            'competitors': 0,
-            'advanced_thumbnail': False,
-            'views_forecast': False,
-            'clustering': False,
-            'publish_time': False,
-            'ml_predictor': False,
-            'max_gaps': 3,  # Top 3 gaps only for free tier
-            'max_comments': 100,  # Limited comment analysis
-        },
-        'starter': {
-            'video_count': 10,
-            'hook_video_count': 5,
-            'competitors': 3,  # Fixed: was 1, should be 3 per pricing plan
-            'advanced_thumbnail': False,
-            'views_forecast': False,
-            'clustering': False,
-            'publish_time': True,
-            'ml_predictor': False,
-            'max_gaps': None,  # Unlimited
-            'max_comments': None,  # Unlimited
-        },
-        'pro': {
-            'video_count': 25,
-            'hook_video_count': 10,
-            'competitors': 10,  # Fixed: was 5, should be 10 per pricing plan
-            'advanced_thumbnail': True,
-            'views_forecast': True,
-            'clustering': True,
-            'publish_time': True,
-            'ml_predictor': True,
-            'max_gaps': None,
-            'max_comments': None,
-        },
-        'enterprise': {
-            'video_count': 100,
-            'hook_video_count': 25,
-            'competitors': 100,
-            'advanced_thumbnail': True,
-            'views_forecast': True,
-            'clustering': True,
-            'publish_time': True,
-            'ml_predictor': True,
-            'max_gaps': None,
-            'max_comments': None,
-        }
-    }
-    limits = TIER_LIMITS.get(tier, TIER_LIMITS['starter'])
+    Sub-work goes to the shared I/O / CPU pools instead of nested pools.
+    With a comment_store holding every video, satisfaction reads its
+    comment columns from the store.
+    """
+    pools = pools or get_task_pools()
+    deadline = deadline or Deadline()
     
-    # Robustness checks
-    if len(videos_data) < 2:
-        if limits.get('views_forecast'): limits['views_forecast'] = False
-        if limits.get('clustering'): limits['clustering'] = False
-
     # --- Task Definitions for Parallel Execution ---
 
     def task_ctr():
         try:
             print("   📊 [Parallel] Running CTR Prediction...")
             ctr_predictor = CTRPredictor()
-            # Disable face detection to prevent crashes on Mac
-            thumbnail_extractor = ThumbnailFeatureExtractor(use_ocr=False, use_face_detection=False)
             ctr_results = []
             
-            def process_ctr(video):
-                v_info = video.get('video_info', {})
-                v_id = v_info.get('video_id', '')
-                url = v_info.get('thumbnail_url') or f"https://img.youtube.com/vi/{v_id}/maxresdefault.jpg"
+            infos = [v.get('video_info', {}) for v in videos_data[:5]]
+            urls = [vi.get('thumbnail_url') or f"https://img.youtube.com/vi/{vi.get('video_id', '')}/maxresdefault.jpg" for vi in infos]
+            # Downloads on the shared I/O pool overlap with features on the shared CPU pool
+            # Paid tiers get the full level (OCR/mediapipe on the vision worker pool);
+            # free gets the standard level (Haar faces, edge-based text)
+            level = 'full' if limits.get('thumbnail_vision', False) else 'standard'
+            batch = ThumbnailFeatureExtractor(level=level).extract_batch(
+                urls, pools=pools, video_ids=[vi.get('video_id') for vi in infos])
+            
+            for v_info, features in zip(infos, batch.features):
                 try:
-                    feat = thumbnail_extractor.extract_from_url(url)
-                    pred = ctr_predictor.predict(feat.to_dict(), v_info.get('title', ''))
-                    return {
+                    feat = features.to_dict()
+                    pred = ctr_predictor.predict(feat, v_info.get('title', ''))
+                    ctr_results.append({
                         'video_title': v_info.get('title', ''),
                         'predicted_ctr': pred.predicted_ctr,
                         'confidence': pred.confidence,
                         'positive_factors': pred.top_positive_factors[:3],
                         'negative_factors': pred.top_negative_factors[:3],
                         'suggestions': pred.improvement_suggestions[:3]
-                    }
-                except: return None
-
-            with ThreadPoolExecutor(max_workers=4) as executor:
-                futures = [executor.submit(process_ctr, v) for v in videos_data[:5]]
-                for f in as_completed(futures):
-                    res = f.result()
-                    if res: ctr_results.append(res)
+                    })
+                except: continue
             
             if ctr_results:
                 avg = sum(r['predicted_ctr'] for r in ctr_results) / len(ctr_results)
@@ -1259,25 +1390,34 @@ def run_premium_analysis(
                 cache = get_competitor_cache()
             except: cache = None
             analyzer = CompetitorAnalyzer()
-            disc = analyzer.discover_competitors(channel_id, search_terms=[channel_name], max_competitors=limits['competitors'])
+            snapshots = get_channel_snapshot_cache()
+            # Discovery (search API) and deep-dives are shared across jobs in the same niche;
+            # discovery returns [] on search/quota errors, which must not be cached for 6h
+            disc = snapshots.get_or_fetch(
+                'competitor', f"discover:{channel_id}:{limits['competitors']}",
+                lambda: analyzer.discover_competitors(channel_id, search_terms=[channel_name], max_competitors=limits['competitors']),
+                cache_if=bool)
             insights, hits, to_analyze = [], 0, []
             for cid in disc[:limits['competitors']]:
                 cached = cache.get(cid) if cache else None
                 if cached: insights.append(cached); hits += 1
                 else: to_analyze.append(cid)
             def proc(cid):
-                try:
+                # Deep-dive is truncated once the job deadline passes
+                if deadline.expired(): return None
+                def analyze():
                     ins = analyzer.analyze_competitor(cid, video_limit=10)
-                    data = {'channel_name': ins.channel_name, 'subscriber_count': ins.subscriber_count, 'avg_views': int(ins.avg_views_per_video), 'avg_engagement': round(ins.avg_engagement_rate, 2), 'upload_frequency_days': round(ins.upload_frequency_days, 1), 'top_formats': ins.top_formats[:3], 'posting_days': ins.posting_day_pattern[:3]}
+                    return {'channel_name': ins.channel_name, 'subscriber_count': ins.subscriber_count, 'avg_views': int(ins.avg_views_per_video), 'avg_engagement': round(ins.avg_engagement_rate, 2), 'upload_frequency_days': round(ins.upload_frequency_days, 1), 'top_formats': ins.top_formats[:3], 'posting_days': ins.posting_day_pattern[:3]}
+                try:
+                    data = snapshots.get_or_fetch('competitor', cid, analyze)
                     if cache: cache.set(cid, data)
                     return data
                 except: return None
             if to_analyze:
-                with ThreadPoolExecutor(max_workers=5) as executor:
-                    futures = [executor.submit(proc, cid) for cid in to_analyze]
-                    for f in as_completed(futures):
-                        res = f.result()
-                        if res: insights.append(res)
+                for res in pools.map(WORKLOAD_IO, proc, to_analyze):
+                    if res: insights.append(res)
+                if deadline.expired():
+                    deadline.skip('competitor_intel', 'deadline (truncated)')
             return 'competitor_intel', {'competitors_tracked': len(insights), 'max_allowed': limits['competitors'], 'competitors': insights, 'cache_hits': hits}
         except Exception as e: print(f"   ⚠️ Competitor Task failed: {e}")
         return 'competitor_intel', None
@@ -1286,7 +1426,6 @@ def run_premium_analysis(
         if not limits['clustering']: return 'content_clusters', None
         try:
             print("   🧩 [Parallel] Running Content Clustering...")
-            clusterer = ContentClusteringEngine(use_embeddings=False)
             cvideos, tv, cv = [], 0, 0
             for v in videos_data:
                 vi = v.get('video_info', {})
@@ -1295,7 +1434,7 @@ def run_premium_analysis(
                 if v_views > 0: tv += v_views; cv += 1
                 cvideos.append({'title': vi.get('title', ''), 'view_count': v_views, 'engagement_rate': round(er, 2)})
             avg = tv / cv if cv > 0 else 10000
-            res = clusterer.cluster_channel_content(cvideos, n_clusters=min(5, max(2, len(cvideos)//2)))
+            res = pools.submit(WORKLOAD_CPU, cluster_content, cvideos, min(5, max(2, len(cvideos)//2))).result()
             processed = []
             for c in res.clusters:
                 d = c.to_dict()
@@ -1320,8 +1459,11 @@ def run_premium_analysis(
         if tier not in ['pro', 'enterprise']: return 'hook_analysis', None
         try:
             print("   🎣 [Parallel] Running Hook Analysis...")
-            analyzer = HookAnalyzer()
-            h_v = [{'video_id': v.get('video_info', {}).get('video_id', ''), 'title': v.get('video_info', {}).get('title', ''), 'view_count': v.get('video_info', {}).get('view_count') or 0, 'transcript': v.get('transcript', '')[:1000]} for v in videos_data[:10]]
+            # Hooks are sliced from the captions ingest already fetched (no re-download)
+            store = get_transcript_store()
+            store.add_videos(videos_data)
+            analyzer = HookAnalyzer(transcript_store=store)
+            h_v = [{'video_id': v.get('video_info', {}).get('video_id') or v.get('video_info', {}).get('id', ''), 'title': v.get('video_info', {}).get('title', ''), 'view_count': v.get('video_info', {}).get('view_count') or 0} for v in videos_data[:10]]
             res = analyzer.analyze_videos(h_v, max_videos=10)
             ins = analyzer.generate_insights(res)
             return 'hook_analysis', {'videos_analyzed': ins.total_videos, 'avg_hook_score': ins.avg_hook_score, 'best_patterns': ins.best_patterns[:5], 'recommendations': ins.recommended_hooks, 'top_hooks': ins.top_performing_hooks[:3], 'pattern_performance': ins.pattern_performance}
@@ -1333,7 +1475,13 @@ def run_premium_analysis(
             print("   😊 [Parallel] Analyzing Satisfaction Signals...")
             analyzer = SatisfactionAnalyzer()
             avg_e = sum([v.get('engagement_rate', 0) for v in videos_data if v.get('engagement_rate')]) / len(videos_data) if videos_data else 5.0
-            res = analyzer.analyze_satisfaction(videos_data, channel_engagement_rate=avg_e)
+            video_ids = job_video_ids(videos_data)
+            if comment_store is not None and comment_store.has_job_videos(channel_id, video_ids):
+                stats = {vid: {'view_count': v['video_info'].get('view_count', 0), 'like_count': v['video_info'].get('like_count', 0)}
+                         for vid, v in zip(video_ids, videos_data)}
+                res = analyzer.analyze_from_store(comment_store, [channel_id], video_ids, video_stats=stats, channel_engagement_rate=avg_e)
+            else:
+                res = analyzer.analyze_satisfaction(videos_data, channel_engagement_rate=avg_e)
             return 'satisfaction_signals', {'satisfaction_index': res.satisfaction_index, 'engagement_quality': res.engagement_quality_score, 'retention_proxy': res.retention_proxy_score, 'implementation_success': res.implementation_success_score, 'success_comments': res.success_comment_count, 'confusion_signals': res.confusion_signal_count, 'return_viewer_ratio': res.return_viewer_ratio, 'clarity_score': res.clarity_score, 'top_success': res.top_success_comments[:3], 'top_confusion': res.top_confusion_comments[:3], 'recommendations': res.recommendations}
         except Exception as e: print(f"   ⚠️ Satisfaction Task failed: {e}")
         return 'satisfaction_signals', None
@@ -1348,25 +1496,40 @@ def run_premium_analysis(
         except Exception as e: print(f"   ⚠️ Growth Task failed: {e}")
         return 'growth_patterns', None
 
-    # --- Execute Parallel Tasks ---
-    funcs = [task_ctr, task_thumbnail, task_views, task_competitor, task_clustering, task_publish, task_hook, task_satisfaction, task_growth]
-    completed_count = 0
-    total_tasks = len(funcs)
-    with ThreadPoolExecutor(max_workers=3) as master:
-        mfutures = [master.submit(f) for f in funcs]
-        for f in as_completed(mfutures):
-            k, v = f.result()
-            if k: premium_data[k] = v
-            completed_count += 1
-            # Update progress as tasks complete (78% to 88%)
-            progress = 78 + int((completed_count / total_tasks) * 10)
-            print_progress(progress, f"Analyzing ({completed_count}/{total_tasks})")
-
-    # --- Sequential Tasks ---
+    return {
+        'ctr_prediction': task_ctr,
+        'thumbnail_analysis': task_thumbnail,
+        'views_forecast': task_views,
+        'competitor_intel': task_competitor,
+        'content_clusters': task_clustering,
+        'publish_times': task_publish,
+        'hook_analysis': task_hook,
+        'satisfaction_signals': task_satisfaction,
+        'growth_patterns': task_growth,
+    }
+
+
+def finalize_premium_analysis(
+    premium_data: dict,
+    videos_data: list,
+    tier: str,
+    limits: dict,
+    results: dict = None,
+    niche: str = "General",
+    deadline: Deadline = None
+) -> dict:
+    """
+    Sequential premium steps that depend on other results:
+    Color ML (thumbnail analysis), optimization scoring (gap analysis) and charts.
+    Color ML is optional and skipped when the deadline is close.
+    """
+    deadline = deadline or Deadline()
     print_progress(88, "Advanced Analysis")
     
     # 1. Color ML (depends on thumbnail analysis)
-    if tier in ['pro', 'enterprise'] and premium_data.get('thumbnail_analysis'):
+    if tier in ['pro', 'enterprise'] and premium_data.get('thumbnail_analysis') and not deadline.has(COLOR_MIN_SECONDS):
+        deadline.skip('color_insights')
+    elif tier in ['pro', 'enterprise'] and premium_data.get('thumbnail_analysis'):
         try:
             print("   🎨 Running Color ML Analysis...")
             color_analyzer = ColorMLAnalyzer()
@@ -1430,7 +1593,6 @@ def run_premium_analysis(
     return premium_data
 
 
-
 def generate_report(output_path: Path, channel_name: str, videos_data: list, analysis: dict, is_sample: bool = False, niche: str = "General"):
     """Generate the analytical GAP_REPORT.md file with verified gaps."""
     
@@ -1621,6 +1783,317 @@ def generate_report(output_path: Path, channel_name: str, videos_data: list, ana
 
 
 
+def ingest_videos(videos: list, youtube_api_key: str, args) -> tuple:
+    """
+    Fetch captions/comments for the latest videos.
+    Returns (videos_data, caption_report); videos_data holds compact VideoRecords.
+    """
+    # Step 4: SMART PROCESSING - Comments from all videos, transcription from 5 only
+    # This is ~4x faster: transcription is slow, comments are fast (just API calls)
+    TRANSCRIBE_COUNT = 5  # Videos to fully process (download + transcribe)
+    
+    from ingest_manager import fetch_all_comments, extract_video_id, AsyncCaptionFetcher
+    
+    videos_data = []
+    
+    # Tier-based comment limits (Quick Win Phase 2)
+    COMMENT_LIMITS = {
+        'starter': 150,
+        'pro': 300,
+        'enterprise': 500
+    }
+    comment_limit = COMMENT_LIMITS.get(args.tier, 500)
+    
+    # Split videos: first 5 get full processing, rest get comments-only
+    videos_to_transcribe = videos[:TRANSCRIBE_COUNT]
+    videos_comments_only = videos[TRANSCRIBE_COUNT:]
+    
+    print(f"\n⚙️ Smart Processing Mode:")
+    print(f"   📝 Full analysis: {len(videos_to_transcribe)} videos (with transcription)")
+    print(f"   💬 Comments-only: {len(videos_comments_only)} videos (fast)")
+    
+    # 1. Process videos that need transcription (parallel, 3 workers)
+    caption_report = None
+    if videos_to_transcribe:
+        print(f"\n🎙️ Transcribing {len(videos_to_transcribe)} videos...")
+        # One fetcher per job: global caption concurrency + shared 429 backoff
+        caption_fetcher = AsyncCaptionFetcher(language=args.language)
+        
+        # Opt-in: local Whisper pool, used only for videos without captions
+        transcription_pool = None
+        if args.local_transcription != 'off':
+            from transcription_pool import WhisperPool
+            transcription_pool = WhisperPool(
+                model_name=args.model,
+                max_minutes=args.hook_minutes if args.local_transcription == 'hooks' else None
+            )
+        
+        def process_single_video(video_tuple):
+            idx, video = video_tuple
+            try:
+                result = process_video(
+                    video['url'], 
+                    youtube_api_key, 
+                    model_name=args.model,
+                    verbose=False,
+                    max_comments=comment_limit,
+                    language=args.language,
+                    caption_fetcher=caption_fetcher,
+                    transcription_pool=transcription_pool
+                )
+                return idx, result, None
+            except Exception as e:
+                return idx, None, str(e)
+        
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            futures = {executor.submit(process_single_video, (i, v)): i for i, v in enumerate(videos_to_transcribe, 1)}
+            
+            completed = 0
+            for future in as_completed(futures):
+                completed += 1
+                idx, result, error = future.result()
+                if result:
+                    # Transcript stays in the ingest cache; comments go columnar
+                    videos_data.append(VideoRecord.from_ingest(result))
+                    print(f"   ✓ [{completed}/{len(videos_to_transcribe)}] {videos_to_transcribe[idx-1]['title'][:35]}...")
+                else:
+                    if error:
+                        print(f"   ⚠️ [{completed}/{len(videos_to_transcribe)}] Failed: {error[:40]}...")
+                    else:
+                        print(f"   ℹ️ [{completed}/{len(videos_to_transcribe)}] Skipped (no captions)")
+        
+        caption_fetcher.close()
+        caption_report = caption_fetcher.report()
+        if transcription_pool is not None:
+            transcription_pool.close()
+            caption_report['local_transcription'] = transcription_pool.report()
+            lt = caption_report['local_transcription']
+            print(f"   🎙️ Local transcription: {lt['transcribed']} videos, "
+                  f"{lt['cpu_seconds']:.0f}/{lt['cpu_budget_seconds']:.0f} CPU-s, {lt['skipped_budget']} skipped (budget)")
+        print(f"   📑 Captions: {caption_report['ok']} ok, {caption_report['no_captions']} missing, "
+              f"{caption_report['throttled']} throttled, {caption_report['errors']} errors "
+              f"(p50 {caption_report['latency_p50_ms']:.0f}ms, p95 {caption_report['latency_p95_ms']:.0f}ms, "
+              f"{caption_report['retries']} retries)")
+    
+    # 2. Fetch comments from remaining videos (parallel, 5 workers - faster)
+    if videos_comments_only:
+        print(f"\n💬 Fetching comments from {len(videos_comments_only)} additional videos...")
+        
+        def fetch_comments_only(video_tuple):
+            idx, video = video_tuple
+            try:
+                video_id = video.get('video_id') or extract_video_id(video['url'])
+                comments = fetch_all_comments(video_id, youtube_api_key, max_comments=comment_limit)
+                # Create minimal video data structure (no transcript) with full metadata
+                result = {
+                    'video_info': {
+                        'id': video_id,
+                        'video_id': video_id,  # Add both for compatibility
+                        'title': video['title'],
+                        'url': video['url'],
+                        'view_count': video.get('view_count', 0),
+                        'like_count': video.get('like_count', 0),
+                        'thumbnail_url': video.get('thumbnail_url'),
+                        'upload_date': video.get('upload_date', ''),
+                        'published_at': video.get('published_at', ''),
+                    },
+                    'transcript': '',  # Empty - no transcription
+                    'transcript_segments': [],
+                    'comments': comments,
+                }
+                return idx, result, None
+            except Exception as e:
+                return idx, None, str(e)
+        
+        with ThreadPoolExecutor(max_workers=6) as executor:
+            futures = {executor.submit(fetch_comments_only, (i, v)): i for i, v in enumerate(videos_comments_only, 1)}
+            
+            completed = 0
+            for future in as_completed(futures):
+                completed += 1
+                idx, result, error = future.result()
+                if result:
+                    videos_data.append(VideoRecord.from_ingest(result))
+                    print(f"   ✓ [{completed}/{len(videos_comments_only)}] {videos_comments_only[idx-1]['title'][:35]}... ({len(result['comments'])} comments)")
+                else:
+                    print(f"   ⚠️ [{completed}/{len(videos_comments_only)}] Failed: {error[:40]}...")
+    
+    if not videos_data:
+        # Runs as a DAG stage thread: raise so the pipeline fails the job (sys.exit would only end the thread)
+        print(f"   This may be due to YouTube rate limiting. Try again in a few minutes.")
+        raise PipelineError(f"No videos could be processed ({len(videos)} attempted)")
+    
+    # Report on processing
+    transcribed = len([v for v in videos_data if v.transcript_chars])
+    comments_only = len(videos_data) - transcribed
+    print(f"\n✅ Processed {len(videos_data)} videos ({transcribed} transcribed, {comments_only} comments-only)")
+    
+    return videos_data, caption_report
+
+
+def restore_ingest_checkpoint(out: dict):
+    """Rebuild VideoRecords from an ingest checkpoint; None (re-run ingest) if a transcript cache file is gone."""
+    try:
+        return {**out, 'videos_data': compact_videos_data(out.get('videos_data'))}
+    except TranscriptCacheMissing as e:
+        print(f"   ⚠️ Ingest checkpoint is stale ({e}); re-running ingest")
+        return None
+
+
+def build_analysis_pipeline(args, youtube, youtube_api_key: str, ai_client, checkpoints: CheckpointStore = None,
+                            deadline: Deadline = None) -> PipelineDAG:
+    """
+    Express the analysis as a DAG of stages with declared inputs/outputs.
+    
+    Overlap:
+    - --competitors fetch and premium competitor discovery run during ingest
+    - Metadata-only premium tasks run alongside the LLM gap analysis
+    - Only the premium finalize step (color ML, scoring, charts) waits for both
+    
+    Stages with JSON outputs are checkpointed (run with dag.run(checkpoints=...)),
+    so a requeued job resumes after the last completed stage.
+    
+    Competitor fetches and premium modules are optional: with a deadline they
+    are skipped/abandoned when time runs out instead of failing the job.
+    """
+    deadline = deadline or Deadline()
+    # Channel / playlist / video list lookups are shared with concurrent jobs
+    snapshots = get_channel_snapshot_cache()
+    dag = PipelineDAG(max_workers=int(os.getenv('PIPELINE_MAX_WORKERS', 4)),
+                      io_workers=int(os.getenv('PIPELINE_IO_WORKERS', 8)))
+    
+    def stage_channel():
+        # Step 1: Find channel
+        print(f"\n📺 Looking up channel: {args.channel}")
+        channel_id, channel_name = snapshots.get_or_fetch(
+            'channel', handle_key(args.channel), lambda: get_channel_id(youtube, args.channel))
+        print(f"   ✓ Found: {channel_name}")
+        print_progress(10, "Initializing")
+        return {'channel_id': channel_id, 'channel_name': channel_name}
+    
+    def stage_videos(channel_id):
+        # Step 2: Get uploads playlist
+        uploads_playlist = snapshots.get_or_fetch(
+            'playlist', channel_id, lambda: get_uploads_playlist_id(youtube, channel_id))
+        
+        # Step 3: Get latest N videos
+        shorts_text = " (excluding Shorts)" if args.skip_shorts else ""
+        print(f"\n📋 Fetching last {args.videos} videos{shorts_text}...")
+        print_progress(25, "Fetching Videos")
+        
+        videos = snapshots.get_or_fetch(
+            'videos', f"{uploads_playlist}:{args.videos}:{int(args.skip_shorts)}",
+            lambda: get_latest_videos(youtube, uploads_playlist, args.videos, skip_shorts=args.skip_shorts),
+            cache_if=bool)  # [] on an API error: retry next time
+        for v in videos:
+            duration_mins = v.get('duration_seconds', 0) // 60
+            print(f"   • {v['title'][:45]}... ({duration_mins}m)")
+        return {'videos': videos}
+    
+    def stage_ingest(videos):
+        # Step 4: Captions + comments
+        videos_data, caption_report = ingest_videos(videos, youtube_api_key, args)
+        return {'videos_data': videos_data, 'caption_report': caption_report}
+    
+    def stage_comment_store(channel_id, videos_data):
+        # Persist comments to the columnar store for cross-job analytics
+        comment_store = get_comment_store()
+        if comment_store.enabled:
+            stored = comment_store.write_job_comments(channel_id, videos_data)
+            print(f"   🗄️ Comment store: {stored}/{len(videos_data)} videos written")
+        return {'comment_store': comment_store}
+    
+    def stage_competitor_videos():
+        # Step 4.5: Competitor Analysis (Step 8) - independent of our own videos
+        competitors_data = {}
+        if args.competitors:
+            competitors_data = fetch_competitor_videos(youtube, args.competitors)
+        return {'competitors_data': competitors_data}
+    
+    def stage_ai_analysis(channel_id, channel_name, videos_data, competitors_data, comment_store):
+        # Step 5: AI Analysis
+        print(f"\n🧠 Running AI gap analysis...")
+        analysis = analyze_with_ai(ai_client, videos_data, channel_name, competitors_data or {}, model_type=args.ai, gemini_model=args.gemini_model, language=args.language, comment_store=comment_store, channel_id=channel_id, checkpoints=checkpoints, deadline=deadline)
+        return {'analysis': analysis}
+    
+    def premium_stage(key):
+        def run(channel_id, channel_name, videos_data=None, comment_store=None):
+            videos_data = videos_data or []
+            limits = get_tier_limits(args.tier, len(videos_data))
+            tasks = build_premium_tasks(channel_id, channel_name, videos_data, args.tier, limits,
+                                        ai_client=ai_client, gemini_model=args.gemini_model, niche=args.niche,
+                                        deadline=deadline, comment_store=comment_store)
+            _, result = tasks[key]()
+            return {f'premium_{key}': result}
+        return run
+    
+    def stage_premium_finalize(videos_data, analysis, **premium_results):
+        # Step 5.5: Premium steps that need the gap analysis / other modules
+        premium_data = empty_premium_data(args.tier)
+        for name, result in premium_results.items():
+            premium_data[name[len('premium_'):]] = result
+        limits = get_tier_limits(args.tier, len(videos_data))
+        premium_data = finalize_premium_analysis(premium_data, videos_data, args.tier, limits,
+                                                 results=analysis, niche=args.niche, deadline=deadline)
+        return {'premium_data': premium_data}
+    
+    dag.add('channel', stage_channel, outputs=('channel_id', 'channel_name'),
+            workload=WORKLOAD_IO, checkpoint=True)
+    dag.add('videos', stage_videos, inputs=('channel_id',), outputs=('videos',),
+            workload=WORKLOAD_IO, checkpoint=True)
+    dag.add('ingest', stage_ingest, inputs=('videos',), outputs=('videos_data', 'caption_report'),
+            workload=WORKLOAD_IO, checkpoint=True,
+            restore=restore_ingest_checkpoint)
+    dag.add('comment_store', stage_comment_store, inputs=('channel_id', 'videos_data'),
+            outputs=('comment_store',), workload=WORKLOAD_IO)
+    dag.add('competitor_videos', stage_competitor_videos, outputs=('competitors_data',),
+            workload=WORKLOAD_IO, checkpoint=True, optional=True,
+            min_seconds=OPTIONAL_STAGE_MIN_SECONDS['competitor_videos'])
+    dag.add('ai_analysis', stage_ai_analysis,
+            inputs=('channel_id', 'channel_name', 'videos_data', 'competitors_data', 'comment_store'),
+            outputs=('analysis',), workload=WORKLOAD_IO, checkpoint=True)
+    
+    # Competitor discovery only needs the channel, so it starts during ingest
+    dag.add('premium:competitor_intel', premium_stage('competitor_intel'),
+            inputs=('channel_id', 'channel_name'), outputs=('premium_competitor_intel',),
+            workload=PREMIUM_TASK_WORKLOAD['competitor_intel'], checkpoint=True, optional=True,
+            min_seconds=OPTIONAL_STAGE_MIN_SECONDS['premium:competitor_intel'])
+    premium_outputs = ['premium_competitor_intel']
+    for key in ['publish_times', 'growth_patterns', 'content_clusters', 'views_forecast',
+                'ctr_prediction', 'thumbnail_analysis', 'hook_analysis', 'satisfaction_signals']:
+        # Satisfaction reads its comment columns from the store
+        store_input = ('comment_store',) if key == 'satisfaction_signals' else ()
+        dag.add(f'premium:{key}', premium_stage(key),
+                inputs=('channel_id', 'channel_name', 'videos_data', *store_input), outputs=(f'premium_{key}',),
+                workload=PREMIUM_TASK_WORKLOAD[key], checkpoint=True, optional=True,
+                min_seconds=OPTIONAL_STAGE_MIN_SECONDS.get(f'premium:{key}', 0))
+        premium_outputs.append(f'premium_{key}')
+    
+    dag.add('premium:finalize', stage_premium_finalize,
+            inputs=('videos_data', 'analysis', *premium_outputs), outputs=('premium_data',),
+            checkpoint=True)
+    return dag
+
+
+def emit_job_metrics(dag: PipelineDAG = None, checkpoints: CheckpointStore = None):
+    """Print this job's metrics as the __METRICS__ line (stage durations, caches, LLM, quota)."""
+    try:
+        if dag is not None:
+            for t in dag.trace_report():
+                STAGE_DURATION.observe(t['duration_s'], stage=t['stage'], status=t['status'])
+        record_cache_stats('channel_snapshot', get_channel_snapshot_cache().stats())
+        thumbnails = get_thumbnail_cache().stats()
+        record_cache_stats('thumbnail_image', thumbnails)
+        record_cache_stats('thumbnail_features', {'hits': thumbnails['feature_hits'],
+                                                  'misses': thumbnails['feature_misses']})
+        record_cache_stats('thumbnail_index', get_thumbnail_index().stats())
+        if checkpoints is not None:
+            record_cache_stats('checkpoint', checkpoints.stats())
+        print(get_registry().dump_line())
+    except Exception as e:
+        print(f"⚠️ Metrics export failed: {e}")
+
+
 def main():
     import sys
     print(f"DEBUG ARGV: {sys.argv}")
@@ -1654,6 +2127,22 @@ Examples:
     parser.add_argument('--language', default='en', choices=['en', 'de', 'fr', 'it', 'es'],
                         help='Report language: en, de, fr, it, es (default: en)')
     parser.add_argument('--niche', default='General', help='Niche for strategy guidelines (e.g. Gaming, Finance, Tech)')
+    parser.add_argument('--local-transcription', default='off', choices=['off', 'hooks', 'full'],
+                        help='Transcribe caption-less videos locally with Whisper: off (default), '
+                             'hooks (first --hook-minutes only) or full')
+    parser.add_argument('--hook-minutes', type=float, default=2,
+                        help='Minutes of audio to transcribe in hooks mode (default: 2)')
+    parser.add_argument('--deadline', type=float, default=None,
+                        help='Unix timestamp by which the report must be written; optional sections '
+                             'are skipped as it approaches (set by the server from JOB_TIMEOUT_SECONDS)')
+    parser.add_argument('--profile', action='store_true',
+                        help='Record per-stage wall/CPU time, memory and HTTP calls as pipeline_timings '
+                             '(also enabled by PIPELINE_PROFILE=1)')
+    parser.add_argument('--output-dir', metavar='DIR',
+                        help='Directory for analysis_result.json and the markdown report '
+                             '(default: analysis_result.json next to this script, report in data/)')
+    parser.add_argument('--profile-trace', metavar='PATH',
+                        help='Write the stage profile as Chrome trace JSON (implies --profile)')
     
     args = parser.parse_args()
     
@@ -1694,9 +2183,9 @@ Examples:
     elif args.ai == 'local':
         # No client needed for requests, but we verify connection
         try:
-            resp = requests.get('http://localhost:11434/')
+            resp = requests.get(f'{OLLAMA_URL}/')
             if resp.status_code != 200:
-                 print("❌ Ollama not responding at localhost:11434. Run 'ollama serve'")
+                 print(f"❌ Ollama not responding at {OLLAMA_URL}. Run 'ollama serve'")
                  sys.exit(1)
             ai_client = "local_requests" # Placeholder
         except Exception:
@@ -1706,8 +2195,10 @@ Examples:
     print(f"\n🔍 Channel Gap Analyzer (AI: {args.ai.upper()})")
     print(f"="*50)
     
+    dag = None
     try:
         # Initialize APIs
+        meter_youtube_quota()
         youtube = build('youtube', 'v3', developerKey=youtube_api_key)
         
         if args.sample:
@@ -1716,146 +2207,30 @@ Examples:
             args.videos = 3
             args.skip_shorts = True  # Better quality for samples
         
-        # Step 1: Find channel
-        print(f"\n📺 Looking up channel: {args.channel}")
-        channel_id, channel_name = get_channel_id(youtube, args.channel)
-        print(f"   ✓ Found: {channel_name}")
-        print_progress(10, "Initializing")
-
-        
-        # Step 2: Get uploads playlist
-        uploads_playlist = get_uploads_playlist_id(youtube, channel_id)
-        
-        # Step 3: Get latest N videos
-        shorts_text = " (excluding Shorts)" if args.skip_shorts else ""
-        print(f"\n📋 Fetching last {args.videos} videos{shorts_text}...")
-        print_progress(25, "Fetching Videos")
-
-        videos = get_latest_videos(youtube, uploads_playlist, args.videos, skip_shorts=args.skip_shorts)
-        for v in videos:
-            duration_mins = v.get('duration_seconds', 0) // 60
-            print(f"   • {v['title'][:45]}... ({duration_mins}m)")
-        
-        # Step 4: SMART PROCESSING - Comments from all videos, transcription from 5 only
-        # This is ~4x faster: transcription is slow, comments are fast (just API calls)
-        TRANSCRIBE_COUNT = 5  # Videos to fully process (download + transcribe)
-        
-        from concurrent.futures import ThreadPoolExecutor, as_completed
-        from ingest_manager import fetch_all_comments, extract_video_id
-        
-        videos_data = []
-        
-        # Tier-based comment limits (Quick Win Phase 2)
-        COMMENT_LIMITS = {
-            'starter': 150,
-            'pro': 300,
-            'enterprise': 500
-        }
-        comment_limit = COMMENT_LIMITS.get(args.tier, 500)
-        
-        # Split videos: first 5 get full processing, rest get comments-only
-        videos_to_transcribe = videos[:TRANSCRIBE_COUNT]
-        videos_comments_only = videos[TRANSCRIBE_COUNT:]
-        
-        print(f"\n⚙️ Smart Processing Mode:")
-        print(f"   📝 Full analysis: {len(videos_to_transcribe)} videos (with transcription)")
-        print(f"   💬 Comments-only: {len(videos_comments_only)} videos (fast)")
-        
-        # 1. Process videos that need transcription (parallel, 3 workers)
-        if videos_to_transcribe:
-            print(f"\n🎙️ Transcribing {len(videos_to_transcribe)} videos...")
-            
-            def process_single_video(video_tuple):
-                idx, video = video_tuple
-                try:
-                    result = process_video(
-                        video['url'], 
-                        youtube_api_key, 
-                        model_name=args.model,
-                        verbose=False,
-                        max_comments=comment_limit
-                    )
-                    return idx, result, None
-                except Exception as e:
-                    return idx, None, str(e)
-            
-            with ThreadPoolExecutor(max_workers=4) as executor:
-                futures = {executor.submit(process_single_video, (i, v)): i for i, v in enumerate(videos_to_transcribe, 1)}
-                
-                completed = 0
-                for future in as_completed(futures):
-                    completed += 1
-                    idx, result, error = future.result()
-                    if result:
-                        videos_data.append(result)
-                        print(f"   ✓ [{completed}/{len(videos_to_transcribe)}] {videos_to_transcribe[idx-1]['title'][:35]}...")
-                    else:
-                        if error:
-                            print(f"   ⚠️ [{completed}/{len(videos_to_transcribe)}] Failed: {error[:40]}...")
-                        else:
-                            print(f"   ℹ️ [{completed}/{len(videos_to_transcribe)}] Skipped (no captions)")
-        
-        # 2. Fetch comments from remaining videos (parallel, 5 workers - faster)
-        if videos_comments_only:
-            print(f"\n💬 Fetching comments from {len(videos_comments_only)} additional videos...")
-            
-            def fetch_comments_only(video_tuple):
-                idx, video = video_tuple
-                try:
-                    video_id = video.get('video_id') or extract_video_id(video['url'])
-                    comments = fetch_all_comments(video_id, youtube_api_key, max_comments=comment_limit)
-                    # Create minimal video data structure (no transcript) with full metadata
-                    result = {
-                        'video_info': {
-                            'id': video_id,
-                            'video_id': video_id,  # Add both for compatibility
-                            'title': video['title'],
-                            'url': video['url'],
-                            'view_count': video.get('view_count', 0),
-                            'like_count': video.get('like_count', 0),
-                            'thumbnail_url': video.get('thumbnail_url'),
-                            'upload_date': video.get('upload_date', ''),
-                            'published_at': video.get('published_at', ''),
-                        },
-                        'transcript': '',  # Empty - no transcription
-                        'transcript_segments': [],
-                        'comments': comments,
-                    }
-                    return idx, result, None
-                except Exception as e:
-                    return idx, None, str(e)
-            
-            with ThreadPoolExecutor(max_workers=6) as executor:
-                futures = {executor.submit(fetch_comments_only, (i, v)): i for i, v in enumerate(videos_comments_only, 1)}
-                
-                completed = 0
-                for future in as_completed(futures):
-                    completed += 1
-                    idx, result, error = future.result()
-                    if result:
-                        videos_data.append(result)
-                        print(f"   ✓ [{completed}/{len(videos_comments_only)}] {videos_comments_only[idx-1]['title'][:35]}... ({len(result['comments'])} comments)")
-                    else:
-                        print(f"   ⚠️ [{completed}/{len(videos_comments_only)}] Failed: {error[:40]}...")
-        
-        if not videos_data:
-            print(f"❌ No videos could be processed ({len(videos)} attempted)")
-            print(f"   This may be due to YouTube rate limiting. Try again in a few minutes.")
-            sys.exit(1)
-        
-        # Report on processing
-        transcribed = len([v for v in videos_data if v.get('transcript')])
-        comments_only = len(videos_data) - transcribed
-        print(f"\n✅ Processed {len(videos_data)} videos ({transcribed} transcribed, {comments_only} comments-only)")
-        
-        # Step 4.5: Competitor Analysis (Step 8)
-        competitors_data = {}
-        if args.competitors:
-             competitors_data = fetch_competitor_videos(youtube, args.competitors)
-
-        # Step 5: AI Analysis
-        print(f"\n🧠 Running AI gap analysis...")
-        analysis = analyze_with_ai(ai_client, videos_data, channel_name, competitors_data, model_type=args.ai, gemini_model=args.gemini_model, language=args.language)
+        # Steps 1-5.5 run as a stage graph (see build_analysis_pipeline)
+        # Checkpoints keyed by access key: a requeued job resumes completed stages
+        checkpoints = CheckpointStore(args.access_key, params={
+            k: v for k, v in vars(args).items()
+            if k not in ('access_key', 'email', 'deadline', 'profile', 'profile_trace', 'output_dir')
+        })
+        deadline = Deadline(args.deadline)
+        # Per-stage wall/CPU/memory/HTTP accounting (no-op unless enabled)
+        profiler = JobProfiler(enabled=True if (args.profile or args.profile_trace) else None)
+        dag = build_analysis_pipeline(args, youtube, youtube_api_key, ai_client, checkpoints, deadline)
+        try:
+            ctx = dag.run(checkpoints=checkpoints, deadline=deadline, profiler=profiler)
+        finally:
+            # Abandoned optional stages may still have pool work running; don't wait for it
+            # (the process hard-exits once the report is written, see below)
+            wait = not dag.abandoned
+            get_task_pools().close(wait=wait)
+            get_vision_pool().close(wait=wait)
+            profiler.close()
+        
+        channel_name = ctx['channel_name']
+        videos_data = ctx['videos_data']
+        caption_report = ctx['caption_report']
+        analysis = ctx['analysis']
         
         # Add videos_analyzed for frontend dashboard
         analysis['videos_analyzed'] = [
@@ -1864,7 +2239,7 @@ Examples:
                 'url': v['video_info'].get('url', ''),
                 'video_id': v['video_info'].get('video_id') or v['video_info'].get('id', ''),
                 'comments_count': len(v['comments']),
-                'transcript_length': len(v['transcript']),
+                'transcript_length': v.transcript_chars,
                 'view_count': v['video_info'].get('view_count') or 0,
                 'like_count': v['video_info'].get('like_count') or 0,
                 'thumbnail_url': v['video_info'].get('thumbnail_url', '')
@@ -1872,22 +2247,41 @@ Examples:
             for v in videos_data
         ]
         
-        # Step 5.5: Run Premium Analysis based on tier
-        premium_data = run_premium_analysis(
-            youtube=youtube,
-            channel_id=channel_id,
-            channel_name=channel_name,
-            videos_data=videos_data,
-            tier=args.tier,
-            ai_client=ai_client,
-            model_type=args.ai,
-            gemini_model=args.gemini_model,
-            results=analysis,
-            niche=args.niche
-        )
+        if caption_report:
+            analysis['caption_fetch_report'] = caption_report
         
         # Merge premium data into analysis
-        analysis['premium'] = premium_data
+        analysis['premium'] = ctx['premium_data']
+        
+        # Per-stage timing trace
+        analysis['pipeline_trace'] = dag.trace_report()
+        print(f"\n⏱️ Pipeline stages:")
+        for t in analysis['pipeline_trace']:
+            print(f"   • {t['stage']:<30} {t['start_s']:>7.1f}s → {t['end_s']:>7.1f}s  ({t['duration_s']:.1f}s)")
+        resumed = [t['stage'] for t in analysis['pipeline_trace'] if t['status'] == 'cached']
+        if resumed:
+            print(f"   ♻️ Resumed {len(resumed)} stages from checkpoint: {', '.join(resumed)}")
+        
+        if profiler.enabled:
+            analysis['pipeline_timings'] = profiler.report()
+            total = analysis['pipeline_timings']['total']
+            print(f"   🧮 Profile: {total['wall_s']:.1f}s wall, {total['process_cpu_s']:.1f}s CPU, "
+                  f"peak RSS {total['peak_rss_mb']:.0f} MB, {total['external_calls']} HTTP calls "
+                  f"({total['bytes_received'] / 1e6:.1f} MB in)")
+            if args.profile_trace:
+                profiler.write_chrome_trace(args.profile_trace)
+        
+        analysis['snapshot_cache'] = get_channel_snapshot_cache().stats()
+        analysis['thumbnail_cache'] = get_thumbnail_cache().stats()
+        analysis['vision_workers'] = get_vision_pool().stats()
+        
+        # Sections dropped to meet the job deadline (partial-but-valid report)
+        analysis['skipped_sections'] = [
+            {**s, 'section': s['section'].split(':', 1)[-1]} for s in deadline.skipped
+        ]
+        analysis['partial'] = bool(analysis['skipped_sections'])
+        if analysis['partial']:
+            print(f"   ⏳ Partial report: skipped {', '.join(s['section'] for s in analysis['skipped_sections'])}")
         
         # Enforce Free Tier Limits (Top 3 Gaps only)
         if args.tier == 'free':
@@ -1931,11 +2325,11 @@ Examples:
         
         # Setup output paths
         script_dir = Path(__file__).parent.resolve()
-        data_dir = script_dir / "data"
-        data_dir.mkdir(exist_ok=True)
+        data_dir = Path(args.output_dir) if args.output_dir else script_dir / "data"
+        data_dir.mkdir(parents=True, exist_ok=True)
         
         # Save JSON for Dashboard (Step 9)
-        json_output_path = script_dir / "analysis_result.json"
+        json_output_path = (data_dir if args.output_dir else script_dir) / "analysis_result.json"
         with open(json_output_path, 'w', encoding='utf-8') as f:
             json.dump(analysis, f, indent=2)
         print(f"📊 Dashboard data saved to: {json_output_path}")
@@ -1943,6 +2337,9 @@ Examples:
         # Step 6: Generate report
         report_path = data_dir / f"GAP_REPORT_{channel_name.replace(' ', '_')}.md"
         generate_report(report_path, channel_name, videos_data, analysis, is_sample=args.sample, niche=args.niche)
+        
+        # Job finished - resume data is no longer needed
+        checkpoints.clear()
 
         print(f"\n🎉 Analysis complete!")
         print(f"   Report: {report_path}")
@@ -1950,6 +2347,8 @@ Examples:
 
         
         # FINAL OUTPUT FOR PARENT PROCESS
+        # Job metrics first (one marker line the server merges into /metrics)
+        emit_job_metrics(dag, checkpoints)
         # Print the JSON to stdout so main.py can capture it
         print(json.dumps(analysis))
         
@@ -1958,10 +2357,16 @@ Examples:
         if top_gap.get('topic'):
             print(f"\n   🎯 Top Gap: {top_gap['topic']}")
         
+        if dag.abandoned:
+            # Abandoned stage threads would otherwise keep the process alive
+            sys.stdout.flush()
+            os._exit(0)
+        
     except Exception as e:
         print(f"\n❌ Error: {e}")
         import traceback
         traceback.print_exc()
+        emit_job_metrics(dag)
         sys.exit(1)
 
 
@@ -0,0 +1,340 @@
+#!/usr/bin/env python3
+"""
+Benchmark Replay Layer - Offline stand-ins for every external service
+
+Installed inside the benchmark child process before GAP_ULTIMATE.main() runs:
+- YouTube Data API: googleapiclient requests are answered from a
+  deterministic SyntheticChannel (channels, playlistItems, videos,
+  commentThreads, search)
+- Captions (ingest and hook analysis) / yt-dlp metadata: served from the
+  same SyntheticChannel
+- LLM (--ai local) and thumbnails: a local HTTP stand-in server replaying the
+  recorded responses in fixtures/llm/ and a generated JPEG
+- Google Trends: fixed trend results (no pytrends session)
+- Anything else trying to reach the network is refused, so a new
+  un-stubbed dependency fails the benchmark instead of silently going online
+"""
+
+import io
+import json
+import random
+import socket
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Dict, List
+from urllib.parse import parse_qs, urlparse
+
+
+FIXTURES_DIR = Path(__file__).resolve().parent / "fixtures"
+LOCAL_HOSTS = {'127.0.0.1', 'localhost', '::1'}
+
+TOPICS = ['color grading', 'lighting setup', 'audio sync', 'lens choice', 'camera settings', 'editing workflow']
+COMMENT_TEMPLATES = [
+    "how do you handle {topic}? I always struggle with it",
+    "please make a video on {topic}",
+    "can you explain your {topic} in more detail",
+    "great video!",
+    "love this channel",
+    "I'm confused about {topic}, what am I doing wrong?",
+    "first",
+    "why did you skip the {topic} part",
+]
+
+# LLM phase -> (prompt marker, recorded response file)
+LLM_PHASES = [
+    ('pain_points', 'Identify UNMET NEEDS'),
+    ('clustering', 'Cluster similar pain points'),
+    ('verification', 'verifying content gaps'),
+    ('titles', 'viral_titles'),
+]
+
+
+class SyntheticChannel:
+    """Deterministic channel with N videos; answers YouTube API calls by method."""
+
+    def __init__(self, handle: str, videos: int, comments_per_video: int = 300,
+                 thumbnail_base: str = '', seed: int = 42):
+        self.handle = handle.lstrip('@')
+        self.channel_id = 'UC' + f"bench{videos:04d}".ljust(22, 'x')
+        self.uploads_id = 'UU' + self.channel_id[2:]
+        self.videos = videos
+        self.comments_per_video = comments_per_video
+        self.thumbnail_base = thumbnail_base
+        self.seed = seed
+        self.video_ids = [f"bv{videos:03d}{i:06d}" for i in range(videos)]
+        self.calls: Dict[str, int] = {}
+
+    def _rng(self, key: str) -> random.Random:
+        return random.Random(f"{self.seed}:{key}")
+
+    # --- YouTube Data API ---
+
+    def respond(self, method: str, params: Dict[str, str]) -> Dict:
+        self.calls[method] = self.calls.get(method, 0) + 1
+        handler = {
+            'youtube.channels.list': self._channels,
+            'youtube.playlistItems.list': self._playlist_items,
+            'youtube.videos.list': self._videos,
+            'youtube.commentThreads.list': self._comment_threads,
+            'youtube.search.list': self._search,
+        }.get(method)
+        return handler(params) if handler else {'items': []}
+
+    def _channel_item(self, channel_id: str, title: str) -> Dict:
+        rng = self._rng(channel_id)
+        return {
+            'id': channel_id,
+            'snippet': {'title': title, 'description': 'Filmmaking tutorials', 'publishedAt': '2019-03-01T00:00:00Z',
+                        'customUrl': f"@{title.lower().replace(' ', '')}"},
+            'contentDetails': {'relatedPlaylists': {'uploads': 'UU' + channel_id[2:]}},
+            'statistics': {'subscriberCount': str(rng.randint(80_000, 120_000)),
+                           'viewCount': str(rng.randint(10 ** 7, 10 ** 8)), 'videoCount': str(self.videos)},
+        }
+
+    def _channels(self, params):
+        if params.get('forHandle') or params.get('forUsername'):
+            return {'items': [self._channel_item(self.channel_id, self.handle.title())]}
+        items = [self._channel_item(cid, 'Benchmark Channel' if cid == self.channel_id else f"Rival {cid[-4:]}")
+                 for cid in params.get('id', '').split(',') if cid]
+        return {'items': items}
+
+    def _playlist_items(self, params):
+        start = int(params.get('pageToken') or 0)
+        count = int(params.get('maxResults') or 50)
+        if params.get('playlistId') != self.uploads_id:
+            ids = [f"{params.get('playlistId', 'UU')[-6:]}{i:05d}" for i in range(start, min(start + count, 25))]
+        else:
+            ids = self.video_ids[start:start + count]
+        response = {'items': [{'snippet': {'resourceId': {'videoId': vid}, 'title': self._title(vid),
+                                           'publishedAt': self._published(vid)}} for vid in ids]}
+        if start + count < self.videos and ids:
+            response['nextPageToken'] = str(start + count)
+        return response
+
+    def _title(self, video_id: str) -> str:
+        rng = self._rng(video_id)
+        return f"{rng.choice(TOPICS).title()} Tips #{rng.randint(1, 300)}"
+
+    def _published(self, video_id: str) -> str:
+        day = self._rng(video_id).randint(1, 28)
+        return f"2024-0{self._rng(video_id + 'm').randint(1, 9)}-{day:02d}T15:00:00Z"
+
+    def _videos(self, params):
+        items = []
+        for vid in params.get('id', '').split(','):
+            if not vid:
+                continue
+            rng = self._rng(vid)
+            items.append({
+                'id': vid,
+                'snippet': {'title': self._title(vid), 'publishedAt': self._published(vid), 'channelId': self.channel_id,
+                            'description': 'In this video we cover ' + rng.choice(TOPICS), 'tags': TOPICS[:3],
+                            'thumbnails': {'high': {'url': f"{self.thumbnail_base}/thumb/{vid}.jpg"}}},
+                'contentDetails': {'duration': f"PT{rng.randint(6, 20)}M{rng.randint(0, 59)}S"},
+                'statistics': {'viewCount': str(rng.randint(5_000, 900_000)), 'likeCount': str(rng.randint(100, 30_000)),
+                               'commentCount': str(self.comments_per_video)},
+            })
+        return {'items': items}
+
+    def _comment_threads(self, params):
+        vid = params.get('videoId', '')
+        start = int(params.get('pageToken') or 0)
+        count = min(int(params.get('maxResults') or 100), self.comments_per_video - start)
+        rng = self._rng(f"{vid}:{start}")
+        items = [{'snippet': {'topLevelComment': {'snippet': {
+            'authorDisplayName': f"viewer{rng.randint(0, 4000)}",
+            'textDisplay': rng.choice(COMMENT_TEMPLATES).format(topic=rng.choice(TOPICS)),
+            'likeCount': rng.randint(0, 400),
+            'publishedAt': '2024-05-01T12:00:00Z'}}}} for _ in range(max(0, count))]
+        response = {'items': items}
+        if start + count < self.comments_per_video:
+            response['nextPageToken'] = str(start + count)
+        return response
+
+    def _search(self, params):
+        rng = self._rng(params.get('q', ''))
+        if params.get('type') == 'channel':
+            return {'items': [{'id': {'channelId': f"UCrival{rng.randint(0, 10 ** 6):06d}".ljust(24, 'r')},
+                               'snippet': {'channelId': '', 'channelTitle': f"Rival {i}"}} for i in range(10)]}
+        return {'items': [{'id': {'videoId': f"sv{rng.randint(0, 10 ** 8):08d}"}} for _ in range(10)]}
+
+    # --- Captions / yt-dlp ---
+
+    def captions(self, video_id: str) -> Dict:
+        rng = self._rng('captions:' + video_id)
+        segments = []
+        for i in range(360):  # ~24 minutes of 4s segments
+            text = ' '.join(rng.choice(TOPICS + ['so', 'today', 'we', 'look', 'at', 'the']) for _ in range(9))
+            segments.append({'start': i * 4.0, 'end': i * 4.0 + 4.0, 'text': text})
+        return {'text': ' '.join(s['text'] for s in segments), 'language': 'en', 'segments': segments}
+
+    def metadata(self, url: str) -> Dict:
+        video_id = parse_qs(urlparse(url).query).get('v', [url.rsplit('/', 1)[-1]])[0]
+        rng = self._rng(video_id)
+        return {'id': video_id, 'title': self._title(video_id), 'webpage_url': url, 'uploader': 'Benchmark Channel',
+                'uploader_id': self.handle, 'description': 'Benchmark video', 'view_count': rng.randint(5_000, 900_000),
+                'like_count': rng.randint(100, 30_000), 'duration': rng.randint(360, 1200),
+                'upload_date': self._published(video_id)[:10].replace('-', ''),
+                'thumbnail': f"{self.thumbnail_base}/thumb/{video_id}.jpg", 'tags': TOPICS[:3]}
+
+
+def _thumbnail_bytes() -> bytes:
+    """A 1280x720 JPEG with a few colour blocks (empty if Pillow is missing)."""
+    try:
+        from PIL import Image, ImageDraw
+    except ImportError:
+        return b''
+    image = Image.new('RGB', (1280, 720), (20, 24, 40))
+    draw = ImageDraw.Draw(image)
+    draw.rectangle((0, 0, 640, 720), fill=(230, 60, 40))
+    draw.rectangle((700, 100, 1200, 600), fill=(250, 210, 40))
+    draw.text((80, 300), "BENCH", fill=(255, 255, 255))
+    out = io.BytesIO()
+    image.save(out, format='JPEG', quality=85)
+    return out.getvalue()
+
+
+class StandInServer:
+    """Local HTTP server: Ollama-compatible /api/chat replaying fixtures, and /thumb/<id>.jpg."""
+
+    def __init__(self, llm_latency: float = 0.0):
+        self.llm_latency = llm_latency
+        self.responses = {name: (FIXTURES_DIR / 'llm' / f"{name}.json").read_text(encoding='utf-8')
+                          for name, _ in LLM_PHASES}
+        self.thumbnail = _thumbnail_bytes()
+        self.llm_calls: Dict[str, int] = {}
+        self.thumbnail_requests = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), self._handler())
+        self._server.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self._server.server_address[1]}"
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def _send(self, status: int, body: bytes, content_type: str):
+                self.send_response(status)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                if self.path.startswith('/thumb/') and server.thumbnail:
+                    with server._lock:
+                        server.thumbnail_requests += 1
+                    self._send(200, server.thumbnail, 'image/jpeg')
+                elif self.path == '/':
+                    self._send(200, b'Ollama is running', 'text/plain')
+                else:
+                    self._send(404, b'', 'text/plain')
+
+            def do_POST(self):
+                length = int(self.headers.get('Content-Length') or 0)
+                payload = json.loads(self.rfile.read(length) or b'{}')
+                prompt = ' '.join(m.get('content', '') for m in payload.get('messages', []))
+                phase = next((name for name, marker in LLM_PHASES if marker in prompt), 'unknown')
+                with server._lock:
+                    server.llm_calls[phase] = server.llm_calls.get(phase, 0) + 1
+                if server.llm_latency:
+                    time.sleep(server.llm_latency)
+                content = server.responses.get(phase, '{}')
+                body = json.dumps({'message': {'role': 'assistant', 'content': content}, 'done': True,
+                                   'prompt_eval_count': len(prompt) // 4, 'eval_count': len(content) // 4})
+                self._send(200, body.encode('utf-8'), 'application/json')
+
+        return Handler
+
+    def start(self) -> 'StandInServer':
+        threading.Thread(target=self._server.serve_forever, name='bench-stand-in', daemon=True).start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+
+
+def _block_network(blocked: List[str]):
+    """Refuse connections to anything but localhost (records the attempted hosts)."""
+    original_getaddrinfo = socket.getaddrinfo
+
+    def getaddrinfo(host, *args, **kwargs):
+        if host not in LOCAL_HOSTS:
+            blocked.append(str(host))
+            raise socket.gaierror(f"benchmark replay: network access to {host} is blocked")
+        return original_getaddrinfo(host, *args, **kwargs)
+    socket.getaddrinfo = getaddrinfo
+
+
+def install(channel: SyntheticChannel, stand_in: StandInServer) -> Dict:
+    """
+    Patch the pipeline's external dependencies. Call before importing GAP_ULTIMATE.
+    Returns a stats dict filled in while the pipeline runs.
+    """
+    stats = {'blocked_hosts': [], 'caption_fetches': 0, 'metadata_fetches': 0}
+    _block_network(stats['blocked_hosts'])
+
+    from googleapiclient.http import HttpRequest
+
+    def execute(self, *args, **kwargs):
+        params = {k: v[0] for k, v in parse_qs(urlparse(self.uri).query).items()}
+        return channel.respond(getattr(self, 'methodId', ''), params)
+    HttpRequest.execute = execute
+
+    import ingest_manager
+
+    def fetch_captions_raw(video_id, languages):
+        stats['caption_fetches'] += 1
+        return channel.captions(video_id)
+    ingest_manager._fetch_captions_raw = fetch_captions_raw
+    # Embedding pre-computation writes to Supabase; not part of the measured pipeline
+    ingest_manager.CLUSTERING_AVAILABLE = False
+
+    class YoutubeDL:
+        def __init__(self, opts=None):
+            pass
+
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *exc):
+            return False
+
+        def extract_info(self, url, download=False):
+            stats['metadata_fetches'] += 1
+            return channel.metadata(url)
+    ingest_manager.yt_dlp.YoutubeDL = YoutubeDL
+
+    import premium.hook_analyzer as hook_analyzer
+
+    class TranscriptApi:
+        """Hook analysis downloads captions for videos ingest didn't transcribe."""
+
+        def fetch(self, video_id, *args, **kwargs):
+            stats['caption_fetches'] += 1
+            return [SimpleNamespace(start=s['start'], duration=s['end'] - s['start'], text=s['text'])
+                    for s in channel.captions(video_id)['segments']]
+    hook_analyzer.YouTubeTranscriptApi = TranscriptApi
+    hook_analyzer.CAPTIONS_AVAILABLE = True
+
+    import premium.market_intelligence as market_intelligence
+
+    class NoTrends:
+        def __init__(self, *args, **kwargs):
+            pass
+
+    def analyze_market_trends(self, keywords):
+        rng = random.Random(','.join(keywords))
+        return {kw: {'score': rng.randint(20, 90), 'trajectory': rng.choice(['RISING', 'STABLE', 'FALLING']),
+                     'momentum': rng.randint(-20, 40), 'seasonality': 'none', 'trend_strength': rng.randint(10, 80),
+                     'is_opportunity': False} for kw in keywords}
+    market_intelligence.TrendReq = NoTrends
+    market_intelligence.MarketIntelligence.analyze_market_trends = analyze_market_trends
+
+    return stats
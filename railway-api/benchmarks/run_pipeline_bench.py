@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+"""
+End-to-end pipeline benchmark (offline, replayed fixtures)
+
+Runs GAP_ULTIMATE.main() against synthetic 3/10/25/100-video channels with
+every external service replayed (see benchmarks/replay.py), one child process
+per channel size so peak RSS and module state don't leak between runs.
+
+Reports per-stage wall time, peak RSS and call counts (YouTube API calls and
+quota units, LLM calls, HTTP calls), and compares them with
+benchmarks/baseline.json:
+- a stage slower than baseline by more than --max-regression (and by more
+  than --min-delta seconds, to ignore noise on tiny stages) fails
+- peak RSS above baseline by more than --max-regression fails
+- any call count above baseline fails (replay is deterministic)
+
+Exit code 1 on regression, so it can gate CI.
+
+Usage:
+    python benchmarks/run_pipeline_bench.py                      # 3,10,25,100 videos
+    python benchmarks/run_pipeline_bench.py --sizes 3 10 --record-baseline
+    python benchmarks/run_pipeline_bench.py --llm-latency 0.5    # simulate a slow model
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+BENCH_DIR = Path(__file__).resolve().parent
+API_DIR = BENCH_DIR.parent
+DEFAULT_BASELINE = BENCH_DIR / "baseline.json"
+DEFAULT_SIZES = [3, 10, 25, 100]
+
+REPLAY_MARKER = '__REPLAY__:'
+METRICS_MARKER = '__METRICS__:'
+
+
+# === Child: one pipeline run ===
+
+def run_child(size: int, comments: int, llm_latency: float):
+    sys.path.insert(0, str(API_DIR))
+    sys.path.insert(0, str(BENCH_DIR))
+    work_dir = Path(tempfile.mkdtemp(prefix=f"gapintel-bench-{size}-"))
+
+    # Isolated caches and no credentials; set before load_dotenv() so .env can't override them
+    os.environ.update({
+        'YOUTUBE_API_KEY': 'bench',
+        'INGEST_CACHE_DIR': str(work_dir / 'ingest'),
+        'CHANNEL_SNAPSHOT_DIR': str(work_dir / 'snapshots'),
+        'CHANNEL_SNAPSHOT_CACHE': 'false',
+        'COMMENT_STORE_DIR': str(work_dir / 'comments'),
+        # Thumbnail features/index start cold too, or timings depend on earlier runs on this machine
+        'THUMBNAIL_CACHE_DIR': str(work_dir / 'thumbnails'),
+        'THUMBNAIL_INDEX_PATH': str(work_dir / 'thumbnail_index.sqlite3'),
+        'SUPABASE_URL': '', 'SUPABASE_SERVICE_KEY': '',
+        'GEMINI_API_KEY': '', 'OPENAI_API_KEY': '', 'GROQ_API_KEY': '',
+    })
+
+    import replay
+    stand_in = replay.StandInServer(llm_latency=llm_latency).start()
+    os.environ['OLLAMA_URL'] = stand_in.url
+    channel = replay.SyntheticChannel('benchchannel', size, comments_per_video=comments,
+                                      thumbnail_base=stand_in.url)
+    stats = replay.install(channel, stand_in)
+
+    import GAP_ULTIMATE
+    sys.argv = ['GAP_ULTIMATE.py', '@benchchannel', '-n', str(size), '--ai', 'local', '--tier', 'enterprise',
+                '--profile', '--output-dir', str(work_dir / 'out')]
+    started = time.perf_counter()
+    exit_code = 0
+    try:
+        GAP_ULTIMATE.main()
+    except SystemExit as e:
+        exit_code = e.code if isinstance(e.code, int) else (0 if e.code is None else 1)
+    except Exception as e:
+        print(f"❌ Pipeline raised {type(e).__name__}: {e}")
+        exit_code = 1
+    stats.update({
+        'exit_code': exit_code,
+        'wall_s': round(time.perf_counter() - started, 3),
+        'youtube_calls': channel.calls,
+        'llm_calls': stand_in.llm_calls,
+        'thumbnail_requests': stand_in.thumbnail_requests,
+    })
+    stand_in.stop()
+    print(REPLAY_MARKER + json.dumps(stats))
+    sys.stdout.flush()
+    # Pool threads/abandoned stages must not keep the child alive; the pipeline's exit code is the child's
+    os._exit(exit_code)
+
+
+# === Parent: run sizes, report, compare ===
+
+def parse_child_output(stdout: str) -> Optional[Dict]:
+    analysis, metrics, replay_stats = None, {}, {}
+    for line in stdout.splitlines():
+        if line.startswith(METRICS_MARKER):
+            metrics = json.loads(line[len(METRICS_MARKER):])
+        elif line.startswith(REPLAY_MARKER):
+            replay_stats = json.loads(line[len(REPLAY_MARKER):])
+        elif line.startswith('{'):
+            try:
+                parsed = json.loads(line)
+            except ValueError:
+                continue
+            if isinstance(parsed, dict) and 'pipeline_trace' in parsed:
+                analysis = parsed
+    if analysis is None:
+        return None
+
+    timings = analysis.get('pipeline_timings', {})
+    stages = {t['stage']: t['duration_s'] for t in analysis.get('pipeline_trace', [])}
+    quota = {key[0]: value for key, value in metrics.get('gapintel_youtube_quota_units_total', [])}
+    return {
+        'wall_s': timings.get('total', {}).get('wall_s') or replay_stats.get('wall_s'),
+        'peak_rss_mb': timings.get('total', {}).get('peak_rss_mb'),
+        'stages': stages,
+        'calls': {
+            'http': timings.get('total', {}).get('external_calls', 0),
+            'youtube_api': sum(replay_stats.get('youtube_calls', {}).values()),
+            'youtube_quota_units': sum(quota.values()),
+            'llm': sum(replay_stats.get('llm_calls', {}).values()),
+            'captions': replay_stats.get('caption_fetches', 0),
+        },
+        'blocked_hosts': sorted(set(replay_stats.get('blocked_hosts', []))),
+    }
+
+
+def run_size(size: int, args) -> Optional[Dict]:
+    cmd = [sys.executable, str(Path(__file__).resolve()), '--child', str(size),
+           '--comments', str(args.comments), '--llm-latency', str(args.llm_latency)]
+    print(f"▶️ {size} videos ...", flush=True)
+    proc = subprocess.run(cmd, cwd=str(API_DIR), capture_output=True, text=True, timeout=args.timeout)
+    result = parse_child_output(proc.stdout)
+    if result is None or proc.returncode != 0:
+        reason = 'no analysis output' if result is None else 'pipeline failed'
+        print(f"❌ {size} videos: {reason} (exit {proc.returncode})")
+        print('\n'.join((proc.stdout + proc.stderr).splitlines()[-30:]))
+        return None
+    if result['blocked_hosts']:
+        print(f"⚠️ {size} videos: un-replayed network access to {', '.join(result['blocked_hosts'])}")
+    return result
+
+
+def print_report(results: Dict[str, Dict]):
+    for size, result in results.items():
+        calls = result['calls']
+        print(f"\n📊 {size} videos: {result['wall_s']:.1f}s wall, peak RSS {result['peak_rss_mb']:.0f} MB, "
+              f"{calls['youtube_api']} YouTube calls ({calls['youtube_quota_units']} quota units), "
+              f"{calls['llm']} LLM calls, {calls['http']} HTTP calls")
+        for stage, duration in sorted(result['stages'].items(), key=lambda kv: -kv[1]):
+            print(f"   • {stage:<30} {duration:>7.2f}s")
+
+
+def compare(results: Dict[str, Dict], baseline: Dict[str, Dict], max_regression: float,
+            min_delta: float) -> List[str]:
+    """Regressions as human-readable lines (empty when within thresholds)."""
+    regressions = []
+    for size, result in results.items():
+        base = baseline.get(size)
+        if not base:
+            continue
+        timed = [('wall', result['wall_s'], base.get('wall_s'))]
+        timed += [(stage, duration, base.get('stages', {}).get(stage)) for stage, duration in result['stages'].items()]
+        for name, now, before in timed:
+            if before is not None and now > before * (1 + max_regression) and now - before > min_delta:
+                regressions.append(f"{size} videos: {name} {before:.2f}s → {now:.2f}s "
+                                   f"(+{(now / max(before, 1e-9) - 1) * 100:.0f}%)")
+        before_rss = base.get('peak_rss_mb')
+        if before_rss and result['peak_rss_mb'] and result['peak_rss_mb'] > before_rss * (1 + max_regression):
+            regressions.append(f"{size} videos: peak RSS {before_rss:.0f} MB → {result['peak_rss_mb']:.0f} MB")
+        for name, now in result['calls'].items():
+            before = base.get('calls', {}).get(name)
+            if before is not None and now > before:
+                regressions.append(f"{size} videos: {name} calls {before} → {now}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Offline end-to-end GapIntel pipeline benchmark')
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES, help='Channel sizes (videos)')
+    parser.add_argument('--comments', type=int, default=300, help='Comments per synthetic video')
+    parser.add_argument('--llm-latency', type=float, default=0.0, help='Injected seconds per LLM response')
+    parser.add_argument('--baseline', default=str(DEFAULT_BASELINE), help='Baseline JSON to compare against')
+    parser.add_argument('--record-baseline', action='store_true', help='Write results as the new baseline')
+    parser.add_argument('--max-regression', type=float, default=0.25,
+                        help='Allowed slowdown / RSS growth vs baseline (0.25 = 25%%)')
+    parser.add_argument('--min-delta', type=float, default=0.5,
+                        help='Ignore stage slowdowns smaller than this many seconds')
+    parser.add_argument('--timeout', type=int, default=1800, help='Per-size timeout in seconds')
+    parser.add_argument('--json', metavar='PATH', help='Also write results to this file')
+    parser.add_argument('--child', type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child is not None:
+        run_child(args.child, args.comments, args.llm_latency)
+        return
+
+    results = {}
+    for size in args.sizes:
+        result = run_size(size, args)
+        if result is None:
+            sys.exit(1)
+        results[str(size)] = result
+    print_report(results)
+
+    if args.json:
+        Path(args.json).write_text(json.dumps(results, indent=2))
+
+    baseline_path = Path(args.baseline)
+    if args.record_baseline:
+        baseline = json.loads(baseline_path.read_text()) if baseline_path.exists() else {}
+        baseline.update(results)
+        baseline_path.write_text(json.dumps(baseline, indent=2, sort_keys=True) + '\n')
+        print(f"\n💾 Baseline written to {baseline_path}")
+        return
+    if not baseline_path.exists():
+        print(f"\n❌ No baseline at {baseline_path}; run with --record-baseline to create one")
+        sys.exit(1)
+
+    regressions = compare(results, json.loads(baseline_path.read_text()), args.max_regression, args.min_delta)
+    if regressions:
+        print(f"\n❌ {len(regressions)} regression(s) beyond {args.max_regression:.0%}:")
+        for line in regressions:
+            print(f"   • {line}")
+        sys.exit(1)
+    print(f"\n✅ Within {args.max_regression:.0%} of baseline")
+
+
+if __name__ == '__main__':
+    main()
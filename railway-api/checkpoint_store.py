@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+Checkpoint Store - Per-stage checkpoints so requeued jobs resume
+
+Each pipeline stage (ingest, pain-point extraction, clustering, verification,
+trends, titles, premium tasks) saves its output keyed by the job's access key
+and a hash of the stage inputs. When `recover_stuck_jobs` requeues a job that
+timed out, the rerun loads finished stages instead of recomputing them.
+
+Layout (one JSON file per stage; latest inputs win):
+    data/checkpoints/<sha256(access_key)[:16]>/<stage>.json
+
+Checkpoints are cleared when the job completes and pruned after
+CHECKPOINT_TTL_HOURS (default 24).
+
+Usage:
+    checkpoints = CheckpointStore(access_key, params={'tier': 'pro'})
+    verified = checkpoints.cached('verification', [pain_points, transcripts],
+                                  lambda: verify_gaps_against_content(...))
+"""
+
+import hashlib
+import json
+import os
+import re
+import shutil
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+
+
+DEFAULT_CHECKPOINT_DIR = Path(__file__).resolve().parent / "data" / "checkpoints"
+
+
+def _stable_default(obj):
+    """JSON fallback for hashing: objects hash by type, not by address."""
+    if isinstance(obj, (set, frozenset)):
+        return sorted(obj, key=str)
+    if hasattr(obj, 'to_dict'):
+        return obj.to_dict()
+    return type(obj).__name__
+
+
+def _json_default(obj):
+    """JSON fallback for saving: objects that know their JSON form (to_dict)."""
+    if hasattr(obj, 'to_dict'):
+        return obj.to_dict()
+    raise TypeError(f"{type(obj).__name__} is not JSON serializable")
+
+
+class CheckpointStore:
+    """
+    JSON checkpoints for one job.
+
+    Disabled (every lookup misses, nothing is written) when no job key is
+    given or CHECKPOINTS_ENABLED=false.
+    """
+
+    def __init__(self, job_key: str = None, params: Dict = None, root: Path = None):
+        self.root = Path(root or os.getenv('CHECKPOINT_DIR') or DEFAULT_CHECKPOINT_DIR)
+        self.enabled = bool(job_key) and os.getenv('CHECKPOINTS_ENABLED', 'true').lower() != 'false'
+        # Job parameters (tier, language, model...) are part of every input hash
+        self.params = params or {}
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        # Hash the access key so it never appears in file paths
+        job_id = hashlib.sha256(job_key.encode()).hexdigest()[:16] if job_key else ''
+        self.job_dir = self.root / job_id
+
+        if self.enabled:
+            self.prune_stale()
+
+    @staticmethod
+    def input_hash(*parts: Any) -> str:
+        """Stable hash of arbitrary JSON-like inputs."""
+        payload = json.dumps(parts, sort_keys=True, default=_stable_default)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def digest(self, stage: str, inputs: Iterable[Any]) -> str:
+        """Checkpoint key for a stage: stage name + job params + inputs."""
+        return self.input_hash(stage, self.params, list(inputs))
+
+    def _path(self, stage: str) -> Path:
+        return self.job_dir / f"{re.sub(r'[^A-Za-z0-9_.-]', '_', stage)}.json"
+
+    def load(self, stage: str, digest: str) -> Tuple[bool, Any]:
+        """Return (hit, value) for a stage whose inputs hashed to digest."""
+        if not self.enabled:
+            return False, None
+        path = self._path(stage)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            with self._lock:
+                self.misses += 1
+            return False, None
+
+        if data.get('input_hash') != digest:
+            with self._lock:
+                self.misses += 1
+            return False, None
+        with self._lock:
+            self.hits += 1
+        return True, data.get('value')
+
+    def save(self, stage: str, digest: str, value: Any) -> bool:
+        """Write a stage checkpoint atomically. Non-JSON outputs are skipped."""
+        if not self.enabled:
+            return False
+        path = self._path(stage)
+        try:
+            payload = json.dumps({'stage': stage, 'input_hash': digest,
+                                  'saved_at': time.time(), 'value': value}, default=_json_default)
+        except (TypeError, ValueError):
+            print(f"   ⚠️ Checkpoint skipped for {stage}: output is not JSON-serializable")
+            return False
+
+        try:
+            self.job_dir.mkdir(parents=True, exist_ok=True)
+            tmp_path = path.with_suffix('.json.tmp')
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                f.write(payload)
+            os.replace(tmp_path, path)
+            return True
+        except OSError as e:
+            print(f"   ⚠️ Checkpoint write error ({stage}): {e}")
+            return False
+
+    def cached(self, stage: str, inputs: Iterable[Any], fn: Callable[[], Any],
+               valid: Optional[Callable[[Any], bool]] = None) -> Any:
+        """
+        Load the stage output if its inputs are unchanged, else compute and save it.
+        Empty results (None / {}) and results rejected by valid() are returned but
+        not saved, so failed or partial LLM phases are retried on resume.
+        """
+        if not self.enabled:
+            return fn()
+        digest = self.digest(stage, inputs)
+        hit, value = self.load(stage, digest)
+        if hit:
+            print(f"   ♻️ Resumed '{stage}' from checkpoint")
+            return value
+        value = fn()
+        if value is not None and value != {} and (valid is None or valid(value)):
+            self.save(stage, digest, value)
+        return value
+
+    def clear(self):
+        """Remove all checkpoints of this job (call after a successful run)."""
+        if self.enabled and self.job_dir.exists():
+            shutil.rmtree(self.job_dir, ignore_errors=True)
+
+    def prune_stale(self, ttl_hours: float = None):
+        """Delete checkpoint dirs of other jobs untouched for longer than the TTL."""
+        ttl_hours = ttl_hours if ttl_hours is not None else float(os.getenv('CHECKPOINT_TTL_HOURS', 24))
+        if not self.root.exists():
+            return
+        cutoff = time.time() - ttl_hours * 3600
+        for job_dir in self.root.iterdir():
+            try:
+                if job_dir.is_dir() and job_dir != self.job_dir and job_dir.stat().st_mtime < cutoff:
+                    shutil.rmtree(job_dir, ignore_errors=True)
+            except OSError:
+                continue
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {'enabled': self.enabled, 'hits': self.hits, 'misses': self.misses}
@@ -14,6 +14,7 @@ Usage (as module):
 """
 
 import argparse
+import asyncio
 import os
 import re
 import sys
@@ -22,6 +23,7 @@ from pathlib import Path
 import json
 import time
 import random
+import threading
 
 
 # Load environment variables
@@ -179,7 +181,8 @@ def fetch_all_comments(video_id: str, api_key: str, max_comments: int = 500) ->
     return comments
 
 
-def download_audio(youtube_url: str, output_dir: Path, video_id: str, verbose: bool = False, max_retries: int = 3) -> tuple[Path, dict]:
+def download_audio(youtube_url: str, output_dir: Path, video_id: str, verbose: bool = False, max_retries: int = 3,
+                   max_seconds: float = None) -> tuple[Path, dict]:
     """
     Download audio from YouTube video using yt-dlp with robust fallbacks.
     
@@ -188,6 +191,8 @@ def download_audio(youtube_url: str, output_dir: Path, video_id: str, verbose: b
     2. Different format fallbacks
     3. Anti-blocking measures (user-agent rotation, etc.)
     
+    If max_seconds is set, only the first max_seconds of audio are downloaded.
+    
     Returns:
         Tuple of (audio_path, video_info)
     """
@@ -252,6 +257,10 @@ def download_audio(youtube_url: str, output_dir: Path, video_id: str, verbose: b
             'extractor_retries': 3,
         }
         
+        if max_seconds:
+            # Partial download: only the opening section (e.g. hooks-only jobs)
+            ydl_opts['download_ranges'] = yt_dlp.utils.download_range_func(None, [(0, max_seconds)])
+        
         try:
             with yt_dlp.YoutubeDL(ydl_opts) as ydl:
                 info = ydl.extract_info(youtube_url, download=True)
@@ -336,7 +345,78 @@ def transcribe_audio(audio_path: Path, model_name: str = "tiny") -> dict:
     }
 
 
-def fetch_captions(video_id: str) -> dict:
+def caption_languages(language: str = "en") -> list[str]:
+    """Caption language priority for a job: requested language first, then English."""
+    languages = [language] if language else []
+    if 'en' not in languages:
+        languages.append('en')
+    return languages
+
+
+def is_throttle_error(error: Exception) -> bool:
+    """Detect YouTube rate limiting (HTTP 429 / request blocked) on caption requests."""
+    name = type(error).__name__
+    if name in ('TooManyRequests', 'RequestBlocked', 'IpBlocked'):
+        return True
+    text = str(error).lower()
+    return '429' in text or 'too many requests' in text
+
+
+def _is_missing_captions_error(error: Exception) -> bool:
+    error_str = str(error).lower()
+    return 'disabled' in error_str or 'not found' in error_str or 'no transcript' in error_str
+
+
+def _is_language_missing_error(error: Exception) -> bool:
+    """Captions exist, just not in the requested languages (NoTranscriptFound), as opposed to disabled."""
+    if type(error).__name__ == 'NoTranscriptFound':
+        return True
+    error_str = str(error).lower()
+    return 'disabled' not in error_str and ('no transcript' in error_str or 'not found' in error_str)
+
+
+def _fetch_captions_raw(video_id: str, languages: list[str]) -> dict:
+    """
+    Fetch captions, negotiating language by priority.
+    Falls back to any available transcript if none of the languages exist.
+    Raises on errors so callers can distinguish throttling from missing captions.
+    """
+    api = YouTubeTranscriptApi()
+    try:
+        transcript = api.fetch(video_id, languages=languages)
+    except Exception as e:
+        if is_throttle_error(e) or not _is_language_missing_error(e):
+            raise  # Throttled, disabled or unavailable: listing transcripts would fail the same way
+        # None of the preferred languages - take whatever the video has
+        available = next(iter(api.list(video_id)), None)
+        if available is None:
+            raise
+        transcript = available.fetch()
+
+    full_text = ""
+    segments = []
+
+    for snippet in transcript:
+        text = snippet.text.replace('\n', ' ').strip()
+        start = snippet.start
+        end = start + snippet.duration
+
+        full_text += text + " "
+
+        segments.append({
+            'start': start,
+            'end': end,
+            'text': text
+        })
+
+    return {
+        'text': full_text.strip(),
+        'language': getattr(transcript, 'language_code', None) or languages[0],
+        'segments': segments
+    }
+
+
+def fetch_captions(video_id: str, languages: list[str] = None) -> dict:
     """
     Fetch YouTube captions for a video using youtube-transcript-api.
     Returns format compatible with Whisper output: {text, segments}
@@ -345,42 +425,153 @@ def fetch_captions(video_id: str) -> dict:
         return None
         
     try:
-        # Use new API (v1.2.3+)
-        api = YouTubeTranscriptApi()
-        transcript = api.fetch(video_id)
-        
-        full_text = ""
-        segments = []
-        
-        for snippet in transcript:
-            text = snippet.text.replace('\n', ' ').strip()
-            start = snippet.start
-            end = start + snippet.duration
-            
-            full_text += text + " "
-            
-            segments.append({
-                'start': start,
-                'end': end,
-                'text': text
-            })
-            
-        return {
-            'text': full_text.strip(),
-            'language': 'en',  # Assumed or API could provide
-            'segments': segments
-        }
+        return _fetch_captions_raw(video_id, languages or caption_languages())
     except Exception as e:
         # Don't print huge stack traces for common "no caption" errors
-        error = str(e).lower()
-        if 'disabled' in error or 'not found' in error or 'no transcript' in error:
+        if _is_missing_captions_error(e):
             return None
         print(f"⚠️ Caption fetch failed: {e}")
         return None
 
 
+class AsyncCaptionFetcher:
+    """
+    asyncio-based caption fetcher shared by all ingest workers of a job.
+    
+    - Global concurrency limit across threads (one semaphore on a private loop)
+    - Exponential backoff with jitter on 429s, shared by every in-flight request
+      so the whole job slows down when YouTube starts throttling
+    - Language negotiation matching the job's --language
+    - Per-job latency/failure report via report()
+    
+    Usage:
+        fetcher = AsyncCaptionFetcher(language='de')
+        captions = fetcher.fetch_blocking(video_id)     # from worker threads
+        results = fetcher.fetch_all(video_ids)          # batch
+        print(fetcher.report())
+        fetcher.close()
+    """
+    
+    def __init__(self, language: str = "en", max_concurrency: int = None,
+                 max_retries: int = 4, base_delay: float = 2.0, max_delay: float = 60.0):
+        self.languages = caption_languages(language)
+        self.max_concurrency = max_concurrency or int(os.getenv('CAPTION_MAX_CONCURRENCY', 4))
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="caption-fetcher", daemon=True)
+        self._thread.start()
+        self._semaphore = asyncio.run_coroutine_threadsafe(self._make_semaphore(), self._loop).result()
+        self._cooldown_until = 0.0
+        self._records = []
+        self._records_lock = threading.Lock()
+    
+    async def _make_semaphore(self):
+        return asyncio.Semaphore(self.max_concurrency)
+    
+    async def _wait_for_cooldown(self):
+        # Loop: another request may extend the cooldown while we sleep
+        while self._cooldown_until > self._loop.time():
+            await asyncio.sleep(self._cooldown_until - self._loop.time())
+    
+    async def fetch(self, video_id: str) -> dict:
+        """Fetch captions for one video (coroutine, runs on the fetcher loop)."""
+        started = time.perf_counter()
+        status, error, attempts, result = 'no_captions', None, 0, None
+        
+        if not CAPTIONS_AVAILABLE:
+            status = 'unavailable'
+        else:
+            for attempt in range(self.max_retries + 1):
+                attempts = attempt + 1
+                await self._wait_for_cooldown()
+                try:
+                    async with self._semaphore:
+                        result = await self._loop.run_in_executor(None, _fetch_captions_raw, video_id, self.languages)
+                    status = 'ok'
+                    break
+                except Exception as e:
+                    if is_throttle_error(e) and attempt < self.max_retries:
+                        # Push back every request of this job, not just this one
+                        delay = min(self.max_delay, self.base_delay * (2 ** attempt)) + random.uniform(0, 1)
+                        self._cooldown_until = max(self._cooldown_until, self._loop.time() + delay)
+                        status = 'throttled'
+                        continue
+                    if is_throttle_error(e):
+                        status, error = 'throttled', str(e)[:200]
+                    elif _is_missing_captions_error(e):
+                        status = 'no_captions'
+                    else:
+                        status, error = 'error', str(e)[:200]
+                    break
+        
+        with self._records_lock:
+            self._records.append({
+                'video_id': video_id,
+                'status': status,
+                'attempts': attempts,
+                'latency_ms': round((time.perf_counter() - started) * 1000, 1),
+                'language': result.get('language') if result else None,
+                'error': error,
+            })
+        return result
+    
+    def fetch_blocking(self, video_id: str) -> dict:
+        """Fetch captions from any thread, respecting the shared limits."""
+        return asyncio.run_coroutine_threadsafe(self.fetch(video_id), self._loop).result()
+    
+    def fetch_all(self, video_ids: list[str]) -> dict:
+        """Fetch captions for many videos concurrently. Returns {video_id: captions or None}."""
+        async def gather():
+            results = await asyncio.gather(*(self.fetch(vid) for vid in video_ids))
+            return dict(zip(video_ids, results))
+        
+        return asyncio.run_coroutine_threadsafe(gather(), self._loop).result()
+    
+    def report(self) -> dict:
+        """Per-job summary of caption latency and failures."""
+        with self._records_lock:
+            records = list(self._records)
+        
+        latencies = sorted(r['latency_ms'] for r in records)
+        
+        def percentile(p):
+            if not latencies:
+                return 0.0
+            return latencies[min(len(latencies) - 1, int(round(p * (len(latencies) - 1))))]
+        
+        by_status = {}
+        for r in records:
+            by_status[r['status']] = by_status.get(r['status'], 0) + 1
+        
+        return {
+            'requests': len(records),
+            'ok': by_status.get('ok', 0),
+            'no_captions': by_status.get('no_captions', 0),
+            'throttled': by_status.get('throttled', 0),
+            'errors': by_status.get('error', 0),
+            'retries': sum(max(0, r['attempts'] - 1) for r in records),
+            'latency_p50_ms': percentile(0.5),
+            'latency_p95_ms': percentile(0.95),
+            'latency_max_ms': latencies[-1] if latencies else 0.0,
+            'languages': self.languages,
+            'max_concurrency': self.max_concurrency,
+            'failures': [r for r in records if r['status'] in ('throttled', 'error')],
+        }
+    
+    def close(self):
+        """Stop the fetcher loop."""
+        if self._loop.is_running():
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join(timeout=5)
+
+
 def process_video(url: str, api_key: str, model_name: str = "tiny", 
-                  temp_dir: Path = None, verbose: bool = True, max_comments: int = 200) -> dict:
+                  temp_dir: Path = None, verbose: bool = True, max_comments: int = 200,
+                  language: str = "en", caption_fetcher: AsyncCaptionFetcher = None,
+                  transcription_pool=None) -> dict:
     """
     Process a single YouTube video: download, transcribe, fetch comments.
     
@@ -392,6 +583,10 @@ def process_video(url: str, api_key: str, model_name: str = "tiny",
         model_name: Whisper model size
         temp_dir: Directory for temp audio files (default: ./data/.temp)
         verbose: Print progress messages
+        language: Preferred caption language (falls back to English, then any)
+        caption_fetcher: Shared AsyncCaptionFetcher for concurrency limits/backoff
+        transcription_pool: Optional transcription_pool.WhisperPool used only for
+            caption-less videos (opt-in local transcription)
         
     Returns:
         dict with keys:
@@ -410,7 +605,7 @@ def process_video(url: str, api_key: str, model_name: str = "tiny",
     video_id = extract_video_id(url)
     
     # Check Cache
-    cache_dir = temp_dir.parent / "cache"
+    cache_dir = Path(os.getenv('INGEST_CACHE_DIR') or temp_dir.parent / "cache")
     cache_dir.mkdir(parents=True, exist_ok=True)
     cache_file = cache_dir / f"{video_id}.json"
     
@@ -441,12 +636,23 @@ def process_video(url: str, api_key: str, model_name: str = "tiny",
     if verbose:
         print(f"   🔍 Checking for captions...")
     
-    caption_result = fetch_captions(video_id)
+    if caption_fetcher is not None:
+        caption_result = caption_fetcher.fetch_blocking(video_id)
+    else:
+        caption_result = fetch_captions(video_id, caption_languages(language))
     
     if caption_result:
         if verbose:
             print(f"   ✅ Captions found!")
         transcription = caption_result
+    elif transcription_pool is not None:
+        if verbose:
+            print(f"   🎙️ No captions found. Transcribing locally...")
+        transcription = transcription_pool.transcribe_video(url, video_id, temp_dir, verbose=verbose)
+        if not transcription or not transcription.get('text'):
+            if verbose:
+                print(f"   ❌ Local transcription unavailable. Skipping video.")
+            return None
     else:
         if verbose:
             print(f"   ❌ No captions found. Skipping video (Audio transcription disabled in fast mode).")
@@ -0,0 +1,267 @@
+#!/usr/bin/env python3
+"""
+Job Profiler - Per-stage wall/CPU/memory/network accounting for one job
+
+Wraps pipeline stages (and the premium tasks, which run as stages) and
+records for each:
+- wall time and CPU time of the stage thread
+- peak-RSS growth while the stage ran (process-wide high-water mark)
+- external HTTP calls and bytes sent/received (requests, httplib2 for the
+  YouTube client, httpx for the LLM SDKs), attributed to the stage that made
+  them - including work the stage submits to the shared I/O pool
+
+The result is attached to the report as `pipeline_timings` and can be
+exported as Chrome trace JSON (chrome://tracing, Perfetto).
+
+Disabled by default (--profile or PIPELINE_PROFILE=1). When disabled,
+`stage()` returns a shared no-op context and no HTTP hooks are installed.
+
+Usage:
+    profiler = JobProfiler(enabled=True)
+    with profiler.stage('ingest'):
+        ...
+    report['pipeline_timings'] = profiler.report()
+    profiler.write_chrome_trace('trace.json')
+"""
+
+import contextlib
+import json
+import os
+import resource
+import sys
+import threading
+import time
+from typing import Callable, Dict, List
+
+
+_NULL_CONTEXT = contextlib.nullcontext()
+
+# Profiler receiving HTTP call records (set while an enabled profiler is active)
+_active_profiler = None
+_hooks_installed = False
+_hooks_lock = threading.Lock()
+_stage_local = threading.local()
+
+
+def _peak_rss_mb() -> float:
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / (1024 * 1024) if sys.platform == 'darwin' else rss / 1024
+
+
+def current_stage() -> str:
+    """Stage the calling thread is working for ('' outside any stage)."""
+    return getattr(_stage_local, 'name', '')
+
+
+def bind_stage(fn: Callable) -> Callable:
+    """
+    Carry the caller's stage into work submitted to another thread, so calls
+    made from pool threads count towards the submitting stage.
+    Returns fn unchanged when no profiler is active.
+    """
+    if _active_profiler is None:
+        return fn
+    name = current_stage()
+
+    def run(*args, **kwargs):
+        previous = current_stage()
+        _stage_local.name = name
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            _stage_local.name = previous
+    return run
+
+
+def _record_call(kind: str, sent: int, received: int):
+    profiler = _active_profiler
+    if profiler is not None:
+        profiler.record_call(kind, sent, received)
+
+
+def _body_size(body) -> int:
+    if body is None:
+        return 0
+    if isinstance(body, (bytes, bytearray, str)):
+        return len(body)
+    return 0  # Streams/generators: size unknown
+
+
+def _install_http_hooks():
+    """Wrap the HTTP clients used by the pipeline (once per process)."""
+    global _hooks_installed
+    with _hooks_lock:
+        if _hooks_installed:
+            return
+        _hooks_installed = True
+
+    try:
+        import requests
+        original_send = requests.Session.send
+
+        def send(self, request, **kwargs):
+            response = original_send(self, request, **kwargs)
+            if kwargs.get('stream'):
+                received = int(response.headers.get('Content-Length') or 0)
+            else:
+                received = len(response.content or b'')
+            _record_call('requests', _body_size(request.body), received)
+            return response
+        requests.Session.send = send
+    except ImportError:
+        pass
+
+    try:
+        import httplib2
+        original_request = httplib2.Http.request
+
+        def http_request(self, uri, method='GET', body=None, *args, **kwargs):
+            response, content = original_request(self, uri, method, body, *args, **kwargs)
+            _record_call('httplib2', _body_size(body), len(content or b''))
+            return response, content
+        httplib2.Http.request = http_request
+    except ImportError:
+        pass
+
+    try:
+        import httpx
+        original_httpx_send = httpx.Client.send
+
+        def httpx_send(self, request, **kwargs):
+            response = original_httpx_send(self, request, **kwargs)
+            _record_call('httpx', len(request.content or b''), getattr(response, 'num_bytes_downloaded', 0))
+            return response
+        httpx.Client.send = httpx_send
+    except (ImportError, AttributeError):
+        pass
+
+
+class StageProfile:
+    """Measurements for one stage run."""
+
+    __slots__ = ('name', 'thread', 'tid', 'start', 'end', 'cpu_s', 'rss_growth_mb',
+                 'calls', 'bytes_sent', 'bytes_received', 'calls_by_client')
+
+    def __init__(self, name: str, start: float):
+        self.name = name
+        self.thread = threading.current_thread().name
+        self.tid = threading.get_ident()
+        self.start = start
+        self.end = start
+        self.cpu_s = 0.0
+        self.rss_growth_mb = 0.0
+        self.calls = 0
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self.calls_by_client: Dict[str, int] = {}
+
+    def to_dict(self) -> Dict:
+        return {
+            'stage': self.name,
+            'start_s': round(self.start, 3),
+            'wall_s': round(self.end - self.start, 3),
+            'cpu_s': round(self.cpu_s, 3),
+            'rss_growth_mb': round(self.rss_growth_mb, 1),
+            'external_calls': self.calls,
+            'calls_by_client': dict(self.calls_by_client),
+            'bytes_sent': self.bytes_sent,
+            'bytes_received': self.bytes_received,
+            'thread': self.thread,
+        }
+
+
+class JobProfiler:
+    """Collects StageProfiles for one job."""
+
+    def __init__(self, enabled: bool = None):
+        if enabled is None:
+            enabled = os.getenv('PIPELINE_PROFILE', '').lower() in ('1', 'true', 'yes')
+        self.enabled = enabled
+        self.stages: List[StageProfile] = []
+        self._open: Dict[str, StageProfile] = {}
+        self._unattributed = StageProfile('(job)', 0.0)
+        self._lock = threading.Lock()
+        self._t0 = time.perf_counter()
+        self._cpu0 = time.process_time()
+
+        if self.enabled:
+            global _active_profiler
+            _install_http_hooks()
+            _active_profiler = self
+
+    def stage(self, name: str):
+        """Context manager measuring one stage (no-op when disabled)."""
+        if not self.enabled:
+            return _NULL_CONTEXT
+        return self._measure(name)
+
+    @contextlib.contextmanager
+    def _measure(self, name: str):
+        profile = StageProfile(name, time.perf_counter() - self._t0)
+        previous = current_stage()
+        _stage_local.name = name
+        with self._lock:
+            self._open[name] = profile
+        cpu_start = time.thread_time()
+        rss_start = _peak_rss_mb()
+        try:
+            yield profile
+        finally:
+            profile.cpu_s = time.thread_time() - cpu_start
+            profile.rss_growth_mb = max(0.0, _peak_rss_mb() - rss_start)
+            profile.end = time.perf_counter() - self._t0
+            _stage_local.name = previous
+            with self._lock:
+                self._open.pop(name, None)
+                self.stages.append(profile)
+
+    def record_call(self, client: str, sent: int, received: int):
+        """Attribute one HTTP call to the calling thread's stage."""
+        with self._lock:
+            profile = self._open.get(current_stage(), self._unattributed)
+            profile.calls += 1
+            profile.bytes_sent += sent
+            profile.bytes_received += received
+            profile.calls_by_client[client] = profile.calls_by_client.get(client, 0) + 1
+
+    def close(self):
+        """Stop receiving HTTP call records."""
+        global _active_profiler
+        if _active_profiler is self:
+            _active_profiler = None
+
+    def report(self) -> Dict:
+        """Per-stage timings plus job totals (for the report's pipeline_timings)."""
+        with self._lock:
+            stages = sorted(self.stages, key=lambda p: p.start)
+            unattributed = self._unattributed
+            return {
+                'stages': [p.to_dict() for p in stages],
+                'total': {
+                    'wall_s': round(time.perf_counter() - self._t0, 3),
+                    'process_cpu_s': round(time.process_time() - self._cpu0, 3),
+                    'peak_rss_mb': round(_peak_rss_mb(), 1),
+                    'external_calls': sum(p.calls for p in stages) + unattributed.calls,
+                    'bytes_received': sum(p.bytes_received for p in stages) + unattributed.bytes_received,
+                    'unattributed_calls': unattributed.calls,
+                },
+            }
+
+    def chrome_trace(self) -> Dict:
+        """Stages as Chrome trace 'complete' events (one row per thread)."""
+        pid = os.getpid()
+        with self._lock:
+            events = [{
+                'name': p.name, 'cat': 'stage', 'ph': 'X', 'pid': pid, 'tid': p.tid,
+                'ts': int(p.start * 1e6), 'dur': int((p.end - p.start) * 1e6),
+                'args': {k: v for k, v in p.to_dict().items() if k not in ('stage', 'start_s', 'thread')},
+            } for p in self.stages]
+            threads = {p.tid: p.thread for p in self.stages}
+        events += [{'name': 'thread_name', 'ph': 'M', 'pid': pid, 'tid': tid, 'args': {'name': name}}
+                   for tid, name in threads.items()]
+        return {'traceEvents': events, 'displayTimeUnit': 'ms'}
+
+    def write_chrome_trace(self, path: str):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.chrome_trace(), f)
+        print(f"🧭 Chrome trace written to {path}")
@@ -0,0 +1,281 @@
+#!/usr/bin/env python3
+"""
+Metrics - Low-overhead in-process counters/histograms in Prometheus text format
+
+Two kinds of producers feed one registry per process:
+- the API server (job duration per tier, Supabase latency, rate-limit
+  rejections, queue gauges)
+- each GAP_ULTIMATE.py job subprocess (stage durations, LLM latency/tokens,
+  YouTube quota, cache hits), which prints its registry as one
+  `__METRICS__:` line at exit; the server merges it into its own registry
+
+No prometheus_client dependency: a metric is a dict of label tuple -> value
+(or bucket counts) behind a lock, so recording costs a dict update.
+
+Usage:
+    from metrics import LLM_LATENCY, get_registry
+    LLM_LATENCY.observe(1.8, provider='gemini')
+    text = get_registry().render()      # GET /metrics
+"""
+
+import json
+import threading
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, List, Sequence, Tuple
+
+
+METRICS_MARKER = '__METRICS__:'
+
+# Default latency buckets (seconds)
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+JOB_BUCKETS = (30, 60, 120, 180, 240, 300, 420, 600, 900)
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = '') -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return '{' + ','.join(parts) + '}' if parts else ''
+
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+
+class _Metric:
+    kind = ''
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple, object] = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict) -> Tuple:
+        return tuple(str(labels.get(n, '')) for n in self.labelnames)
+
+    def dump(self) -> List:
+        with self._lock:
+            return [[list(k), v] for k, v in self._values.items()]
+
+
+class Counter(_Metric):
+    """Monotonic counter."""
+    kind = 'counter'
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def get(self, **labels) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+    def merge(self, dumped: List):
+        with self._lock:
+            for key, value in dumped:
+                key = tuple(key)
+                self._values[key] = self._values.get(key, 0) + value
+
+    def render(self) -> List[str]:
+        with self._lock:
+            return [f"{self.name}{_format_labels(self.labelnames, k)} {_format_value(v)}"
+                    for k, v in sorted(self._values.items())]
+
+
+class Histogram(_Metric):
+    """Cumulative-bucket histogram (state per label set: [bucket counts..., sum, count])."""
+    kind = 'histogram'
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [0] * (len(self.buckets) + 1) + [0.0, 0]
+            state[index] += 1  # Last slot = above the highest bucket
+            state[-2] += value
+            state[-1] += 1
+
+    def time(self, **labels):
+        """Context manager observing the elapsed time of its block."""
+        return _Timer(self, labels)
+
+    def count(self, **labels) -> int:
+        with self._lock:
+            state = self._values.get(self._key(labels))
+            return state[-1] if state else 0
+
+    def merge(self, dumped: List):
+        with self._lock:
+            for key, other in dumped:
+                key = tuple(key)
+                if len(other) != len(self.buckets) + 3:
+                    continue  # Bucket layout changed between versions
+                state = self._values.get(key)
+                if state is None:
+                    self._values[key] = list(other)
+                else:
+                    for i, v in enumerate(other):
+                        state[i] += v
+
+    def render(self) -> List[str]:
+        lines = []
+        with self._lock:
+            for key, state in sorted(self._values.items()):
+                cumulative = 0
+                for bound, n in zip(self.buckets + (float('inf'),), state):
+                    cumulative += n
+                    le = _format_labels(self.labelnames, key, f'le="{_format_value(bound)}"')
+                    lines.append(f"{self.name}_bucket{le} {cumulative}")
+                labels = _format_labels(self.labelnames, key)
+                lines.append(f"{self.name}_sum{labels} {_format_value(state[-2])}")
+                lines.append(f"{self.name}_count{labels} {state[-1]}")
+        return lines
+
+
+class _Timer:
+    __slots__ = ('histogram', 'labels', 'start')
+
+    def __init__(self, histogram: Histogram, labels: Dict):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.start, **self.labels)
+        return False
+
+
+class MetricsRegistry:
+    """Named metrics plus gauges computed at scrape time."""
+
+    def __init__(self):
+        self.metrics: Dict[str, _Metric] = {}
+        self._gauges: Dict[str, Tuple[str, Callable[[], Dict]]] = {}
+
+    def counter(self, name: str, help_text: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self.metrics.setdefault(name, Counter(name, help_text, labelnames))
+
+    def histogram(self, name: str, help_text: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        return self.metrics.setdefault(name, Histogram(name, help_text, labelnames, buckets))
+
+    def gauge(self, name: str, help_text: str, fn: Callable[[], Dict]):
+        """Register a gauge read at scrape time; fn returns {label value or '': number}."""
+        self._gauges[name] = (help_text, fn)
+
+    def dump(self) -> Dict:
+        """Serializable state of metrics that recorded something."""
+        return {name: m.dump() for name, m in self.metrics.items() if m._values}
+
+    def dump_line(self) -> str:
+        """One stdout line the server picks up from a job subprocess."""
+        return METRICS_MARKER + json.dumps(self.dump(), separators=(',', ':'))
+
+    def merge(self, dumped: Dict):
+        """Add another process's dump() into this registry."""
+        for name, values in (dumped or {}).items():
+            metric = self.metrics.get(name)
+            if metric is not None:
+                metric.merge(values)
+
+    def render(self) -> str:
+        lines = []
+        for metric in self.metrics.values():
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.render())
+        for name, (help_text, fn) in self._gauges.items():
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} gauge")
+            try:
+                values = fn()
+            except Exception:
+                continue
+            for label, value in values.items():
+                label_str = f'{{{label}}}' if label else ''
+                lines.append(f"{name}{label_str} {_format_value(value)}")
+        return '\n'.join(lines) + '\n'
+
+
+_registry = MetricsRegistry()
+
+def get_registry() -> MetricsRegistry:
+    """Get the process-wide metrics registry."""
+    return _registry
+
+
+# === Metric definitions (shared by the server and job subprocesses) ===
+
+# Server
+JOB_DURATION = _registry.histogram('gapintel_job_duration_seconds',
+                                   'Analysis job wall time', ('tier', 'status'), JOB_BUCKETS)
+SUPABASE_LATENCY = _registry.histogram('gapintel_supabase_request_duration_seconds',
+                                       'Supabase REST request latency', ('operation',))
+RATE_LIMIT_REJECTIONS = _registry.counter('gapintel_rate_limit_rejections_total',
+                                          'Requests rejected by the per-IP rate limiter')
+JOBS_COALESCED = _registry.counter('gapintel_jobs_coalesced_total',
+                                   'Analyses served by an identical run', ('mode',))
+
+# Job subprocess
+STAGE_DURATION = _registry.histogram('gapintel_stage_duration_seconds',
+                                     'Pipeline stage wall time', ('stage', 'status'),
+                                     (0.1, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300))
+LLM_LATENCY = _registry.histogram('gapintel_llm_call_duration_seconds',
+                                  'LLM call latency', ('provider',), (0.5, 1, 2, 5, 10, 20, 30, 60, 120))
+LLM_TOKENS = _registry.counter('gapintel_llm_tokens_total', 'LLM tokens used', ('provider', 'kind'))
+LLM_ERRORS = _registry.counter('gapintel_llm_errors_total', 'Failed LLM calls', ('provider',))
+YOUTUBE_QUOTA = _registry.counter('gapintel_youtube_quota_units_total',
+                                  'YouTube Data API quota units consumed', ('method',))
+CACHE_REQUESTS = _registry.counter('gapintel_cache_requests_total',
+                                   'Cache lookups by cache and result', ('cache', 'result'))
+
+
+def record_cache_stats(cache: str, stats: Dict):
+    """Count hits/misses from a cache's stats() dict."""
+    if stats.get('hits'):
+        CACHE_REQUESTS.inc(stats['hits'], cache=cache, result='hit')
+    if stats.get('misses'):
+        CACHE_REQUESTS.inc(stats['misses'], cache=cache, result='miss')
+
+
+# YouTube Data API v3 quota cost per call (everything else we use costs 1)
+YOUTUBE_QUOTA_COSTS = {'youtube.search.list': 100}
+
+
+def meter_youtube_quota():
+    """Count quota units for every googleapiclient request executed in this process."""
+    try:
+        from googleapiclient.http import HttpRequest
+    except ImportError:
+        return
+    if getattr(HttpRequest.execute, '_quota_metered', False):
+        return
+    original_execute = HttpRequest.execute
+
+    def execute(self, *args, **kwargs):
+        method = getattr(self, 'methodId', None) or 'unknown'
+        # Quota is charged even when the call fails, so count before executing
+        YOUTUBE_QUOTA.inc(YOUTUBE_QUOTA_COSTS.get(method, 1), method=method)
+        return original_execute(self, *args, **kwargs)
+    execute._quota_metered = True
+    HttpRequest.execute = execute
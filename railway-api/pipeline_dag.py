@@ -0,0 +1,333 @@
+#!/usr/bin/env python3
+"""
+Pipeline DAG Executor
+
+Runs analysis stages as a dependency graph instead of a fixed sequence.
+Each stage declares the context keys it reads (inputs) and writes (outputs);
+a stage starts as soon as all of its inputs exist, so independent stages
+overlap (e.g. competitor discovery while comments are still being fetched).
+
+Usage:
+    dag = PipelineDAG(max_workers=4, io_workers=8)
+    dag.add('videos', fetch_videos, inputs=('channel_id',), outputs=('videos',), workload='io')
+    dag.add('ingest', ingest, inputs=('videos',), outputs=('videos_data',), workload='io')
+    context = dag.run({'channel_id': 'UC...'})
+    print(dag.trace_report())
+"""
+
+import contextlib
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Tuple
+
+from task_pools import WORKLOAD_CPU, WORKLOAD_IO
+
+
+_SKIPPED = object()  # Sentinel returned by stages skipped for the deadline
+
+
+class PipelineError(Exception):
+    """Raised when a required stage fails or the graph cannot make progress."""
+
+
+class Deadline:
+    """
+    Job-level wall-clock deadline shared by all stages.
+
+    Optional work checks `has(seconds)` before starting and records what it
+    dropped via `skip()`, so the report can list its skipped sections.
+    A Deadline without expires_at never runs out.
+    """
+
+    def __init__(self, expires_at: float = None):
+        self.expires_at = expires_at
+        self._skipped = []
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def remaining(self) -> float:
+        if self.expires_at is None:
+            return float('inf')
+        return self.expires_at - time.time()
+
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+    def has(self, seconds: float) -> bool:
+        """True if at least `seconds` remain before the deadline."""
+        return self.remaining() >= seconds
+
+    def skip(self, section: str, reason: str = 'deadline'):
+        """Record a section that was skipped or truncated."""
+        with self._lock:
+            if not any(s['section'] == section for s in self._skipped):
+                self._skipped.append({'section': section, 'reason': reason})
+        tracked = getattr(self._local, 'sections', None)
+        if tracked is not None:
+            tracked.append(section)
+        print(f"   ⏳ Skipping {section} ({reason}, {max(0, self.remaining()):.0f}s left)")
+
+    @property
+    def skipped(self) -> List[dict]:
+        with self._lock:
+            return list(self._skipped)
+
+    @contextlib.contextmanager
+    def tracking(self):
+        """Collect the sections skipped by the current thread (one stage run) into the yielded list."""
+        previous = getattr(self._local, 'sections', None)
+        self._local.sections = sections = []
+        try:
+            yield sections
+        finally:
+            self._local.sections = previous
+
+
+@dataclass
+class Stage:
+    """A single pipeline stage."""
+    name: str
+    fn: Callable[..., Dict]  # Called with inputs as kwargs, returns {output_key: value}
+    inputs: Tuple[str, ...] = ()
+    outputs: Tuple[str, ...] = ()
+    optional: bool = False  # On failure, outputs are set to None and dependents still run
+    workload: str = WORKLOAD_CPU  # 'io' stages run in their own lane
+    checkpoint: bool = False  # Save/restore outputs via a CheckpointStore
+    min_seconds: float = 0  # Optional stages are skipped if less time than this remains
+    restore: Callable[[Dict], Dict] = None  # Rebuilds outputs loaded from a checkpoint (None: stale, re-run)
+
+
+@dataclass
+class StageTiming:
+    """Timing record for one executed stage (seconds relative to run start)."""
+    stage: str
+    start: float
+    end: float
+    status: str  # 'ok', 'cached', 'failed', 'skipped'
+    thread: str = ''
+    error: str = None
+    deps: List[str] = field(default_factory=list)
+    workload: str = WORKLOAD_CPU
+
+    @property
+    def duration(self) -> float:
+        return self.end - self.start
+
+    def to_dict(self) -> dict:
+        return {
+            'stage': self.stage,
+            'start_s': round(self.start, 3),
+            'end_s': round(self.end, 3),
+            'duration_s': round(self.duration, 3),
+            'status': self.status,
+            'thread': self.thread,
+            'error': self.error,
+            'depends_on': self.deps,
+            'workload': self.workload,
+        }
+
+
+class PipelineDAG:
+    """
+    Thread-pool executor for a graph of stages.
+
+    Stages tagged workload='io' (API calls, downloads, LLM requests) run in a
+    separate lane of io_workers threads, so waiting on the network never
+    holds a slot that CPU-bound stages could use.
+    """
+
+    def __init__(self, max_workers: int = 4, io_workers: int = None):
+        self.max_workers = max_workers
+        self.io_workers = io_workers or max_workers
+        self.stages: Dict[str, Stage] = {}
+        self.trace: List[StageTiming] = []
+        self.abandoned = set()  # Optional stages given up on at the deadline
+        self._lock = threading.Lock()
+
+    def add(self, name: str, fn: Callable[..., Dict], inputs: Tuple[str, ...] = (),
+            outputs: Tuple[str, ...] = (), optional: bool = False,
+            workload: str = WORKLOAD_CPU, checkpoint: bool = False,
+            min_seconds: float = 0, restore: Callable[[Dict], Dict] = None) -> Stage:
+        """Register a stage."""
+        if name in self.stages:
+            raise ValueError(f"Duplicate stage: {name}")
+        if workload not in (WORKLOAD_CPU, WORKLOAD_IO):
+            raise ValueError(f"Unknown workload class for {name}: {workload}")
+        stage = Stage(name, fn, tuple(inputs), tuple(outputs), optional, workload, checkpoint,
+                      min_seconds, restore)
+        self.stages[name] = stage
+        return stage
+
+    def producers(self) -> Dict[str, str]:
+        """Map output key -> producing stage name."""
+        producers = {}
+        for stage in self.stages.values():
+            for key in stage.outputs:
+                if key in producers:
+                    raise ValueError(f"Output '{key}' produced by both {producers[key]} and {stage.name}")
+                producers[key] = stage.name
+        return producers
+
+    def validate(self, initial_keys) -> None:
+        """Check every input is produced somewhere and the graph is acyclic."""
+        producers = self.producers()
+        available = set(initial_keys)
+        for stage in self.stages.values():
+            missing = [k for k in stage.inputs if k not in producers and k not in available]
+            if missing:
+                raise ValueError(f"Stage '{stage.name}' needs unknown inputs: {missing}")
+
+        # Kahn's algorithm over stage dependencies
+        resolved = set(available)
+        remaining = dict(self.stages)
+        while remaining:
+            ready = [s for s in remaining.values() if all(k in resolved for k in s.inputs)]
+            if not ready:
+                raise ValueError(f"Cycle detected between stages: {sorted(remaining)}")
+            for s in ready:
+                resolved.update(s.outputs)
+                del remaining[s.name]
+
+    def run(self, context: Dict = None, checkpoints=None, deadline: Deadline = None,
+            profiler=None) -> Dict:
+        """
+        Execute all stages, returning the final context.
+        Raises PipelineError if a required stage fails.
+
+        With a CheckpointStore, stages registered with checkpoint=True whose
+        inputs are unchanged since a previous (interrupted) run are restored
+        instead of executed. Outputs that are None, or from a run that skipped
+        work for the deadline, are not saved.
+
+        With a Deadline, optional stages are skipped when less than their
+        min_seconds remain, and optional stages still running when it expires
+        are abandoned (outputs None). Required stages always run.
+
+        With a JobProfiler, each executed stage is measured (see job_profiler.py).
+        """
+        context = dict(context or {})
+        self.validate(context.keys())
+        producers = self.producers()
+
+        pending = dict(self.stages)
+        running = {}
+        t0 = time.perf_counter()
+        failure = None
+
+        started = {}
+
+        def record(stage: Stage, start: float, status: str, error: str = None):
+            timing = StageTiming(stage.name, start, time.perf_counter() - t0, status,
+                                 threading.current_thread().name, error[:300] if error else None,
+                                 sorted({producers[k] for k in stage.inputs if k in producers}),
+                                 stage.workload)
+            with self._lock:
+                if stage.name not in self.abandoned:
+                    self.trace.append(timing)
+
+        def execute(stage: Stage):
+            kwargs = {k: context[k] for k in stage.inputs}
+            start = time.perf_counter() - t0
+            started[stage.name] = start
+
+            if stage.optional and deadline is not None and not deadline.has(stage.min_seconds):
+                deadline.skip(stage.name)
+                record(stage, start, 'skipped', 'deadline')
+                return _SKIPPED
+
+            digest = None
+            if checkpoints is not None and stage.checkpoint:
+                digest = checkpoints.digest(stage.name, [kwargs[k] for k in stage.inputs])
+                hit, result = checkpoints.load(stage.name, digest)
+                if hit and stage.restore is not None:
+                    result = stage.restore(result)
+                    hit = result is not None  # Checkpoint refers to data that is gone
+                if hit:
+                    record(stage, start, 'cached')
+                    return result
+
+            try:
+                with profiler.stage(stage.name) if profiler is not None else contextlib.nullcontext(), \
+                        deadline.tracking() if deadline is not None else contextlib.nullcontext([]) as truncated:
+                    result = stage.fn(**kwargs) or {}
+            except Exception as e:
+                record(stage, start, 'failed', f"{type(e).__name__}: {e}")
+                if not stage.optional:
+                    raise
+                return None
+            if digest:
+                outputs = {k: result.get(k) for k in stage.outputs}
+                # Failed (None) or deadline-truncated outputs must be recomputed on resume
+                if truncated or any(v is None for v in outputs.values()):
+                    print(f"   ⚠️ Checkpoint skipped for {stage.name}: incomplete output")
+                else:
+                    checkpoints.save(stage.name, digest, outputs)
+            record(stage, start, 'ok')
+            return result
+
+        cpu_lane = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='stage')
+        io_lane = ThreadPoolExecutor(max_workers=self.io_workers, thread_name_prefix='stage-io')
+        try:
+            while pending or running:
+                ready = [s for s in pending.values() if all(k in context for k in s.inputs)]
+                for stage in ready:
+                    del pending[stage.name]
+                    lane = io_lane if stage.workload == WORKLOAD_IO else cpu_lane
+                    running[lane.submit(execute, stage)] = stage
+
+                if not running:
+                    raise PipelineError(f"Pipeline stalled; unresolved stages: {sorted(pending)}")
+
+                # Wake up at the deadline if optional stages could be abandoned
+                timeout = None
+                if deadline is not None and deadline.expires_at is not None \
+                        and any(s.optional for s in running.values()):
+                    timeout = max(0.0, deadline.remaining())
+
+                done, _ = wait(running, timeout=timeout, return_when=FIRST_COMPLETED)
+                if not done and deadline is not None and deadline.expired():
+                    for future, stage in list(running.items()):
+                        if not stage.optional:
+                            continue
+                        # Leave the thread running; its result is ignored
+                        running.pop(future)
+                        future.cancel()
+                        deadline.skip(stage.name, 'deadline (abandoned)')
+                        record(stage, started.get(stage.name, time.perf_counter() - t0), 'skipped', 'abandoned at deadline')
+                        with self._lock:
+                            self.abandoned.add(stage.name)
+                        for key in stage.outputs:
+                            context[key] = None
+
+                for future in done:
+                    stage = running.pop(future)
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        failure = failure or (stage.name, e)
+                        continue
+                    if result is _SKIPPED:
+                        result = {}
+                    elif result is None:
+                        print(f"   ⚠️ Optional stage '{stage.name}' failed - continuing without it")
+                        result = {}
+                    for key in stage.outputs:
+                        context[key] = result.get(key)
+
+                if failure:
+                    for future in running:
+                        future.cancel()
+                    name, error = failure
+                    raise PipelineError(f"Stage '{name}' failed: {error}") from error
+        finally:
+            # Don't block on abandoned stages; callers exit once the report is written
+            cpu_lane.shutdown(wait=not self.abandoned)
+            io_lane.shutdown(wait=not self.abandoned)
+
+        return context
+
+    def trace_report(self) -> List[dict]:
+        """Per-stage timing trace, ordered by start time."""
+        return [t.to_dict() for t in sorted(self.trace, key=lambda t: t.start)]
@@ -7,13 +7,14 @@ Features:
 - Correlates color palettes with view performance
 - Tracks warm/cool, contrast, saturation patterns
 - Recommends optimal color palette based on top performers
+
+All per-thumbnail math runs on an (N, 3, 3) dominant-color tensor, so
+niche-level benchmarks over thousands of thumbnails stay fast.
 """
 
 import numpy as np
-from dataclasses import dataclass, field
-from typing import List, Dict, Tuple, Optional
-from collections import Counter
-import colorsys
+from dataclasses import dataclass
+from typing import List, Dict, Tuple
 
 
 @dataclass
@@ -83,14 +84,199 @@ class ColorInsights:
         return result
 
 
+# Category labels; arrays below hold indices into these
+TEMPERATURES = ('warm', 'cool', 'neutral')
+SATURATION_LEVELS = ('high', 'medium', 'low')
+BRIGHTNESS_LEVELS = ('bright', 'medium', 'dark')
+
+# Dominant colors per thumbnail in the color tensor
+COLORS_PER_THUMBNAIL = 3
+FALLBACK_COLOR = (128, 128, 128)
+
+
+def rgb_to_hex(rgb) -> str:
+    return f"#{int(rgb[0]):02x}{int(rgb[1]):02x}{int(rgb[2]):02x}"
+
+
+def rgb_to_hls(rgb: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """colorsys.rgb_to_hls over an (..., 3) array of 0-255 colors; returns (h, l, s) arrays in 0-1."""
+    c = np.asarray(rgb, dtype=np.float64) / 255
+    r, g, b = c[..., 0], c[..., 1], c[..., 2]
+    maxc = c.max(axis=-1)
+    minc = c.min(axis=-1)
+    sumc = maxc + minc
+    rangec = maxc - minc
+    l = sumc / 2.0
+    gray = rangec == 0
+    safe_range = np.where(gray, 1.0, rangec)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        s = np.where(l <= 0.5, rangec / np.where(gray, 1.0, sumc), rangec / np.where(gray, 1.0, 2.0 - maxc - minc))
+    rc = (maxc - r) / safe_range
+    gc = (maxc - g) / safe_range
+    bc = (maxc - b) / safe_range
+    h = np.where(r == maxc, bc - gc, np.where(g == maxc, 2.0 + rc - bc, 4.0 + gc - rc))
+    h = (h / 6.0) % 1.0
+    return np.where(gray, 0.0, h), l, np.where(gray, 0.0, s)
+
+
+def classify_colors(rgb: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Temperature, saturation and brightness codes (indices into TEMPERATURES,
+    SATURATION_LEVELS, BRIGHTNESS_LEVELS) for an (N, 3) array of colors.
+    """
+    h, l, s = rgb_to_hls(rgb)
+    hue = h * 360
+    warm = ((hue >= 0) & (hue <= 60)) | ((hue >= 300) & (hue <= 360))
+    cool = (hue >= 180) & (hue <= 300)
+    temperature = np.select([s < 0.15, warm, cool], [2, 0, 1], default=2)  # Low saturation = neutral (gray-ish)
+    saturation = np.select([s > 0.7, s > 0.35], [0, 1], default=2)
+    brightness = np.select([l > 0.65, l > 0.35], [0, 1], default=2)
+    return temperature.astype(np.int8), saturation.astype(np.int8), brightness.astype(np.int8)
+
+
+def contrast_scores(colors: np.ndarray, mask: np.ndarray) -> np.ndarray:
+    """Max luminance difference between the valid dominant colors of each thumbnail (0 if < 2 colors)."""
+    lum = (0.299 * colors[..., 0] + 0.587 * colors[..., 1] + 0.114 * colors[..., 2]) / 255
+    spread = np.where(mask, lum, -np.inf).max(axis=1) - np.where(mask, lum, np.inf).min(axis=1)
+    spread = np.where(np.isfinite(spread), spread, 0.0)
+    rounded = np.round(spread, 2)
+    # np.round scales by 100 first and can land on the other side of .xx5; only those
+    # boundary values fall back to Python round() (exact half-way handling), so scores
+    # stay identical to the per-pair version
+    scaled = spread * 100
+    boundary = np.flatnonzero(np.abs(scaled - np.floor(scaled) - 0.5) < 1e-6)
+    rounded[boundary] = [round(float(x), 2) for x in spread[boundary]]
+    return np.where(mask.sum(axis=1) >= 2, rounded, 0.0)
+
+
+def distinct_counts(colors: np.ndarray, mask: np.ndarray) -> np.ndarray:
+    """Number of distinct valid colors per thumbnail."""
+    same = np.all(colors[:, :, None, :] == colors[:, None, :, :], axis=-1) & mask[:, None, :]
+    # A color counts if no earlier valid color equals it
+    earlier = np.tril(np.ones((colors.shape[1],) * 2, dtype=bool), k=-1)
+    return (mask & ~np.any(same & earlier, axis=2)).sum(axis=1)
+
+
+def color_tensor(features_list: List[Dict]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    (N, 3, 3) int tensor of dominant colors and an (N, 3) validity mask from
+    ThumbnailFeatureExtractor feature dicts. Valid colors are packed to the
+    front; thumbnails without any get FALLBACK_COLOR.
+    """
+    colors = np.zeros((len(features_list), COLORS_PER_THUMBNAIL, 3), dtype=np.int64)
+    mask = np.zeros((len(features_list), COLORS_PER_THUMBNAIL), dtype=bool)
+    for i, features in enumerate(features_list):
+        k = 0
+        for key in ('dominant_color_1', 'dominant_color_2', 'dominant_color_3'):
+            color = features.get(key)
+            if isinstance(color, (list, tuple)) and len(color) == 3:
+                colors[i, k] = color
+                mask[i, k] = True
+                k += 1
+        if k == 0:
+            colors[i, 0] = FALLBACK_COLOR
+            mask[i, 0] = True
+    return colors, mask
+
+
+def _pack(colors: np.ndarray) -> np.ndarray:
+    """RGB -> single int (0xRRGGBB) so colors can be grouped with np.unique."""
+    return (colors[..., 0] << 16) | (colors[..., 1] << 8) | colors[..., 2]
+
+
+def _unpack_hex(code: int) -> str:
+    return f"#{int(code):06x}"
+
+
+def _counts_by_first_seen(codes: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """(unique codes, counts, first index) ordered by first appearance, like Counter's dict order."""
+    if codes.size == 0:
+        empty = np.zeros(0, dtype=np.int64)
+        return empty, empty, empty
+    uniq, first, counts = np.unique(codes, return_index=True, return_counts=True)
+    order = np.argsort(first, kind='stable')
+    return uniq[order], counts[order], first[order]
+
+
+def _most_common(codes: np.ndarray, k: int) -> np.ndarray:
+    """Counter(codes).most_common(k) keys: by count, ties by first appearance."""
+    uniq, counts, first = _counts_by_first_seen(codes)
+    return uniq[np.lexsort((first, -counts))][:k]
+
+
+@dataclass
+class ColorBatch:
+    """
+    Array form of many ColorProfiles: one row per thumbnail, categorical
+    fields as indices into TEMPERATURES / SATURATION_LEVELS / BRIGHTNESS_LEVELS.
+    Niche-level benchmarks with thousands of thumbnails stay in this form.
+    """
+    video_ids: List[str]
+    titles: List[str]
+    views: np.ndarray  # (N,) int64
+    colors: np.ndarray  # (N, 3, 3) int64 RGB
+    mask: np.ndarray  # (N, 3) valid colors
+    temperature: np.ndarray  # (N,) codes of the primary color
+    saturation: np.ndarray
+    brightness: np.ndarray
+    contrast: np.ndarray  # (N,) 0-1
+    diversity: np.ndarray  # (N,) distinct colors
+    
+    def __len__(self) -> int:
+        return len(self.video_ids)
+    
+    @classmethod
+    def from_profiles(cls, profiles: List[ColorProfile]) -> 'ColorBatch':
+        colors = np.zeros((len(profiles), COLORS_PER_THUMBNAIL, 3), dtype=np.int64)
+        mask = np.zeros((len(profiles), COLORS_PER_THUMBNAIL), dtype=bool)
+        for i, p in enumerate(profiles):
+            row = p.dominant_colors[:COLORS_PER_THUMBNAIL]
+            colors[i, :len(row)] = row
+            mask[i, :len(row)] = True
+        return cls(
+            video_ids=[p.video_id for p in profiles],
+            titles=[p.video_title for p in profiles],
+            views=np.array([p.view_count for p in profiles], dtype=np.int64),
+            colors=colors,
+            mask=mask,
+            temperature=np.array([TEMPERATURES.index(p.color_temperature) for p in profiles], dtype=np.int8),
+            saturation=np.array([SATURATION_LEVELS.index(p.saturation_level) for p in profiles], dtype=np.int8),
+            brightness=np.array([BRIGHTNESS_LEVELS.index(p.brightness_level) for p in profiles], dtype=np.int8),
+            contrast=np.array([p.contrast_score for p in profiles], dtype=np.float64),
+            diversity=np.array([p.color_diversity for p in profiles], dtype=np.int64),
+        )
+    
+    def row_colors(self, i: int) -> List[Tuple[int, int, int]]:
+        return [tuple(int(v) for v in c) for c in self.colors[i][self.mask[i]]]
+    
+    def profiles(self) -> List[ColorProfile]:
+        return [ColorProfile(
+            video_id=self.video_ids[i],
+            video_title=self.titles[i],
+            view_count=int(self.views[i]),
+            dominant_colors=self.row_colors(i),
+            color_temperature=TEMPERATURES[self.temperature[i]],
+            saturation_level=SATURATION_LEVELS[self.saturation[i]],
+            brightness_level=BRIGHTNESS_LEVELS[self.brightness[i]],
+            contrast_score=float(self.contrast[i]),
+            color_diversity=int(self.diversity[i]),
+        ) for i in range(len(self))]
+
+
 class ColorMLAnalyzer:
     """
     Analyzes thumbnail colors and correlates with view performance.
     
+    Classification, contrast and the top/bottom performer statistics run on
+    NumPy arrays (a ColorBatch) rather than per-color Python loops.
+    
     Usage:
         analyzer = ColorMLAnalyzer()
         profiles = analyzer.analyze_thumbnails(videos_with_features)
         insights = analyzer.generate_insights(profiles)
+    
+        # Thousands of thumbnails: skip the per-video objects
+        insights = analyzer.generate_insights(analyzer.build_batch(videos_with_features))
     """
     
     # Color temperature classification (based on hue)
@@ -102,65 +288,46 @@ class ColorMLAnalyzer:
     
     def classify_temperature(self, rgb: Tuple[int, int, int]) -> str:
         """Classify a color as warm, cool, or neutral."""
-        r, g, b = rgb
-        h, l, s = colorsys.rgb_to_hls(r/255, g/255, b/255)
-        hue = h * 360
-        
-        # Low saturation = neutral (gray-ish)
-        if s < 0.15:
-            return 'neutral'
-        
-        # Check warm hues
-        for start, end in self.WARM_HUES:
-            if start <= hue <= end:
-                return 'warm'
-        
-        # Check cool hues
-        for start, end in self.COOL_HUES:
-            if start <= hue <= end:
-                return 'cool'
-        
-        return 'neutral'
+        return TEMPERATURES[classify_colors(np.array([rgb]))[0][0]]
     
     def classify_saturation(self, rgb: Tuple[int, int, int]) -> str:
         """Classify saturation level."""
-        r, g, b = rgb
-        h, l, s = colorsys.rgb_to_hls(r/255, g/255, b/255)
-        
-        if s > 0.7:
-            return 'high'
-        elif s > 0.35:
-            return 'medium'
-        else:
-            return 'low'
+        return SATURATION_LEVELS[classify_colors(np.array([rgb]))[1][0]]
     
     def classify_brightness(self, rgb: Tuple[int, int, int]) -> str:
         """Classify brightness level."""
-        r, g, b = rgb
-        h, l, s = colorsys.rgb_to_hls(r/255, g/255, b/255)
-        
-        if l > 0.65:
-            return 'bright'
-        elif l > 0.35:
-            return 'medium'
-        else:
-            return 'dark'
+        return BRIGHTNESS_LEVELS[classify_colors(np.array([rgb]))[2][0]]
     
     def calculate_contrast(self, colors: List[Tuple[int, int, int]]) -> float:
         """Calculate contrast between dominant colors."""
         if len(colors) < 2:
             return 0.0
+        arr = np.array([colors], dtype=np.int64)
+        return float(contrast_scores(arr, np.ones(arr.shape[:2], dtype=bool))[0])
+    
+    def build_batch(self, videos_with_features: List[Dict]) -> ColorBatch:
+        """
+        Classify many thumbnails at once.
         
-        max_contrast = 0
-        for i, c1 in enumerate(colors):
-            for c2 in colors[i+1:]:
-                # Calculate relative luminance difference
-                l1 = (0.299 * c1[0] + 0.587 * c1[1] + 0.114 * c1[2]) / 255
-                l2 = (0.299 * c2[0] + 0.587 * c2[1] + 0.114 * c2[2]) / 255
-                contrast = abs(l1 - l2)
-                max_contrast = max(max_contrast, contrast)
-        
-        return round(max_contrast, 2)
+        Args:
+            videos_with_features: List of dicts with video_data and thumbnail_features
+        """
+        video_data = [item.get('video_data', item) for item in videos_with_features]
+        colors, mask = color_tensor([item.get('thumbnail_features', {}) for item in videos_with_features])
+        # Classify using first dominant color
+        temperature, saturation, brightness = classify_colors(colors[:, 0, :])
+        return ColorBatch(
+            video_ids=[v.get('video_id', '') for v in video_data],
+            titles=[v.get('title', '') for v in video_data],
+            views=np.array([v.get('view_count', 0) or 0 for v in video_data], dtype=np.int64),
+            colors=colors,
+            mask=mask,
+            temperature=temperature,
+            saturation=saturation,
+            brightness=brightness,
+            contrast=contrast_scores(colors, mask),
+            diversity=distinct_counts(colors, mask),
+        )
     
     def analyze_thumbnail_colors(self, video_data: dict, thumbnail_features: dict) -> ColorProfile:
         """
@@ -173,32 +340,7 @@ class ColorMLAnalyzer:
         Returns:
             ColorProfile analysis
         """
-        # Extract dominant colors from features
-        dominant_colors = []
-        for key in ['dominant_color_1', 'dominant_color_2', 'dominant_color_3']:
-            if key in thumbnail_features:
-                color = thumbnail_features[key]
-                if isinstance(color, (list, tuple)) and len(color) == 3:
-                    dominant_colors.append(tuple(color))
-        
-        if not dominant_colors:
-            # Default fallback
-            dominant_colors = [(128, 128, 128)]
-        
-        # Classify using first dominant color
-        primary_color = dominant_colors[0]
-        
-        return ColorProfile(
-            video_id=video_data.get('video_id', ''),
-            video_title=video_data.get('title', ''),
-            view_count=video_data.get('view_count', 0),
-            dominant_colors=dominant_colors,
-            color_temperature=self.classify_temperature(primary_color),
-            saturation_level=self.classify_saturation(primary_color),
-            brightness_level=self.classify_brightness(primary_color),
-            contrast_score=self.calculate_contrast(dominant_colors),
-            color_diversity=len(set(dominant_colors)),
-        )
+        return self.analyze_thumbnails([{'video_data': video_data, 'thumbnail_features': thumbnail_features}])[0]
     
     def analyze_thumbnails(self, videos_with_features: List[Dict]) -> List[ColorProfile]:
         """
@@ -210,28 +352,22 @@ class ColorMLAnalyzer:
         Returns:
             List of ColorProfile
         """
-        profiles = []
-        for item in videos_with_features:
-            video_data = item.get('video_data', item)
-            features = item.get('thumbnail_features', {})
-            
-            profile = self.analyze_thumbnail_colors(video_data, features)
-            profiles.append(profile)
-        
-        return profiles
+        return self.build_batch(videos_with_features).profiles()
     
-    def generate_insights(self, profiles: List[ColorProfile]) -> ColorInsights:
+    def generate_insights(self, profiles) -> ColorInsights:
         """
         Generate aggregated color performance insights.
         Enhanced to compare top 25% vs bottom 25% performers.
         
         Args:
-            profiles: List of ColorProfile analyses
+            profiles: List of ColorProfile analyses, or a ColorBatch
             
         Returns:
             ColorInsights with recommendations
         """
-        if not profiles:
+        batch = profiles if isinstance(profiles, ColorBatch) else ColorBatch.from_profiles(profiles)
+        n = len(batch)
+        if n == 0:
             return ColorInsights(
                 total_videos=0,
                 best_color_temperatures=[],
@@ -242,62 +378,26 @@ class ColorMLAnalyzer:
                 saturation_performance={},
                 brightness_performance={},
             )
+        views = batch.views
         
-        # Sort profiles by view count to compare top vs bottom
-        sorted_profiles = sorted(profiles, key=lambda p: p.view_count, reverse=True)
-        n = len(sorted_profiles)
+        # Sort by view count (stable, so ties keep input order) to compare top vs bottom
+        order = np.argsort(-views, kind='stable')
         quartile_size = max(1, n // 4)
+        top = order[:quartile_size]  # Top 25%
+        bottom = order[-quartile_size:] if n > 1 else order[:0]  # Bottom 25%
         
-        top_performers = sorted_profiles[:quartile_size]  # Top 25%
-        bottom_performers = sorted_profiles[-quartile_size:] if n > 1 else []  # Bottom 25%
+        def avg_views(idx) -> float:
+            return float(views[idx].mean()) if len(idx) else 0
         
-        # Group by temperature
-        temp_views = {'warm': [], 'cool': [], 'neutral': []}
-        sat_views = {'high': [], 'medium': [], 'low': []}
-        bright_views = {'bright': [], 'medium': [], 'dark': []}
+        # Average views per category
+        def performance(codes: np.ndarray, labels: Tuple[str, ...]) -> Dict[str, float]:
+            counts = np.bincount(codes, minlength=len(labels))
+            sums = np.bincount(codes, weights=views, minlength=len(labels))
+            return {label: float(sums[i] / counts[i]) for i, label in enumerate(labels) if counts[i]}
         
-        all_colors = []
-        color_views = {}  # hex -> [views]
-        
-        # Track colors for top vs bottom comparison
-        top_colors_list = []
-        bottom_colors_list = []
-        top_temps = []
-        bottom_temps = []
-        
-        for profile in profiles:
-            temp_views[profile.color_temperature].append(profile.view_count)
-            sat_views[profile.saturation_level].append(profile.view_count)
-            bright_views[profile.brightness_level].append(profile.view_count)
-            
-            for color in profile.dominant_colors:
-                hex_color = f"#{color[0]:02x}{color[1]:02x}{color[2]:02x}"
-                all_colors.append(hex_color)
-                if hex_color not in color_views:
-                    color_views[hex_color] = []
-                color_views[hex_color].append(profile.view_count)
-        
-        # Analyze top performers specifically
-        for profile in top_performers:
-            top_temps.append(profile.color_temperature)
-            for color in profile.dominant_colors:
-                hex_color = f"#{color[0]:02x}{color[1]:02x}{color[2]:02x}"
-                top_colors_list.append(hex_color)
-        
-        # Analyze bottom performers
-        for profile in bottom_performers:
-            bottom_temps.append(profile.color_temperature)
-            for color in profile.dominant_colors:
-                hex_color = f"#{color[0]:02x}{color[1]:02x}{color[2]:02x}"
-                bottom_colors_list.append(hex_color)
-        
-        # Calculate averages
-        def avg_views(views_list):
-            return sum(views_list) / len(views_list) if views_list else 0
-        
-        temperature_performance = {k: avg_views(v) for k, v in temp_views.items() if v}
-        saturation_performance = {k: avg_views(v) for k, v in sat_views.items() if v}
-        brightness_performance = {k: avg_views(v) for k, v in bright_views.items() if v}
+        temperature_performance = performance(batch.temperature, TEMPERATURES)
+        saturation_performance = performance(batch.saturation, SATURATION_LEVELS)
+        brightness_performance = performance(batch.brightness, BRIGHTNESS_LEVELS)
         
         # Sort by performance
         best_temps = sorted(
@@ -310,23 +410,32 @@ class ColorMLAnalyzer:
             key=lambda x: x['avg_views'], reverse=True
         )
         
-        # Top performing individual colors
-        color_avg = {k: avg_views(v) for k, v in color_views.items()}
-        top_colors = sorted(color_avg.items(), key=lambda x: x[1], reverse=True)[:5]
-        
-        # Count most common patterns in top vs bottom
-        top_temp_counts = Counter(top_temps)
-        bottom_temp_counts = Counter(bottom_temps)
-        top_color_counts = Counter(top_colors_list)
-        bottom_color_counts = Counter(bottom_colors_list)
+        # Top performing individual colors: average views per color (ties: first seen)
+        codes = _pack(batch.colors)
+        color_codes = codes[batch.mask]
+        color_view_sums = np.broadcast_to(views[:, None], batch.mask.shape)[batch.mask]
+        uniq, first, inverse = np.unique(color_codes, return_index=True, return_inverse=True)
+        color_avg = np.bincount(inverse, weights=color_view_sums) / np.bincount(inverse)
+        ranked = np.lexsort((first, -color_avg))[:5]
+        top_colors = [(_unpack_hex(uniq[i]), float(color_avg[i])) for i in ranked]
+        
+        # Most common patterns in top vs bottom
+        def temp_counts(idx) -> Dict[str, int]:
+            uniq_t, counts_t, _ = _counts_by_first_seen(batch.temperature[idx])
+            return {TEMPERATURES[t]: int(c) for t, c in zip(uniq_t, counts_t)}
+        
+        top_temp_counts = temp_counts(top)
+        bottom_temp_counts = temp_counts(bottom)
+        top_color_codes = codes[top][batch.mask[top]]
+        bottom_color_codes = codes[bottom][batch.mask[bottom]]
         
         # Generate recommendations with comparison
         recommendations = []
         
         # Compare temperatures
         if top_temp_counts and bottom_temp_counts:
-            winner_temp = top_temp_counts.most_common(1)[0][0] if top_temp_counts else 'neutral'
-            loser_temp = bottom_temp_counts.most_common(1)[0][0] if bottom_temp_counts else 'neutral'
+            winner_temp = max(top_temp_counts, key=top_temp_counts.get)
+            loser_temp = max(bottom_temp_counts, key=bottom_temp_counts.get)
             if winner_temp != loser_temp:
                 recommendations.append(f"Use {winner_temp} colors - top videos prefer {winner_temp} while underperformers use {loser_temp}")
         elif best_temps:
@@ -338,31 +447,21 @@ class ColorMLAnalyzer:
         if top_colors:
             recommendations.append(f"Top color: {top_colors[0][0]} ({top_colors[0][1]:,.0f} avg views)")
             
-        # Build video examples (top 3 winners per temperature category)
+        # Build video examples (top 2 winners per temperature category)
         video_examples = []
-        for temp in ['warm', 'cool', 'neutral']:
-            # Find videos with this temp
-            temp_profiles = [p for p in profiles if p.color_temperature == temp]
-            if not temp_profiles:
-                continue
-                
-            # Sort by views
-            temp_profiles.sort(key=lambda p: p.view_count, reverse=True)
-            
-            # Add top 2
-            for p in temp_profiles[:2]:
+        for code, temp in enumerate(TEMPERATURES):
+            for i in order[batch.temperature[order] == code][:2]:
                 video_examples.append({
-                    'video_id': p.video_id,
-                    'title': p.video_title,
-                    'views': p.view_count,
-                    'thumbnail_url': f"https://img.youtube.com/vi/{p.video_id}/maxresdefault.jpg",
-                    'colors': [self._rgb_to_hex(c) for c in p.dominant_colors[:3]],
-                    'temperature': p.color_temperature,
+                    'video_id': batch.video_ids[i],
+                    'title': batch.titles[i],
+                    'views': int(views[i]),
+                    'thumbnail_url': f"https://img.youtube.com/vi/{batch.video_ids[i]}/maxresdefault.jpg",
+                    'colors': [rgb_to_hex(c) for c in batch.row_colors(i)[:3]],
+                    'temperature': temp,
                 })
         
-        # Add comparison data to the result
         insights = ColorInsights(
-            total_videos=len(profiles),
+            total_videos=n,
             best_color_temperatures=best_temps,
             best_saturation_levels=best_sats,
             top_performing_colors=[c[0] for c in top_colors],
@@ -373,25 +472,21 @@ class ColorMLAnalyzer:
             video_examples=video_examples,
         )
         
-        # Add extra comparison data
-        insights_dict = insights.to_dict()
-        insights_dict['comparison'] = {
+        # Extra comparison data (duck-type compatible, emitted by to_dict)
+        insights._comparison = {
             'top_25_percent': {
-                'count': len(top_performers),
-                'avg_views': avg_views([p.view_count for p in top_performers]),
-                'dominant_temperatures': dict(top_temp_counts),
-                'top_colors': [c[0] for c in top_color_counts.most_common(3)]
+                'count': len(top),
+                'avg_views': avg_views(top),
+                'dominant_temperatures': top_temp_counts,
+                'top_colors': [_unpack_hex(c) for c in _most_common(top_color_codes, 3)]
             },
             'bottom_25_percent': {
-                'count': len(bottom_performers),
-                'avg_views': avg_views([p.view_count for p in bottom_performers]),
-                'dominant_temperatures': dict(bottom_temp_counts),
-                'top_colors': [c[0] for c in bottom_color_counts.most_common(3)]
+                'count': len(bottom),
+                'avg_views': avg_views(bottom),
+                'dominant_temperatures': bottom_temp_counts,
+                'top_colors': [_unpack_hex(c) for c in _most_common(bottom_color_codes, 3)]
             }
         }
-        
-        # Return enriched insights (duck-type compatible)
-        insights._comparison = insights_dict['comparison']
         return insights
 
 
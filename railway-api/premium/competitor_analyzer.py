@@ -7,6 +7,10 @@ from typing import Dict, List, Optional
 from dataclasses import dataclass, asdict
 from datetime import datetime, timedelta
 
+# Our namespace in the shared thumbnail index, and the attributes a hit must have
+INDEX_PRODUCER = 'competitor'
+INDEX_KEYS = ('face_count', 'has_text', 'contrast_score')
+
 
 @dataclass
 class CompetitorInsight:
@@ -107,7 +111,7 @@ class CompetitorAnalyzer:
         top_videos = sorted(videos, key=lambda v: v['view_count'], reverse=True)[:5]
         
         # Analyze thumbnail patterns
-        thumbnail_patterns = self._analyze_thumbnail_patterns(videos)
+        thumbnail_patterns = self._analyze_thumbnail_patterns(videos, channel_id)
         
         # Analyze title patterns
         title_patterns = self._analyze_title_patterns(videos)
@@ -228,8 +232,14 @@ class CompetitorAnalyzer:
         
         return sorted(format_counts.keys(), key=lambda f: format_counts[f], reverse=True)[:3]
     
-    def _analyze_thumbnail_patterns(self, videos: List[Dict]) -> Dict:
-        """Analyze common patterns in thumbnails."""
+    def _analyze_thumbnail_patterns(self, videos: List[Dict], channel_id: Optional[str] = None) -> Dict:
+        """
+        Analyze common patterns in thumbnails.
+        
+        Thumbnails already in the thumbnail index are read from it instead of
+        being re-downloaded and re-extracted; new ones are extracted and added.
+        Also reports how lookalike thumbnails from other channels performed.
+        """
         patterns = {
             'analyzed_count': 0,
             'common_elements': [],
@@ -241,31 +251,57 @@ class CompetitorAnalyzer:
             patterns['note'] = 'Thumbnail extractor not available for deep analysis'
             return patterns
         
+        from premium.db.thumbnail_cache import get_thumbnail_cache
+        from premium.db.thumbnail_index import describe_thumbnail, get_thumbnail_index, summarize_neighbors
+        index = get_thumbnail_index()
+        
         # Sample top performers for analysis
         top_videos = sorted(videos, key=lambda v: v['view_count'], reverse=True)[:5]
+        avg_views = sum(v['view_count'] for v in videos) / len(videos) if videos else 0
         
         face_count = 0
         text_count = 0
         high_contrast = 0
+        index_hits = 0
+        top_video_id = None
         
         for video in top_videos:
             if not video.get('thumbnail_url'):
                 continue
             
             try:
-                features = self.thumbnail_extractor.extract_from_url(video['thumbnail_url'])
+                video_id = video.get('video_id')
+                entry = index.get(video_id, producer=INDEX_PRODUCER, keys=INDEX_KEYS) if video_id else None
+                if entry:
+                    attributes = entry['attributes'][INDEX_PRODUCER]
+                    index_hits += 1
+                else:
+                    features = self.thumbnail_extractor.extract_from_url(video['thumbnail_url'], video_id)
+                    attributes = {
+                        'face_count': features.face_count,
+                        'has_text': features.has_text,
+                        'contrast_score': features.contrast_score,
+                    }
+                    fetched = get_thumbnail_cache().fetch(video['thumbnail_url'], video_id) if video_id else None
+                    if fetched:
+                        index.add(video_id, describe_thumbnail(fetched[1]), INDEX_PRODUCER, channel_id=channel_id,
+                                  content_hash=fetched[0], views=video['view_count'],
+                                  performance=round(video['view_count'] / avg_views, 3) if avg_views else None,
+                                  style=features.estimated_style, attributes=attributes)
                 patterns['analyzed_count'] += 1
+                top_video_id = top_video_id or video_id
                 
-                if features.face_count > 0:
+                if attributes.get('face_count', 0) > 0:
                     face_count += 1
-                if features.has_text:
+                if attributes.get('has_text'):
                     text_count += 1
-                if features.contrast_score > 0.3:
+                if attributes.get('contrast_score', 0) > 0.3:
                     high_contrast += 1
             except:
                 continue
         
         total = patterns['analyzed_count'] or 1
+        patterns['index_hits'] = index_hits
         
         if face_count / total > 0.6:
             patterns['common_elements'].append('Faces in thumbnails')
@@ -274,6 +310,13 @@ class CompetitorAnalyzer:
         if high_contrast / total > 0.6:
             patterns['common_elements'].append('High contrast colors')
         
+        # How thumbnails that look like their best one did on other channels
+        descriptor = index.descriptor(top_video_id) if top_video_id else None
+        if descriptor is not None:
+            neighbors = index.similar(descriptor, k=10, exclude_channel=channel_id)
+            if neighbors:
+                patterns['lookalikes'] = summarize_neighbors(neighbors, INDEX_PRODUCER)
+        
         return patterns
     
     def _analyze_title_patterns(self, videos: List[Dict]) -> Dict:
@@ -0,0 +1,43 @@
+"""
+Premium Analysis - CPU-bound task kernels
+
+Module-level (picklable) functions submitted to the shared process pool
+(task_pools.WORKLOAD_CPU). Keep inputs/outputs to plain data so they pickle
+cheaply; one extractor/clusterer is created per worker process.
+"""
+
+from typing import Dict, List
+
+
+# Worker-process globals (created lazily, reused across submissions)
+_extractors = {}  # worker_options -> ThumbnailFeatureExtractor
+_clusterer = None
+
+
+def download_thumbnail(url: str) -> bytes:
+    """Thumbnail bytes via the shared thumbnail cache (I/O pool). Returns None on failure."""
+    from premium.db.thumbnail_cache import get_thumbnail_cache
+    return get_thumbnail_cache().get_bytes(url)
+
+
+def extract_thumbnail_features(image_bytes: bytes, options: Dict = None) -> Dict:
+    """
+    Features for one thumbnail. options are ThumbnailFeatureExtractor.worker_options();
+    by default face detection / OCR stay off (crash-prone on Mac, heavy models).
+    """
+    from premium.thumbnail_extractor import ThumbnailFeatureExtractor
+    options = options or {'use_ocr': False, 'use_face_detection': False}
+    key = tuple(sorted(options.items()))
+    extractor = _extractors.get(key)
+    if extractor is None:
+        extractor = _extractors[key] = ThumbnailFeatureExtractor(**options)
+    return extractor.extract_from_bytes(image_bytes).to_dict()
+
+
+def cluster_content(videos: List[Dict], n_clusters: int):
+    """Cluster channel videos by title (sklearn). Returns a ClusteringResult."""
+    global _clusterer
+    from premium.ml_models.content_clusterer import ContentClusteringEngine
+    if _clusterer is None:
+        _clusterer = ContentClusteringEngine(use_embeddings=False)
+    return _clusterer.cluster_channel_content(videos, n_clusters=n_clusters)
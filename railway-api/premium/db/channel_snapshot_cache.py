@@ -0,0 +1,180 @@
+"""
+Channel Snapshot Cache - Cross-job cache with single-flight fetches
+
+Analysis jobs run as separate GAP_ULTIMATE.py processes on the same box,
+and popular channels / niche competitors show up in many of them. This
+cache shares the YouTube lookups between jobs:
+- handle -> (channel id, title)        (24h TTL)
+- channel id -> uploads playlist id    (24h TTL)
+- playlist -> recent videos with stats (15 min TTL)
+- competitor channel snapshots         (6h TTL)
+
+Single-flight: concurrent requests for the same key (threads in one job or
+other jobs' processes) wait on one fetch instead of each calling the API.
+Cross-process waiting uses an fcntl lock file per key.
+
+Layout:
+    data/channel_snapshots/<kind>/<sha1(key)>.json
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional
+
+try:
+    import fcntl
+    FCNTL_AVAILABLE = True
+except ImportError:  # Windows: single-flight within the process only
+    FCNTL_AVAILABLE = False
+
+
+DEFAULT_SNAPSHOT_DIR = Path(__file__).resolve().parents[2] / "data" / "channel_snapshots"
+
+# TTL per snapshot kind (seconds)
+SNAPSHOT_TTLS = {
+    'channel': 24 * 3600,
+    'playlist': 24 * 3600,
+    'videos': 15 * 60,
+    'competitor': 6 * 3600,
+}
+
+
+class ChannelSnapshotCache:
+    """
+    File-backed snapshot cache shared by all jobs on the host.
+
+    Usage:
+        cache = get_channel_snapshot_cache()
+        channel_id, title = cache.get_or_fetch('channel', '@mkbhd', lambda: get_channel_id(yt, '@mkbhd'))
+    """
+
+    def __init__(self, root: Optional[Path] = None):
+        self.root = Path(root or os.getenv('CHANNEL_SNAPSHOT_DIR') or DEFAULT_SNAPSHOT_DIR)
+        self.enabled = os.getenv('CHANNEL_SNAPSHOT_CACHE', 'true').lower() != 'false'
+        self.hits = 0
+        self.misses = 0
+        self.waits = 0  # Lookups that waited on another fetch of the same key
+        self._locks: Dict[str, threading.Lock] = {}
+        self._locks_guard = threading.Lock()
+
+    def _path(self, kind: str, key: str) -> Path:
+        digest = hashlib.sha1(key.encode('utf-8')).hexdigest()
+        return self.root / kind / f"{digest}.json"
+
+    def _key_lock(self, kind: str, key: str) -> threading.Lock:
+        with self._locks_guard:
+            return self._locks.setdefault(f"{kind}:{key}", threading.Lock())
+
+    def _read(self, path: Path, ttl: float) -> tuple:
+        """Return (hit, value) for a fresh entry."""
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return False, None
+        if time.time() - entry.get('cached_at', 0) > ttl:
+            return False, None
+        return True, entry.get('value')
+
+    def _write(self, path: Path, key: str, value: Any):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(f'.{os.getpid()}.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'key': key, 'cached_at': time.time(), 'value': value}, f)
+        os.replace(tmp_path, path)
+
+    def get(self, kind: str, key: str, ttl: float = None) -> Optional[Any]:
+        """Get a fresh snapshot or None."""
+        if not self.enabled:
+            return None
+        hit, value = self._read(self._path(kind, key), ttl or SNAPSHOT_TTLS.get(kind, 3600))
+        return value if hit else None
+
+    def get_or_fetch(self, kind: str, key: str, fetch_fn: Callable[[], Any], ttl: float = None,
+                     cache_if: Callable[[Any], bool] = None) -> Any:
+        """
+        Return the cached snapshot, or fetch it exactly once across
+        concurrent callers (threads and processes) and cache the result.
+        Exceptions from fetch_fn propagate and nothing is cached. Fetchers that
+        swallow their errors (returning [] on a quota error, say) pass
+        cache_if=bool so such results are returned but not cached.
+        """
+        if not self.enabled:
+            return fetch_fn()
+
+        ttl = ttl or SNAPSHOT_TTLS.get(kind, 3600)
+        path = self._path(kind, key)
+
+        hit, value = self._read(path, ttl)
+        if hit:
+            self.hits += 1
+            return value
+
+        key_lock = self._key_lock(kind, key)
+        if key_lock.locked():
+            self.waits += 1
+        with key_lock:
+            lock_file = None
+            try:
+                if FCNTL_AVAILABLE:
+                    path.parent.mkdir(parents=True, exist_ok=True)
+                    lock_file = open(path.with_suffix('.lock'), 'w')
+                    try:
+                        fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    except BlockingIOError:
+                        # Another job is fetching this key - wait for it
+                        self.waits += 1
+                        fcntl.flock(lock_file, fcntl.LOCK_EX)
+
+                # Re-check: the fetch we waited on may have filled the cache
+                hit, value = self._read(path, ttl)
+                if hit:
+                    self.hits += 1
+                    return value
+
+                self.misses += 1
+                value = fetch_fn()
+                if cache_if is not None and not cache_if(value):
+                    return value
+                try:
+                    self._write(path, key, value)
+                except (OSError, TypeError, ValueError) as e:
+                    print(f"⚠️ Snapshot cache write error ({kind}): {e}")
+                return value
+            finally:
+                if lock_file is not None:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+                    lock_file.close()
+
+    def invalidate(self, kind: str, key: str):
+        """Drop a snapshot (e.g. after it proved stale)."""
+        try:
+            self._path(kind, key).unlink()
+        except OSError:
+            pass
+
+    def stats(self) -> Dict:
+        return {'enabled': self.enabled, 'hits': self.hits, 'misses': self.misses, 'waits': self.waits}
+
+
+# Singleton instance for global use
+_cache_instance = None
+
+def get_channel_snapshot_cache() -> ChannelSnapshotCache:
+    """Get the singleton channel snapshot cache instance."""
+    global _cache_instance
+    if _cache_instance is None:
+        _cache_instance = ChannelSnapshotCache()
+    return _cache_instance
+
+
+# === Quick test ===
+if __name__ == "__main__":
+    print("🧪 Channel Snapshot Cache module loaded")
+    cache = get_channel_snapshot_cache()
+    print(f"   Cache enabled: {cache.enabled}")
+    print(f"   Root: {cache.root}")
@@ -0,0 +1,262 @@
+"""
+Comment Store - Local columnar (Parquet) store for ingested comments
+
+Persists comments written by the ingest stage so multi-channel and
+historical analyses can scan only the columns they need instead of
+re-parsing the per-video JSON cache files.
+
+Layout (hive-partitioned, one file per video, latest ingest wins):
+    data/comment_store/channel_id=<UC...>/video_id=<id>/comments.parquet
+
+Scans by channel only open that channel's partition files. Partitions this
+process wrote are also kept in memory (the tables of the last job), so the
+analyzers of the job that just ingested read its comments back without
+touching the disk.
+"""
+
+import os
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+try:
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+    ARROW_AVAILABLE = True
+except ImportError:
+    ARROW_AVAILABLE = False
+
+
+DEFAULT_STORE_DIR = Path(__file__).resolve().parents[2] / "data" / "comment_store"
+
+# Columns stored inside each parquet file. channel_id / video_id live in the
+# partition path and are exposed as regular columns when scanning.
+FILE_COLUMNS = ['video_title', 'author', 'text', 'likes', 'published_at', 'ingested_at']
+PARTITION_COLUMNS = ['channel_id', 'video_id']
+ALL_COLUMNS = PARTITION_COLUMNS + FILE_COLUMNS
+
+
+class CommentStore:
+    """
+    Parquet-backed comment store partitioned by channel and video.
+
+    Write path: `write_video_comments` / `write_job_comments` (ingest stage).
+    Read path: `scan` with column projection and partition pruning.
+    """
+
+    def __init__(self, root: Optional[Path] = None):
+        self.root = Path(root or os.getenv('COMMENT_STORE_DIR') or DEFAULT_STORE_DIR)
+        self._lock = threading.Lock()
+        self._written = {}  # (channel_id, video_id) -> table written by this process (last job)
+
+        if not ARROW_AVAILABLE:
+            print("⚠️ pyarrow not installed - comment store disabled")
+            self.enabled = False
+        else:
+            self.enabled = True
+            self._file_schema = pa.schema([
+                ('video_title', pa.string()),
+                ('author', pa.string()),
+                ('text', pa.string()),
+                ('likes', pa.int64()),
+                ('published_at', pa.string()),
+                ('ingested_at', pa.string()),
+            ])
+            self._partitioning = ds.partitioning(
+                pa.schema([('channel_id', pa.string()), ('video_id', pa.string())]),
+                flavor='hive'
+            )
+
+    def _video_path(self, channel_id: str, video_id: str) -> Path:
+        return self.root / f"channel_id={channel_id}" / f"video_id={video_id}" / "comments.parquet"
+
+    # ------------------------------------------------------------------
+    # Write path
+    # ------------------------------------------------------------------
+
+    def write_video_comments(self, channel_id: str, video_id: str,
+                             comments: List[Dict], video_title: str = '') -> bool:
+        """
+        Replace the stored comments for one video.
+        Returns True on success, False if disabled or the write failed.
+        """
+        if not self.enabled or not channel_id or not video_id:
+            return False
+
+        ingested_at = datetime.utcnow().isoformat() + 'Z'
+        columns = {
+            'video_title': [video_title or ''] * len(comments),
+            'author': [c.get('author', '') for c in comments],
+            'text': [c.get('text', '') for c in comments],
+            'likes': [int(c.get('likes', 0) or 0) for c in comments],
+            'published_at': [c.get('published_at', '') for c in comments],
+            'ingested_at': [ingested_at] * len(comments),
+        }
+
+        try:
+            table = pa.table(columns, schema=self._file_schema)
+            path = self._video_path(channel_id, video_id)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            # Dot-prefixed temp file is skipped by dataset discovery
+            tmp_path = path.parent / f".{path.name}.tmp"
+            with self._lock:
+                pq.write_table(table, tmp_path, compression='zstd')
+                os.replace(tmp_path, path)
+                self._written[(channel_id, video_id)] = table
+            return True
+        except Exception as e:
+            print(f"⚠️ Comment store write error ({video_id}): {e}")
+            return False
+
+    def write_job_comments(self, channel_id: str, videos_data: List[Dict]) -> int:
+        """
+        Persist comments for every video of an analysis run.
+        Returns the number of videos written.
+        """
+        if not self.enabled:
+            return 0
+
+        with self._lock:
+            self._written.clear()  # Keep only the current job's partitions in memory
+        written = 0
+        for v in videos_data:
+            info = v.get('video_info', {})
+            video_id = info.get('video_id') or info.get('id')
+            if self.write_video_comments(channel_id, video_id, v.get('comments', []), info.get('title', '')):
+                written += 1
+        return written
+
+    # ------------------------------------------------------------------
+    # Read path
+    # ------------------------------------------------------------------
+
+    def _filter_expression(self, channel_ids: Optional[Iterable[str]],
+                           video_ids: Optional[Iterable[str]],
+                           min_likes: Optional[int]):
+        expr = None
+        if channel_ids:
+            expr = ds.field('channel_id').isin(list(channel_ids))
+        if video_ids:
+            cond = ds.field('video_id').isin(list(video_ids))
+            expr = cond if expr is None else expr & cond
+        if min_likes is not None:
+            cond = ds.field('likes') >= min_likes
+            expr = cond if expr is None else expr & cond
+        return expr
+
+    def _partitions(self, channel_ids: Iterable[str], video_ids: Optional[Iterable[str]]):
+        """Split the requested partitions into in-memory tables and parquet file paths."""
+        tables, files = [], []
+        video_ids = set(video_ids) if video_ids else None
+        with self._lock:
+            written = dict(self._written)
+        for channel_id in channel_ids:
+            ids = video_ids if video_ids is not None else self.list_videos(channel_id)
+            for video_id in sorted(ids):
+                table = written.get((channel_id, video_id))
+                if table is not None:
+                    n = table.num_rows
+                    tables.append(table.append_column('channel_id', pa.array([channel_id] * n, pa.string()))
+                                       .append_column('video_id', pa.array([video_id] * n, pa.string())))
+                elif self._video_path(channel_id, video_id).exists():
+                    files.append(str(self._video_path(channel_id, video_id)))
+        return tables, files
+
+    def scan(self, columns: Optional[List[str]] = None,
+             channel_ids: Optional[Iterable[str]] = None,
+             video_ids: Optional[Iterable[str]] = None,
+             min_likes: Optional[int] = None) -> List[Dict]:
+        """
+        Read comments as a list of dicts.
+
+        Args:
+            columns: Subset of ALL_COLUMNS to materialize (default: all)
+            channel_ids: Only read these channel partitions
+            video_ids: Only read these video partitions
+            min_likes: Drop comments with fewer likes
+
+        Returns:
+            List of row dicts containing only the requested columns
+        """
+        if not self.enabled or not self.root.exists():
+            return []
+
+        columns = columns or ALL_COLUMNS
+        unknown = [c for c in columns if c not in ALL_COLUMNS]
+        if unknown:
+            raise ValueError(f"Unknown comment store columns: {unknown}")
+
+        try:
+            expr = self._filter_expression(channel_ids, video_ids, min_likes)
+            if not channel_ids:
+                # Cross-channel scan: discover partitions under the root
+                datasets = [ds.dataset(str(self.root), format='parquet', partitioning=self._partitioning)]
+            else:
+                tables, files = self._partitions(channel_ids, video_ids)
+                datasets = [ds.dataset(pa.concat_tables(tables))] if tables else []
+                if files:
+                    datasets.append(ds.dataset(files, format='parquet', partitioning=self._partitioning,
+                                               partition_base_dir=str(self.root)))
+            rows = []
+            for dataset in datasets:
+                rows.extend(dataset.to_table(columns=columns, filter=expr).to_pylist())
+            return rows
+        except Exception as e:
+            print(f"⚠️ Comment store read error: {e}")
+            return []
+
+    def has_videos(self, channel_id: str, video_ids: Iterable[str]) -> bool:
+        """True if comments for every one of the videos have been stored."""
+        video_ids = list(video_ids)
+        return bool(video_ids) and all(self.has_video(channel_id, v) for v in video_ids)
+
+    def has_job_videos(self, channel_id: str, video_ids: Iterable[str]) -> bool:
+        """
+        True if the current job (last write_job_comments) wrote every one of
+        the videos. Partitions left by earlier jobs don't count, so a failed
+        write never makes analyzers read stale comments as this job's.
+        """
+        video_ids = list(video_ids)
+        with self._lock:
+            return bool(video_ids) and all((channel_id, v) in self._written for v in video_ids)
+
+    def has_video(self, channel_id: str, video_id: str) -> bool:
+        """Check whether comments for a video have been stored."""
+        return self.enabled and self._video_path(channel_id, video_id).exists()
+
+    def list_videos(self, channel_id: str) -> List[str]:
+        """List stored video ids for a channel (partition listing, no file reads)."""
+        channel_dir = self.root / f"channel_id={channel_id}"
+        if not self.enabled or not channel_dir.exists():
+            return []
+        return [p.name.split('=', 1)[1] for p in channel_dir.iterdir()
+                if p.is_dir() and p.name.startswith('video_id=')]
+
+    def list_channels(self) -> List[str]:
+        """List channel ids present in the store."""
+        if not self.enabled or not self.root.exists():
+            return []
+        return [p.name.split('=', 1)[1] for p in self.root.iterdir()
+                if p.is_dir() and p.name.startswith('channel_id=')]
+
+
+# Singleton instance for global use
+_store_instance = None
+
+def get_comment_store() -> CommentStore:
+    """Get the singleton comment store instance."""
+    global _store_instance
+    if _store_instance is None:
+        _store_instance = CommentStore()
+    return _store_instance
+
+
+# === Quick test ===
+if __name__ == "__main__":
+    print("🧪 Comment Store module loaded")
+    store = get_comment_store()
+    print(f"   Store enabled: {store.enabled}")
+    print(f"   Root: {store.root}")
+    print(f"   Channels: {len(store.list_channels())}")
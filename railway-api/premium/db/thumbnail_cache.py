@@ -0,0 +1,255 @@
+"""
+Thumbnail Cache - Content-addressed image bytes and extracted features
+
+The same thumbnail is fetched by several tasks in a job (CTR features,
+Gemini thumbnail critique, competitor patterns) and again by later jobs for
+the same channel. This cache stores each image once and its features once
+per extractor version:
+- refs:     (video id, thumbnail URL) -> content hash + ETag
+- images:   content hash -> image bytes exactly as downloaded (JPEG/WebP)
+- features: (content hash, extractor variant) -> ThumbnailFeatures dict
+
+Refs older than THUMBNAIL_CACHE_REVALIDATE_HOURS are revalidated with a
+conditional GET (If-None-Match), since custom thumbnails can change behind
+the same URL. Images/features are evicted least-recently-used once the
+cache exceeds THUMBNAIL_CACHE_MAX_MB.
+
+Layout:
+    data/thumbnail_cache/refs/<sha1(video_id|url)>.json
+    data/thumbnail_cache/images/<sha256[:2]>/<sha256>
+    data/thumbnail_cache/features/<sha256[:2]>/<sha256>.<variant>.json
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+import requests
+
+
+DEFAULT_THUMBNAIL_CACHE_DIR = Path(__file__).resolve().parents[2] / "data" / "thumbnail_cache"
+
+# Check the cache size after this many writes
+EVICT_CHECK_EVERY = 50
+
+
+class ThumbnailCache:
+    """
+    File-backed thumbnail cache shared by all tasks and jobs on the host.
+
+    Usage:
+        cache = get_thumbnail_cache()
+        data = cache.get_bytes(url, video_id='dQw4w9WgXcQ')
+    """
+
+    def __init__(self, root: Optional[Path] = None, max_bytes: Optional[int] = None,
+                 revalidate_after: Optional[float] = None):
+        self.root = Path(root or os.getenv('THUMBNAIL_CACHE_DIR') or DEFAULT_THUMBNAIL_CACHE_DIR)
+        self.enabled = os.getenv('THUMBNAIL_CACHE', 'true').lower() != 'false'
+        self.max_bytes = max_bytes or int(float(os.getenv('THUMBNAIL_CACHE_MAX_MB', 512)) * 1024 * 1024)
+        self.revalidate_after = revalidate_after if revalidate_after is not None else \
+            float(os.getenv('THUMBNAIL_CACHE_REVALIDATE_HOURS', 24)) * 3600
+        self.hits = 0
+        self.misses = 0
+        self.revalidated = 0
+        self.feature_hits = 0
+        self.feature_misses = 0
+        self._writes = 0
+        self._locks: Dict[str, threading.Lock] = {}
+        self._locks_guard = threading.Lock()
+
+    # --- paths ---
+
+    def _ref_path(self, url: str, video_id: Optional[str]) -> Path:
+        digest = hashlib.sha1(f"{video_id or ''}|{url}".encode('utf-8')).hexdigest()
+        return self.root / "refs" / f"{digest}.json"
+
+    def _image_path(self, content_hash: str) -> Path:
+        return self.root / "images" / content_hash[:2] / content_hash
+
+    def _features_path(self, content_hash: str, variant: str) -> Path:
+        return self.root / "features" / content_hash[:2] / f"{content_hash}.{variant}.json"
+
+    def _key_lock(self, key: str) -> threading.Lock:
+        with self._locks_guard:
+            return self._locks.setdefault(key, threading.Lock())
+
+    # --- file helpers ---
+
+    def _write_atomic(self, path: Path, data: bytes):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+        self._writes += 1
+        if self._writes % EVICT_CHECK_EVERY == 0:
+            self.evict()
+
+    def _read_json(self, path: Path) -> Optional[Dict]:
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _read_image(self, content_hash: str) -> Optional[bytes]:
+        path = self._image_path(content_hash)
+        try:
+            data = path.read_bytes()
+            os.utime(path)  # LRU: mtime = last use
+            return data
+        except OSError:
+            return None
+
+    # --- images ---
+
+    def fetch(self, url: str, video_id: Optional[str] = None, timeout: float = 10) -> Optional[Tuple[str, bytes]]:
+        """
+        Return (content hash, image bytes), downloading at most once per
+        (video id, URL) across concurrent callers. None if the download fails.
+        """
+        if not url:
+            return None
+        if not self.enabled:
+            data = self._download(url, timeout)[0]
+            return (hashlib.sha256(data).hexdigest(), data) if data else None
+
+        ref_path = self._ref_path(url, video_id)
+        with self._key_lock(str(ref_path)):
+            ref = self._read_json(ref_path)
+            data = self._read_image(ref['sha256']) if ref else None
+            if data is not None and time.time() - ref.get('checked_at', 0) < self.revalidate_after:
+                self.hits += 1
+                return ref['sha256'], data
+
+            if data is not None and ref.get('etag'):
+                # Stale ref: conditional GET, keep our copy on 304
+                new_data, etag, not_modified = self._download(url, timeout, etag=ref['etag'])
+                if not_modified:
+                    self.revalidated += 1
+                    self._write_ref(ref_path, url, video_id, ref['sha256'], ref['etag'])
+                    return ref['sha256'], data
+            else:
+                new_data, etag, _ = self._download(url, timeout)
+
+            if not new_data:
+                # Network failure: a stale copy beats nothing
+                return (ref['sha256'], data) if data is not None else None
+
+            self.misses += 1
+            content_hash = hashlib.sha256(new_data).hexdigest()
+            try:
+                if not self._image_path(content_hash).exists():
+                    self._write_atomic(self._image_path(content_hash), new_data)
+                self._write_ref(ref_path, url, video_id, content_hash, etag)
+            except OSError as e:
+                print(f"⚠️ Thumbnail cache write error: {e}")
+            return content_hash, new_data
+
+    def get_bytes(self, url: str, video_id: Optional[str] = None, timeout: float = 10) -> Optional[bytes]:
+        """Image bytes for a thumbnail URL (cached), or None."""
+        result = self.fetch(url, video_id, timeout)
+        return result[1] if result else None
+
+    def _write_ref(self, path: Path, url: str, video_id: Optional[str], content_hash: str, etag: Optional[str]):
+        ref = {'url': url, 'video_id': video_id, 'sha256': content_hash, 'etag': etag, 'checked_at': time.time()}
+        self._write_atomic(path, json.dumps(ref).encode('utf-8'))
+
+    def _download(self, url: str, timeout: float, etag: Optional[str] = None) -> Tuple[Optional[bytes], Optional[str], bool]:
+        """(bytes, etag, not_modified)"""
+        headers = {'If-None-Match': etag} if etag else {}
+        try:
+            response = requests.get(url, timeout=timeout, headers=headers)
+            if response.status_code == 304:
+                return None, etag, True
+            response.raise_for_status()
+            return response.content, response.headers.get('ETag'), False
+        except Exception as e:
+            print(f"⚠️ Thumbnail download failed ({url}): {e}")
+            return None, None, False
+
+    # --- features ---
+
+    def get_features(self, content_hash: str, variant: str) -> Optional[Dict]:
+        """Cached feature dict for an image and extractor variant, or None."""
+        if not self.enabled or not content_hash:
+            return None
+        path = self._features_path(content_hash, variant)
+        features = self._read_json(path)
+        if features is None:
+            self.feature_misses += 1
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        self.feature_hits += 1
+        return features
+
+    def put_features(self, content_hash: str, variant: str, features: Dict):
+        if not self.enabled or not content_hash:
+            return
+        try:
+            self._write_atomic(self._features_path(content_hash, variant), json.dumps(features).encode('utf-8'))
+        except (OSError, TypeError, ValueError) as e:
+            print(f"⚠️ Thumbnail feature cache write error: {e}")
+
+    # --- maintenance ---
+
+    def evict(self, target_ratio: float = 0.9) -> int:
+        """Delete least-recently-used images/features until under max_bytes. Returns files removed."""
+        entries = []
+        for sub in ("images", "features"):
+            for dirpath, _, filenames in os.walk(self.root / sub):
+                for name in filenames:
+                    path = os.path.join(dirpath, name)
+                    try:
+                        st = os.stat(path)
+                    except OSError:
+                        continue
+                    entries.append((st.st_mtime, st.st_size, path))
+
+        total = sum(size for _, size, _ in entries)
+        if total <= self.max_bytes:
+            return 0
+
+        removed = 0
+        target = self.max_bytes * target_ratio
+        for _, size, path in sorted(entries):
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+                total -= size
+                removed += 1
+            except OSError:
+                continue
+        print(f"🧹 Thumbnail cache: evicted {removed} files ({total / 1e6:.0f} MB kept)")
+        return removed
+
+    def stats(self) -> Dict:
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'revalidated': self.revalidated,
+            'feature_hits': self.feature_hits,
+            'feature_misses': self.feature_misses,
+        }
+
+
+# Singleton instance for global use
+_cache_instance = None
+_cache_lock = threading.Lock()
+
+def get_thumbnail_cache() -> ThumbnailCache:
+    """Get the singleton thumbnail cache instance."""
+    global _cache_instance
+    with _cache_lock:
+        if _cache_instance is None:
+            _cache_instance = ThumbnailCache()
+        return _cache_instance
@@ -0,0 +1,403 @@
+"""
+Thumbnail Index - Perceptual hashes + descriptors for every thumbnail we've seen
+
+Competitor thumbnail patterns and channel visual styles used to be
+recomputed from pixels on every run. This index keeps, per video:
+- pHash (DCT) and dHash (gradient), 64-bit each, for near-duplicate lookups
+- a compact descriptor vector (HSV color histogram + 4x4 luminance layout)
+  for "looks like" nearest-neighbor queries
+- each producer's analysis and style, namespaced by producer (the
+  competitor analyzer and vision_analyzer use different feature sets and
+  style taxonomies), and performance (views, views vs. channel average)
+
+so "thumbnails similar to this one and how they did" is a matrix product
+over the in-memory arrays instead of a round of downloads + feature
+extraction. Entries older than THUMBNAIL_INDEX_MAX_AGE_HOURS are treated as
+missing for `get()` (custom thumbnails change) but still answer queries;
+entries older than THUMBNAIL_INDEX_RETENTION_DAYS are deleted.
+
+Storage is SQLite (shared by all job processes on the host):
+    data/thumbnail_index.sqlite3
+
+Usage:
+    index = get_thumbnail_index()
+    descriptor = describe_thumbnail(image_bytes)
+    index.add('dQw4w9WgXcQ', descriptor, 'competitor', channel_id='UC...', views=12000, performance=1.4,
+              style='face-forward', attributes={'face_count': 1})
+    entry = index.get('dQw4w9WgXcQ', producer='competitor', keys=('face_count',))
+    neighbors = index.similar(descriptor, k=5, exclude_channel='UC...')
+    summary = summarize_neighbors(neighbors, 'competitor')
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Union
+
+import numpy as np
+
+try:
+    import cv2
+    CV2_AVAILABLE = True
+except ImportError:
+    CV2_AVAILABLE = False
+
+
+DEFAULT_THUMBNAIL_INDEX_PATH = Path(__file__).resolve().parents[2] / "data" / "thumbnail_index.sqlite3"
+
+# Descriptor layout: 8 hue x 3 saturation x 3 value bins, then a 4x4 luminance grid
+HIST_BINS = (8, 3, 3)
+LAYOUT_GRID = 4
+VECTOR_DIM = int(np.prod(HIST_BINS)) + LAYOUT_GRID * LAYOUT_GRID
+
+# Hamming distance (of 64 bits) at or below which two thumbnails are near-duplicates
+NEAR_DUPLICATE_BITS = 10
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS thumbnails (
+    video_id TEXT PRIMARY KEY,
+    channel_id TEXT,
+    content_hash TEXT,
+    phash TEXT NOT NULL,
+    dhash TEXT NOT NULL,
+    vector BLOB NOT NULL,
+    views INTEGER,
+    performance REAL,
+    style TEXT,
+    attributes TEXT,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_thumbnails_channel ON thumbnails(channel_id);
+CREATE INDEX IF NOT EXISTS idx_thumbnails_updated ON thumbnails(updated_at);
+"""
+
+
+@dataclass
+class ThumbnailDescriptor:
+    """Perceptual hashes and descriptor vector of one thumbnail."""
+    phash: int
+    dhash: int
+    vector: np.ndarray  # float32, unit length
+
+
+def _bits_to_int(bits: np.ndarray) -> int:
+    return int(np.packbits(bits.astype(np.uint8).ravel()).view('>u8')[0])
+
+
+def _json_default(value):
+    """numpy scalars/arrays in analysis dicts -> JSON natives."""
+    if hasattr(value, 'tolist'):
+        return value.tolist()
+    raise TypeError(f"Not JSON serializable: {type(value).__name__}")
+
+
+def _namespaced(text: Optional[str]) -> Dict:
+    """Stored {producer: ...} JSON; entries from before namespacing read as empty."""
+    try:
+        value = json.loads(text or '{}')
+    except ValueError:
+        return {}
+    return value if isinstance(value, dict) and all(isinstance(v, (dict, str)) for v in value.values()) else {}
+
+
+def describe_thumbnail(image: Union[bytes, np.ndarray]) -> Optional[ThumbnailDescriptor]:
+    """
+    Hashes + descriptor for encoded image bytes or an RGB array.
+    Cheap (a few small resizes), safe to run on the CPU pool. None if undecodable.
+    """
+    if not CV2_AVAILABLE:
+        return None
+    if isinstance(image, (bytes, bytearray)):
+        bgr = cv2.imdecode(np.frombuffer(image, dtype=np.uint8), cv2.IMREAD_COLOR)
+        if bgr is None:
+            return None
+        rgb = cv2.cvtColor(bgr, cv2.COLOR_BGR2RGB)
+    else:
+        rgb = np.asarray(image)
+    gray = cv2.cvtColor(rgb, cv2.COLOR_RGB2GRAY)
+
+    # pHash: low-frequency 8x8 DCT block vs its median
+    small = cv2.resize(gray, (32, 32), interpolation=cv2.INTER_AREA).astype(np.float32)
+    low = cv2.dct(small)[:8, :8]
+    phash = _bits_to_int(low > np.median(low))
+
+    # dHash: horizontal gradient sign on a 9x8 thumbnail
+    tiny = cv2.resize(gray, (9, 8), interpolation=cv2.INTER_AREA).astype(np.int16)
+    dhash = _bits_to_int(tiny[:, 1:] > tiny[:, :-1])
+
+    # Color: Hellinger-normalized HSV histogram (sqrt of a distribution -> unit length)
+    hsv = cv2.cvtColor(cv2.resize(rgb, (64, 36), interpolation=cv2.INTER_AREA), cv2.COLOR_RGB2HSV)
+    hist = cv2.calcHist([hsv], [0, 1, 2], None, list(HIST_BINS), [0, 180, 0, 256, 0, 256]).ravel()
+    color = np.sqrt(hist / max(hist.sum(), 1.0))
+
+    # Layout: mean-centred 4x4 luminance grid
+    grid = cv2.resize(gray, (LAYOUT_GRID, LAYOUT_GRID), interpolation=cv2.INTER_AREA).astype(np.float32).ravel()
+    grid -= grid.mean()
+    norm = np.linalg.norm(grid)
+    layout = grid / norm if norm > 0 else grid
+
+    # Both halves unit length -> cosine similarity is the mean of color and layout similarity
+    vector = (np.concatenate([color, layout]) / np.sqrt(2)).astype(np.float32)
+    return ThumbnailDescriptor(phash=phash, dhash=dhash, vector=vector)
+
+
+def hamming(a: np.ndarray, b: int) -> np.ndarray:
+    """Bit distance between each uint64 in `a` and the hash `b`."""
+    x = np.bitwise_xor(a, np.uint64(b))
+    return np.unpackbits(x.view(np.uint8).reshape(-1, 8), axis=1).sum(axis=1)
+
+
+class ThumbnailIndex:
+    """
+    Persistent perceptual-hash + descriptor index with in-memory nearest-neighbor search.
+
+    The arrays are (re)loaded lazily when another process has written since
+    the last query; this instance's own writes update them in place.
+    """
+
+    def __init__(self, path: Optional[Path] = None, max_age: Optional[float] = None,
+                 retention: Optional[float] = None):
+        self.path = Path(path or os.getenv('THUMBNAIL_INDEX_PATH') or DEFAULT_THUMBNAIL_INDEX_PATH)
+        self.enabled = os.getenv('THUMBNAIL_INDEX', 'true').lower() != 'false'
+        self.max_age = max_age if max_age is not None else \
+            float(os.getenv('THUMBNAIL_INDEX_MAX_AGE_HOURS', 24)) * 3600
+        self.retention = retention if retention is not None else \
+            float(os.getenv('THUMBNAIL_INDEX_RETENTION_DAYS', 30)) * 86400
+        self.hits = 0
+        self.misses = 0
+        self._conn = None
+        self._lock = threading.Lock()
+        self._loaded_version = None
+        self._dirty = True
+        self._video_ids: List[str] = []
+        self._rows: Dict[str, int] = {}
+        self._channels: np.ndarray = np.array([], dtype=object)
+        self._phash = np.zeros(0, dtype=np.uint64)
+        self._dhash = np.zeros(0, dtype=np.uint64)
+        self._vectors = np.zeros((0, VECTOR_DIM), dtype=np.float32)
+        self._meta: List[Dict] = []
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(str(self.path), timeout=30, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(SCHEMA)
+            self._prune()
+        return self._conn
+
+    def _prune(self):
+        """Delete entries older than the retention period (once per connection)."""
+        deleted = self._conn.execute("DELETE FROM thumbnails WHERE updated_at < ?",
+                                     (time.time() - self.retention,)).rowcount
+        self._conn.commit()
+        if deleted > 0:
+            print(f"🧹 Pruned {deleted} thumbnail index entries older than {self.retention / 86400:.0f} days")
+
+    # --- writes ---
+
+    def add(self, video_id: str, descriptor: ThumbnailDescriptor, producer: str, channel_id: Optional[str] = None,
+            content_hash: Optional[str] = None, views: Optional[int] = None, performance: Optional[float] = None,
+            style: Optional[str] = None, attributes: Optional[Dict] = None):
+        """
+        Insert or replace one thumbnail's entry. Style and attributes are
+        stored under `producer`, next to other producers' (unless the image
+        content changed); channel/views/performance keep their old values
+        when passed as None.
+        """
+        if not self.enabled or not video_id or descriptor is None:
+            return
+        try:
+            with self._lock:
+                conn = self._connect()
+                old = conn.execute("SELECT content_hash, views, performance, style, attributes, channel_id FROM thumbnails "
+                                   "WHERE video_id = ?", (video_id,)).fetchone()
+                styles, namespaces = {}, {}
+                if old and (not content_hash or not old[0] or old[0] == content_hash):
+                    content_hash = content_hash or old[0]
+                    views = views if views is not None else old[1]
+                    performance = performance if performance is not None else old[2]
+                    channel_id = channel_id or old[5]
+                    styles, namespaces = _namespaced(old[3]), _namespaced(old[4])
+                if style:
+                    styles[producer] = style
+                namespaces[producer] = {**namespaces.get(producer, {}), **(attributes or {})}
+                # Round-trip through JSON so the in-memory entry matches what a reload would give
+                styles_json = json.dumps(styles)
+                attributes_json = json.dumps(namespaces, default=_json_default)
+                vector = np.asarray(descriptor.vector, dtype=np.float32)
+                updated_at = time.time()
+                conn.execute(
+                    "INSERT OR REPLACE INTO thumbnails (video_id, channel_id, content_hash, phash, dhash, vector, "
+                    "views, performance, style, attributes, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (video_id, channel_id, content_hash, f"{descriptor.phash:016x}", f"{descriptor.dhash:016x}",
+                     vector.tobytes(), views, performance, styles_json, attributes_json, updated_at))
+                conn.commit()
+                self._store(video_id, channel_id, descriptor, vector, {
+                    'video_id': video_id, 'channel_id': channel_id, 'content_hash': content_hash, 'views': views,
+                    'performance': performance, 'styles': json.loads(styles_json),
+                    'attributes': json.loads(attributes_json), 'updated_at': updated_at,
+                })
+        except (sqlite3.Error, TypeError, ValueError) as e:
+            print(f"⚠️ Thumbnail index write error: {e}")
+
+    def _store(self, video_id: str, channel_id: Optional[str], descriptor: ThumbnailDescriptor,
+               vector: np.ndarray, meta: Dict):
+        """Apply our own write to the loaded arrays instead of reloading the table. Caller holds the lock."""
+        if self._dirty:
+            return  # Never loaded; the first query reads everything
+        row = self._rows.get(video_id)
+        if row is None:
+            self._rows[video_id] = len(self._video_ids)
+            self._video_ids.append(video_id)
+            self._channels = np.append(self._channels, np.array([channel_id], dtype=object))
+            self._phash = np.append(self._phash, np.uint64(descriptor.phash))
+            self._dhash = np.append(self._dhash, np.uint64(descriptor.dhash))
+            self._vectors = np.vstack([self._vectors, vector[None, :]])
+            self._meta.append(meta)
+        else:
+            self._channels[row] = channel_id
+            self._phash[row] = descriptor.phash
+            self._dhash[row] = descriptor.dhash
+            self._vectors[row] = vector
+            self._meta[row] = meta
+
+    # --- reads ---
+
+    def _load(self):
+        """Refresh the in-memory arrays if another connection changed the database. Caller holds the lock."""
+        conn = self._connect()
+        version = conn.execute("PRAGMA data_version").fetchone()[0]
+        if not self._dirty and version == self._loaded_version:
+            return
+        rows = conn.execute(
+            "SELECT video_id, channel_id, content_hash, phash, dhash, vector, views, performance, style, "
+            "attributes, updated_at FROM thumbnails").fetchall()
+        self._video_ids = [r[0] for r in rows]
+        self._rows = {vid: i for i, vid in enumerate(self._video_ids)}
+        self._channels = np.array([r[1] for r in rows], dtype=object)
+        self._phash = np.array([int(r[3], 16) for r in rows], dtype=np.uint64)
+        self._dhash = np.array([int(r[4], 16) for r in rows], dtype=np.uint64)
+        # Copy: rows are updated in place by _store
+        self._vectors = np.frombuffer(b''.join(r[5] for r in rows), dtype=np.float32).reshape(len(rows), VECTOR_DIM).copy() \
+            if rows else np.zeros((0, VECTOR_DIM), dtype=np.float32)
+        self._meta = [{
+            'video_id': r[0], 'channel_id': r[1], 'content_hash': r[2], 'views': r[6], 'performance': r[7],
+            'styles': _namespaced(r[8]), 'attributes': _namespaced(r[9]), 'updated_at': r[10],
+        } for r in rows]
+        self._loaded_version = version
+        self._dirty = False
+
+    def get(self, video_id: str, content_hash: Optional[str] = None, producer: Optional[str] = None,
+            keys=()) -> Optional[Dict]:
+        """
+        Stored entry for a video, or None if missing, stale, or indexed from
+        different image content. With `producer`, an entry without that
+        producer's attributes (or any of `keys` in them) is also a miss.
+        """
+        if not self.enabled:
+            return None
+        try:
+            with self._lock:
+                self._load()
+                row = self._rows.get(video_id)
+                entry = self._meta[row] if row is not None else None
+        except sqlite3.Error as e:
+            print(f"⚠️ Thumbnail index read error: {e}")
+            return None
+        produced = entry['attributes'].get(producer) if entry and producer else None
+        if entry is None or time.time() - entry['updated_at'] > self.max_age or \
+                (content_hash and entry['content_hash'] and entry['content_hash'] != content_hash) or \
+                (producer and (produced is None or any(k not in produced for k in keys))):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return dict(entry)
+
+    def descriptor(self, video_id: str) -> Optional[ThumbnailDescriptor]:
+        """Stored hashes/vector for a video (any age), or None."""
+        with self._lock:
+            self._load()
+            row = self._rows.get(video_id)
+            if row is None:
+                return None
+            return ThumbnailDescriptor(int(self._phash[row]), int(self._dhash[row]), self._vectors[row].copy())
+
+    def similar(self, descriptor: ThumbnailDescriptor, k: int = 5, channel_id: Optional[str] = None,
+                exclude_channel: Optional[str] = None, exclude_video: Optional[str] = None) -> List[Dict]:
+        """
+        Nearest thumbnails to `descriptor`: near-duplicates (pHash/dHash within
+        NEAR_DUPLICATE_BITS) first, then by descriptor cosine similarity.
+        Each result is the stored entry plus 'similarity', 'hamming' and 'near_duplicate'.
+        """
+        if not self.enabled or descriptor is None:
+            return []
+        with self._lock:
+            self._load()
+            if not self._video_ids:
+                return []
+            similarity = self._vectors @ np.asarray(descriptor.vector, dtype=np.float32)
+            bits = np.minimum(hamming(self._phash, descriptor.phash), hamming(self._dhash, descriptor.dhash))
+            mask = np.ones(len(self._video_ids), dtype=bool)
+            if channel_id is not None:
+                mask &= self._channels == channel_id
+            if exclude_channel is not None:
+                mask &= self._channels != exclude_channel
+            if exclude_video is not None and exclude_video in self._rows:
+                mask[self._rows[exclude_video]] = False
+            candidates = np.flatnonzero(mask)
+            if candidates.size == 0:
+                return []
+
+            near = bits[candidates] <= NEAR_DUPLICATE_BITS
+            # Sort key: near-duplicates first, then highest similarity
+            order = np.lexsort((-similarity[candidates], ~near))[:k]
+            results = []
+            for i in candidates[order]:
+                entry = dict(self._meta[i])
+                entry['similarity'] = round(float(similarity[i]), 4)
+                entry['hamming'] = int(bits[i])
+                entry['near_duplicate'] = bool(bits[i] <= NEAR_DUPLICATE_BITS)
+                results.append(entry)
+            return results
+
+    def __len__(self) -> int:
+        with self._lock:
+            self._load()
+            return len(self._video_ids)
+
+    def stats(self) -> Dict:
+        return {'hits': self.hits, 'misses': self.misses}
+
+
+def summarize_neighbors(neighbors: List[Dict], producer: str) -> Dict:
+    """Average performance and most common style (in `producer`'s taxonomy) among similar thumbnails."""
+    performances = [n['performance'] for n in neighbors if n.get('performance') is not None]
+    styles = {}
+    for n in neighbors:
+        style = n.get('styles', {}).get(producer)
+        if style:
+            styles[style] = styles.get(style, 0) + 1
+    return {
+        'count': len(neighbors),
+        'avg_performance': round(sum(performances) / len(performances), 2) if performances else None,
+        'top_style': max(styles, key=styles.get) if styles else None,
+        'near_duplicates': sum(1 for n in neighbors if n.get('near_duplicate')),
+    }
+
+
+# Singleton instance for global use
+_index_instance = None
+_index_lock = threading.Lock()
+
+def get_thumbnail_index() -> ThumbnailIndex:
+    """Get the singleton thumbnail index instance."""
+    global _index_instance
+    with _index_lock:
+        if _index_instance is None:
+            _index_instance = ThumbnailIndex()
+        return _index_instance
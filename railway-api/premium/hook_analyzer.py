@@ -3,7 +3,8 @@ Premium Analysis - Hook Analyzer
 Analyzes the first 60 seconds of videos to identify patterns that drive views.
 
 Features:
-- Uses YouTube captions (instant, no audio download needed)
+- Reuses captions already fetched by ingest (shared TranscriptStore)
+- Falls back to YouTube captions only for videos not ingested
 - Extracts hook patterns (questions, statements, teasers, CTAs)
 - Correlates hook style with view performance using ML
 - Skips videos without captions (no transcription fallback)
@@ -13,6 +14,8 @@ import re
 from dataclasses import dataclass, field
 from typing import List, Dict, Optional
 
+from .transcript_store import TranscriptStore
+
 # Try to import youtube-transcript-api
 try:
     from youtube_transcript_api import YouTubeTranscriptApi
@@ -158,15 +161,22 @@ class HookAnalyzer:
         ],
     }
     
-    def __init__(self, whisper_model: str = 'tiny'):
+    HOOK_SECONDS = 60
+    HOOK_MAX_CHARS = 500
+    
+    def __init__(self, whisper_model: str = 'tiny', transcript_store: Optional[TranscriptStore] = None):
         """
         Initialize the hook analyzer.
         
         Args:
             whisper_model: Ignored (kept for API compatibility)
+            transcript_store: Shared store of ingested caption segments. When set,
+                hooks are sliced from it and captions are only downloaded on a miss.
         """
         # Note: whisper_model is ignored - we only use YouTube captions now
-        pass
+        self.transcript_store = transcript_store
+        self.store_hits = 0
+        self.caption_downloads = 0
     
     def fetch_captions(self, video_id: str, max_chars: int = 500) -> Optional[str]:
         """
@@ -295,8 +305,8 @@ class HookAnalyzer:
         if not video_id:
             return None
         
-        # Fetch captions (instant - no audio download needed)
-        caption_text = self.fetch_captions(video_id)
+        # Prefer captions already ingested for this job, download only on a miss
+        caption_text, hook_duration = self.get_hook_text(video_id)
         if not caption_text:
             print(f"   ⚠️ No captions for {video_id} - skipping")
             return None
@@ -319,9 +329,26 @@ class HookAnalyzer:
             patterns=patterns,
             hook_score=hook_score,
             opening_words=opening_words,
-            hook_duration_seconds=60.0,  # Approximate
+            hook_duration_seconds=hook_duration,
         )
     
+    def get_hook_text(self, video_id: str) -> tuple:
+        """
+        Get the first HOOK_SECONDS of captions for a video.
+        
+        Returns:
+            Tuple of (text or None, covered_seconds)
+        """
+        if self.transcript_store is not None:
+            opening = self.transcript_store.get_opening(video_id, seconds=self.HOOK_SECONDS,
+                                                        max_chars=self.HOOK_MAX_CHARS)
+            if opening:
+                self.store_hits += 1
+                return opening
+        
+        self.caption_downloads += 1
+        return self.fetch_captions(video_id, max_chars=self.HOOK_MAX_CHARS), float(self.HOOK_SECONDS)
+    
     def analyze_videos(self, videos_data: List[dict], max_videos: int = 20) -> List[HookAnalysisResult]:
         """
         Analyze hooks for multiple videos using YouTube captions.
@@ -349,24 +376,26 @@ class HookAnalyzer:
             print(f"🎣 Analyzing hook {idx+1}/{len(videos)}: {video.get('title', '')[:50]}...")
             return self.analyze_single_video(video, avg_views)
 
-        from concurrent.futures import ThreadPoolExecutor, as_completed
-        
-        with ThreadPoolExecutor(max_workers=5) as executor:
-            futures = {executor.submit(process_one, i, v): i for i, v in enumerate(videos)}
-            
-            for future in as_completed(futures):
-                try:
-                    result = future.result()
-                    if result:
-                        results.append(result)
-                    else:
-                        skipped += 1
-                except Exception as e:
-                    print(f"   ⚠️ Hook analysis error: {e}")
+        # Shared I/O pool (caption/audio downloads) instead of a pool per call
+        from task_pools import get_task_pools, WORKLOAD_IO
+        pools = get_task_pools()
+        futures = [pools.submit(WORKLOAD_IO, process_one, i, v) for i, v in enumerate(videos)]
+        
+        for future in futures:
+            try:
+                result = future.result()
+                if result:
+                    results.append(result)
+                else:
                     skipped += 1
+            except Exception as e:
+                print(f"   ⚠️ Hook analysis error: {e}")
+                skipped += 1
         
         if skipped > 0:
             print(f"   ℹ️ Skipped {skipped} videos (no captions available)")
+        if self.transcript_store is not None:
+            print(f"   ℹ️ Hook captions: {self.store_hits} reused from ingest, {self.caption_downloads} downloaded")
                 
         return results
     
@@ -23,7 +23,6 @@ import warnings
 import requests
 from PIL import Image
 from io import BytesIO
-import time
 
 warnings.filterwarnings('ignore')
 
@@ -371,6 +370,7 @@ def extract_thumbnail_features_batch(df: pd.DataFrame,
     processed = 0
     errors = 0
     
+    pending = []
     for idx, row in df.iterrows():
         vid_id = row['video_id']
         
@@ -379,11 +379,18 @@ def extract_thumbnail_features_batch(df: pd.DataFrame,
             for key, val in cached_features[vid_id].items():
                 df.loc[idx, f'thumb_{key}'] = val
             continue
-        
-        # Extract new features
+        pending.append((idx, vid_id, row['thumbnail_url']))
+    
+    # Download and extract uncached thumbnails in one batch (I/O threads + CPU processes)
+    print(f"  Extracting {len(pending)} thumbnails...")
+    batch = extractor.extract_batch([url for _, _, url in pending])
+    failed = set(batch.failed)
+    
+    for i, ((idx, vid_id, _), features) in enumerate(zip(pending, batch.features)):
+        if i in failed:
+            errors += 1
+            continue
         try:
-            url = row['thumbnail_url']
-            features = extractor.extract_from_url(url)
             rag_score = scorer.score_from_features(features)
             
             # Store key features
@@ -412,12 +419,6 @@ def extract_thumbnail_features_batch(df: pd.DataFrame,
             new_features[vid_id] = feature_dict
             processed += 1
             
-            if processed % 20 == 0:
-                print(f"  Processed {processed} thumbnails...")
-            
-            # Rate limit
-            time.sleep(0.1)
-            
         except Exception as e:
             errors += 1
             if errors < 5:
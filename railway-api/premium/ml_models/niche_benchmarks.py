@@ -0,0 +1,274 @@
+"""
+Niche Thumbnail Benchmarks
+==========================
+
+RAGThumbnailScorer and OptimizationScorer.score_thumbnail judge thumbnail
+features against fixed research thresholds ("contrast > 0.3 is high"). What
+counts as high depends on the niche: a gaming thumbnail at 0.3 contrast is
+ordinary, a finance one is loud. This module answers "where does this
+thumbnail sit among its niche?" instead.
+
+Offline (once per training-data refresh):
+    cd railway-api
+    python -m premium.ml_models.niche_benchmarks --data ../training_data
+
+downloads every thumbnail in training_data/*.json through the thumbnail
+cache, extracts features at one feature level (fast by default) and writes
+a fixed quantile grid per niche and feature to a small JSON artifact
+(trained/niche_thumbnail_benchmarks.json, a few KB).
+
+At request time a lookup is one bisect per feature on the grid, i.e.
+O(features) with no numpy and no model loading:
+
+    from premium.ml_models.niche_benchmarks import get_niche_benchmarks
+    result = get_niche_benchmarks().percentile_ranks(features.to_dict(), 'Gaming')
+    # {'niche': 'gaming', 'samples': 130, 'percentiles': {'contrast_score': 71.3, ...}}
+
+Features must be extracted at the artifact's level (benchmarks.level);
+Haar and mediapipe face counts, or edge and OCR text, are not comparable.
+"""
+
+import glob
+import json
+import os
+import threading
+from bisect import bisect_left, bisect_right
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+ARTIFACT_VERSION = 1
+
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'trained', 'niche_thumbnail_benchmarks.json')
+
+# Features ranked against the niche (all produced by the fast level)
+BENCHMARK_FEATURES = (
+    'contrast_score',
+    'avg_saturation',
+    'avg_brightness',
+    'face_count',
+    'face_area_ratio',
+    'text_density_score',
+    'edge_density',
+    'visual_complexity',
+)
+
+QUANTILE_POINTS = 21  # Every 5th percentile
+MIN_SAMPLES = 30  # Smaller niches fall back to the pooled 'general' entry
+GENERAL = 'general'
+
+
+def niche_slug(niche: str) -> str:
+    """Same normalization as the per-niche models (benchmark_{slug}.joblib)."""
+    return niche.lower().strip().replace(" & ", "_").replace(" ", "_").replace("/", "_")
+
+
+def quantile_grid(values: Iterable[float], points: int = QUANTILE_POINTS) -> List[float]:
+    """points evenly spaced quantiles (0th..100th), linearly interpolated."""
+    ordered = sorted(float(v) for v in values)
+    if not ordered:
+        raise ValueError("quantile_grid needs at least one value")
+    grid = []
+    last = len(ordered) - 1
+    for i in range(points):
+        pos = last * i / (points - 1)
+        lo = int(pos)
+        hi = min(lo + 1, last)
+        grid.append(round(ordered[lo] + (ordered[hi] - ordered[lo]) * (pos - lo), 4))
+    return grid
+
+
+def percentile_rank(grid: List[float], value: float) -> float:
+    """
+    Percentile (0-100) of value on a quantile grid.
+    Ties take the middle of the tied span, so a face_count of 0 in a niche
+    where most thumbnails have no face lands mid-pack, not at 0 or 100.
+    """
+    steps = len(grid) - 1
+    lo = bisect_left(grid, value)
+    hi = bisect_right(grid, value)
+    if lo < hi:
+        return 100.0 * (lo + hi - 1) / 2 / steps
+    if lo == 0:
+        return 0.0
+    if lo > steps:
+        return 100.0
+    below, above = grid[lo - 1], grid[lo]
+    return 100.0 * (lo - 1 + (value - below) / (above - below)) / steps
+
+
+def benchmarks_from_features(rows: Iterable[Tuple[str, Dict[str, Any]]], level: str,
+                             points: int = QUANTILE_POINTS, min_samples: int = MIN_SAMPLES,
+                             extractor_version: Optional[int] = None) -> Dict:
+    """
+    Build the artifact from (niche name, feature dict) rows.
+    Every row also counts towards the pooled 'general' entry.
+    """
+    groups: Dict[str, Dict] = {}
+    for niche, features in rows:
+        for key, name in ((niche_slug(niche), niche), (GENERAL, 'General')):
+            group = groups.setdefault(key, {'name': name, 'values': {f: [] for f in BENCHMARK_FEATURES}})
+            for feature in BENCHMARK_FEATURES:
+                group['values'][feature].append(float(features.get(feature) or 0))
+
+    niches = {}
+    for key, group in sorted(groups.items()):
+        samples = len(group['values'][BENCHMARK_FEATURES[0]])
+        if samples < min_samples and key != GENERAL:
+            print(f"⚠️ Skipping niche {group['name']}: {samples} samples (< {min_samples})")
+            continue
+        niches[key] = {
+            'name': group['name'],
+            'samples': samples,
+            'quantiles': {f: quantile_grid(v, points) for f, v in group['values'].items()},
+        }
+    return {
+        'version': ARTIFACT_VERSION,
+        'level': level,
+        'extractor_version': extractor_version,
+        'points': points,
+        'features': list(BENCHMARK_FEATURES),
+        'built_at': datetime.utcnow().isoformat(),
+        'niches': niches,
+    }
+
+
+def load_training_videos(data_dir: str) -> List[Dict]:
+    """Videos from data_dir/*.json with a niche and thumbnail URL."""
+    videos = []
+    for path in sorted(glob.glob(os.path.join(data_dir, '*.json'))):
+        try:
+            with open(path, 'r') as f:
+                data = json.load(f)
+        except Exception as e:
+            print(f"Skipping {path}: {e}")
+            continue
+        niche_guess = os.path.basename(path).split('_')[0]
+        for entry in data if isinstance(data, list) else []:
+            if entry.get('thumbnail_url'):
+                videos.append(dict(entry, niche=entry.get('niche') or niche_guess))
+    # Collection runs overlap; one row per video
+    return list({v.get('video_id') or v['thumbnail_url']: v for v in videos}.values())
+
+
+def build_niche_benchmarks(data_dir: str, level: str = 'fast', points: int = QUANTILE_POINTS,
+                           min_samples: int = MIN_SAMPLES, pools=None) -> Dict:
+    """Extract features for every training thumbnail and build the artifact."""
+    from premium.thumbnail_extractor import EXTRACTOR_VERSION, ThumbnailFeatureExtractor
+
+    videos = load_training_videos(data_dir)
+    print(f"📊 Extracting {len(videos)} training thumbnails at level '{level}'...")
+    extractor = ThumbnailFeatureExtractor(level=level, use_vision_pool=False)
+    batch = extractor.extract_batch([v['thumbnail_url'] for v in videos], pools=pools,
+                                    video_ids=[v.get('video_id') for v in videos])
+    failed = set(batch.failed)
+    rows = [(video['niche'], features.to_dict())
+            for i, (video, features) in enumerate(zip(videos, batch.features)) if i not in failed]
+    return benchmarks_from_features(rows, level, points, min_samples, EXTRACTOR_VERSION)
+
+
+class NicheBenchmarks:
+    """Per-niche quantile grids with O(features) percentile lookups."""
+
+    def __init__(self, artifact: Optional[Dict] = None):
+        artifact = artifact or {}
+        self.artifact = artifact
+        self.level = artifact.get('level')
+        self.features = tuple(artifact.get('features') or ())
+        self.niches = artifact.get('niches') or {}
+        self.built_at = artifact.get('built_at')
+        self.enabled = bool(self.niches)
+
+    @classmethod
+    def from_file(cls, path: str) -> 'NicheBenchmarks':
+        """
+        Load an artifact; a missing or unreadable file, or one built with a
+        different thumbnail extractor version, gives disabled benchmarks.
+        """
+        try:
+            with open(path, 'r') as f:
+                artifact = json.load(f)
+        except FileNotFoundError:
+            return cls()
+        except Exception as e:
+            print(f"⚠️ Could not load niche benchmarks from {path}: {e}")
+            return cls()
+        if artifact.get('version') != ARTIFACT_VERSION:
+            print(f"⚠️ Ignoring niche benchmarks artifact version {artifact.get('version')}")
+            return cls()
+        from premium.thumbnail_extractor import EXTRACTOR_VERSION
+        if artifact.get('extractor_version') != EXTRACTOR_VERSION:
+            # Features from another extractor version aren't comparable to the quantiles
+            print(f"⚠️ Ignoring niche benchmarks built with extractor version {artifact.get('extractor_version')} "
+                  f"(current {EXTRACTOR_VERSION}); rebuild with python -m premium.ml_models.niche_benchmarks")
+            return cls()
+        return cls(artifact)
+
+    def save(self, path: str):
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with open(path, 'w') as f:
+            json.dump(self.to_dict(), f, separators=(',', ':'))
+
+    def to_dict(self) -> Dict:
+        return self.artifact
+
+    def resolve(self, niche: Optional[str]) -> Optional[str]:
+        """Artifact key for a niche name; partial matches allowed, else 'general'."""
+        slug = niche_slug(niche) if niche else ''
+        if slug in self.niches:
+            return slug
+        for key in self.niches:
+            if slug and key != GENERAL and (key in slug or slug in key):
+                return key
+        return GENERAL if GENERAL in self.niches else None
+
+    def percentile_ranks(self, features: Dict[str, Any], niche: Optional[str] = None) -> Optional[Dict]:
+        """Percentile of each benchmark feature within the niche; None when unavailable."""
+        key = self.resolve(niche)
+        if key is None:
+            return None
+        entry = self.niches[key]
+        percentiles = {}
+        for feature, grid in entry['quantiles'].items():
+            value = features.get(feature)
+            if value is not None:
+                percentiles[feature] = round(percentile_rank(grid, float(value)), 1)
+        return {
+            'niche': key,
+            'niche_name': entry.get('name', key),
+            'samples': entry.get('samples', 0),
+            'level': self.level,
+            'percentiles': percentiles,
+        }
+
+
+# Singleton instance for global use
+_benchmarks_instance = None
+_benchmarks_lock = threading.Lock()
+
+def get_niche_benchmarks() -> NicheBenchmarks:
+    """Get the singleton niche benchmarks (NICHE_BENCHMARKS_PATH overrides the artifact path)."""
+    global _benchmarks_instance
+    with _benchmarks_lock:
+        if _benchmarks_instance is None:
+            _benchmarks_instance = NicheBenchmarks.from_file(os.getenv('NICHE_BENCHMARKS_PATH', DEFAULT_PATH))
+        return _benchmarks_instance
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Precompute per-niche thumbnail feature quantiles")
+    parser.add_argument("--data", default="../training_data", help="Training data directory")
+    parser.add_argument("--out", default=DEFAULT_PATH, help="Artifact path")
+    parser.add_argument("--level", default="fast", help="Thumbnail feature level (fast/standard/full)")
+    parser.add_argument("--points", type=int, default=QUANTILE_POINTS, help="Quantile grid size")
+    parser.add_argument("--min-samples", type=int, default=MIN_SAMPLES, help="Minimum thumbnails per niche")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.data):
+        print(f"Data directory {args.data} not found.")
+    else:
+        benchmarks = NicheBenchmarks(build_niche_benchmarks(args.data, args.level, args.points, args.min_samples))
+        benchmarks.save(args.out)
+        print(f"✅ Saved benchmarks for {len(benchmarks.niches)} niches to {args.out}")
+        for key, entry in benchmarks.niches.items():
+            print(f"   {entry['name']}: {entry['samples']} thumbnails")
@@ -147,6 +147,22 @@ class SentimentEngine:
             
         return enhanced_comments
 
+    def analyze_from_store(self, store, channel_ids: List[str], video_ids: List[str] = None,
+                           min_likes: int = None, select=None) -> List[Dict]:
+        """
+        Analyze comments read from the columnar CommentStore.
+        Only the video_id/video_title/text/likes columns are scanned; `select`
+        (e.g. the signal filter) narrows the rows before inference.
+        """
+        comments = store.scan(columns=['video_id', 'video_title', 'text', 'likes'],
+                              channel_ids=channel_ids, video_ids=video_ids,
+                              min_likes=min_likes)
+        for c in comments:
+            c['video'] = c.pop('video_title')  # Same shape as the in-memory comment rows
+        if select is not None:
+            comments = select(comments)
+        return self.analyze_batch(comments)
+
     def _get_embedding(self, text: str) -> np.ndarray:
         """Get pooled embedding for text."""
         try:
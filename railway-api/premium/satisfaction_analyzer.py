@@ -177,6 +177,54 @@ class SatisfactionAnalyzer:
             recommendations=recommendations
         )
     
+    def analyze_from_store(self,
+                           store,
+                           channel_ids: List[str],
+                           video_ids: Optional[List[str]] = None,
+                           video_stats: Optional[Dict[str, Dict]] = None,
+                           channel_engagement_rate: float = 5.0) -> SatisfactionResult:
+        """
+        Analyze satisfaction for comments held in the columnar CommentStore.
+        
+        Only the author/text/likes columns are read, so historical or
+        multi-channel runs don't need the per-video JSON caches.
+        
+        Args:
+            store: premium.db.comment_store.CommentStore
+            channel_ids: Channel partitions to scan
+            video_ids: Optional subset of videos
+            video_stats: Optional {video_id: {'view_count', 'like_count'}}
+            channel_engagement_rate: Average channel engagement rate for comparison
+        """
+        rows = store.scan(columns=['video_id', 'author', 'text', 'likes'],
+                          channel_ids=channel_ids, video_ids=video_ids)
+        video_stats = video_stats or {}
+        
+        by_video = {}
+        for row in rows:
+            by_video.setdefault(row['video_id'], []).append(row)
+        
+        # Every video counts its views/likes, including those without comment rows,
+        # so the result matches analyze_satisfaction() on the same job
+        order = list(video_ids) if video_ids is not None else list(video_stats)
+        listed = set(order)
+        order += [v for v in by_video if v not in listed]
+        
+        videos_data = []
+        for video_id in order:
+            comments = by_video.get(video_id, [])
+            stats = video_stats.get(video_id, {})
+            videos_data.append({
+                'video_info': {
+                    'id': video_id,
+                    'view_count': stats.get('view_count', 0),
+                    'like_count': stats.get('like_count', 0),
+                },
+                'comments': comments,
+            })
+        
+        return self.analyze_satisfaction(videos_data, channel_engagement_rate=channel_engagement_rate)
+    
     def _detect_success_comments(self, comments: List[Dict]) -> List[Dict]:
         """Find comments indicating successful understanding/implementation."""
         success = []
@@ -4,7 +4,6 @@ Uses gemini-2.0-flash for cost-effective, accurate thumbnail analysis.
 """
 
 import json
-import requests
 from typing import Dict, List, Optional
 from dataclasses import dataclass, asdict
 import os
@@ -56,35 +55,18 @@ class ThumbnailAnalysis:
         return asdict(self)
 
 
-def analyze_thumbnail_with_gemini(
-    thumbnail_url: str,
-    video_title: str,
-    ai_client,
-    model: str = "gemini-2.0-flash",
-    guidelines: str = ""
-) -> ThumbnailAnalysis:
-    """
-    Analyze a YouTube thumbnail using Gemini Vision.
-    
-    Args:
-        thumbnail_url: URL of the thumbnail image
-        video_title: Title of the video (for context)
-        ai_client: Gemini client instance
-        model: Gemini model to use (default: gemini-2.0-flash for cost)
-    
-    Returns:
-        ThumbnailAnalysis with detected features and issues
-    """
-    
-    prompt = f"""Analyze this YouTube thumbnail for the video titled: "{video_title}"
+# Bump when the prompt or the fields parsed from it change (invalidates cached analyses)
+PROMPT_VERSION = 2
 
-STRATEGY GUIDELINES TO FOLLOW:
-{guidelines if guidelines else "Use general YouTube thumbnail best practices (high contrast, readable text, emotional faces)."}
+# Gemini bills images in 768x768 tiles (<=384px: one small tile); thumbnails are
+# downscaled to fit one tile and re-encoded before upload
+GEMINI_THUMBNAIL_MAX_SIDE = int(os.getenv('GEMINI_THUMBNAIL_MAX_SIDE', 768))
+GEMINI_THUMBNAIL_QUALITY = int(os.getenv('GEMINI_THUMBNAIL_QUALITY', 85))
 
-TASK: Based on the STRATEGY GUIDELINES above, critique this thumbnail.
+# Thumbnails packed into one multimodal request (1 = one request per thumbnail)
+GEMINI_THUMBNAILS_PER_REQUEST = int(os.getenv('GEMINI_THUMBNAILS_PER_REQUEST', 3))
 
-Return a JSON object with these exact fields:
-{{
+ANALYSIS_FIELDS = """{
     "has_face": true/false (is there a human face visible?),
     "face_count": number (how many faces),
     "face_is_large": true/false (does face take up >15% of image?),
@@ -102,76 +84,234 @@ Return a JSON object with these exact fields:
     "color_palette_type": "vibrant/dark/pastel/minimalist/neon",
     
     "issues": [
-        {{"issue": "description", "severity": "high/medium/low", "fix": "how to fix"}}
+        {"issue": "description", "severity": "high/medium/low", "fix": "how to fix"}
     ],
     "strengths": ["strength1", "strength2"],
     
     "overall_score": 1-100 (thumbnail quality score),
     "quality_score": 1-100 (visual appeal and clickability score)
-}}
+}"""
+
+
+def build_prompt(titles: List[str], guidelines: str = "") -> str:
+    """Critique prompt for one thumbnail, or for several packed into one request."""
+    guidelines = guidelines if guidelines else \
+        "Use general YouTube thumbnail best practices (high contrast, readable text, emotional faces)."
+    
+    if len(titles) == 1:
+        return f"""Analyze this YouTube thumbnail for the video titled: "{titles[0]}"
+
+STRATEGY GUIDELINES TO FOLLOW:
+{guidelines}
+
+TASK: Based on the STRATEGY GUIDELINES above, critique this thumbnail.
+
+Return a JSON object with these exact fields:
+{ANALYSIS_FIELDS}
 
 Be accurate and specific. Only report issues that actually exist in this thumbnail.
 For dominant_colors, favor the ACCENT colors that pop (e.g. the text color, the shirt color, the background glow) over the general dark background.
 Return ONLY the JSON object, no other text."""
+    
+    listing = "\n".join(f'Image {i + 1}: "{title}"' for i, title in enumerate(titles))
+    return f"""Analyze these {len(titles)} YouTube thumbnails. The images are attached in this order, one per video:
+{listing}
+
+STRATEGY GUIDELINES TO FOLLOW:
+{guidelines}
+
+TASK: Based on the STRATEGY GUIDELINES above, critique EACH thumbnail on its own.
 
+Return a JSON array with exactly {len(titles)} objects, in image order, each with these exact fields:
+{ANALYSIS_FIELDS}
+
+Be accurate and specific. Only report issues that actually exist in that thumbnail.
+For dominant_colors, favor the ACCENT colors that pop (e.g. the text color, the shirt color, the background glow) over the general dark background.
+Return ONLY the JSON array, no other text."""
+
+
+def prepare_thumbnail(image_bytes: bytes, max_side: int = None, quality: int = None) -> bytes:
+    """
+    Downscale to fit max_side (aspect kept) and re-encode as JPEG for upload.
+    Returns the original bytes if they can't be decoded or are already smaller.
+    """
+    from io import BytesIO
+    from PIL import Image
+    max_side = max_side or GEMINI_THUMBNAIL_MAX_SIDE
     try:
-        # Download image for Gemini
-        response = requests.get(thumbnail_url, timeout=10)
-        if response.status_code != 200:
-            print(f"⚠️ Failed to download thumbnail: {response.status_code}")
-            return ThumbnailAnalysis()
-        
-        import base64
-        image_data = base64.b64encode(response.content).decode('utf-8')
-        
-        # Call Gemini with image
-        gemini_model = ai_client.GenerativeModel(model)
-        
-        gemini_response = gemini_model.generate_content([
-            prompt,
-            {
-                "mime_type": "image/jpeg",
-                "data": image_data
-            }
-        ])
-        
-        # Parse response
-        response_text = gemini_response.text.strip()
-        
-        # Clean up response if wrapped in markdown
-        if response_text.startswith("```"):
-            response_text = response_text.split("```")[1]
-            if response_text.startswith("json"):
-                response_text = response_text[4:]
-        response_text = response_text.strip()
-        
-        data = json.loads(response_text)
-        
-        return ThumbnailAnalysis(
-            has_face=data.get("has_face", False),
-            face_count=data.get("face_count", 0),
-            face_is_large=data.get("face_is_large", False),
-            has_eye_contact=data.get("has_eye_contact", False),
-            face_expression=data.get("face_expression", ""),
-            has_text=data.get("has_text", False),
-            text_content=data.get("text_content", ""),
-            word_count=data.get("word_count", 0),
-            text_is_readable=data.get("text_is_readable", False),
-            has_bright_colors=data.get("has_bright_colors", False),
-            has_high_contrast=data.get("has_high_contrast", False),
-            dominant_colors=data.get("dominant_colors", []),
-            issues=data.get("issues", []),
-            strengths=data.get("strengths", []),
-            overall_score=data.get("overall_score", 50),
-            quality_score=data.get("quality_score", 50)
-        )
-        
-    except json.JSONDecodeError as e:
-        print(f"⚠️ Failed to parse Gemini response: {e}")
-        return ThumbnailAnalysis()
-    except Exception as e:
-        print(f"⚠️ Thumbnail analysis failed: {e}")
-        return ThumbnailAnalysis()
+        img = Image.open(BytesIO(image_bytes)).convert('RGB')
+    except Exception:
+        return image_bytes
+    img.thumbnail((max_side, max_side), Image.LANCZOS)
+    buf = BytesIO()
+    img.save(buf, format='JPEG', quality=quality or GEMINI_THUMBNAIL_QUALITY, optimize=True)
+    return buf.getvalue() if buf.tell() < len(image_bytes) else image_bytes
+
+
+def parse_json_response(text: str):
+    """Parse a model's JSON reply, tolerating a markdown code fence."""
+    text = text.strip()
+    if text.startswith("```"):
+        text = text.split("```")[1]
+        if text.startswith("json"):
+            text = text[4:]
+    return json.loads(text.strip())
+
+
+def analysis_from_dict(data: Dict) -> ThumbnailAnalysis:
+    return ThumbnailAnalysis(
+        has_face=data.get("has_face", False),
+        face_count=data.get("face_count", 0),
+        face_is_large=data.get("face_is_large", False),
+        has_eye_contact=data.get("has_eye_contact", False),
+        face_expression=data.get("face_expression", ""),
+        has_text=data.get("has_text", False),
+        text_content=data.get("text_content", ""),
+        word_count=data.get("word_count", 0),
+        text_is_readable=data.get("text_is_readable", False),
+        has_bright_colors=data.get("has_bright_colors", False),
+        has_high_contrast=data.get("has_high_contrast", False),
+        dominant_colors=data.get("dominant_colors", []),
+        issues=data.get("issues", []),
+        strengths=data.get("strengths", []),
+        overall_score=data.get("overall_score", 50),
+        quality_score=data.get("quality_score", 50)
+    )
+
+
+def analysis_variant(model: str, title: str, guidelines: str) -> str:
+    """Thumbnail-cache variant for a Gemini analysis: prompt version + everything else in the prompt."""
+    import hashlib
+    digest = hashlib.sha1(json.dumps([model, title, guidelines]).encode('utf-8')).hexdigest()
+    return f"gemini-p{PROMPT_VERSION}-{digest[:12]}"
+
+
+def _request_analyses(images: List[bytes], titles: List[str], ai_client, model: str, guidelines: str) -> List[Dict]:
+    """
+    One Gemini request for one or more prepared thumbnails; a dict per image,
+    in order. Elements that aren't JSON objects come back as None.
+    """
+    import base64
+    gemini_model = ai_client.GenerativeModel(model)
+    parts = [build_prompt(titles, guidelines)]
+    parts.extend({"mime_type": "image/jpeg", "data": base64.b64encode(data).decode('utf-8')} for data in images)
+    data = parse_json_response(gemini_model.generate_content(parts).text)
+    if len(images) == 1 and isinstance(data, dict):
+        return [data]
+    if not isinstance(data, list) or len(data) != len(images):
+        raise ValueError(f"expected {len(images)} analyses, got {len(data) if isinstance(data, list) else type(data).__name__}")
+    return [d if isinstance(d, dict) else None for d in data]
+
+
+def analyze_thumbnails_with_gemini(
+    items: List[Dict],
+    ai_client,
+    model: str = "gemini-2.0-flash",
+    guidelines: str = "",
+    per_request: int = None
+) -> List[ThumbnailAnalysis]:
+    """
+    Analyze several thumbnails with as few Gemini requests as possible.
+    
+    Each image is downloaded once (thumbnail cache), downscaled for upload and
+    packed GEMINI_THUMBNAILS_PER_REQUEST to a request; downloads and requests
+    run in parallel on the shared I/O pool. Analyses are cached per image content hash, prompt version,
+    model, title and guidelines. A packed request whose reply can't be
+    matched to its images is retried one thumbnail per request, as are
+    images whose analysis in a packed reply isn't a JSON object.
+    
+    Args:
+        items: Dicts with 'thumbnail_url', 'title' and optionally 'video_id'
+    
+    Returns:
+        ThumbnailAnalysis per item, same order (defaults where analysis failed)
+    """
+    from premium.db.thumbnail_cache import get_thumbnail_cache
+    from task_pools import get_task_pools, WORKLOAD_IO
+    cache = get_thumbnail_cache()
+    pools = get_task_pools()
+    per_request = max(1, per_request or GEMINI_THUMBNAILS_PER_REQUEST)
+    results: List[Optional[ThumbnailAnalysis]] = [None] * len(items)
+    
+    def fetch(item):
+        return cache.fetch(item['thumbnail_url'], item.get('video_id'))
+    
+    fetched = pools.map(WORKLOAD_IO, fetch, items, ignore_errors=True)
+    
+    pending, original_bytes, uploaded_bytes = [], 0, 0
+    for i, (item, got) in enumerate(zip(items, fetched)):
+        if not got:
+            print(f"⚠️ Failed to download thumbnail: {item['thumbnail_url']}")
+            results[i] = ThumbnailAnalysis()
+            continue
+        variant = analysis_variant(model, item['title'], guidelines)
+        cached = cache.get_features(got[0], variant)
+        if cached is not None:
+            results[i] = analysis_from_dict(cached)
+            continue
+        image = prepare_thumbnail(got[1])
+        original_bytes += len(got[1])
+        uploaded_bytes += len(image)
+        pending.append((i, got[0], variant, image))
+    
+    def run(chunk):
+        images = [image for _, _, _, image in chunk]
+        titles = [items[i]['title'] for i, _, _, _ in chunk]
+        try:
+            analyses = _request_analyses(images, titles, ai_client, model, guidelines)
+        except Exception as e:
+            if len(chunk) == 1:
+                print(f"⚠️ Thumbnail analysis failed: {e}")
+                return chunk, [None]
+            print(f"⚠️ Packed thumbnail request failed ({e}); retrying one per request")
+            return chunk, [run([entry])[1][0] for entry in chunk]
+        malformed = [k for k, data in enumerate(analyses) if data is None]
+        if malformed and len(chunk) > 1:
+            # Same as a mismatch, but only for the images whose analysis was unusable
+            print(f"⚠️ {len(malformed)} malformed analyses in packed reply; retrying them one per request")
+            for k in malformed:
+                analyses[k] = run([chunk[k]])[1][0]
+        elif malformed:
+            print("⚠️ Thumbnail analysis failed: reply is not a JSON object")
+        return chunk, analyses
+    
+    chunks = [pending[j:j + per_request] for j in range(0, len(pending), per_request)]
+    if chunks:
+        for chunk, analyses in pools.map(WORKLOAD_IO, run, chunks):
+            for (i, content_hash, variant, _), data in zip(chunk, analyses):
+                if data is None:
+                    results[i] = ThumbnailAnalysis()
+                    continue
+                results[i] = analysis_from_dict(data)
+                cache.put_features(content_hash, variant, data)
+        print(f"   🖼️ Gemini: {len(pending)} thumbnails in {len(chunks)} request(s), "
+              f"{uploaded_bytes / 1024:.0f} KB uploaded ({original_bytes / 1024:.0f} KB before resizing), "
+              f"{len(items) - len(pending)} cached/skipped")
+    return results
+
+
+def analyze_thumbnail_with_gemini(
+    thumbnail_url: str,
+    video_title: str,
+    ai_client,
+    model: str = "gemini-2.0-flash",
+    guidelines: str = ""
+) -> ThumbnailAnalysis:
+    """
+    Analyze a YouTube thumbnail using Gemini Vision.
+    
+    Args:
+        thumbnail_url: URL of the thumbnail image
+        video_title: Title of the video (for context)
+        ai_client: Gemini client instance
+        model: Gemini model to use (default: gemini-2.0-flash for cost)
+    
+    Returns:
+        ThumbnailAnalysis with detected features and issues
+    """
+    return analyze_thumbnails_with_gemini(
+        [{'thumbnail_url': thumbnail_url, 'title': video_title}],
+        ai_client, model=model, guidelines=guidelines, per_request=1)[0]
 
 
 def analyze_thumbnails_batch(
@@ -182,7 +322,7 @@ def analyze_thumbnails_batch(
     niche: str = "General"
 ) -> List[Dict]:
     """
-    Analyze multiple thumbnails and return formatted results in parallel.
+    Analyze multiple thumbnails and return formatted results (same order as videos).
     
     Args:
         videos: List of video dicts with 'title' and 'thumbnail_url' or 'video_id'
@@ -193,8 +333,6 @@ def analyze_thumbnails_batch(
     Returns:
         List of analysis results formatted for frontend
     """
-    from concurrent.futures import ThreadPoolExecutor, as_completed
-    
     results = []
     
     # Initialize RAG Service
@@ -206,25 +344,23 @@ def analyze_thumbnails_batch(
         except Exception as e:
             print(f"⚠️ RAG Service init failed: {e}")
 
-    def process_video_thumbnail(video):
+    items = []
+    for video in videos[:max_videos]:
         video_info = video.get('video_info', video)
-        title = video_info.get('title', 'Unknown')
         video_id = video_info.get('video_id', '')
-        
-        # Get thumbnail URL
-        thumbnail_url = video_info.get('thumbnail_url') or \
-                       f"https://img.youtube.com/vi/{video_id}/maxresdefault.jpg"
-        
-        print(f"   🖼️ Analyzing: {title[:50]}...")
-        
-        analysis = analyze_thumbnail_with_gemini(
-            thumbnail_url=thumbnail_url,
-            video_title=title,
-            ai_client=ai_client,
-            model=model,
-            guidelines=guidelines
-        )
-        
+        items.append({
+            'title': video_info.get('title', 'Unknown'),
+            'video_id': video_id or None,
+            # Get thumbnail URL
+            'thumbnail_url': video_info.get('thumbnail_url') or
+                             f"https://img.youtube.com/vi/{video_id}/maxresdefault.jpg",
+        })
+    print(f"   🖼️ Analyzing {len(items)} thumbnails...")
+    
+    # Packed, parallel, cached Gemini requests
+    analyses = analyze_thumbnails_with_gemini(items, ai_client, model=model, guidelines=guidelines)
+    
+    for item, analysis in zip(items, analyses):
         # Format for frontend
         formatted_issues = []
         for issue in analysis.issues:
@@ -242,8 +378,8 @@ def analyze_thumbnails_batch(
         else:
             potential = "Low"
         
-        return {
-            "video_title": title,
+        results.append({
+            "video_title": item['title'],
             "quality_score": analysis.quality_score,
             "potential_improvement": potential,
             "score_breakdown": {
@@ -255,18 +391,7 @@ def analyze_thumbnails_batch(
             "issues": formatted_issues,
             "strengths": analysis.strengths,
             "ab_test_suggestions": []  # Can add later
-        }
-
-    # Parallelize with up to 5 workers
-    with ThreadPoolExecutor(max_workers=min(5, max_videos)) as executor:
-        futures = [executor.submit(process_video_thumbnail, v) for v in videos[:max_videos]]
-        for future in as_completed(futures):
-            try:
-                res = future.result()
-                if res:
-                    results.append(res)
-            except Exception as e:
-                print(f"   ⚠️ Batch thumbnail processed failed: {e}")
+        })
     
     return results
 
@@ -2,20 +2,30 @@
 Premium Analysis - Thumbnail Feature Extractor
 Extracts 50+ features from YouTube thumbnails for ML training.
 
+This is the single thumbnail feature engine: the premium modules and the
+root-level scripts (vision_analyzer.py) both use it, at one of three levels:
+- fast:     color, composition, Haar-cascade faces, edge-based text density
+- standard: fast + advanced features (Hough circles, gradients, layouts)
+- full:     every group, with mediapipe faces and EasyOCR text
+
 Uses:
-- OpenCV for basic image processing
+- OpenCV for basic image processing and Haar-cascade faces
 - EasyOCR for text extraction
 - mediapipe for face detection
-- Color analysis with K-means clustering
+- Color analysis with K-means clustering (on a downsampled copy by default)
 """
 
 import cv2
 import numpy as np
 from PIL import Image
-import requests
 from io import BytesIO
 from typing import Dict, List, Tuple, Optional
 import colorsys
+import hashlib
+import json
+import os
+import threading
+from concurrent.futures import Future
 from dataclasses import dataclass, asdict
 from sklearn.cluster import KMeans
 import warnings
@@ -23,44 +33,119 @@ import warnings
 # Suppress warnings for cleaner output
 warnings.filterwarnings('ignore')
 
+# Bump when feature definitions change (invalidates cached features)
+EXTRACTOR_VERSION = 3
+
+# Dominant colors are clustered on a copy whose longest side is this many pixels
+# (~14k points for a 16:9 thumbnail instead of ~920k for maxres)
+COLOR_SAMPLE_MAX_SIDE = 160
+
 # Lazy imports for optional dependencies
 _easyocr_reader = None
 _face_detection = None
+_haar = threading.local()  # CascadeClassifier per thread (cheap to load, not shared)
+
+# Neither model is thread-safe: one lock each for loading and inference.
+# Parallel jobs run them in premium/vision_workers.py processes instead.
+_ocr_lock = threading.Lock()
+_face_lock = threading.Lock()
 
 
 def get_ocr_reader():
     """Lazy load EasyOCR reader."""
     global _easyocr_reader
-    if _easyocr_reader is None:
-        try:
-            import easyocr
-            _easyocr_reader = easyocr.Reader(['en'], gpu=False)
-        except ImportError:
-            print("⚠️ EasyOCR not installed. Text detection disabled.")
-            return None
+    with _ocr_lock:
+        if _easyocr_reader is None:
+            try:
+                import easyocr
+                _easyocr_reader = easyocr.Reader(['en'], gpu=False)
+            except ImportError:
+                print("⚠️ EasyOCR not installed. Text detection disabled.")
+                return None
     return _easyocr_reader
 
 
 def get_face_detector():
     """Lazy load mediapipe face detector."""
     global _face_detection
-    if _face_detection is None:
-        try:
-            import mediapipe as mp
-            # Check if solutions attribute exists (version compatibility)
-            if hasattr(mp, 'solutions') and hasattr(mp.solutions, 'face_detection'):
-                _face_detection = mp.solutions.face_detection.FaceDetection(
-                    model_selection=1, min_detection_confidence=0.5
-                )
-            else:
-                print("⚠️ mediapipe version incompatible. Face detection disabled.")
+    with _face_lock:
+        if _face_detection is None:
+            try:
+                import mediapipe as mp
+                # Check if solutions attribute exists (version compatibility)
+                if hasattr(mp, 'solutions') and hasattr(mp.solutions, 'face_detection'):
+                    _face_detection = mp.solutions.face_detection.FaceDetection(
+                        model_selection=1, min_detection_confidence=0.5
+                    )
+                else:
+                    print("⚠️ mediapipe version incompatible. Face detection disabled.")
+                    return None
+            except Exception as e:
+                print(f"⚠️ mediapipe init failed: {e}. Face detection disabled.")
                 return None
-        except Exception as e:
-            print(f"⚠️ mediapipe init failed: {e}. Face detection disabled.")
-            return None
     return _face_detection
 
 
+def get_face_cascade():
+    """Lazy load OpenCV's frontal-face Haar cascade (one per thread); None if this OpenCV build has none."""
+    if not hasattr(cv2, 'CascadeClassifier') or not hasattr(cv2, 'data'):
+        return None  # OpenCV 5 dropped the Haar cascades
+    cascade = getattr(_haar, 'cascade', None)
+    if cascade is None:
+        cascade = _haar.cascade = cv2.CascadeClassifier(
+            cv2.data.haarcascades + 'haarcascade_frontalface_default.xml')
+    return None if cascade.empty() else cascade
+
+
+def dominant_colors(img_rgb: np.ndarray, n_colors: int = 5, fast: bool = True, with_shares: bool = False):
+    """
+    K-means dominant colors of an RGB image, largest cluster first.
+    
+    fast=True clusters an area-averaged downsample (COLOR_SAMPLE_MAX_SIDE) with
+    fewer restarts; fast=False clusters every pixel (the original behaviour,
+    kept as the reference for quality checks). with_shares=True returns
+    (colors, pixel fraction of each color).
+    """
+    h, w = img_rgb.shape[:2]
+    scale = COLOR_SAMPLE_MAX_SIDE / max(h, w)
+    if fast and scale < 1:
+        sample = cv2.resize(img_rgb, (max(1, round(w * scale)), max(1, round(h * scale))),
+                            interpolation=cv2.INTER_AREA)
+        pixels = sample.reshape(-1, 3).astype(np.float32)
+        kmeans = KMeans(n_clusters=n_colors, random_state=42, n_init=3)
+    else:
+        pixels = img_rgb.reshape(-1, 3).astype(float)
+        kmeans = KMeans(n_clusters=n_colors, random_state=42, n_init=10)
+    
+    kmeans.fit(pixels)
+    centers = np.clip(np.rint(kmeans.cluster_centers_), 0, 255).astype(int)
+    counts = np.bincount(kmeans.labels_, minlength=n_colors)
+    order = np.argsort(-counts, kind='stable')
+    colors = [tuple(int(c) for c in centers[i]) for i in order]
+    if with_shares:
+        return colors, [float(counts[i] / len(pixels)) for i in order]
+    return colors
+
+
+def delta_e(rgb1: Tuple[int, int, int], rgb2: Tuple[int, int, int]) -> float:
+    """CIE76 color difference (Euclidean distance in CIELAB); ~2.3 is a just-noticeable difference."""
+    pair = np.array([[rgb1, rgb2]], dtype=np.float32) / 255.0
+    lab = cv2.cvtColor(pair, cv2.COLOR_RGB2LAB)[0]
+    return float(np.linalg.norm(lab[0] - lab[1]))
+
+
+def palette_delta_e(reference: List[Tuple[int, int, int]], reference_shares: List[float],
+                    candidate: List[Tuple[int, int, int]]) -> float:
+    """
+    Share-weighted mean ΔE from each reference color to its nearest candidate color.
+    K-means can split or merge clusters differently between runs, so palettes
+    are compared by nearest match, not rank by rank.
+    """
+    total = sum(reference_shares) or 1.0
+    return sum(share * min(delta_e(color, other) for other in candidate)
+               for color, share in zip(reference, reference_shares)) / total
+
+
 @dataclass
 class ThumbnailFeatures:
     """50+ features extracted from a thumbnail."""
@@ -125,13 +210,19 @@ class ThumbnailFeatures:
     overall_vibrancy: float = 0.0
     mobile_readability_score: float = 0.0
     
+    # === Descriptive extras (not part of the ML feature vector) ===
+    palette: Tuple = ()  # Up to 5 dominant colors, largest first
+    palette_shares: Tuple = ()  # Pixel fraction of each palette color
+    text_density_score: float = 0.0  # Edge-based text estimate, 0-100 (fast/standard levels)
+    
     def to_dict(self) -> Dict:
         """Convert to dictionary for JSON serialization."""
         result = {}
         for key, value in asdict(self).items():
             if isinstance(value, tuple):
                 # Convert numpy types in tuples to native Python
-                result[key] = [int(v) if hasattr(v, 'item') else v for v in value]
+                result[key] = [list(v) if isinstance(v, tuple) else v.item() if hasattr(v, 'item') else v
+                               for v in value]
             elif hasattr(value, 'item'):
                 # Convert numpy scalars to Python natives
                 result[key] = value.item()
@@ -139,10 +230,21 @@ class ThumbnailFeatures:
                 result[key] = value
         return result
     
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'ThumbnailFeatures':
+        """Rebuild from to_dict() output (e.g. returned by a worker process)."""
+        known = cls.__dataclass_fields__
+        return cls(**{k: tuple(tuple(x) if isinstance(x, list) else x for x in v) if isinstance(v, list) else v
+                      for k, v in data.items() if k in known})
+    
     def to_feature_vector(self) -> List[float]:
         """Convert to numeric feature vector for ML models."""
         vector = []
         for key, value in asdict(self).items():
+            if key in NON_VECTOR_FIELDS:
+                continue
+            if isinstance(value, np.generic):
+                value = value.item()  # numpy bool/number would otherwise be dropped
             if isinstance(value, bool):
                 vector.append(float(value))
             elif isinstance(value, (int, float)):
@@ -155,6 +257,128 @@ class ThumbnailFeatures:
         return vector
 
 
+# Fields left out of to_feature_vector() (keeps trained models' input layout)
+NON_VECTOR_FIELDS = ('palette', 'palette_shares', 'text_density_score')
+
+FEATURE_GROUPS = ('color', 'face', 'text', 'composition', 'advanced')
+
+# Feature levels: which groups run and which face/text backend they use
+FEATURE_LEVELS = {
+    'fast': {'groups': ('color', 'face', 'text', 'composition'), 'face_backend': 'haar', 'text_backend': 'edges'},
+    'standard': {'groups': FEATURE_GROUPS, 'face_backend': 'haar', 'text_backend': 'edges'},
+    'full': {'groups': FEATURE_GROUPS, 'face_backend': 'mediapipe', 'text_backend': 'ocr'},
+}
+
+# Outputs of the model-backed groups (filled in by vision workers when pooled)
+FACE_FIELDS = ('face_count', 'face_area_ratio', 'primary_face_x', 'primary_face_y', 'primary_face_size',
+               'has_eye_contact', 'face_in_left_third', 'face_in_right_third', 'face_in_center', 'faces_are_large')
+TEXT_FIELDS = ('has_text', 'word_count', 'text_area_ratio', 'extracted_text', 'text_contrast_score',
+               'uses_numbers', 'uses_all_caps', 'text_length', 'has_question', 'has_exclamation')
+
+
+@dataclass
+class ThumbnailBatch:
+    """Result of ThumbnailFeatureExtractor.extract_batch (same order as the input URLs)."""
+    urls: List[str]
+    features: List[ThumbnailFeatures]  # Defaults for thumbnails that failed
+    failed: List[int]  # Indices whose download or worker failed
+    
+    @property
+    def matrix(self) -> np.ndarray:
+        """Feature matrix, one to_feature_vector() row per URL."""
+        return np.array([f.to_feature_vector() for f in self.features], dtype=np.float32)
+
+
+class ImageContext:
+    """
+    Derived arrays for one image, each computed at most once and shared by
+    all feature groups (HSV, gray, Canny edges, blur, gray histogram, ...).
+    
+    Float/int scratch arrays come from `buffers`, a dict the extractor keeps
+    across images, so same-sized thumbnails reuse the same allocations.
+    """
+    
+    def __init__(self, img_rgb: np.ndarray, buffers: Optional[Dict] = None):
+        self.rgb = img_rgb
+        self.h, self.w = img_rgb.shape[:2]
+        self._buffers = buffers if buffers is not None else {}
+        self._cache = {}
+    
+    def buffer(self, name: str, shape: Tuple[int, ...], dtype=np.float32) -> np.ndarray:
+        """Reusable scratch array (contents undefined; valid until the next image)."""
+        key = (name, shape, np.dtype(dtype).str)
+        buf = self._buffers.get(key)
+        if buf is None:
+            buf = self._buffers[key] = np.empty(shape, dtype=dtype)
+        return buf
+    
+    def _cached(self, name: str, compute):
+        value = self._cache.get(name)
+        if value is None:
+            value = self._cache[name] = compute()
+        return value
+    
+    @property
+    def hsv(self) -> np.ndarray:
+        return self._cached('hsv', lambda: cv2.cvtColor(self.rgb, cv2.COLOR_RGB2HSV))
+    
+    @property
+    def gray(self) -> np.ndarray:
+        return self._cached('gray', lambda: cv2.cvtColor(self.rgb, cv2.COLOR_RGB2GRAY))
+    
+    @property
+    def hue(self) -> np.ndarray:
+        """OpenCV hue channel (0-179), uint8 view into hsv."""
+        return self.hsv[:, :, 0]
+    
+    @property
+    def hue_i16(self) -> np.ndarray:
+        """Hue as int16 so differences don't wrap."""
+        def compute():
+            out = self.buffer('hue_i16', (self.h, self.w), np.int16)
+            np.copyto(out, self.hue)
+            return out
+        return self._cached('hue_i16', compute)
+    
+    def _scaled_channel(self, name: str, channel: int) -> np.ndarray:
+        def compute():
+            out = self.buffer(name, (self.h, self.w))
+            np.multiply(self.hsv[:, :, channel], np.float32(1 / 255.0), out=out, dtype=np.float32)
+            return out
+        return self._cached(name, compute)
+    
+    @property
+    def sat(self) -> np.ndarray:
+        """Saturation scaled to 0-1 (float32)."""
+        return self._scaled_channel('sat', 1)
+    
+    @property
+    def val(self) -> np.ndarray:
+        """Value (brightness) scaled to 0-1 (float32)."""
+        return self._scaled_channel('val', 2)
+    
+    @property
+    def edges(self) -> np.ndarray:
+        return self._cached('edges', lambda: cv2.Canny(self.gray, 100, 200))
+    
+    @property
+    def blur(self) -> np.ndarray:
+        """15x15 Gaussian blur of the gray image."""
+        return self._cached('blur', lambda: cv2.GaussianBlur(self.gray, (15, 15), 0))
+    
+    @property
+    def gray_hist(self) -> np.ndarray:
+        return self._cached('gray_hist', lambda: cv2.calcHist([self.gray], [0], None, [256], [0, 256]))
+    
+    @property
+    def laplacian_var(self) -> float:
+        def compute():
+            lap = self.buffer('laplacian', (self.h, self.w))
+            cv2.Laplacian(self.gray, cv2.CV_32F, dst=lap)
+            return float(lap.var(dtype=np.float64))
+        return self._cached('laplacian_var', compute)
+
+
 class ThumbnailFeatureExtractor:
     """
     Extract comprehensive features from YouTube thumbnails.
@@ -163,23 +387,184 @@ class ThumbnailFeatureExtractor:
         extractor = ThumbnailFeatureExtractor()
         features = extractor.extract_from_url(thumbnail_url)
         print(features.to_dict())
+    
+    feature_groups limits extraction to a subset of FEATURE_GROUPS; skipped
+    groups keep their ThumbnailFeatures defaults. level ('fast', 'standard',
+    'full'; see FEATURE_LEVELS) picks the groups and face/text backends in
+    one go and overrides use_ocr/use_face_detection.
     """
     
-    def __init__(self, use_ocr: bool = True, use_face_detection: bool = True):
+    def __init__(self, use_ocr: bool = True, use_face_detection: bool = True,
+                 fast_colors: Optional[bool] = None, feature_groups: Optional[Tuple[str, ...]] = None,
+                 use_vision_pool: Optional[bool] = None, level: Optional[str] = None,
+                 vision_timeout: Optional[float] = None):
+        if level is not None and level not in FEATURE_LEVELS:
+            raise ValueError(f"Unknown feature level: {level} (expected one of {sorted(FEATURE_LEVELS)})")
+        self.level = level
+        preset = FEATURE_LEVELS[level] if level else FEATURE_LEVELS['full']
+        self.face_backend = preset['face_backend']
+        self.text_backend = preset['text_backend']
+        if level:
+            use_ocr = use_face_detection = True  # Backends come from the level
         self.use_ocr = use_ocr
         self.use_face_detection = use_face_detection
+        groups = set(feature_groups or FEATURE_GROUPS)
+        unknown = groups - set(FEATURE_GROUPS)
+        if unknown:
+            raise ValueError(f"Unknown feature groups: {sorted(unknown)}")
+        if level:
+            groups &= set(preset['groups'])
+        if not use_ocr:
+            groups.discard('text')
+        if not use_face_detection:
+            groups.discard('face')
+        self.feature_groups = frozenset(groups)
+        self._local = threading.local()
+        # Downsampled dominant-color clustering (THUMBNAIL_FAST_COLORS=false restores full-resolution K-means)
+        if fast_colors is None:
+            fast_colors = os.getenv('THUMBNAIL_FAST_COLORS', 'true').lower() != 'false'
+        self.fast_colors = fast_colors
+        # OCR/face models run in premium/vision_workers.py processes (VISION_POOL=false: in-process)
+        if use_vision_pool is None:
+            use_vision_pool = os.getenv('VISION_POOL', 'true').lower() != 'false'
+        self.use_vision_pool = use_vision_pool
+        # Longest wait per image for the vision pool (API requests); None uses the pool's own timeouts
+        self.vision_timeout = vision_timeout
+        # Only the model-backed backends go to the vision pool; Haar/edges run locally
+        model_groups = {'face': self.face_backend == 'mediapipe', 'text': self.text_backend == 'ocr'}
+        self.vision_groups = tuple(g for g in ('face', 'text') if g in self.feature_groups and model_groups[g])
+    
+    def worker_options(self) -> Dict:
+        """Constructor arguments for an equivalent extractor in a worker process."""
+        return {
+            'use_ocr': self.use_ocr,
+            'use_face_detection': self.use_face_detection,
+            'fast_colors': self.fast_colors,
+            'feature_groups': tuple(sorted(self.feature_groups)),
+            'level': self.level,
+        }
+    
+    def _local_options(self) -> Dict:
+        """worker_options() minus the model-backed groups the vision pool handles."""
+        options = dict(self.worker_options(), use_vision_pool=False)
+        if self.use_vision_pool and self.vision_groups:
+            options.update(use_ocr=False, use_face_detection=False,
+                           feature_groups=tuple(g for g in options['feature_groups'] if g not in self.vision_groups))
+        return options
+    
+    def _merge_vision(self, features: ThumbnailFeatures, vision: Optional[Dict]) -> bool:
+        """
+        Apply face/text fields from a vision worker and refresh the features derived from them.
+        Returns False if a pooled group is missing (worker timeout, crash or full queue);
+        such results keep default face/text fields and must not be cached.
+        """
+        for name, value in (vision or {}).items():
+            setattr(features, name, value)
+        if 'advanced' in self.feature_groups:
+            derive_summary_features(features)
+        group_fields = {'face': FACE_FIELDS, 'text': TEXT_FIELDS}
+        return vision is not None and all(name in vision for group in self.vision_groups
+                                          for name in group_fields[group])
+    
+    def feature_variant(self) -> str:
+        """Feature-cache variant: extractor version plus the options that change outputs."""
+        digest = hashlib.sha1(json.dumps(self.worker_options(), sort_keys=True).encode('utf-8')).hexdigest()
+        return f"v{EXTRACTOR_VERSION}-{digest[:10]}"
+    
+    def extract_batch(self, urls: List[str], pools=None, video_ids: Optional[List[str]] = None) -> ThumbnailBatch:
+        """
+        Download and extract many thumbnails at once.
+        
+        Downloads run on the shared I/O pool; each finished download is handed
+        straight to the shared CPU process pool, so decoding/feature extraction
+        overlaps with the remaining downloads and isn't bound by the GIL.
+        Images and features come from the thumbnail cache when present.
+        """
+        from premium.cpu_tasks import extract_thumbnail_features
+        from premium.db.thumbnail_cache import get_thumbnail_cache
+        from task_pools import get_task_pools, WORKLOAD_CPU, WORKLOAD_IO
+        pools = pools or get_task_pools()
+        cache = get_thumbnail_cache()
+        options = self._local_options()
+        variant = self.feature_variant()
+        video_ids = video_ids or [None] * len(urls)
+        vision = None
+        if self.use_vision_pool and self.vision_groups:
+            from premium.vision_workers import get_vision_pool
+            vision = get_vision_pool(self.vision_groups)
+        
+        def fetch_and_submit(item):
+            url, video_id = item
+            fetched = cache.fetch(url, video_id) if url else None
+            if not fetched:
+                return None
+            content_hash, data = fetched
+            cached = cache.get_features(content_hash, variant)
+            if cached is not None:
+                done = Future()
+                done.set_result(cached)
+                return content_hash, done, None, True
+            # OCR/face on the vision workers in parallel with the CPU features
+            vision_future = vision.submit(data, self.vision_groups, self.vision_timeout) if vision else None
+            cpu_future = pools.submit(WORKLOAD_CPU, extract_thumbnail_features, data, options)
+            return content_hash, cpu_future, vision_future, False
+        
+        submitted = pools.map(WORKLOAD_IO, fetch_and_submit, list(zip(urls, video_ids)), ignore_errors=True)
+        
+        features, failed = [], []
+        degraded = 0
+        for i, item in enumerate(submitted):
+            try:
+                content_hash, future, vision_future, from_cache = item
+                result = ThumbnailFeatures.from_dict(future.result())
+                if not from_cache:
+                    complete = self._merge_vision(result, vision.result(vision_future, self.vision_timeout)) if vision else True
+                    if complete:
+                        cache.put_features(content_hash, variant, result.to_dict())
+                    else:
+                        degraded += 1
+                features.append(result)
+            except Exception:
+                features.append(ThumbnailFeatures())
+                failed.append(i)
+        if failed:
+            print(f"⚠️ {len(failed)}/{len(urls)} thumbnails could not be downloaded")
+        if degraded:
+            print(f"⚠️ {degraded}/{len(urls)} thumbnails without face/text features (vision workers); not cached")
+        return ThumbnailBatch(urls=list(urls), features=features, failed=failed)
     
-    def extract_from_url(self, url: str) -> ThumbnailFeatures:
-        """Download thumbnail and extract features."""
+    def extract_from_url(self, url: str, video_id: Optional[str] = None) -> ThumbnailFeatures:
+        """Download thumbnail (via the thumbnail cache) and extract features."""
+        from premium.db.thumbnail_cache import get_thumbnail_cache
+        cache = get_thumbnail_cache()
+        fetched = cache.fetch(url, video_id)
+        if not fetched:
+            print(f"⚠️ Failed to download thumbnail: {url}")
+            return ThumbnailFeatures()
+        content_hash, data = fetched
+        variant = self.feature_variant()
+        cached = cache.get_features(content_hash, variant)
+        if cached is not None:
+            return ThumbnailFeatures.from_dict(cached)
         try:
-            response = requests.get(url, timeout=10)
-            response.raise_for_status()
-            img = Image.open(BytesIO(response.content)).convert('RGB')
-            return self.extract_from_image(img)
+            img = Image.open(BytesIO(data)).convert('RGB')
         except Exception as e:
-            print(f"⚠️ Failed to download thumbnail: {e}")
+            print(f"⚠️ Failed to decode thumbnail: {e}")
             return ThumbnailFeatures()
+        features, complete = self._extract(img)
+        if complete:
+            cache.put_features(content_hash, variant, features.to_dict())
+        return features
     
+    def extract_from_bytes(self, data: bytes) -> ThumbnailFeatures:
+        """Extract features from already-downloaded image bytes."""
+        try:
+            img = Image.open(BytesIO(data)).convert('RGB')
+            return self.extract_from_image(img)
+        except Exception as e:
+            print(f"⚠️ Failed to decode thumbnail: {e}")
+            return ThumbnailFeatures()
+
     def extract_from_path(self, path: str) -> ThumbnailFeatures:
         """Load thumbnail from file and extract features."""
         try:
@@ -190,82 +575,93 @@ class ThumbnailFeatureExtractor:
             return ThumbnailFeatures()
     
     def extract_from_image(self, img: Image.Image) -> ThumbnailFeatures:
-        """Extract all features from a PIL Image."""
+        """Extract all enabled feature groups from a PIL Image."""
+        return self._extract(img)[0]
+    
+    def _extract(self, img: Image.Image) -> Tuple[ThumbnailFeatures, bool]:
+        """extract_from_image() plus whether every pooled vision group returned (safe to cache)."""
         features = ThumbnailFeatures()
         
-        # Convert to numpy for OpenCV
-        img_np = np.array(img)
-        img_bgr = cv2.cvtColor(img_np, cv2.COLOR_RGB2BGR)
-        img_hsv = cv2.cvtColor(img_np, cv2.COLOR_RGB2HSV)
-        img_gray = cv2.cvtColor(img_np, cv2.COLOR_RGB2GRAY)
+        # One decode; every derived array is computed once in the shared context
+        ctx = ImageContext(np.array(img), self._buffers())
+        features.aspect_ratio = ctx.w / ctx.h
         
-        h, w = img_np.shape[:2]
-        features.aspect_ratio = w / h
+        # OCR/face on a vision worker while the local groups run
+        vision, vision_future = None, None
+        if self.use_vision_pool and self.vision_groups:
+            from premium.vision_workers import get_vision_pool
+            vision = get_vision_pool(self.vision_groups)
+            vision_future = vision.submit(ctx.rgb, self.vision_groups, self.vision_timeout)
         
         # === Color Features ===
-        self._extract_color_features(img_np, img_hsv, features)
+        if 'color' in self.feature_groups:
+            self._extract_color_features(ctx, features)
         
         # === Face Features ===
-        if self.use_face_detection:
-            self._extract_face_features(img_np, features)
+        if 'face' in self.feature_groups and 'face' not in self.pooled_groups(vision):
+            if self.face_backend == 'haar':
+                self._extract_face_features_haar(ctx, features)
+            else:
+                self._extract_face_features(ctx, features)
         
         # === Text Features ===
-        if self.use_ocr:
-            self._extract_text_features(img_np, features)
+        if 'text' in self.feature_groups and 'text' not in self.pooled_groups(vision):
+            if self.text_backend == 'edges':
+                self._extract_text_density(ctx, features)
+            else:
+                self._extract_text_features(ctx, features)
         
         # === Composition Features ===
-        self._extract_composition_features(img_gray, img_np, features)
+        if 'composition' in self.feature_groups:
+            self._extract_composition_features(ctx, features)
         
         # === Advanced Features ===
-        self._extract_advanced_features(img_np, img_hsv, features)
+        if 'advanced' in self.feature_groups:
+            self._extract_advanced_features(ctx, features)
         
-        return features
+        if vision is not None:
+            return features, self._merge_vision(features, vision.result(vision_future, self.vision_timeout))
+        return features, True
+    
+    def pooled_groups(self, vision) -> Tuple[str, ...]:
+        """Groups handled by the vision pool for this image (none when it isn't used)."""
+        return self.vision_groups if vision is not None else ()
+    
+    def _buffers(self) -> Dict:
+        """Scratch buffers reused across images (per thread, keyed by shape)."""
+        buffers = getattr(self._local, 'buffers', None)
+        if buffers is None:
+            buffers = self._local.buffers = {}
+        return buffers
     
-    def _extract_color_features(self, img_rgb: np.ndarray, img_hsv: np.ndarray, 
-                                 features: ThumbnailFeatures):
+    def _extract_color_features(self, ctx: 'ImageContext', features: ThumbnailFeatures):
         """Extract color-related features."""
-        h, w = img_rgb.shape[:2]
+        h, w = ctx.h, ctx.w
         
-        # Reshape for clustering
-        pixels = img_rgb.reshape(-1, 3).astype(float)
-        
-        # K-means for dominant colors
+        # K-means for dominant colors (sorted by cluster size)
         try:
-            kmeans = KMeans(n_clusters=5, random_state=42, n_init=10)
-            kmeans.fit(pixels)
-            centers = kmeans.cluster_centers_.astype(int)
-            
-            # Sort by cluster size
-            labels, counts = np.unique(kmeans.labels_, return_counts=True)
-            sorted_indices = np.argsort(-counts)
-            
-            features.dominant_color_1 = tuple(centers[sorted_indices[0]])
-            features.dominant_color_2 = tuple(centers[sorted_indices[1]])
-            features.dominant_color_3 = tuple(centers[sorted_indices[2]])
+            colors, shares = dominant_colors(ctx.rgb, n_colors=5, fast=self.fast_colors, with_shares=True)
+            features.dominant_color_1, features.dominant_color_2, features.dominant_color_3 = colors[:3]
+            features.palette = tuple(colors)
+            features.palette_shares = tuple(round(share, 4) for share in shares)
         except:
             pass
         
-        # Get 2D arrays for spatial operations BEFORE flattening
-        hue_2d = img_hsv[:, :, 0]
-        sat_2d = img_hsv[:, :, 1] / 255.0
-        val_2d = img_hsv[:, :, 2] / 255.0
+        hue = ctx.hue
+        sat = ctx.sat
+        val = ctx.val
         
-        # Background brightness (edges of image) - use 2D array
+        # Background brightness (edges of image)
         border_rows = min(10, h // 4)
         border_cols = min(10, w // 4)
         border = np.concatenate([
-            val_2d[:border_rows, :].flatten(),
-            val_2d[-border_rows:, :].flatten(),
-            val_2d[:, :border_cols].flatten(),
-            val_2d[:, -border_cols:].flatten()
+            val[:border_rows, :].ravel(),
+            val[-border_rows:, :].ravel(),
+            val[:, :border_cols].ravel(),
+            val[:, -border_cols:].ravel()
         ])
         features.background_brightness = float(np.mean(border))
         
-        # Now flatten for statistics
-        hue = hue_2d.flatten()
-        sat = sat_2d.flatten()
-        val = val_2d.flatten()
-        
         features.avg_saturation = float(np.mean(sat))
         features.avg_brightness = float(np.mean(val))
         features.primary_hue = int(np.median(hue) * 2)  # Convert to 0-360
@@ -283,7 +679,7 @@ class ThumbnailFeatureExtractor:
         # Red accent detection
         red_mask = (hue < 10) | (hue > 170)
         red_sat = sat[red_mask] if np.any(red_mask) else []
-        features.has_red_accent = len(red_sat) > 0 and np.mean(red_sat) > 0.5
+        features.has_red_accent = bool(len(red_sat) > 0 and np.mean(red_sat) > 0.5)
         
         # Color temperature
         avg_hue = np.mean(hue)
@@ -297,16 +693,15 @@ class ThumbnailFeatureExtractor:
         # Overall vibrancy
         features.overall_vibrancy = float(features.avg_saturation * features.contrast_score)
     
-    def _extract_face_features(self, img_rgb: np.ndarray, features: ThumbnailFeatures):
+    def _extract_face_features(self, ctx: 'ImageContext', features: ThumbnailFeatures):
         """Extract face-related features using mediapipe."""
         detector = get_face_detector()
         if detector is None:
             return
         
-        h, w = img_rgb.shape[:2]
-        
         try:
-            results = detector.process(img_rgb)
+            with _face_lock:
+                results = detector.process(ctx.rgb)
             
             if results.detections:
                 features.face_count = len(results.detections)
@@ -343,17 +738,61 @@ class ThumbnailFeatureExtractor:
         except Exception as e:
             print(f"⚠️ Face detection failed: {e}")
     
-    def _extract_text_features(self, img_rgb: np.ndarray, features: ThumbnailFeatures):
+    def _extract_face_features_haar(self, ctx: 'ImageContext', features: ThumbnailFeatures):
+        """Face features from OpenCV's Haar cascade (fast/standard levels; no model download)."""
+        cascade = get_face_cascade()
+        if cascade is None:
+            return
+        
+        faces = cascade.detectMultiScale(ctx.gray, 1.1, 4)
+        if len(faces) == 0:
+            return
+        features.face_count = len(faces)
+        
+        # Largest face, in the same normalized terms as the mediapipe path
+        x, y, w, h = max(faces, key=lambda f: f[2] * f[3])
+        largest_area = (w * h) / (ctx.w * ctx.h)
+        features.face_area_ratio = float(largest_area)
+        features.primary_face_x = float((x + w / 2) / ctx.w)
+        features.primary_face_y = float((y + h / 2) / ctx.h)
+        features.primary_face_size = float(max(w / ctx.w, h / ctx.h))
+        
+        center_x = features.primary_face_x
+        features.face_in_left_third = center_x < 0.33
+        features.face_in_right_third = center_x > 0.66
+        features.face_in_center = 0.33 <= center_x <= 0.66
+        features.faces_are_large = largest_area > 0.15
+        features.has_eye_contact = abs(center_x - 0.5) < 0.15
+    
+    def _extract_text_density(self, ctx: 'ImageContext', features: ThumbnailFeatures):
+        """Text presence from edge patterns (fast/standard levels; no OCR)."""
+        edges = ctx.edges
+        edge_density = np.count_nonzero(edges) / edges.size * 100
+        
+        # Text rows produce long horizontal edge runs
+        horizontal = cv2.morphologyEx(edges, cv2.MORPH_OPEN,
+                                      cv2.getStructuringElement(cv2.MORPH_RECT, (25, 1)), iterations=2)
+        horizontal_density = np.count_nonzero(horizontal) / horizontal.size * 100
+        
+        features.text_density_score = float(min(100, edge_density * 0.5 + horizontal_density * 10))
+        features.has_text = features.text_density_score > 15
+        if features.has_text:
+            # Area estimate: the horizontal runs grown to text-line height
+            lines = cv2.dilate(horizontal, cv2.getStructuringElement(cv2.MORPH_RECT, (15, 9)))
+            features.text_area_ratio = float(np.count_nonzero(lines) / lines.size)
+            features.text_contrast_score = min(1.0, features.text_area_ratio * 10)
+    
+    def _extract_text_features(self, ctx: 'ImageContext', features: ThumbnailFeatures):
         """Extract text-related features using EasyOCR."""
         reader = get_ocr_reader()
         if reader is None:
             return
         
-        h, w = img_rgb.shape[:2]
-        total_pixels = h * w
+        total_pixels = ctx.h * ctx.w
         
         try:
-            results = reader.readtext(img_rgb)
+            with _ocr_lock:
+                results = reader.readtext(ctx.rgb)
             
             if results:
                 features.has_text = True
@@ -382,23 +821,21 @@ class ThumbnailFeatureExtractor:
         except Exception as e:
             print(f"⚠️ OCR failed: {e}")
     
-    def _extract_composition_features(self, img_gray: np.ndarray, img_rgb: np.ndarray,
-                                        features: ThumbnailFeatures):
+    def _extract_composition_features(self, ctx: 'ImageContext', features: ThumbnailFeatures):
         """Extract composition-related features."""
-        h, w = img_gray.shape
+        h, w = ctx.h, ctx.w
+        img_gray = ctx.gray
         
         # Edge density (Canny edge detection)
-        edges = cv2.Canny(img_gray, 100, 200)
+        edges = ctx.edges
         features.edge_density = float(np.mean(edges) / 255.0)
         
         # Center focus (brightness in center vs edges)
         center_region = img_gray[h//4:3*h//4, w//4:3*w//4]
-        edge_regions = np.concatenate([
-            img_gray[:h//4, :].flatten(),
-            img_gray[3*h//4:, :].flatten()
-        ])
+        top, bottom = img_gray[:h//4, :], img_gray[3*h//4:, :]
+        edge_mean = (top.sum(dtype=np.float64) + bottom.sum(dtype=np.float64)) / max(top.size + bottom.size, 1)
         features.center_focus_score = float(
-            np.mean(center_region) / max(np.mean(edge_regions), 1)
+            np.mean(center_region) / max(edge_mean, 1)
         )
         
         # Rule of thirds (look for features at intersection points)
@@ -415,18 +852,23 @@ class ThumbnailFeatureExtractor:
         left = img_gray[:, :w//2]
         right = np.flip(img_gray[:, w//2:], axis=1)
         if left.shape == right.shape:
-            features.symmetry_score = float(1 - np.mean(np.abs(left.astype(float) - right.astype(float))) / 255.0)
+            diff = ctx.buffer('symmetry', left.shape, np.int16)
+            np.subtract(left, right, out=diff, dtype=np.int16)
+            np.abs(diff, out=diff)
+            features.symmetry_score = float(1 - np.mean(diff) / 255.0)
         
         # Visual complexity (entropy)
-        hist = cv2.calcHist([img_gray], [0], None, [256], [0, 256])
+        hist = ctx.gray_hist
         hist = hist / hist.sum()
         hist = hist[hist > 0]
         features.visual_complexity = float(-np.sum(hist * np.log2(hist)) / 8.0)  # Normalize
         
-        # Negative space (low-variance regions)
-        blur = cv2.GaussianBlur(img_gray, (15, 15), 0)
-        local_std = cv2.GaussianBlur((img_gray.astype(float) - blur.astype(float))**2, (15, 15), 0)**0.5
-        features.negative_space_ratio = float(np.mean(local_std < 10))
+        # Negative space (low-variance regions): local std < 10  <=>  local variance < 100
+        local_var = ctx.buffer('local_var', (h, w))
+        np.subtract(img_gray, ctx.blur, out=local_var, dtype=np.float32)
+        np.square(local_var, out=local_var)
+        cv2.GaussianBlur(local_var, (15, 15), 0, dst=local_var)
+        features.negative_space_ratio = float(np.mean(local_var < 100))
         
         # Border detection
         border_pixels = np.concatenate([
@@ -436,28 +878,32 @@ class ThumbnailFeatureExtractor:
         features.has_border = float(np.std(border_pixels)) < 20
         
         # Image quality (Laplacian variance)
-        laplacian = cv2.Laplacian(img_gray, cv2.CV_64F)
-        features.image_quality_score = float(min(laplacian.var() / 1000, 1.0))
+        features.image_quality_score = float(min(ctx.laplacian_var / 1000, 1.0))
         
         # Blur score
         features.blur_score = float(1 - features.image_quality_score)
     
-    def _extract_advanced_features(self, img_rgb: np.ndarray, img_hsv: np.ndarray,
-                                     features: ThumbnailFeatures):
+    def _extract_advanced_features(self, ctx: 'ImageContext', features: ThumbnailFeatures):
         """Extract advanced/semantic features."""
-        h, w = img_rgb.shape[:2]
+        h, w = ctx.h, ctx.w
+        gray = ctx.gray
+        img_hsv = ctx.hsv
         
         # Arrow/circle detection using Hough circles
-        gray = cv2.cvtColor(img_rgb, cv2.COLOR_RGB2GRAY)
         circles = cv2.HoughCircles(gray, cv2.HOUGH_GRADIENT, 1, 20,
                                     param1=50, param2=30, minRadius=10, maxRadius=100)
         features.has_arrows_or_circles = circles is not None
         
-        # Gradient detection (smooth color transitions)
-        dx = np.abs(np.diff(img_hsv[:, :, 0].astype(float), axis=1))
-        dy = np.abs(np.diff(img_hsv[:, :, 0].astype(float), axis=0))
-        smooth_regions = (np.mean(dx) < 5) and (np.mean(dy) < 5)
-        features.has_gradient = bool(features.color_diversity < 0.3 and smooth_regions)
+        # Gradient detection (smooth color transitions); only matters for low hue diversity
+        if features.color_diversity < 0.3:
+            hue = ctx.hue_i16
+            dx = ctx.buffer('hue_dx', (h, w - 1), np.int16)
+            dy = ctx.buffer('hue_dy', (h - 1, w), np.int16)
+            np.abs(np.subtract(hue[:, 1:], hue[:, :-1], out=dx), out=dx)
+            np.abs(np.subtract(hue[1:, :], hue[:-1, :], out=dy), out=dy)
+            features.has_gradient = bool((np.mean(dx) < 5) and (np.mean(dy) < 5))
+        else:
+            features.has_gradient = False
         
         # Split layout detection (vertical line in center)
         center_col = gray[:, w//2-5:w//2+5]
@@ -471,30 +917,38 @@ class ThumbnailFeatureExtractor:
         ))
         features.has_before_after = half_diff > 20
         
-        # Mobile readability (text is large enough)
-        features.mobile_readability_score = float(
-            (features.text_area_ratio / 0.1 if features.has_text else 0.5) +
-            (0.5 if features.faces_are_large else 0)
-        )
-        features.mobile_readability_score = min(1.0, features.mobile_readability_score)
-        
-        # Style estimation based on features
-        if features.face_count > 0 and features.faces_are_large:
-            if features.has_text and features.word_count <= 3:
-                features.estimated_style = "vlog"
-            else:
-                features.estimated_style = "reaction"
-        elif features.has_text and features.word_count > 5:
-            features.estimated_style = "tutorial"
-        elif features.has_arrows_or_circles:
-            features.estimated_style = "educational"
+        derive_summary_features(features)
+
+
+def derive_summary_features(features: ThumbnailFeatures):
+    """
+    Features derived from other groups' outputs (mobile readability, style).
+    Re-run after merging face/text results computed elsewhere.
+    """
+    # Mobile readability (text is large enough)
+    features.mobile_readability_score = float(
+        (features.text_area_ratio / 0.1 if features.has_text else 0.5) +
+        (0.5 if features.faces_are_large else 0)
+    )
+    features.mobile_readability_score = min(1.0, features.mobile_readability_score)
+    
+    # Style estimation based on features
+    if features.face_count > 0 and features.faces_are_large:
+        if features.has_text and features.word_count <= 3:
+            features.estimated_style = "vlog"
         else:
-            features.estimated_style = "general"
+            features.estimated_style = "reaction"
+    elif features.has_text and features.word_count > 5:
+        features.estimated_style = "tutorial"
+    elif features.has_arrows_or_circles:
+        features.estimated_style = "educational"
+    else:
+        features.estimated_style = "general"
 
 
 # === Quick test ===
 if __name__ == "__main__":
-    extractor = ThumbnailFeatureExtractor(use_ocr=False, use_face_detection=False)
+    extractor = ThumbnailFeatureExtractor(level='standard')
     
     # Test with a sample thumbnail
     test_url = "https://i.ytimg.com/vi/dQw4w9WgXcQ/maxresdefault.jpg"
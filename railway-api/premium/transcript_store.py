@@ -0,0 +1,132 @@
+"""
+Premium Analysis - Shared Transcript Store
+
+Holds the caption segments fetched by the ingest stage so downstream
+modules (e.g. HookAnalyzer) can slice them by time instead of downloading
+the same captions again.
+
+Lookup order: in-memory (current job) -> ingest JSON cache (data/cache).
+Segments read from the cache file are not kept in memory: compact
+videos_data records leave their transcripts on disk on purpose.
+"""
+
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional
+
+
+DEFAULT_CACHE_DIR = Path(__file__).resolve().parents[1] / "data" / "cache"
+
+
+def slice_segments(segments: List[Dict], seconds: float, max_chars: Optional[int] = None) -> List[Dict]:
+    """
+    Return the segments that start within the first `seconds` of a video.
+    Stops early once the accumulated text exceeds `max_chars`.
+    """
+    sliced = []
+    total_chars = 0
+    for seg in segments:
+        if seg.get('start', 0) > seconds:
+            break
+        sliced.append(seg)
+        total_chars += len(seg.get('text', '')) + 1
+        if max_chars is not None and total_chars > max_chars:
+            break
+    return sliced
+
+
+class TranscriptStore:
+    """
+    Per-process store of transcript segments keyed by video ID.
+
+    Usage:
+        store = get_transcript_store()
+        store.add_videos(videos_data)          # after ingest
+        text, duration = store.get_opening(video_id, seconds=60)
+    """
+
+    def __init__(self, cache_dir: Optional[Path] = None):
+        self.cache_dir = Path(cache_dir or os.getenv('INGEST_CACHE_DIR') or DEFAULT_CACHE_DIR)
+        self._segments: Dict[str, List[Dict]] = {}
+        self._lock = threading.Lock()
+
+    def add(self, video_id: str, segments: List[Dict]):
+        """Register segments for a video (empty segment lists are ignored)."""
+        if video_id and segments:
+            with self._lock:
+                self._segments[video_id] = segments
+
+    def add_videos(self, videos_data: List[Dict]) -> int:
+        """Register transcript_segments from ingest results. Returns count added."""
+        added = 0
+        for v in videos_data:
+            if getattr(v, 'transcript_cached', False):
+                continue  # Compact record: segments are read from the ingest cache on demand
+            info = v.get('video_info', {})
+            video_id = info.get('video_id') or info.get('id')
+            segments = v.get('transcript_segments') or []
+            if video_id and segments:
+                self.add(video_id, segments)
+                added += 1
+        return added
+
+    def get_segments(self, video_id: str) -> Optional[List[Dict]]:
+        """Get segments from memory, falling back to the ingest cache file (read each time, not memoized)."""
+        with self._lock:
+            segments = self._segments.get(video_id)
+        if segments:
+            return segments
+
+        cache_file = self.cache_dir / f"{video_id}.json"
+        if not cache_file.exists():
+            return None
+        try:
+            with open(cache_file, 'r', encoding='utf-8') as f:
+                segments = json.load(f).get('transcript_segments') or []
+        except Exception:
+            return None
+
+        return segments or None
+
+    def get_opening(self, video_id: str, seconds: float = 60,
+                    max_chars: Optional[int] = None) -> Optional[tuple]:
+        """
+        Get the opening text of a video from stored segments.
+
+        Returns:
+            Tuple of (text, covered_seconds) or None if not stored
+        """
+        segments = self.get_segments(video_id)
+        if not segments:
+            return None
+
+        opening = slice_segments(segments, seconds, max_chars)
+        text = " ".join(s.get('text', '') for s in opening).strip()
+        if not text:
+            return None
+
+        covered = min(seconds, opening[-1].get('end', seconds))
+        return text, round(covered, 1)
+
+    def __contains__(self, video_id: str) -> bool:
+        with self._lock:
+            return video_id in self._segments
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._segments)
+
+
+# Singleton instance for global use
+_store_instance = None
+_store_lock = threading.Lock()
+
+def get_transcript_store() -> TranscriptStore:
+    """Get the singleton transcript store instance."""
+    global _store_instance
+    with _store_lock:
+        if _store_instance is None:
+            _store_instance = TranscriptStore()
+        return _store_instance
@@ -0,0 +1,358 @@
+"""
+Premium Analysis - Vision Worker Pool (OCR + face detection)
+
+EasyOCR and mediapipe are heavy (hundreds of MB, seconds to load), not
+thread-safe, and mediapipe can crash the whole process on some platforms.
+That is why thumbnail face/text features used to be switched off in
+parallel tasks. This pool runs them out of process instead:
+- a dedicated spawn ProcessPoolExecutor (VISION_WORKERS processes, by
+  default the vision share of the job's process budget, see task_pools.py);
+  each worker loads the models once, when it starts
+- a bounded queue (VISION_QUEUE_SIZE in-flight images); producers block
+  until there is room, so a 100-thumbnail job doesn't queue 100 arrays
+- a per-image timeout (VISION_TIMEOUT seconds); a hung or crashed worker
+  is replaced and the image gets default (empty) face/text features; the
+  other images queued on the replaced pool are resubmitted, not dropped
+- models load in each worker's initializer; until every started worker
+  has loaded them, waits use VISION_WARMUP_TIMEOUT (default 600 s) so a
+  cold start or first-run model download isn't mistaken for a hang
+- only the groups the process asks for are warmed (the API server does
+  face detection only and never loads EasyOCR); a group requested later
+  loads on first use in each worker, under the warm-up timeout
+- interactive callers (API requests) pass a short timeout to submit() and
+  result(); when it runs out the image gets default features, but the pool
+  is not recycled, since a cold start is not a hang
+
+Usage:
+    from premium.vision_workers import get_vision_pool
+    fields = get_vision_pool().analyze(image_bytes, ('face', 'text'))
+    # {'face_count': 1, 'has_text': True, ...} or None
+"""
+
+import multiprocessing
+import os
+import signal
+import threading
+import time
+from concurrent.futures import Future, InvalidStateError, ProcessPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass, field
+from typing import Dict, Optional, Sequence, Tuple, Union
+
+VISION_GROUPS = ('face', 'text')
+
+# Tries per image: one resubmission when its pool is recycled for another image's hang or crash
+VISION_ATTEMPTS = 2
+
+# Worker-process globals (one extractor per group set, models loaded lazily)
+_worker_extractors = {}
+
+
+def warm_up(groups: Sequence[str], started, pids, ready):
+    """Pool initializer: register this worker, then load the OCR/face models before it takes any image."""
+    with started.get_lock():
+        pids[started.value] = os.getpid()
+        started.value += 1
+    from premium.thumbnail_extractor import get_face_detector, get_ocr_reader
+    try:
+        if 'face' in groups:
+            get_face_detector()
+        if 'text' in groups:
+            get_ocr_reader()
+    except Exception as e:
+        print(f"⚠️ Vision worker warm-up failed: {e}")
+    with ready.get_lock():
+        ready.value += 1
+
+
+def detect_faces_and_text(image: Union[bytes, 'np.ndarray'], groups: Sequence[str]) -> Dict:
+    """
+    Face/text feature fields for one image (runs inside a vision worker).
+    image is encoded bytes or an RGB array.
+    """
+    import numpy as np
+    from io import BytesIO
+    from PIL import Image
+    from premium.thumbnail_extractor import FACE_FIELDS, TEXT_FIELDS, ImageContext, ThumbnailFeatureExtractor, \
+        ThumbnailFeatures
+
+    groups = tuple(sorted(g for g in groups if g in VISION_GROUPS))
+    extractor = _worker_extractors.get(groups)
+    if extractor is None:
+        extractor = _worker_extractors[groups] = ThumbnailFeatureExtractor(
+            use_ocr='text' in groups, use_face_detection='face' in groups,
+            feature_groups=groups, use_vision_pool=False)
+
+    if isinstance(image, (bytes, bytearray)):
+        image = np.array(Image.open(BytesIO(image)).convert('RGB'))
+    ctx = ImageContext(image)
+    features = ThumbnailFeatures()
+    result = {}
+    if 'face' in groups:
+        extractor._extract_face_features(ctx, features)
+        result.update({name: getattr(features, name) for name in FACE_FIELDS})
+    if 'text' in groups:
+        extractor._extract_text_features(ctx, features)
+        result.update({name: getattr(features, name) for name in TEXT_FIELDS})
+    return result
+
+
+class _VisionExecutor:
+    """
+    One generation of vision workers: the process pool plus its warm-up state.
+    Workers register their pid and count themselves in the initializer, so the
+    pool never reads ProcessPoolExecutor internals.
+    """
+
+    def __init__(self, workers: int, warm_groups: Tuple[str, ...]):
+        ctx = multiprocessing.get_context('spawn')  # Models must not be inherited via fork
+        self.warm_groups = warm_groups
+        self.started = ctx.Value('i', 0)  # Workers that entered the initializer
+        self.ready = ctx.Value('i', 0)  # Workers that finished loading their models
+        # A broken pool is replaced as a whole, so one generation never starts more than `workers` processes
+        self.pids = ctx.Array('i', workers)
+        self.executor = ProcessPoolExecutor(max_workers=workers, mp_context=ctx, initializer=warm_up,
+                                            initargs=(warm_groups, self.started, self.pids, self.ready))
+
+    def warm(self, groups: Sequence[str]) -> bool:
+        """True once every started worker has loaded the models for groups."""
+        if not set(groups) <= set(self.warm_groups):
+            return False
+        return self.ready.value >= max(1, self.started.value)
+
+    def submit(self, *args) -> Future:
+        return self.executor.submit(detect_faces_and_text, *args)
+
+    def shutdown(self, wait: bool = True, terminate: bool = False):
+        """Shut the pool down; terminate=True kills the workers instead of joining in-flight images."""
+        if terminate:
+            with self.started.get_lock():
+                pids = list(self.pids[:self.started.value])
+            for pid in pids:
+                try:
+                    os.kill(pid, signal.SIGTERM)
+                except OSError:
+                    pass  # Already gone
+        self.executor.shutdown(wait=wait, cancel_futures=True)
+
+
+@dataclass
+class _VisionRequest:
+    """One queued image: the caller's future outlives pool recycles, each attempt is a separate worker task."""
+    image: Union[bytes, 'np.ndarray']
+    groups: Tuple[str, ...]
+    future: Future = field(default_factory=Future)
+    attempts: int = 0
+    pool: Optional[_VisionExecutor] = None
+    task: Optional[Future] = None
+
+
+class VisionWorkerPool:
+    """Out-of-process OCR/face detection with a bounded queue and per-image timeout."""
+
+    def __init__(self, workers: int = None, queue_size: int = None, timeout: float = None,
+                 warmup_timeout: float = None, warm_groups: Sequence[str] = VISION_GROUPS):
+        if not workers:
+            from task_pools import get_task_pools
+            workers = get_task_pools().vision_workers
+        self.workers = workers
+        self.queue_size = queue_size or int(os.getenv('VISION_QUEUE_SIZE', self.workers * 4))
+        self.timeout = timeout or float(os.getenv('VISION_TIMEOUT', 30))
+        self.warmup_timeout = warmup_timeout or float(os.getenv('VISION_WARMUP_TIMEOUT', 600))
+        self.warm_groups = tuple(warm_groups)
+        self.completed = 0
+        self.timeouts = 0
+        self.crashes = 0
+        self.rejected = 0
+        self.abandoned = 0  # Interactive waits that gave up on a cold or busy pool
+        self._slots = threading.BoundedSemaphore(self.queue_size)
+        self._requests: Dict[Future, _VisionRequest] = {}  # Caller futures not completed yet
+        self._pool: Optional[_VisionExecutor] = None
+        self._lock = threading.Lock()
+
+    def _count(self, counter: str):
+        """Bump a stats counter (also called from worker-result callback threads)."""
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def _get_pool(self) -> _VisionExecutor:
+        with self._lock:
+            if self._pool is None:
+                self._pool = _VisionExecutor(self.workers, self.warm_groups)
+            return self._pool
+
+    def _wait_timeout(self, pool: Optional[_VisionExecutor], groups: Sequence[str] = ()) -> float:
+        """
+        Per-image timeout once every started worker is warm; warmup_timeout before
+        that, or when groups need a model the workers didn't load up front.
+        """
+        return self.timeout if pool is not None and pool.warm(groups) else self.warmup_timeout
+
+    def _recycle(self, pool: _VisionExecutor, hung: Optional[_VisionRequest] = None) -> bool:
+        """
+        Kill a pool with a hung/crashed worker. A worker can't be restarted on
+        its own, so every other image still in flight on it is resubmitted to
+        a fresh pool (once) instead of failing with it. Returns False if
+        another thread already replaced the pool.
+        """
+        with self._lock:
+            if self._pool is not pool:
+                return False  # Already replaced by another thread
+            self._pool = None
+            stranded = [r for r in self._requests.values() if r.pool is pool and r is not hung]
+        if hung is not None:
+            self._finish(hung.future, exception=BrokenProcessPool("Vision worker timed out"))
+        # Resubmit before killing the old workers, so their failures find the requests already moved
+        for request in stranded:
+            if request.attempts < VISION_ATTEMPTS:
+                try:
+                    self._dispatch(request)
+                    continue
+                except Exception as e:
+                    self._finish(request.future, exception=e)
+            self._finish(request.future, exception=BrokenProcessPool("Vision worker pool recycled"))
+        pool.shutdown(wait=False, terminate=True)
+        print(f"⚠️ Vision worker pool recycled (hung or crashed worker); {len(stranded)} queued images resubmitted")
+        return True
+
+    def _dispatch(self, request: _VisionRequest):
+        """Send a request to the current pool; the worker's outcome completes the caller's future."""
+        pool = self._get_pool()
+        task = pool.submit(request.image, request.groups)
+        request.attempts += 1
+        request.pool, request.task = pool, task
+        task.add_done_callback(lambda done: self._settle(request, done))
+
+    def _settle(self, request: _VisionRequest, task: Future):
+        if request.future.done() or request.task is not task:
+            return  # Timed out already, or resubmitted to a newer pool
+        if task.cancelled() or isinstance(task.exception(), BrokenProcessPool):
+            # The pool died under this image: replace it, which resubmits this image too
+            if self._recycle(request.pool):
+                self._count('crashes')
+            if request.task is task:
+                self._finish(request.future, exception=BrokenProcessPool("Vision worker pool broken"))
+        elif task.exception() is not None:
+            self._finish(request.future, exception=task.exception())
+        else:
+            self._finish(request.future, result=task.result())
+
+    @staticmethod
+    def _finish(future: Future, result=None, exception: Optional[BaseException] = None):
+        """Complete a caller's future unless another thread got there first."""
+        try:
+            if exception is not None:
+                future.set_exception(exception)
+            else:
+                future.set_result(result)
+        except InvalidStateError:
+            pass
+
+    def _done(self, future: Future):
+        with self._lock:
+            self._requests.pop(future, None)
+        self._slots.release()
+
+    def submit(self, image: Union[bytes, 'np.ndarray'], groups: Sequence[str] = VISION_GROUPS,
+               timeout: float = None) -> Optional[Future]:
+        """
+        Queue one image. Blocks while the queue is full; returns None if no
+        slot frees up within the (warm-up) timeout, or within timeout if given.
+        """
+        groups = tuple(groups)
+        with self._lock:
+            if not set(groups) <= set(self.warm_groups):
+                # Restarted workers warm these too
+                self.warm_groups = tuple(g for g in VISION_GROUPS if g in self.warm_groups or g in groups)
+            pool = self._pool
+        wait = self._wait_timeout(pool, groups)
+        if not self._slots.acquire(timeout=wait if timeout is None else min(wait, timeout)):
+            self._count('rejected')
+            print("⚠️ Vision worker queue full; skipping face/text for one thumbnail")
+            return None
+        request = _VisionRequest(image, groups)
+        with self._lock:
+            self._requests[request.future] = request
+        request.future.add_done_callback(self._done)
+        try:
+            self._dispatch(request)
+        except Exception:
+            request.future.cancel()
+            raise
+        return request.future
+
+    def result(self, future: Optional[Future], timeout: float = None) -> Optional[Dict]:
+        """
+        Wait for a submitted image; None on timeout, crash or error. A caller
+        timeout shorter than the pool's (interactive requests) gives up on the
+        image without recycling the pool; the worker still finishes it.
+        """
+        if future is None:
+            return None
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._lock:
+                request = self._requests.get(future)
+            pool = request.pool if request is not None else None  # None: already completed
+            wait = self._wait_timeout(pool, request.groups) if request is not None else 0
+            capped = deadline is not None and deadline - time.monotonic() < wait
+            try:
+                result = future.result(timeout=max(0.0, deadline - time.monotonic()) if capped else wait)
+                self._count('completed')
+                return result
+            except FutureTimeoutError:
+                if future.done() or request.pool is not pool:
+                    continue  # Finished just now, or resubmitted to a fresh pool: that attempt gets its own timeout
+                if capped:
+                    self._count('abandoned')
+                    print("⚠️ Vision worker busy or warming up; skipping face/text for one thumbnail")
+                    return None
+                self._count('timeouts')
+                self._recycle(pool, hung=request)
+            except BrokenProcessPool:
+                pass  # Crash counted by the thread that recycled the pool
+            except Exception as e:
+                print(f"⚠️ Vision worker failed: {e}")
+            return None
+
+    def analyze(self, image: Union[bytes, 'np.ndarray'], groups: Sequence[str] = VISION_GROUPS,
+                timeout: float = None) -> Optional[Dict]:
+        """Submit one image and wait for its face/text fields (at most timeout seconds, if given)."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        future = self.submit(image, groups, timeout)
+        return self.result(future, None if deadline is None else max(0.0, deadline - time.monotonic()))
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                'workers': self.workers,
+                'completed': self.completed,
+                'timeouts': self.timeouts,
+                'crashes': self.crashes,
+                'rejected': self.rejected,
+                'abandoned': self.abandoned,
+            }
+
+    def close(self, wait: bool = True):
+        """Shut down the workers; wait=False terminates them instead of joining in-flight images."""
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=wait, terminate=not wait)
+
+
+# Singleton instance for global use
+_pool_instance = None
+_pool_lock = threading.Lock()
+
+def get_vision_pool(warm_groups: Sequence[str] = VISION_GROUPS) -> VisionWorkerPool:
+    """
+    Get the singleton vision worker pool instance. The first caller's
+    warm_groups are the models its workers load at start-up.
+    """
+    global _pool_instance
+    with _pool_lock:
+        if _pool_instance is None:
+            _pool_instance = VisionWorkerPool(warm_groups=warm_groups)
+        return _pool_instance
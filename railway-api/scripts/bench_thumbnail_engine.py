@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Thumbnail feature engine benchmark (premium modules and vision_analyzer.py).
+
+For every thumbnail (a directory of images, or synthetic 1280x720 ones) it
+reports thumbnails/sec for:
+- each feature level (fast/standard by default; add `full` for OCR/mediapipe,
+  run in process), through extract_from_image
+- vision_analyzer.analyze_thumbnail_bytes, the root-script entry point
+- dominant colors alone: full-resolution K-means vs the downsampled fast path,
+  with the CIE76 ΔE between each exact top-3 color and the nearest fast
+  top-3 color. Exits 1 if the mean ΔE exceeds --max-delta-e.
+
+Usage:
+    python scripts/bench_thumbnail_engine.py                        # 20 synthetic thumbnails
+    python scripts/bench_thumbnail_engine.py --dir data/thumbnails --limit 50 --levels fast standard full
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+from io import BytesIO
+from pathlib import Path
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))  # vision_analyzer.py
+
+import numpy as np
+from PIL import Image, ImageDraw, ImageFilter
+
+from premium.thumbnail_extractor import FEATURE_LEVELS, ThumbnailFeatureExtractor, dominant_colors, palette_delta_e
+
+
+def synthetic_thumbnail(seed: int) -> Image.Image:
+    """Thumbnail-like image: gradient background, flat color blocks, a blurred 'subject', noise."""
+    rng = random.Random(seed)
+    w, h = 1280, 720
+    c1 = np.array([rng.randint(0, 255) for _ in range(3)], dtype=float)
+    c2 = np.array([rng.randint(0, 255) for _ in range(3)], dtype=float)
+    t = np.linspace(0, 1, w)[None, :, None]
+    background = np.broadcast_to(c1 * (1 - t) + c2 * t, (h, w, 3))
+    img = Image.fromarray(background.astype(np.uint8))
+    draw = ImageDraw.Draw(img)
+    for _ in range(rng.randint(2, 5)):
+        x0, y0 = rng.randint(0, w - 200), rng.randint(0, h - 150)
+        fill = tuple(rng.randint(0, 255) for _ in range(3))
+        draw.rectangle((x0, y0, x0 + rng.randint(100, 500), y0 + rng.randint(80, 400)), fill=fill)
+    draw.ellipse((w // 3, h // 5, 2 * w // 3, h), fill=tuple(rng.randint(120, 255) for _ in range(3)))
+    img = img.filter(ImageFilter.GaussianBlur(2))
+    noise = np.random.default_rng(seed).normal(0, 8, (h, w, 3))
+    return Image.fromarray(np.clip(np.asarray(img, dtype=float) + noise, 0, 255).astype(np.uint8))
+
+
+def load_images(directory: str, limit: int, synthetic: int):
+    if directory:
+        paths = sorted(p for p in Path(directory).iterdir() if p.suffix.lower() in ('.jpg', '.jpeg', '.png', '.webp'))
+        return [Image.open(p).convert('RGB') for p in paths[:limit]]
+    return [synthetic_thumbnail(i) for i in range(synthetic)]
+
+
+def rate(n: int, seconds: float) -> float:
+    return n / seconds if seconds else float('inf')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Thumbnail feature engine benchmark')
+    parser.add_argument('--dir', help='Directory of thumbnails (default: synthetic)')
+    parser.add_argument('--limit', type=int, default=50, help='Max images from --dir')
+    parser.add_argument('--synthetic', type=int, default=20, help='Synthetic thumbnails when no --dir')
+    parser.add_argument('--max-delta-e', type=float, default=5.0, help='Allowed mean ΔE vs full resolution')
+    parser.add_argument('--levels', nargs='+', default=['fast', 'standard'], choices=sorted(FEATURE_LEVELS),
+                        help='Feature levels to time')
+    args = parser.parse_args()
+
+    images = load_images(args.dir, args.limit, args.synthetic)
+    arrays = [np.array(img) for img in images]
+    print(f"🖼️ {len(arrays)} thumbnails ({arrays[0].shape[1]}x{arrays[0].shape[0]} first)")
+
+    # Feature levels
+    for level in args.levels:
+        extractor = ThumbnailFeatureExtractor(level=level, use_vision_pool=False)
+        extractor.extract_from_image(images[0])  # Load models (full level) outside the timing
+        started = time.perf_counter()
+        for img in images:
+            extractor.extract_from_image(img)
+        print(f"   level {level:<9} extract_from_image: {rate(len(images), time.perf_counter() - started):7.2f} thumbnails/s")
+
+    # Root-script entry point (same engine, plus its dict summary)
+    import vision_analyzer
+    encoded = []
+    for img in images:
+        buf = BytesIO()
+        img.save(buf, format='JPEG', quality=90)
+        encoded.append(buf.getvalue())
+    vision_analyzer.analyze_thumbnail_bytes('warmup', encoded[0])
+    started = time.perf_counter()
+    for i, data in enumerate(encoded):
+        vision_analyzer.analyze_thumbnail_bytes(str(i), data)
+    print(f"   vision_analyzer ({vision_analyzer.THUMBNAIL_FEATURE_LEVEL}) analyze_thumbnail_bytes: "
+          f"{rate(len(encoded), time.perf_counter() - started):7.2f} thumbnails/s\n")
+
+    # Dominant colors: full resolution vs downsampled
+    results = {}
+    for fast in (False, True):
+        started = time.perf_counter()
+        palettes = [dominant_colors(a, fast=fast, with_shares=True) for a in arrays]
+        color_s = time.perf_counter() - started
+        results[fast] = palettes
+        print(f"   {'fast' if fast else 'full':<5} dominant colors: {rate(len(arrays), color_s):7.2f} thumbnails/s")
+
+    distances = [palette_delta_e(exact_colors, exact_shares, fast_colors)
+                 for (exact_colors, exact_shares), (fast_colors, _) in zip(results[False], results[True])]
+    mean_de = float(np.mean(distances))
+    print(f"\n🎨 ΔE (share-weighted, exact palette → nearest fast color): mean {mean_de:.2f}, "
+          f"p90 {np.percentile(distances, 90):.2f}, max {max(distances):.2f}")
+
+    if mean_de > args.max_delta_e:
+        print(f"❌ Mean ΔE {mean_de:.2f} exceeds {args.max_delta_e}")
+        sys.exit(1)
+    print(f"✅ Mean ΔE within {args.max_delta_e}")
+
+
+if __name__ == '__main__':
+    main()
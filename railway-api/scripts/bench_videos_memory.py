@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Peak-RSS benchmark for videos_data: legacy nested dicts vs compact VideoRecords.
+
+Builds a synthetic ingest (first 5 videos transcribed, every video with
+tier-sized comment lists, written to a temporary ingest cache like
+process_video does), then runs the consumers GAP_ULTIMATE runs over it
+(comment flattening, transcript excerpts, report summary).
+Each mode runs in a fresh subprocess so ru_maxrss is per-mode.
+
+Usage:
+    python scripts/bench_videos_memory.py                 # 25 and 100 videos
+    python scripts/bench_videos_memory.py --videos 100 --comments 500
+"""
+
+import argparse
+import json
+import os
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+TRANSCRIBE_COUNT = 5  # Same split as ingest_videos
+WORDS = ("how do you set up the camera why does this lens look so soft "
+         "please make a video on lighting tutorial struggling with color grading").split()
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is KB on Linux, bytes on macOS
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / (1024 * 1024) if sys.platform == 'darwin' else rss / 1024
+
+
+def sentence(rng: random.Random, n: int) -> str:
+    return ' '.join(rng.choice(WORDS) for _ in range(n))
+
+
+def build_ingest_cache(cache_dir: Path, videos: int, comments: int, seed: int = 7):
+    """Write one ingest JSON per video (the shape process_video caches)."""
+    rng = random.Random(seed)
+    for i in range(videos):
+        video_id = f"vid{i:05d}"
+        transcribed = i < TRANSCRIBE_COUNT
+        segments = [{'start': s * 4.0, 'end': s * 4.0 + 4, 'text': sentence(rng, 10)}
+                    for s in range(450)] if transcribed else []
+        result = {
+            'video_info': {'id': video_id, 'video_id': video_id, 'title': sentence(rng, 8),
+                           'url': f"https://youtube.com/watch?v={video_id}", 'view_count': rng.randint(1000, 10 ** 6),
+                           'like_count': rng.randint(10, 10 ** 4), 'published_at': '2024-01-01T00:00:00Z'},
+            'transcript': ' '.join(s['text'] for s in segments),
+            'transcript_segments': segments,
+            'comments': [{'author': f"user{rng.randint(0, 5000)}", 'text': sentence(rng, rng.randint(5, 40)),
+                          'likes': rng.randint(0, 500), 'published_at': '2024-01-02T00:00:00Z'}
+                         for _ in range(comments)],
+        }
+        with open(cache_dir / f"{video_id}.json", 'w', encoding='utf-8') as f:
+            json.dump(result, f)
+
+
+def run_worker(mode: str, cache_dir: Path, videos: int) -> dict:
+    from video_records import VideoRecord, transcript_excerpt
+
+    baseline = peak_rss_mb()
+    videos_data = []
+    for i in range(videos):
+        with open(cache_dir / f"vid{i:05d}.json", 'r', encoding='utf-8') as f:
+            result = json.load(f)
+        if i >= TRANSCRIBE_COUNT:
+            # Comments-only videos are not cached by ingest
+            (cache_dir / f"vid{i:05d}.json").unlink()
+        videos_data.append(VideoRecord.from_ingest(result, cache_dir=cache_dir) if mode == 'compact' else result)
+        del result
+
+    # Consumers: signal filter input, LLM transcript excerpts, report summary
+    all_comments = [{'video': v['video_info']['title'], 'text': c['text'], 'likes': c['likes']}
+                    for v in videos_data for c in v['comments']]
+    excerpts = [transcript_excerpt(v, 3000) for v in videos_data]
+    summary = [(len(v['comments']), len(v['transcript'])) for v in videos_data]
+    del all_comments, excerpts, summary
+
+    return {'mode': mode, 'videos': videos, 'peak_rss_mb': round(peak_rss_mb(), 1),
+            'delta_mb': round(peak_rss_mb() - baseline, 1)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Peak RSS of videos_data representations")
+    parser.add_argument('--videos', type=int, nargs='+', default=[25, 100])
+    parser.add_argument('--comments', type=int, default=500, help='Comments per video (enterprise limit: 500)')
+    parser.add_argument('--worker', nargs=2, metavar=('MODE', 'CACHE_DIR'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        mode, cache_dir = args.worker
+        print(json.dumps(run_worker(mode, Path(cache_dir), args.videos[0])))
+        return
+
+    print(f"{'videos':>6} {'mode':>8} {'peak RSS MB':>12} {'videos_data MB':>15}")
+    for count in args.videos:
+        for mode in ('legacy', 'compact'):
+            with tempfile.TemporaryDirectory() as tmp:
+                build_ingest_cache(Path(tmp), count, args.comments)
+                out = subprocess.run([sys.executable, __file__, '--videos', str(count), '--worker', mode, tmp],
+                                     capture_output=True, text=True, check=True)
+                res = json.loads(out.stdout.strip().splitlines()[-1])
+                print(f"{count:>6} {mode:>8} {res['peak_rss_mb']:>12} {res['delta_mb']:>15}")
+
+
+if __name__ == "__main__":
+    main()
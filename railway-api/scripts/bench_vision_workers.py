@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+OCR/face throughput benchmark: in-process models vs the vision worker pool.
+
+Extracts full features (OCR + face detection on) for one job's worth of
+thumbnails (25 by default) from several threads at once, the way parallel
+premium tasks do, and reports thumbnails/sec plus pool timeouts/crashes.
+
+Each job is its own GAP_ULTIMATE.py process, so every job pays for loading
+the models (and, for the pool, spawning its workers) once. Both are
+reported per job: "cold" is a first batch including that start-up, "warm"
+a second batch on the same models, and "start-up" the difference.
+
+Usage:
+    python scripts/bench_vision_workers.py                          # 25 synthetic thumbnails
+    python scripts/bench_vision_workers.py --dir data/thumbnails --workers 1 2 4
+"""
+
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from PIL import Image
+
+from bench_thumbnail_engine import synthetic_thumbnail
+from premium.thumbnail_extractor import ThumbnailFeatureExtractor
+from premium.vision_workers import VisionWorkerPool
+import premium.vision_workers as vision_workers
+
+
+def load_images(directory: str, count: int):
+    if directory:
+        paths = sorted(p for p in Path(directory).iterdir() if p.suffix.lower() in ('.jpg', '.jpeg', '.png', '.webp'))
+        return [Image.open(p).convert('RGB') for p in paths[:count]]
+    return [synthetic_thumbnail(i) for i in range(count)]
+
+
+def run(extractor: ThumbnailFeatureExtractor, images, threads: int) -> float:
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        list(executor.map(extractor.extract_from_image, images))
+    return time.perf_counter() - started
+
+
+def report(label: str, images, cold: float, warm: float, extra: str = ''):
+    print(f"   {label:<19} cold {len(images) / cold:6.2f} thumbnails/s   warm {len(images) / warm:6.2f} thumbnails/s   "
+          f"start-up per job {max(0.0, cold - warm):6.2f}s{extra}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Vision worker pool throughput benchmark')
+    parser.add_argument('--dir', help='Directory of thumbnails (default: synthetic)')
+    parser.add_argument('--count', type=int, default=25, help='Thumbnails per job')
+    parser.add_argument('--threads', type=int, default=4, help='Concurrent callers (premium tasks)')
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4], help='Vision pool sizes to try')
+    args = parser.parse_args()
+
+    images = load_images(args.dir, args.count)
+    print(f"🖼️ {len(images)} thumbnails, {args.threads} concurrent callers")
+
+    # In-process baseline (models serialized by their locks, loaded on first use)
+    local = ThumbnailFeatureExtractor(use_ocr=True, use_face_detection=True, use_vision_pool=False)
+    cold = run(local, images, args.threads)
+    warm = run(local, images, args.threads)
+    report('in-process', images, cold, warm)
+
+    for workers in args.workers:
+        # A fresh pool per size, like a fresh job process: spawn + model load land in the cold run
+        pool = VisionWorkerPool(workers=workers)
+        vision_workers._pool_instance = pool
+        pooled = ThumbnailFeatureExtractor(use_ocr=True, use_face_detection=True, use_vision_pool=True)
+        cold = run(pooled, images, args.threads)
+        warm = run(pooled, images, args.threads)
+        stats = pool.stats()
+        report(f'pool ({workers} workers)', images, cold, warm,
+               f"   timeouts {stats['timeouts']}, crashes {stats['crashes']}, rejected {stats['rejected']}")
+        pool.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -5,15 +5,17 @@ Security-hardened with API authentication, rate limiting, and queue system.
 """
 
 import os
+import copy
 import json
 import time
 import threading
 from datetime import datetime
-from collections import defaultdict, deque
+from collections import defaultdict, deque, OrderedDict
 from contextlib import asynccontextmanager
 
 from fastapi import FastAPI, BackgroundTasks, HTTPException, Request, Depends
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.security import APIKeyHeader
 from pydantic import BaseModel, validator
@@ -38,6 +40,8 @@ if not hasattr(importlib.metadata, 'packages_distributions'):
         return res
     importlib.metadata.packages_distributions = packages_distributions
 
+from metrics import (get_registry, METRICS_MARKER, JOB_DURATION, SUPABASE_LATENCY,
+                     RATE_LIMIT_REJECTIONS, JOBS_COALESCED)
 from email_service import (
     send_report_complete_email,
     send_analysis_started_email,
@@ -59,6 +63,14 @@ SUPABASE_KEY = os.environ.get("SUPABASE_SERVICE_KEY", "")
 API_SECRET_KEY = os.environ.get("API_SECRET_KEY", "").strip().strip('"').strip("'")  # Shared secret with frontend
 MAX_CONCURRENT_JOBS = int(os.environ.get("MAX_CONCURRENT_JOBS", "5"))
 
+# Identical analyses (same channel, tier, video count, language, shorts) share one run.
+# Completed reports are reused for this long; 0 disables reuse of completed runs.
+COALESCE_WINDOW_SECONDS = int(os.environ.get("COALESCE_WINDOW_SECONDS", 15 * 60))
+COALESCE_MAX_RECENT = 20
+
+# Longest a thumbnail request waits on the vision worker pool (a cold pool loads models for minutes)
+VISION_INTERACTIVE_TIMEOUT = float(os.environ.get("VISION_INTERACTIVE_TIMEOUT", 10))
+
 # Allowed origins (restrict CORS)
 ALLOWED_ORIGINS = [
     "https://gapintel.online",
@@ -91,6 +103,7 @@ class RateLimiter:
             ]
             # Check limit
             if len(self.requests[client_ip]) >= self.max_requests:
+                RATE_LIMIT_REJECTIONS.inc()
                 return False
             # Record request
             self.requests[client_ip].append(now)
@@ -111,14 +124,101 @@ class JobQueue:
         self.queue = deque()
         self._lock = threading.Lock()
         self._worker_running = False
+        # Single-flight: signature -> {'access_key': leader key, 'followers': [jobs]}
+        self._inflight = {}
+        # signature -> (completed_at, result) of recently completed runs
+        self._recent = OrderedDict()
+        self.coalesced_inflight = 0
+        self.coalesced_recent = 0
+    
+    @staticmethod
+    def job_signature(job_data: dict):
+        """Jobs with the same signature produce the same report (None = never coalesce)."""
+        if job_data.get('webhook_url') or job_data.get('branding'):
+            return None  # Public API jobs carry per-client delivery and branding
+        return (
+            (job_data.get('channel_name') or '').lstrip('@').strip().lower(),
+            job_data.get('tier', 'starter'),
+            int(job_data.get('video_count') or 1),
+            job_data.get('language', 'en'),
+            bool(job_data.get('include_shorts', True)),
+        )
     
-    def enqueue(self, job_data: dict):
-        """Add job to queue."""
+    def _recent_result(self, signature):
+        """Fresh result of an identical completed run (call with lock held)."""
+        cutoff = time.time() - COALESCE_WINDOW_SECONDS
+        for key in [k for k, (completed_at, _) in self._recent.items() if completed_at < cutoff]:
+            del self._recent[key]
+        entry = self._recent.get(signature) if signature else None
+        return entry[1] if entry else None
+    
+    def enqueue(self, job_data: dict) -> str:
+        """
+        Add job to queue.
+        
+        Returns 'queued', 'coalesced' (attached to an identical in-flight run)
+        or 'reused' (completed from an identical run that just finished).
+        """
+        signature = self.job_signature(job_data)
         with self._lock:
-            self.queue.append(job_data)
-            print(f"📥 Job queued: {job_data['access_key']} (queue size: {len(self.queue)})")
-            if not self._worker_running:
-                self._start_worker()
+            recent = self._recent_result(signature)
+            if recent is None:
+                inflight = self._inflight.get(signature) if signature else None
+                if inflight is not None:
+                    keys = {inflight['access_key']} | {f['access_key'] for f in inflight['followers']}
+                    if job_data['access_key'] not in keys:
+                        inflight['followers'].append(job_data)
+                        self.coalesced_inflight += 1
+                        JOBS_COALESCED.inc(mode='in_flight')
+                    print(f"🔗 Job coalesced: {job_data['access_key']} waits on identical analysis {inflight['access_key']}")
+                    return 'coalesced'
+                
+                if signature:
+                    self._inflight[signature] = {'access_key': job_data['access_key'], 'followers': []}
+                self.queue.append(job_data)
+                print(f"📥 Job queued: {job_data['access_key']} (queue size: {len(self.queue)})")
+                if not self._worker_running:
+                    self._start_worker()
+                return 'queued'
+            self.coalesced_recent += 1
+            JOBS_COALESCED.inc(mode='recent')
+        
+        print(f"♻️ Job {job_data['access_key']} served from a recent identical analysis")
+        threading.Thread(target=deliver_coalesced_result, args=(job_data, recent), daemon=True).start()
+        return 'reused'
+    
+    def _finish(self, job: dict, result: dict):
+        """Hand the leader's result to coalesced followers (or requeue them on failure)."""
+        signature = self.job_signature(job)
+        if not signature:
+            return
+        with self._lock:
+            entry = self._inflight.pop(signature, None)
+            followers = entry['followers'] if entry else []
+            # Partial (deadline) or unparsed reports are not reused for new requests
+            if (isinstance(result, dict) and COALESCE_WINDOW_SECONDS > 0
+                    and not result.get('skipped_sections') and 'raw_report' not in result):
+                self._recent[signature] = (time.time(), result)
+                self._recent.move_to_end(signature)
+                while len(self._recent) > COALESCE_MAX_RECENT:
+                    self._recent.popitem(last=False)
+        
+        if isinstance(result, dict):
+            for follower in followers:
+                deliver_coalesced_result(follower, result)
+        else:
+            # Leader failed: followers run on their own (the first becomes the new leader)
+            for follower in followers:
+                self.enqueue(follower)
+    
+    def coalescing_stats(self) -> dict:
+        with self._lock:
+            return {
+                "coalesced_in_flight": self.coalesced_inflight,
+                "coalesced_recent": self.coalesced_recent,
+                "waiting_on_shared_runs": sum(len(e['followers']) for e in self._inflight.values()),
+                "recent_results": len(self._recent),
+            }
     
     def _start_worker(self):
         """Start background worker if not running."""
@@ -139,9 +239,10 @@ class JobQueue:
                     return
             
             if job:
+                result = None
                 try:
                     print(f"🔄 Processing job: {job['access_key']}")
-                    run_analysis(
+                    result = run_analysis(
                         job['channel_name'],
                         job['access_key'],
                         job['email'],
@@ -153,11 +254,18 @@ class JobQueue:
                 finally:
                     with self._lock:
                         self.active_jobs -= 1
+                    self._finish(job, result)
             else:
                 time.sleep(1)  # Wait before checking again
 
 job_queue = JobQueue(max_concurrent=MAX_CONCURRENT_JOBS)
 
+# Queue gauges are read when /metrics is scraped
+get_registry().gauge('gapintel_queue_length', 'Jobs waiting in the queue', lambda: {'': len(job_queue.queue)})
+get_registry().gauge('gapintel_active_jobs', 'Jobs currently running', lambda: {'': job_queue.active_jobs})
+get_registry().gauge('gapintel_max_concurrent_jobs', 'Configured job concurrency',
+                     lambda: {'': job_queue.max_concurrent})
+
 
 # ============================================
 # API Key Authentication
@@ -267,7 +375,8 @@ def create_analysis_record(access_key: str, channel_name: str, email: str) -> bo
     }
             
     try:
-        resp = requests.post(url, headers=headers, json=payload)
+        with SUPABASE_LATENCY.time(operation='create_analysis'):
+            resp = requests.post(url, headers=headers, json=payload)
         if resp.status_code >= 400:
             print(f"⚠️ Supabase create failed: {resp.text}")
             return False
@@ -318,7 +427,8 @@ def update_analysis_status(access_key: str, status: str, result: dict = None,
             payload["current_phase"] = "Complete"
             
     try:
-        resp = requests.patch(url, headers=headers, json=payload)
+        with SUPABASE_LATENCY.time(operation='update_status'):
+            resp = requests.patch(url, headers=headers, json=payload)
         if resp.status_code >= 400:
             print(f"⚠️ Supabase update failed: {resp.text}")
         else:
@@ -341,7 +451,8 @@ def fetch_analysis_status(access_key: str) -> dict:
     }
     
     try:
-        resp = requests.get(url, headers=headers)
+        with SUPABASE_LATENCY.time(operation='fetch_status'):
+            resp = requests.get(url, headers=headers)
         if resp.status_code == 200:
             data = resp.json()
             if data:
@@ -381,9 +492,16 @@ def handle_failure_logic(email: str, access_key: str, channel_name: str, error_m
 # Maximum time for an analysis job (10 minutes)
 JOB_TIMEOUT_SECONDS = 10 * 60
 
+# Time reserved after the job deadline for finalizing/printing the report
+DEADLINE_MARGIN_SECONDS = int(os.environ.get("DEADLINE_MARGIN_SECONDS", 60))
+
 def run_analysis(channel_name: str, access_key: str, email: str, video_count: int = 1, tier: str = "starter", include_shorts: bool = True, language: str = "en"):
-    """Run the gap analyzer with timeout protection. Called by queue worker."""
+    """
+    Run the gap analyzer with timeout protection. Called by queue worker.
+    Returns the report dict on success (shared with coalesced jobs), else None.
+    """
     print(f"🚀 Starting analysis for @{channel_name} (key: {access_key}) videos: {video_count} tier: {tier} shorts: {include_shorts} lang: {language}")
+    job_started = time.time()
     
     try:
         update_analysis_status(access_key, "processing", progress=10, phase="Initializing")
@@ -391,6 +509,10 @@ def run_analysis(channel_name: str, access_key: str, email: str, video_count: in
         import sys
         import re
         
+        # Deadline propagated to the analyzer: optional sections are skipped as it
+        # approaches, so the job returns a partial report instead of being killed
+        job_deadline = time.time() + JOB_TIMEOUT_SECONDS - DEADLINE_MARGIN_SECONDS
+        
         cmd_list = [
             sys.executable, "GAP_ULTIMATE.py",
             channel_name,
@@ -401,13 +523,19 @@ def run_analysis(channel_name: str, access_key: str, email: str, video_count: in
             "--ai", "gemini",
             "--gemini-model", "gemini-2.0-flash",
             "--tier", tier,
-            "--language", language
+            "--language", language,
+            "--deadline", f"{job_deadline:.0f}"
         ]
         
         # Handle shorts preference
         if not include_shorts:
             cmd_list.append("--skip-shorts")
         
+        # Opt-in local Whisper fallback for caption-less videos (off | hooks | full)
+        local_transcription = os.environ.get("LOCAL_TRANSCRIPTION", "off")
+        if local_transcription in ("hooks", "full"):
+            cmd_list.extend(["--local-transcription", local_transcription])
+        
         print(f"🔄 Running: {' '.join(cmd_list)} (timeout: {JOB_TIMEOUT_SECONDS}s)")
         
         process = subprocess.Popen(
@@ -435,6 +563,15 @@ def run_analysis(channel_name: str, access_key: str, email: str, video_count: in
                 raise subprocess.TimeoutExpired(cmd_list, JOB_TIMEOUT_SECONDS)
                 
             stripped_line = line.strip()
+            
+            # Job-side metrics (stages, LLM, quota, caches) feed /metrics
+            if stripped_line.startswith(METRICS_MARKER):
+                try:
+                    get_registry().merge(json.loads(stripped_line[len(METRICS_MARKER):]))
+                except Exception as e:
+                    print(f"⚠️ Failed to parse job metrics: {e}")
+                continue
+            
             if stripped_line:
                 print(f"   [ANALYSIS] {stripped_line}")
                 output_lines.append(stripped_line)
@@ -503,13 +640,19 @@ def run_analysis(channel_name: str, access_key: str, email: str, video_count: in
                 }
             
             update_analysis_status(access_key, "completed", analysis_result, progress=100, phase="Complete")
+            JOB_DURATION.observe(time.time() - job_started, tier=tier, status='completed')
             print(f"✅ Analysis complete for {channel_name}")
+            if isinstance(analysis_result, dict) and analysis_result.get('skipped_sections'):
+                skipped = ', '.join(x.get('section', '?') for x in analysis_result['skipped_sections'])
+                print(f"   ⏳ Partial report (deadline): skipped {skipped}")
             send_report_complete_email(email, channel_name, access_key)
+            return analysis_result
             
         else:
             error_msg = f"Analysis failed (code: {return_code})"
             last_lines = '\n'.join(output_lines[-10:]) if output_lines else "No output"
             print(f"❌ {error_msg}")
+            JOB_DURATION.observe(time.time() - job_started, tier=tier, status='failed')
             update_analysis_status(access_key, "failed", {"error": error_msg, "last_output": last_lines})
             send_analysis_failed_email(email, channel_name, error_msg)
             handle_failure_logic(email, access_key, channel_name, error_msg)
@@ -521,6 +664,7 @@ def run_analysis(channel_name: str, access_key: str, email: str, video_count: in
             process.wait()
         error_msg = f"Analysis timed out after {JOB_TIMEOUT_SECONDS // 60} minutes"
         print(f"⏰ {error_msg}")
+        JOB_DURATION.observe(time.time() - job_started, tier=tier, status='timeout')
         update_analysis_status(access_key, "failed", {"error": error_msg})
         send_analysis_failed_email(email, access_key, channel_name, error_msg)
         handle_failure_logic(email, access_key, channel_name, error_msg)
@@ -529,11 +673,26 @@ def run_analysis(channel_name: str, access_key: str, email: str, video_count: in
     except Exception as e:
         error_msg = f"Unexpected error: {str(e)}"
         print(f"💥 {error_msg}")
+        JOB_DURATION.observe(time.time() - job_started, tier=tier, status='error')
         update_analysis_status(access_key, "failed", {"error": error_msg})
         send_analysis_failed_email(email, channel_name, error_msg)
         handle_failure_logic(email, access_key, channel_name, error_msg)
 
 
+def deliver_coalesced_result(job: dict, result: dict):
+    """Complete a coalesced job with its own copy of the shared report."""
+    access_key = job['access_key']
+    try:
+        report = copy.deepcopy(result)
+        update_analysis_status(access_key, "completed", report, progress=100, phase="Complete")
+        print(f"✅ Coalesced analysis delivered to {access_key}")
+        send_report_complete_email(job.get('email'), job.get('channel_name'), access_key)
+    except Exception as e:
+        error_msg = f"Coalesced delivery failed: {str(e)}"
+        print(f"💥 {error_msg}")
+        update_analysis_status(access_key, "failed", {"error": error_msg})
+
+
 # ============================================
 # FastAPI App
 # ============================================
@@ -824,13 +983,18 @@ async def analyze(
         'tier': request.tier,
         'language': request.language
     }
-    job_queue.enqueue(job_data)
+    queue_state = job_queue.enqueue(job_data)
     
-    queue_position = len(job_queue.queue)
+    queue_position = len(job_queue.queue) if queue_state == 'queued' else 0
+    message = f"Analysis queued for @{channel_name}. Position: {queue_position}"
+    if queue_state == 'coalesced':
+        message = f"Analysis queued for @{channel_name}. Sharing an identical analysis already in progress"
+    elif queue_state == 'reused':
+        message = f"Analysis queued for @{channel_name}. Reusing an identical analysis completed moments ago"
     
     return AnalyzeResponse(
         status="queued",
-        message=f"Analysis queued for @{channel_name}. Position: {queue_position}",
+        message=message,
         access_key=access_key,
         queue_position=queue_position
     )
@@ -866,10 +1030,17 @@ async def queue_status():
     return {
         "queue_length": len(job_queue.queue),
         "active_jobs": job_queue.active_jobs,
-        "max_concurrent": job_queue.max_concurrent
+        "max_concurrent": job_queue.max_concurrent,
+        "coalescing": job_queue.coalescing_stats()
     }
 
 
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Prometheus text exposition of server and job metrics (public, like /queue-status)."""
+    return PlainTextResponse(get_registry().render(), media_type="text/plain; version=0.0.4")
+
+
 @app.post("/api/admin/recover-stuck-jobs")
 async def trigger_recovery(authenticated: bool = Depends(verify_api_key)):
     """
@@ -1555,7 +1726,8 @@ async def analyze_thumbnail(
     {
         "thumbnail_url": "https://...",
         "title": "Video Title",
-        "user_email": "subscriber@email.com"
+        "user_email": "subscriber@email.com",
+        "niche": "Gaming"  (optional; percentiles fall back to all niches)
     }
     """
     # Rate limiting
@@ -1568,6 +1740,7 @@ async def analyze_thumbnail(
         thumbnail_url = body.get("thumbnail_url")
         title = body.get("title", "")
         user_email = body.get("user_email")
+        niche = body.get("niche")
         
         if not thumbnail_url:
             raise HTTPException(status_code=400, detail="thumbnail_url is required")
@@ -1594,13 +1767,25 @@ async def analyze_thumbnail(
         from premium.ml_models.ctr_predictor import CTRPredictor
         
         # Extract features
-        extractor = ThumbnailFeatureExtractor(use_ocr=False, use_face_detection=True)
-        features = extractor.extract_from_url(thumbnail_url)
+        # Request threads don't wait out a cold vision pool (model load); face fields default instead
+        extractor = ThumbnailFeatureExtractor(use_ocr=False, use_face_detection=True,
+                                              vision_timeout=VISION_INTERACTIVE_TIMEOUT)
+        features = await run_in_threadpool(extractor.extract_from_url, thumbnail_url)
         
         # Predict CTR
         predictor = CTRPredictor()
         prediction = predictor.predict(features.to_dict(), title)
         
+        # Percentile ranks within the niche (precomputed quantiles; features at the artifact's level)
+        from premium.ml_models.niche_benchmarks import get_niche_benchmarks
+        benchmarks = get_niche_benchmarks()
+        niche_benchmark = None
+        if benchmarks.enabled:
+            # Download + extraction block; keep them off the event loop
+            level_extractor = ThumbnailFeatureExtractor(level=benchmarks.level, use_vision_pool=False)
+            level_features = await run_in_threadpool(level_extractor.extract_from_url, thumbnail_url)
+            niche_benchmark = benchmarks.percentile_ranks(level_features.to_dict(), niche)
+        
         # Increment usage
         await manager.increment_usage(user_email)
         
@@ -1612,7 +1797,8 @@ async def analyze_thumbnail(
             },
             "thumbnail_analysis": {
                 "features": features.to_dict(),
-                "ctr_prediction": prediction.to_dict()
+                "ctr_prediction": prediction.to_dict(),
+                "niche_benchmark": niche_benchmark
             }
 
         }
@@ -1805,8 +1991,10 @@ async def optimize_thumbnail(
         from premium.thumbnail_optimizer import ThumbnailOptimizer
         
         # Extract features
-        extractor = ThumbnailFeatureExtractor(use_ocr=False, use_face_detection=True)
-        features = extractor.extract_from_url(thumbnail_url)
+        # Request threads don't wait out a cold vision pool (model load); face fields default instead
+        extractor = ThumbnailFeatureExtractor(use_ocr=False, use_face_detection=True,
+                                              vision_timeout=VISION_INTERACTIVE_TIMEOUT)
+        features = await run_in_threadpool(extractor.extract_from_url, thumbnail_url)
         
         # Optimize
         optimizer = ThumbnailOptimizer()
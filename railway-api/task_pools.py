@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Shared Task Pools - One I/O pool and one CPU pool per process
+
+Premium tasks mix I/O-bound work (Gemini calls, competitor API fetches,
+thumbnail downloads) with CPU-bound work (KMeans color features, sklearn
+clustering). Work is submitted by workload class:
+- 'io':  shared ThreadPoolExecutor (threads mostly wait on sockets)
+- 'cpu': shared spawn ProcessPoolExecutor (no GIL contention); callables
+         must be picklable module-level functions (see premium/cpu_tasks.py)
+
+Tasks submit sub-work here instead of opening their own nested pools, so the
+total thread/process count stays bounded regardless of how many tasks run.
+
+The job's worker processes share one budget (JOB_PROCESS_BUDGET, default
+os.cpu_count()): the vision worker pool (OCR/faces) and the Whisper pool
+take their share from it, the CPU pool gets the rest (minus one core for
+the parent process). VISION_WORKERS, WHISPER_WORKERS and
+PREMIUM_CPU_WORKERS still override a single share.
+
+Usage:
+    from task_pools import get_task_pools, WORKLOAD_CPU, WORKLOAD_IO
+    pools = get_task_pools()
+    blobs = pools.map(WORKLOAD_IO, download, urls)
+    features = pools.map(WORKLOAD_CPU, extract_features, blobs)
+"""
+
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Callable, Iterable, List
+
+from job_profiler import bind_stage
+
+
+WORKLOAD_IO = 'io'
+WORKLOAD_CPU = 'cpu'
+
+
+class TaskPools:
+    """Workload-class executors shared by all premium tasks of a job."""
+
+    def __init__(self, io_workers: int = None, cpu_workers: int = None, process_budget: int = None):
+        budget = process_budget or int(os.getenv('JOB_PROCESS_BUDGET', os.cpu_count() or 1))
+        self.process_budget = budget
+        self.io_workers = io_workers or int(os.getenv('PREMIUM_IO_WORKERS', 16))
+        # Process shares: Whisper runs during ingest, vision + CPU workers during premium analysis
+        self.whisper_workers = int(os.getenv('WHISPER_WORKERS', max(1, min(2, budget // 2))))
+        self.vision_workers = int(os.getenv('VISION_WORKERS', max(1, min(2, budget // 4))))
+        self.cpu_workers = cpu_workers or int(os.getenv('PREMIUM_CPU_WORKERS', max(1, budget - self.vision_workers - 1)))
+
+        self._io = ThreadPoolExecutor(max_workers=self.io_workers, thread_name_prefix='premium-io')
+        self._cpu = None  # Created on first CPU submission (spawning workers is not free)
+        self._lock = threading.Lock()
+
+    def _cpu_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._cpu is None:
+                ctx = multiprocessing.get_context('spawn')  # parent has live threads; don't fork
+                self._cpu = ProcessPoolExecutor(max_workers=self.cpu_workers, mp_context=ctx)
+            return self._cpu
+
+    def submit(self, workload: str, fn: Callable, *args, **kwargs) -> Future:
+        """Submit a callable to the pool for its workload class."""
+        if workload == WORKLOAD_IO:
+            # Profiling: calls made on pool threads count towards the submitting stage
+            return self._io.submit(bind_stage(fn), *args, **kwargs)
+        if workload == WORKLOAD_CPU:
+            return self._cpu_executor().submit(fn, *args, **kwargs)
+        raise ValueError(f"Unknown workload class: {workload}")
+
+    def map(self, workload: str, fn: Callable, items: Iterable, ignore_errors: bool = False) -> List:
+        """
+        Run fn over items on the workload's pool, preserving order.
+        With ignore_errors=True failures come back as None instead of raising.
+        """
+        futures = [self.submit(workload, fn, item) for item in items]
+        results = []
+        for future in futures:
+            try:
+                results.append(future.result())
+            except Exception:
+                if not ignore_errors:
+                    raise
+                results.append(None)
+        return results
+
+    def close(self, wait: bool = True):
+        """
+        Shut down both pools. wait=False (abandoned stages at the deadline)
+        drops queued work, terminates CPU workers and doesn't join running tasks.
+        """
+        self._io.shutdown(wait=wait, cancel_futures=True)
+        with self._lock:
+            cpu, self._cpu = self._cpu, None
+        if cpu is not None:
+            if not wait:
+                for process in list((getattr(cpu, '_processes', None) or {}).values()):
+                    process.terminate()
+            cpu.shutdown(wait=wait, cancel_futures=True)
+
+
+# Singleton instance for global use
+_pools_instance = None
+_pools_lock = threading.Lock()
+
+def get_task_pools() -> TaskPools:
+    """Get the singleton task pools instance."""
+    global _pools_instance
+    with _pools_lock:
+        if _pools_instance is None:
+            _pools_instance = TaskPools()
+        return _pools_instance
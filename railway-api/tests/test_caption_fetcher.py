@@ -0,0 +1,101 @@
+import os
+import sys
+import unittest
+from unittest.mock import MagicMock, patch
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# ingest_manager imports the content clusterer at module level; stub its heavy dependencies
+# the same way test_clustering_embeddings does so the clusterer never loads against the real ones
+for name in ('supabase', 'sentence_transformers'):
+    sys.modules.setdefault(name, MagicMock())
+
+import ingest_manager
+from ingest_manager import AsyncCaptionFetcher, caption_languages
+
+
+class TooManyRequests(Exception):
+    pass
+
+
+CAPTIONS = {'text': 'hello', 'language': 'de', 'segments': [{'start': 0, 'end': 1, 'text': 'hello'}]}
+
+
+class TestAsyncCaptionFetcher(unittest.TestCase):
+    def setUp(self):
+        self.fetcher = AsyncCaptionFetcher(language='de', max_concurrency=2, base_delay=0.01, max_retries=2)
+
+    def tearDown(self):
+        self.fetcher.close()
+
+    def test_language_priority(self):
+        self.assertEqual(caption_languages('de'), ['de', 'en'])
+        self.assertEqual(caption_languages('en'), ['en'])
+
+    @patch.object(ingest_manager, 'CAPTIONS_AVAILABLE', True)
+    def test_backoff_then_success(self):
+        calls = []
+
+        def fake_fetch(video_id, languages):
+            calls.append(languages)
+            if len(calls) == 1:
+                raise TooManyRequests("429")
+            return CAPTIONS
+
+        with patch.object(ingest_manager, '_fetch_captions_raw', side_effect=fake_fetch):
+            result = self.fetcher.fetch_blocking('abc')
+
+        self.assertEqual(result, CAPTIONS)
+        self.assertEqual(calls[0], ['de', 'en'])
+        report = self.fetcher.report()
+        self.assertEqual(report['ok'], 1)
+        self.assertEqual(report['retries'], 1)
+
+    @patch.object(ingest_manager, 'CAPTIONS_AVAILABLE', True)
+    def test_report_counts_failures(self):
+        def fake_fetch(video_id, languages):
+            if video_id == 'missing':
+                raise Exception("No transcript found")
+            if video_id == 'blocked':
+                raise TooManyRequests("429")
+            return CAPTIONS
+
+        with patch.object(ingest_manager, '_fetch_captions_raw', side_effect=fake_fetch):
+            results = self.fetcher.fetch_all(['ok', 'missing', 'blocked'])
+
+        self.assertIsNotNone(results['ok'])
+        self.assertIsNone(results['missing'])
+        report = self.fetcher.report()
+        self.assertEqual((report['ok'], report['no_captions'], report['throttled']), (1, 1, 1))
+        self.assertEqual(report['failures'][0]['video_id'], 'blocked')
+
+
+class TestFetchCaptionsRaw(unittest.TestCase):
+    def test_disabled_captions_do_not_list_transcripts(self):
+        class TranscriptsDisabled(Exception):
+            pass
+
+        api = MagicMock()
+        api.fetch.side_effect = TranscriptsDisabled("Subtitles are disabled for this video")
+        with patch.object(ingest_manager, 'YouTubeTranscriptApi', return_value=api, create=True):
+            with self.assertRaises(TranscriptsDisabled):
+                ingest_manager._fetch_captions_raw('abc', ['de', 'en'])
+        api.list.assert_not_called()
+
+    def test_other_language_used_when_requested_ones_missing(self):
+        class NoTranscriptFound(Exception):
+            pass
+
+        snippet = MagicMock(text='hallo', start=0.0, duration=1.0)
+        available = MagicMock()
+        available.fetch.return_value = MagicMock(__iter__=lambda self: iter([snippet]), language_code='fr')
+        api = MagicMock()
+        api.fetch.side_effect = NoTranscriptFound("No transcripts were found for any of the requested language codes")
+        api.list.return_value = [available]
+        with patch.object(ingest_manager, 'YouTubeTranscriptApi', return_value=api, create=True):
+            result = ingest_manager._fetch_captions_raw('abc', ['de', 'en'])
+        self.assertEqual((result['text'], result['language']), ('hallo', 'fr'))
+
+
+if __name__ == '__main__':
+    unittest.main()
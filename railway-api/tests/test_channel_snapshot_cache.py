@@ -0,0 +1,98 @@
+import importlib.util
+import os
+import sys
+import tempfile
+import threading
+import time
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Load the module on its own: importing through the package would run premium/__init__,
+# which pulls in the content clusterer (and its heavy dependencies) for no reason
+_spec = importlib.util.spec_from_file_location(
+    'channel_snapshot_cache', os.path.join(ROOT, 'premium', 'db', 'channel_snapshot_cache.py'))
+channel_snapshot_cache = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(channel_snapshot_cache)
+ChannelSnapshotCache = channel_snapshot_cache.ChannelSnapshotCache
+
+
+class TestChannelSnapshotCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cache = ChannelSnapshotCache(root=self.tmp.name)
+        self.cache.enabled = True
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_fetch_once_then_hit(self):
+        calls = []
+
+        def fetch():
+            calls.append(1)
+            return ['UC123', 'Channel']
+
+        self.assertEqual(self.cache.get_or_fetch('channel', 'mkbhd', fetch), ['UC123', 'Channel'])
+        self.assertEqual(self.cache.get_or_fetch('channel', 'mkbhd', fetch), ['UC123', 'Channel'])
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(self.cache.stats()['hits'], 1)
+
+        # A second job (new cache instance, same dir) reads the snapshot too
+        other = ChannelSnapshotCache(root=self.tmp.name)
+        other.enabled = True
+        self.assertEqual(other.get('channel', 'mkbhd'), ['UC123', 'Channel'])
+
+    def test_expired_snapshot_is_refetched(self):
+        self.cache.get_or_fetch('videos', 'UU1:20', lambda: [1])
+        time.sleep(0.05)
+        self.assertIsNone(self.cache.get('videos', 'UU1:20', ttl=0.01))
+        self.assertEqual(self.cache.get_or_fetch('videos', 'UU1:20', lambda: [2], ttl=0.01), [2])
+
+    def test_concurrent_callers_share_one_fetch(self):
+        calls = []
+        started = threading.Event()
+
+        def fetch():
+            calls.append(1)
+            started.set()
+            time.sleep(0.2)
+            return {'subs': 10}
+
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(
+            self.cache.get_or_fetch('competitor', 'UCx', fetch))) for _ in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join(5)
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, [{'subs': 10}] * 4)
+
+    def test_errors_are_not_cached(self):
+        def boom():
+            raise RuntimeError("quota")
+
+        with self.assertRaises(RuntimeError):
+            self.cache.get_or_fetch('playlist', 'UC1', boom)
+        self.assertIsNone(self.cache.get('playlist', 'UC1'))
+        self.assertEqual(self.cache.get_or_fetch('playlist', 'UC1', lambda: 'UU1'), 'UU1')
+
+    def test_results_rejected_by_cache_if_are_not_cached(self):
+        # discover_competitors returns [] on a quota error instead of raising
+        self.assertEqual(self.cache.get_or_fetch('competitor', 'discover:UC1', lambda: [], cache_if=bool), [])
+        self.assertIsNone(self.cache.get('competitor', 'discover:UC1'))
+        self.assertEqual(self.cache.get_or_fetch('competitor', 'discover:UC1', lambda: ['UCa'], cache_if=bool), ['UCa'])
+        self.assertEqual(self.cache.get_or_fetch('competitor', 'discover:UC1', lambda: [], cache_if=bool), ['UCa'])
+
+    def test_disabled_always_fetches(self):
+        self.cache.enabled = False
+        calls = []
+        self.cache.get_or_fetch('channel', 'a', lambda: calls.append(1))
+        self.cache.get_or_fetch('channel', 'a', lambda: calls.append(1))
+        self.assertEqual(len(calls), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
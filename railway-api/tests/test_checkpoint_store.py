@@ -0,0 +1,150 @@
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from checkpoint_store import CheckpointStore
+from pipeline_dag import Deadline, PipelineDAG
+
+
+class TestCheckpointStore(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = self.tmp.name
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_cached_resumes_when_inputs_match(self):
+        calls = []
+        store = CheckpointStore('key-1', params={'tier': 'pro'}, root=self.root)
+        self.assertEqual(store.cached('ai:titles', ['prompt'], lambda: calls.append(1) or {'ok': 1}), {'ok': 1})
+
+        resumed = CheckpointStore('key-1', params={'tier': 'pro'}, root=self.root)
+        self.assertEqual(resumed.cached('ai:titles', ['prompt'], lambda: calls.append(1) or {'ok': 2}), {'ok': 1})
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(resumed.stats()['hits'], 1)
+
+    def test_changed_inputs_or_params_miss(self):
+        CheckpointStore('key-1', params={'tier': 'pro'}, root=self.root).cached('s', ['a'], lambda: 1)
+
+        self.assertEqual(CheckpointStore('key-1', params={'tier': 'pro'}, root=self.root).cached('s', ['b'], lambda: 2), 2)
+        self.assertEqual(CheckpointStore('key-1', params={'tier': 'starter'}, root=self.root).cached('s', ['b'], lambda: 3), 3)
+        self.assertEqual(CheckpointStore('key-2', params={'tier': 'pro'}, root=self.root).cached('s', ['a'], lambda: 4), 4)
+
+    def test_empty_results_not_saved_and_clear(self):
+        store = CheckpointStore('key-1', root=self.root)
+        store.cached('s', [], lambda: {})
+        self.assertEqual(store.cached('s', [], lambda: {'x': 1}), {'x': 1})
+
+        store.clear()
+        self.assertFalse(store.job_dir.exists())
+
+    def test_failed_phase_retried_on_resume(self):
+        # Clustering/verification return None when the LLM call fails
+        replies = [None, {'clustered_pain_points': [{'topic_keyword': 'x'}]}]
+        calls = []
+
+        def cluster():
+            calls.append(1)
+            return replies[len(calls) - 1]
+
+        self.assertIsNone(CheckpointStore('job', root=self.root).cached('ai:clustering', ['p'], cluster))
+        resumed = CheckpointStore('job', root=self.root)
+        self.assertEqual(resumed.cached('ai:clustering', ['p'], cluster), replies[1])
+        self.assertEqual(len(calls), 2)
+        self.assertEqual(resumed.cached('ai:clustering', ['p'], cluster), replies[1])
+        self.assertEqual(len(calls), 2)
+
+    def test_partial_results_rejected_by_valid_are_not_saved(self):
+        failed_batches = [2]
+        store = CheckpointStore('job', root=self.root)
+        partial = store.cached('ai:pain_points', ['c'], lambda: [{'pain_points': []}], valid=lambda _: not failed_batches)
+        self.assertEqual(partial, [{'pain_points': []}])
+
+        failed_batches.clear()
+        self.assertEqual(store.cached('ai:pain_points', ['c'], lambda: [1, 2], valid=lambda _: not failed_batches), [1, 2])
+        self.assertEqual(store.cached('ai:pain_points', ['c'], lambda: [3]), [1, 2])
+
+    def test_disabled_without_key(self):
+        store = CheckpointStore(None, root=self.root)
+        self.assertFalse(store.enabled)
+        self.assertEqual(store.cached('s', [], lambda: 5), 5)
+        self.assertEqual(os.listdir(self.root), [])
+
+    def test_dag_resumes_completed_stages(self):
+        calls = []
+
+        def build(fail_analysis):
+            def ingest():
+                calls.append('ingest')
+                return {'videos_data': [1, 2, 3]}
+
+            def analysis(videos_data):
+                calls.append('analysis')
+                if fail_analysis:
+                    raise TimeoutError("deadline")
+                return {'analysis': sum(videos_data)}
+
+            dag = PipelineDAG()
+            dag.add('ingest', ingest, outputs=('videos_data',), checkpoint=True)
+            dag.add('ai_analysis', analysis, inputs=('videos_data',), outputs=('analysis',), checkpoint=True)
+            return dag
+
+        with self.assertRaises(Exception):
+            build(True).run(checkpoints=CheckpointStore('job', root=self.root))
+
+        dag = build(False)
+        ctx = dag.run(checkpoints=CheckpointStore('job', root=self.root))
+        self.assertEqual(ctx['analysis'], 6)
+        self.assertEqual(calls, ['ingest', 'analysis', 'analysis'])
+        statuses = {t['stage']: t['status'] for t in dag.trace_report()}
+        self.assertEqual(statuses, {'ingest': 'cached', 'ai_analysis': 'ok'})
+
+    def test_dag_reruns_stage_when_restore_rejects_checkpoint(self):
+        calls = []
+
+        def ingest():
+            calls.append('ingest')
+            return {'videos_data': [1]}
+
+        for restore in (None, lambda out: None):
+            dag = PipelineDAG()
+            dag.add('ingest', ingest, outputs=('videos_data',), checkpoint=True, restore=restore)
+            self.assertEqual(dag.run(checkpoints=CheckpointStore('job', root=self.root))['videos_data'], [1])
+        self.assertEqual(calls, ['ingest', 'ingest'])
+        self.assertEqual(dag.trace_report()[0]['status'], 'ok')
+
+    def test_dag_does_not_checkpoint_failed_or_truncated_outputs(self):
+        calls = []
+
+        def build(deadline):
+            def premium_task():
+                calls.append('premium')
+                return {'premium_hooks': None}  # Premium tasks report failure as None
+
+            def analysis():
+                calls.append('analysis')
+                deadline.skip('market_trends')
+                return {'analysis': {'gaps': []}}
+
+            dag = PipelineDAG()
+            dag.add('premium:hooks', premium_task, outputs=('premium_hooks',), checkpoint=True, optional=True)
+            dag.add('ai_analysis', analysis, outputs=('analysis',), checkpoint=True)
+            dag.add('report', lambda: {'report': 1}, outputs=('report',), checkpoint=True)
+            return dag
+
+        for _ in range(2):
+            deadline = Deadline(None)
+            dag = build(deadline)
+            dag.run(checkpoints=CheckpointStore('job', root=self.root), deadline=deadline)
+
+        self.assertEqual(calls, ['premium', 'analysis', 'premium', 'analysis'])
+        statuses = {t['stage']: t['status'] for t in dag.trace_report()}
+        self.assertEqual(statuses, {'premium:hooks': 'ok', 'ai_analysis': 'ok', 'report': 'cached'})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,98 @@
+import colorsys
+import os
+import random
+import sys
+import unittest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from premium.color_ml_analyzer import ColorBatch, ColorMLAnalyzer, classify_colors, contrast_scores, rgb_to_hls
+
+
+def reference_temperature(rgb):
+    """The original per-color colorsys classification."""
+    h, l, s = colorsys.rgb_to_hls(*(c / 255 for c in rgb))
+    hue = h * 360
+    if s < 0.15:
+        return 'neutral'
+    if 0 <= hue <= 60 or 300 <= hue <= 360:
+        return 'warm'
+    if 180 <= hue <= 300:
+        return 'cool'
+    return 'neutral'
+
+
+def reference_contrast(colors):
+    """The original pairwise luminance contrast."""
+    if len(colors) < 2:
+        return 0.0
+    lum = [(0.299 * c[0] + 0.587 * c[1] + 0.114 * c[2]) / 255 for c in colors]
+    return round(max(abs(a - b) for i, a in enumerate(lum) for b in lum[i + 1:]), 2)
+
+
+class TestVectorizedColors(unittest.TestCase):
+    def setUp(self):
+        rng = random.Random(7)
+        self.colors = [(rng.randint(0, 255), rng.randint(0, 255), rng.randint(0, 255)) for _ in range(2000)]
+        self.colors += [(0, 0, 0), (255, 255, 255), (128, 128, 128), (255, 0, 0), (0, 0, 255)]
+
+    def test_hls_matches_colorsys(self):
+        h, l, s = rgb_to_hls(np.array(self.colors))
+        expected = np.array([colorsys.rgb_to_hls(*(c / 255 for c in rgb)) for rgb in self.colors])
+        np.testing.assert_allclose(np.stack([h, l, s], axis=1), expected, atol=1e-12)
+
+    def test_temperature_matches_reference(self):
+        temperature, _, _ = classify_colors(np.array(self.colors))
+        labels = ['warm', 'cool', 'neutral']
+        self.assertEqual([labels[t] for t in temperature], [reference_temperature(c) for c in self.colors])
+
+    def test_contrast_matches_reference(self):
+        palettes = np.array(self.colors[:1800]).reshape(-1, 3, 3)
+        mask = np.ones(palettes.shape[:2], dtype=bool)
+        mask[::4, 2] = False
+        mask[1::4, 1:] = False
+        # A luminance spread sitting on a .xx5 boundary, where np.round gives 0.18
+        palettes = np.concatenate([palettes, [[(51, 0, 0), (0, 102, 0), (0, 0, 0)]]])
+        mask = np.concatenate([mask, [[True, True, False]]])
+        scores = contrast_scores(palettes, mask)
+        self.assertEqual(scores[-1], 0.17)
+        expected = [reference_contrast([c for c, valid in zip(p, m) if valid]) for p, m in zip(palettes.tolist(), mask)]
+        self.assertEqual(scores.tolist(), expected)
+
+    def test_profiles_and_insights(self):
+        analyzer = ColorMLAnalyzer()
+        items = [
+            {'video_data': {'video_id': 'a', 'title': 'A', 'view_count': 1000},
+             'thumbnail_features': {'dominant_color_1': (255, 0, 0), 'dominant_color_2': (0, 0, 0),
+                                    'dominant_color_3': (255, 0, 0)}},
+            {'video_data': {'video_id': 'b', 'title': 'B', 'view_count': 100},
+             'thumbnail_features': {'dominant_color_1': (0, 0, 255)}},
+            {'video_data': {'video_id': 'c', 'title': 'C', 'view_count': 500},
+             'thumbnail_features': {}},
+            {'video_data': {'video_id': 'd', 'title': 'D', 'view_count': 10},
+             'thumbnail_features': {'dominant_color_1': (0, 0, 200), 'dominant_color_2': (250, 250, 250)}},
+        ]
+        profiles = analyzer.analyze_thumbnails(items)
+        self.assertEqual([p.color_temperature for p in profiles], ['warm', 'cool', 'neutral', 'cool'])
+        self.assertEqual(profiles[0].color_diversity, 2)
+        self.assertEqual(profiles[0].contrast_score, 0.3)
+        self.assertEqual(profiles[2].dominant_colors, [(128, 128, 128)])
+
+        insights = analyzer.generate_insights(profiles).to_dict()
+        self.assertEqual(insights['temperature_performance'], {'warm': 1000.0, 'cool': 55.0, 'neutral': 500.0})
+        self.assertEqual(insights['top_performing_colors'][:2], ['#ff0000', '#000000'])
+        self.assertEqual(insights['comparison']['top_25_percent']['dominant_temperatures'], {'warm': 1})
+        self.assertEqual(insights['comparison']['bottom_25_percent']['top_colors'], ['#0000c8', '#fafafa'])
+        self.assertEqual([e['video_id'] for e in insights['video_examples']], ['a', 'b', 'd', 'c'])
+        self.assertIn("Use warm colors - top videos prefer warm while underperformers use cool",
+                      insights['color_recommendations'])
+
+        # Batch form gives the same insights without ColorProfile objects
+        self.assertEqual(analyzer.generate_insights(analyzer.build_batch(items)).to_dict(), insights)
+        self.assertEqual(analyzer.generate_insights(ColorBatch.from_profiles(profiles)).to_dict(), insights)
+
+
+if __name__ == '__main__':
+    unittest.main()
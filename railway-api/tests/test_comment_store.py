@@ -0,0 +1,133 @@
+import os
+import sys
+import tempfile
+import unittest
+from unittest.mock import patch
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from premium.db.comment_store import CommentStore, ARROW_AVAILABLE
+
+if ARROW_AVAILABLE:
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+
+
+@unittest.skipUnless(ARROW_AVAILABLE, "pyarrow not installed")
+class TestCommentStore(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.store = CommentStore(root=self.tmp.name)
+        self.videos_data = [
+            {
+                'video_info': {'video_id': 'vid_a', 'title': 'Video A'},
+                'comments': [
+                    {'author': 'u1', 'text': 'How do you do this?', 'likes': 10, 'published_at': '2024-01-01'},
+                    {'author': 'u2', 'text': 'great video', 'likes': 1, 'published_at': '2024-01-02'},
+                ],
+            },
+            {
+                'video_info': {'id': 'vid_b', 'title': 'Video B'},
+                'comments': [
+                    {'author': 'u1', 'text': 'It worked, thanks!', 'likes': 5, 'published_at': '2024-01-03'},
+                ],
+            },
+        ]
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_write_and_scan_projection(self):
+        written = self.store.write_job_comments('UC123', self.videos_data)
+        self.assertEqual(written, 2)
+
+        rows = self.store.scan(columns=['text', 'likes'], channel_ids=['UC123'])
+        self.assertEqual(len(rows), 3)
+        self.assertEqual(set(rows[0].keys()), {'text', 'likes'})
+
+    def test_partition_pruning_and_filters(self):
+        self.store.write_job_comments('UC123', self.videos_data)
+        self.store.write_video_comments('UC999', 'vid_c', [{'text': 'other', 'likes': 3}])
+
+        rows = self.store.scan(columns=['video_id'], video_ids=['vid_a'])
+        self.assertEqual({r['video_id'] for r in rows}, {'vid_a'})
+
+        rows = self.store.scan(columns=['channel_id', 'likes'], min_likes=5)
+        self.assertEqual(sorted(r['likes'] for r in rows), [5, 10])
+        self.assertEqual(sorted(self.store.list_channels()), ['UC123', 'UC999'])
+
+    def test_rewrite_replaces_video(self):
+        self.store.write_job_comments('UC123', self.videos_data)
+        self.store.write_video_comments('UC123', 'vid_a', [{'text': 'new', 'likes': 0}], 'Video A')
+
+        rows = self.store.scan(columns=['text'], video_ids=['vid_a'])
+        self.assertEqual([r['text'] for r in rows], ['new'])
+
+    def test_job_partitions_read_from_memory(self):
+        self.store.write_job_comments('UC123', self.videos_data)
+        self.store.write_video_comments('UC999', 'vid_c', [{'text': 'other', 'likes': 3}])
+        with patch('premium.db.comment_store.pq.read_table') as read_table, \
+                patch('premium.db.comment_store.ds.dataset', wraps=ds.dataset) as dataset:
+            rows = self.store.scan(columns=['video_id', 'text'], channel_ids=['UC123'], video_ids=['vid_a'])
+        self.assertEqual([r['text'] for r in rows], ['How do you do this?', 'great video'])
+        read_table.assert_not_called()
+        # Only the in-memory tables, never a dataset over the store root
+        self.assertNotIn(self.tmp.name, [c.args[0] for c in dataset.call_args_list])
+        self.assertTrue(self.store.has_videos('UC123', ['vid_a', 'vid_b']))
+        self.assertFalse(self.store.has_videos('UC123', ['vid_a', 'vid_x']))
+
+    def test_job_gate_ignores_partitions_from_earlier_jobs(self):
+        self.store.write_job_comments('UC123', self.videos_data)
+        self.assertTrue(self.store.has_job_videos('UC123', ['vid_a', 'vid_b']))
+
+        # Next job: vid_b's write fails, its old partition is still on disk
+        real_write = pq.write_table
+
+        def write_table(table, path, **kwargs):
+            if 'video_id=vid_b' in str(path):
+                raise OSError("disk full")
+            return real_write(table, path, **kwargs)
+
+        with patch('premium.db.comment_store.pq.write_table', side_effect=write_table):
+            self.assertEqual(self.store.write_job_comments('UC123', self.videos_data), 1)
+        self.assertTrue(self.store.has_videos('UC123', ['vid_a', 'vid_b']))
+        self.assertFalse(self.store.has_job_videos('UC123', ['vid_a', 'vid_b']))
+
+    def test_channel_scan_opens_only_its_partition_files(self):
+        self.store.write_job_comments('UC123', self.videos_data)
+        self.store.write_video_comments('UC999', 'vid_c', [{'text': 'other', 'likes': 3}])
+        fresh = CommentStore(root=self.tmp.name)  # Nothing in memory: reads parquet files
+        with patch('premium.db.comment_store.ds.dataset', wraps=ds.dataset) as dataset:
+            rows = fresh.scan(columns=['channel_id', 'video_id', 'likes'], channel_ids=['UC123'], min_likes=5)
+        self.assertEqual(rows, [{'channel_id': 'UC123', 'video_id': 'vid_a', 'likes': 10},
+                                {'channel_id': 'UC123', 'video_id': 'vid_b', 'likes': 5}])
+        files = dataset.call_args.args[0]
+        self.assertEqual(len(files), 2)
+        self.assertTrue(all('channel_id=UC123' in f for f in files))
+
+    def test_satisfaction_from_store_matches_in_memory(self):
+        from premium.satisfaction_analyzer import SatisfactionAnalyzer
+        videos_data = [
+            {'video_info': {'id': 'vid_a', 'view_count': 1000, 'like_count': 80},
+             'comments': [{'author': 'u1', 'text': 'It worked, thanks!', 'likes': 4},
+                          {'author': 'u2', 'text': "I'm confused about step 2", 'likes': 1}]},
+            {'video_info': {'id': 'vid_quiet', 'view_count': 5000, 'like_count': 20}, 'comments': []},
+        ]
+        self.store.write_job_comments('UC123', videos_data)
+        stats = {v['video_info']['id']: {'view_count': v['video_info']['view_count'],
+                                         'like_count': v['video_info']['like_count']} for v in videos_data}
+
+        analyzer = SatisfactionAnalyzer()
+        expected = analyzer.analyze_satisfaction(videos_data)
+        actual = analyzer.analyze_from_store(self.store, ['UC123'], list(stats), video_stats=stats)
+        self.assertEqual(actual.satisfaction_index, expected.satisfaction_index)
+        self.assertEqual(actual.engagement_quality_score, expected.engagement_quality_score)
+        self.assertEqual(actual, expected)
+
+    def test_unknown_column_rejected(self):
+        with self.assertRaises(ValueError):
+            self.store.scan(columns=['nope'])
+
+
+if __name__ == '__main__':
+    unittest.main()
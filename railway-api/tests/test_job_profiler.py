@@ -0,0 +1,64 @@
+import os
+import sys
+import time
+import unittest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import job_profiler
+from job_profiler import JobProfiler
+from pipeline_dag import PipelineDAG
+from task_pools import TaskPools, WORKLOAD_IO
+
+
+class TestJobProfiler(unittest.TestCase):
+    def tearDown(self):
+        if job_profiler._active_profiler is not None:
+            job_profiler._active_profiler.close()
+
+    def test_disabled_is_noop(self):
+        profiler = JobProfiler(enabled=False)
+        self.assertIs(profiler.stage('ingest'), job_profiler._NULL_CONTEXT)
+        self.assertIsNone(job_profiler._active_profiler)
+        fn = lambda: None
+        self.assertIs(job_profiler.bind_stage(fn), fn)
+
+    def test_stage_measures_time_and_calls(self):
+        profiler = JobProfiler(enabled=True)
+        with profiler.stage('ingest'):
+            time.sleep(0.05)
+            job_profiler._record_call('requests', 10, 2048)
+        job_profiler._record_call('httplib2', 0, 100)  # Outside any stage
+
+        report = profiler.report()
+        stage = report['stages'][0]
+        self.assertEqual(stage['stage'], 'ingest')
+        self.assertGreaterEqual(stage['wall_s'], 0.05)
+        self.assertEqual(stage['external_calls'], 1)
+        self.assertEqual(stage['bytes_received'], 2048)
+        self.assertEqual(report['total']['external_calls'], 2)
+        self.assertEqual(report['total']['unattributed_calls'], 1)
+
+    def test_pool_work_counts_towards_submitting_stage(self):
+        profiler = JobProfiler(enabled=True)
+        pools = TaskPools(io_workers=2, cpu_workers=1)
+        try:
+            dag = PipelineDAG()
+            dag.add('thumbnails', lambda: {'n': len(pools.map(
+                WORKLOAD_IO, lambda i: job_profiler._record_call('requests', 0, 1), range(3)))},
+                outputs=('n',))
+            dag.run(profiler=profiler)
+        finally:
+            pools.close()
+
+        stage = profiler.report()['stages'][0]
+        self.assertEqual((stage['stage'], stage['external_calls']), ('thumbnails', 3))
+
+        trace = profiler.chrome_trace()['traceEvents']
+        complete = [e for e in trace if e['ph'] == 'X']
+        self.assertEqual(complete[0]['name'], 'thumbnails')
+        self.assertIn('cpu_s', complete[0]['args'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,55 @@
+import json
+import os
+import sys
+import unittest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from metrics import METRICS_MARKER, MetricsRegistry
+
+
+class TestMetrics(unittest.TestCase):
+    def setUp(self):
+        self.registry = MetricsRegistry()
+        self.latency = self.registry.histogram('llm_seconds', 'LLM latency', ('provider',), (1, 5))
+        self.tokens = self.registry.counter('llm_tokens_total', 'Tokens', ('provider', 'kind'))
+
+    def test_render_prometheus_text(self):
+        self.latency.observe(0.5, provider='gemini')
+        self.latency.observe(3, provider='gemini')
+        self.latency.observe(9, provider='gemini')
+        self.tokens.inc(120, provider='gemini', kind='prompt')
+        self.registry.gauge('queue_length', 'Queued jobs', lambda: {'': 4})
+
+        text = self.registry.render()
+        self.assertIn('# TYPE llm_seconds histogram', text)
+        self.assertIn('llm_seconds_bucket{provider="gemini",le="1"} 1', text)
+        self.assertIn('llm_seconds_bucket{provider="gemini",le="5"} 2', text)
+        self.assertIn('llm_seconds_bucket{provider="gemini",le="+Inf"} 3', text)
+        self.assertIn('llm_seconds_sum{provider="gemini"} 12.5', text)
+        self.assertIn('llm_seconds_count{provider="gemini"} 3', text)
+        self.assertIn('llm_tokens_total{provider="gemini",kind="prompt"} 120', text)
+        self.assertIn('queue_length 4', text)
+
+    def test_job_dump_merges_into_server_registry(self):
+        # Job subprocess side
+        job = MetricsRegistry()
+        job.histogram('llm_seconds', 'LLM latency', ('provider',), (1, 5)).observe(2, provider='openai')
+        job.counter('llm_tokens_total', 'Tokens', ('provider', 'kind')).inc(7, provider='openai', kind='completion')
+        line = job.dump_line()
+        self.assertTrue(line.startswith(METRICS_MARKER))
+
+        # Server side (twice: counts accumulate)
+        for _ in range(2):
+            self.registry.merge(json.loads(line[len(METRICS_MARKER):]))
+        self.assertEqual(self.latency.count(provider='openai'), 2)
+        self.assertEqual(self.tokens.get(provider='openai', kind='completion'), 14)
+
+    def test_timer(self):
+        with self.latency.time(provider='groq'):
+            pass
+        self.assertEqual(self.latency.count(provider='groq'), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,90 @@
+import json
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from premium.ml_models.niche_benchmarks import (BENCHMARK_FEATURES, NicheBenchmarks, benchmarks_from_features,
+                                                load_training_videos, percentile_rank, quantile_grid)
+from premium.thumbnail_extractor import EXTRACTOR_VERSION
+
+
+def rows(niche, contrasts, face_count=0):
+    return [(niche, {'contrast_score': c, 'face_count': face_count}) for c in contrasts]
+
+
+class TestQuantiles(unittest.TestCase):
+    def test_grid_interpolates(self):
+        self.assertEqual(quantile_grid(range(101), points=5), [0, 25, 50, 75, 100])
+        self.assertEqual(quantile_grid([2.0], points=3), [2.0, 2.0, 2.0])
+
+    def test_percentile_rank(self):
+        grid = quantile_grid(range(101), points=21)
+        self.assertAlmostEqual(percentile_rank(grid, 37), 37.0)
+        self.assertEqual(percentile_rank(grid, -5), 0.0)
+        self.assertEqual(percentile_rank(grid, 500), 100.0)
+        # Ties land in the middle of the tied span
+        self.assertEqual(percentile_rank([0, 0, 0, 0, 1], 0), 37.5)
+
+
+class TestNicheBenchmarks(unittest.TestCase):
+    def setUp(self):
+        data = (rows('Gaming', [i / 100 for i in range(40)], face_count=1)
+                + rows('Finance & Business', [0.5 + i / 100 for i in range(40)])
+                + rows('Travel', [0.9] * 5))
+        self.benchmarks = NicheBenchmarks(benchmarks_from_features(data, level='fast', min_samples=30,
+                                                                  extractor_version=EXTRACTOR_VERSION))
+
+    def test_small_niches_fall_back_to_general(self):
+        self.assertEqual(set(self.benchmarks.niches), {'gaming', 'finance_business', 'general'})
+        self.assertEqual(self.benchmarks.niches['general']['samples'], 85)
+        self.assertEqual(self.benchmarks.resolve('Travel'), 'general')
+        self.assertEqual(self.benchmarks.resolve('finance'), 'finance_business')
+        self.assertEqual(self.benchmarks.resolve(None), 'general')
+
+    def test_same_thumbnail_ranks_by_niche(self):
+        features = {'contrast_score': 0.45, 'face_count': 1, 'extracted_text': 'ignored'}
+        gaming = self.benchmarks.percentile_ranks(features, 'Gaming')
+        finance = self.benchmarks.percentile_ranks(features, 'Finance & Business')
+        self.assertEqual(gaming['percentiles']['contrast_score'], 100.0)
+        self.assertEqual(finance['percentiles']['contrast_score'], 0.0)
+        self.assertEqual(set(gaming['percentiles']), {'contrast_score', 'face_count'})
+        self.assertEqual((gaming['niche'], gaming['samples'], gaming['level']), ('gaming', 40, 'fast'))
+
+    def test_artifact_round_trip(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'benchmarks.json')
+            self.benchmarks.save(path)
+            loaded = NicheBenchmarks.from_file(path)
+            self.assertLess(os.path.getsize(path), 10_000)
+        self.assertTrue(loaded.enabled)
+        self.assertEqual(loaded.features, BENCHMARK_FEATURES)
+        self.assertEqual(loaded.percentile_ranks({'contrast_score': 0.2}, 'Gaming'),
+                         self.benchmarks.percentile_ranks({'contrast_score': 0.2}, 'Gaming'))
+        self.assertFalse(NicheBenchmarks.from_file(os.path.join(tmp, 'missing.json')).enabled)
+        self.assertIsNone(NicheBenchmarks().percentile_ranks({'contrast_score': 0.2}, 'Gaming'))
+
+    def test_rejects_other_extractor_version(self):
+        artifact = dict(self.benchmarks.artifact, extractor_version=EXTRACTOR_VERSION - 1)
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'benchmarks.json')
+            NicheBenchmarks(artifact).save(path)
+            self.assertFalse(NicheBenchmarks.from_file(path).enabled)
+
+
+class TestTrainingVideos(unittest.TestCase):
+    def test_dedupes_and_guesses_niche(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            with open(os.path.join(tmp, 'gaming_1.json'), 'w') as f:
+                json.dump([{'video_id': 'a', 'thumbnail_url': 'https://x/a.jpg'},
+                           {'video_id': 'b', 'thumbnail_url': ''}], f)
+            with open(os.path.join(tmp, 'gaming_2.json'), 'w') as f:
+                json.dump([{'video_id': 'a', 'niche': 'Gaming', 'thumbnail_url': 'https://x/a.jpg'}], f)
+            videos = load_training_videos(tmp)
+        self.assertEqual([(v['video_id'], v['niche']) for v in videos], [('a', 'Gaming')])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,152 @@
+import os
+import sys
+import threading
+import time
+import unittest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pipeline_dag import Deadline, PipelineDAG, PipelineError
+
+
+class TestPipelineDAG(unittest.TestCase):
+    def test_outputs_flow_to_dependents(self):
+        dag = PipelineDAG(max_workers=2)
+        dag.add('a', lambda: {'x': 2}, outputs=('x',))
+        dag.add('b', lambda x: {'y': x * 10}, inputs=('x',), outputs=('y',))
+        dag.add('c', lambda x, y, seed: {'z': x + y + seed}, inputs=('x', 'y', 'seed'), outputs=('z',))
+
+        ctx = dag.run({'seed': 1})
+        self.assertEqual(ctx['z'], 23)
+
+        trace = {t['stage']: t for t in dag.trace_report()}
+        self.assertEqual(set(trace), {'a', 'b', 'c'})
+        self.assertEqual(trace['c']['depends_on'], ['a', 'b'])
+        self.assertGreaterEqual(trace['b']['start_s'], trace['a']['end_s'])
+
+    def test_independent_stages_overlap(self):
+        # Both stages must be running at the same time to pass the barrier
+        barrier = threading.Barrier(2, timeout=5)
+
+        def stage(name):
+            def run():
+                barrier.wait()
+                return {name: True}
+            return run
+
+        dag = PipelineDAG(max_workers=2)
+        dag.add('ingest', stage('videos_data'), outputs=('videos_data',))
+        dag.add('competitors', stage('competitors_data'), outputs=('competitors_data',))
+        ctx = dag.run()
+        self.assertTrue(ctx['videos_data'] and ctx['competitors_data'])
+
+    def test_io_stages_use_io_lane(self):
+        dag = PipelineDAG(max_workers=1, io_workers=2)
+        dag.add('fetch', lambda: {'raw': 1}, outputs=('raw',), workload='io')
+        dag.add('compute', lambda raw: {'out': raw + 1}, inputs=('raw',), outputs=('out',))
+
+        self.assertEqual(dag.run()['out'], 2)
+        trace = {t['stage']: t for t in dag.trace_report()}
+        self.assertTrue(trace['fetch']['thread'].startswith('stage-io'))
+        self.assertEqual(trace['fetch']['workload'], 'io')
+        self.assertEqual(trace['compute']['workload'], 'cpu')
+
+        with self.assertRaises(ValueError):
+            dag.add('bad', lambda: {}, workload='gpu')
+
+    def test_optional_failure_continues(self):
+        def boom():
+            raise RuntimeError("boom")
+
+        dag = PipelineDAG()
+        dag.add('extra', boom, outputs=('extra',), optional=True)
+        dag.add('final', lambda extra: {'out': extra is None}, inputs=('extra',), outputs=('out',))
+
+        ctx = dag.run()
+        self.assertTrue(ctx['out'])
+        statuses = {t['stage']: t['status'] for t in dag.trace_report()}
+        self.assertEqual(statuses, {'extra': 'failed', 'final': 'ok'})
+
+    def test_required_failure_raises(self):
+        def boom():
+            raise RuntimeError("boom")
+
+        dag = PipelineDAG()
+        dag.add('ingest', boom, outputs=('videos_data',))
+        dag.add('analysis', lambda videos_data: {}, inputs=('videos_data',))
+
+        with self.assertRaises(PipelineError):
+            dag.run()
+        self.assertEqual([t['stage'] for t in dag.trace_report()], ['ingest'])
+
+    def test_deadline_skips_optional_stages(self):
+        deadline = Deadline(time.time() + 30)
+        dag = PipelineDAG()
+        dag.add('ingest', lambda: {'videos_data': [1]}, outputs=('videos_data',))
+        dag.add('premium:hook_analysis', lambda videos_data: {'hooks': 'x'}, inputs=('videos_data',),
+                outputs=('hooks',), optional=True, min_seconds=90)
+        dag.add('premium:growth', lambda videos_data: {'growth': 'y'}, inputs=('videos_data',),
+                outputs=('growth',), optional=True, min_seconds=5)
+        dag.add('report', lambda hooks, growth: {'report': (hooks, growth)}, inputs=('hooks', 'growth'),
+                outputs=('report',))
+
+        ctx = dag.run(deadline=deadline)
+        self.assertEqual(ctx['report'], (None, 'y'))
+        self.assertEqual(deadline.skipped, [{'section': 'premium:hook_analysis', 'reason': 'deadline'}])
+        statuses = {t['stage']: t['status'] for t in dag.trace_report()}
+        self.assertEqual(statuses['premium:hook_analysis'], 'skipped')
+
+    def test_deadline_abandons_running_optional_stage(self):
+        release = threading.Event()
+
+        def slow():
+            release.wait(5)
+            return {'slow': 'late'}
+
+        deadline = Deadline(time.time() + 0.2)
+        dag = PipelineDAG()
+        dag.add('slow', slow, outputs=('slow',), optional=True)
+        dag.add('report', lambda slow: {'report': slow}, inputs=('slow',), outputs=('report',))
+        try:
+            ctx = dag.run(deadline=deadline)
+        finally:
+            release.set()
+
+        self.assertIsNone(ctx['report'])
+        self.assertEqual(dag.abandoned, {'slow'})
+        self.assertEqual(deadline.skipped[0]['section'], 'slow')
+
+    def test_no_deadline_never_expires(self):
+        deadline = Deadline()
+        self.assertTrue(deadline.has(10 ** 9))
+        self.assertFalse(deadline.expired())
+
+    def test_open_deadline_waits_on_optional_stages(self):
+        # CLI runs pass Deadline(None); waiting must not use an infinite timeout
+        def slow():
+            time.sleep(0.1)
+            return {'slow': 'done'}
+
+        deadline = Deadline(None)
+        dag = PipelineDAG()
+        dag.add('slow', slow, outputs=('slow',), optional=True, min_seconds=60)
+        dag.add('report', lambda slow: {'report': slow}, inputs=('slow',), outputs=('report',))
+
+        self.assertEqual(dag.run(deadline=deadline)['report'], 'done')
+        self.assertEqual(deadline.skipped, [])
+
+    def test_validation(self):
+        dag = PipelineDAG()
+        dag.add('a', lambda missing: {}, inputs=('missing',))
+        with self.assertRaises(ValueError):
+            dag.run()
+
+        dag = PipelineDAG()
+        dag.add('a', lambda y: {'x': 1}, inputs=('y',), outputs=('x',))
+        dag.add('b', lambda x: {'y': 1}, inputs=('x',), outputs=('y',))
+        with self.assertRaises(ValueError):
+            dag.run()
+
+
+if __name__ == '__main__':
+    unittest.main()
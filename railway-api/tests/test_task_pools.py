@@ -0,0 +1,78 @@
+import math
+import os
+import sys
+import threading
+import time
+import unittest
+from unittest.mock import patch
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from task_pools import TaskPools, WORKLOAD_CPU, WORKLOAD_IO
+
+
+class TestTaskPools(unittest.TestCase):
+    def setUp(self):
+        self.pools = TaskPools(io_workers=4, cpu_workers=1)
+
+    def tearDown(self):
+        self.pools.close()
+
+    def test_io_map_preserves_order(self):
+        self.assertEqual(self.pools.map(WORKLOAD_IO, lambda x: x * 2, [3, 1, 2]), [6, 2, 4])
+
+    def test_io_runs_on_threads(self):
+        name = self.pools.submit(WORKLOAD_IO, lambda: threading.current_thread().name).result()
+        self.assertTrue(name.startswith('premium-io'))
+
+    def test_ignore_errors(self):
+        def maybe_fail(x):
+            if x == 2:
+                raise RuntimeError("boom")
+            return x
+
+        self.assertEqual(self.pools.map(WORKLOAD_IO, maybe_fail, [1, 2, 3], ignore_errors=True), [1, None, 3])
+        with self.assertRaises(RuntimeError):
+            self.pools.map(WORKLOAD_IO, maybe_fail, [1, 2, 3])
+
+    def test_cpu_pool_is_lazy_and_process_based(self):
+        self.assertIsNone(self.pools._cpu)
+        self.assertEqual(self.pools.map(WORKLOAD_CPU, math.factorial, [5, 6]), [120, 720])
+        self.assertIsNotNone(self.pools._cpu)
+
+    def test_process_budget_split(self):
+        env = {k: v for k, v in os.environ.items()
+               if k not in ('VISION_WORKERS', 'WHISPER_WORKERS', 'PREMIUM_CPU_WORKERS')}
+        with patch.dict(os.environ, env, clear=True):
+            pools = TaskPools(io_workers=1, process_budget=8)
+            self.assertEqual((pools.vision_workers, pools.whisper_workers, pools.cpu_workers), (2, 2, 5))
+            small = TaskPools(io_workers=1, process_budget=1)
+            self.assertEqual((small.vision_workers, small.whisper_workers, small.cpu_workers), (1, 1, 1))
+        pools.close()
+        small.close()
+
+    def test_close_without_wait_abandons_running_work(self):
+        pools = TaskPools(io_workers=1, cpu_workers=1)
+        release = threading.Event()
+        running = pools.submit(WORKLOAD_IO, release.wait, 10)
+        queued = pools.submit(WORKLOAD_IO, lambda: 'never')
+        pools.submit(WORKLOAD_CPU, time.sleep, 10)
+        processes = list(pools._cpu._processes.values())
+        self.assertTrue(processes)
+        t0 = time.perf_counter()
+        pools.close(wait=False)
+        self.assertLess(time.perf_counter() - t0, 5)
+        self.assertTrue(queued.cancelled())
+        self.assertFalse(running.done())
+        for process in processes:
+            process.join(5)
+            self.assertFalse(process.is_alive())
+        release.set()
+
+    def test_unknown_workload(self):
+        with self.assertRaises(ValueError):
+            self.pools.submit('gpu', print)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,84 @@
+import hashlib
+import json
+import os
+import sys
+import tempfile
+import unittest
+from io import BytesIO
+from unittest.mock import MagicMock, patch
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PIL import Image
+
+import premium.db.thumbnail_cache as thumbnail_cache
+from premium.thumbnail_analyzer_ai import ThumbnailAnalysis, analyze_thumbnails_with_gemini, prepare_thumbnail
+
+
+def jpeg(w=1280, h=720, color=(200, 40, 40)) -> bytes:
+    buf = BytesIO()
+    Image.new('RGB', (w, h), color).save(buf, format='JPEG', quality=100)
+    return buf.getvalue()
+
+
+def fake_client(replies):
+    """Gemini client stand-in returning `replies` (JSON-able) in order and recording the requests."""
+    client = MagicMock()
+    model = client.GenerativeModel.return_value
+    model.generate_content.side_effect = [MagicMock(text=json.dumps(r)) for r in replies]
+    return client, model
+
+
+class TestGeminiThumbnails(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        cache = thumbnail_cache.ThumbnailCache(root=self.tmp.name)
+        cache.enabled = True
+        images = {f"https://x/{i}.jpg": jpeg(color=(40 * i, 80, 120)) for i in range(3)}
+        cache.fetch = lambda url, video_id=None: (hashlib.sha256(images[url]).hexdigest(), images[url])
+        self.cache_patch = patch.object(thumbnail_cache, '_cache_instance', cache)
+        self.cache_patch.start()
+        self.items = [{'thumbnail_url': url, 'title': f"Video {i}"} for i, url in enumerate(images)]
+
+    def tearDown(self):
+        self.cache_patch.stop()
+        self.tmp.cleanup()
+
+    def test_prepare_thumbnail_downscales(self):
+        small = Image.open(BytesIO(prepare_thumbnail(jpeg(), max_side=768)))
+        self.assertEqual(small.size, (768, 432))
+
+    def test_packed_request_then_cache(self):
+        client, model = fake_client([[{'overall_score': 10 * (i + 1)} for i in range(3)]])
+        first = analyze_thumbnails_with_gemini(self.items, client, per_request=3)
+        self.assertEqual([a.overall_score for a in first], [10, 20, 30])
+        self.assertEqual(model.generate_content.call_count, 1)
+        self.assertEqual(len(model.generate_content.call_args.args[0]), 4)  # Prompt + 3 images
+
+        second = analyze_thumbnails_with_gemini(self.items, client, per_request=3)
+        self.assertEqual([a.overall_score for a in second], [10, 20, 30])
+        self.assertEqual(model.generate_content.call_count, 1)  # All from cache
+
+    def test_mismatched_packed_reply_falls_back_to_single_requests(self):
+        client, model = fake_client([[{'overall_score': 1}], {'overall_score': 70}, {'overall_score': 80}])
+        analyses = analyze_thumbnails_with_gemini(self.items[:2], client, per_request=2)
+        self.assertEqual([a.overall_score for a in analyses], [70, 80])
+        self.assertEqual(model.generate_content.call_count, 3)
+
+    def test_malformed_element_retried_alone(self):
+        client, model = fake_client([[{'overall_score': 10}, 'oops', {'overall_score': 30}], {'overall_score': 20}])
+        analyses = analyze_thumbnails_with_gemini(self.items, client, per_request=3)
+        self.assertEqual([a.overall_score for a in analyses], [10, 20, 30])
+        self.assertEqual(model.generate_content.call_count, 2)
+        self.assertEqual(len(model.generate_content.call_args.args[0]), 2)  # Prompt + the one bad image
+
+    def test_malformed_single_reply_is_not_cached(self):
+        client, model = fake_client([[None], [None]])
+        for _ in range(2):
+            analyses = analyze_thumbnails_with_gemini(self.items[:1], client, per_request=1)
+            self.assertEqual(analyses[0], ThumbnailAnalysis())  # Defaults
+        self.assertEqual(model.generate_content.call_count, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,68 @@
+import os
+import sys
+import tempfile
+import time
+import unittest
+from unittest.mock import MagicMock, patch
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from premium.db.thumbnail_cache import ThumbnailCache
+
+
+def response(status=200, content=b'', etag=None):
+    resp = MagicMock(status_code=status, content=content, headers={'ETag': etag} if etag else {})
+    resp.raise_for_status.side_effect = None if status < 400 else Exception(f"HTTP {status}")
+    return resp
+
+
+class TestThumbnailCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cache = ThumbnailCache(root=self.tmp.name, max_bytes=10_000, revalidate_after=3600)
+        self.cache.enabled = True
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_download_once_and_share_identical_content(self):
+        with patch('premium.db.thumbnail_cache.requests.get', return_value=response(content=b'jpeg' * 100)) as get:
+            first = self.cache.fetch('https://i.ytimg.com/vi/a/hq.jpg', 'a')
+            second = self.cache.fetch('https://i.ytimg.com/vi/a/hq.jpg', 'a')
+            other = self.cache.fetch('https://i.ytimg.com/vi/b/hq.jpg', 'b')
+        self.assertEqual(get.call_count, 2)
+        self.assertEqual(first, second)
+        self.assertEqual(first[0], other[0])  # Same bytes -> same content hash
+        self.assertEqual(len(os.listdir(os.path.join(self.tmp.name, 'images', first[0][:2]))), 1)
+        self.assertEqual((self.cache.hits, self.cache.misses), (1, 2))
+
+    def test_stale_ref_revalidates_with_etag(self):
+        self.cache.revalidate_after = 0
+        with patch('premium.db.thumbnail_cache.requests.get',
+                   side_effect=[response(content=b'v1' * 100, etag='"abc"'), response(status=304)]) as get:
+            first = self.cache.fetch('https://x/thumb.jpg')
+            second = self.cache.fetch('https://x/thumb.jpg')
+        self.assertEqual(first, second)
+        self.assertEqual(get.call_args.kwargs['headers'], {'If-None-Match': '"abc"'})
+        self.assertEqual(self.cache.revalidated, 1)
+
+    def test_features_are_versioned(self):
+        self.cache.put_features('ab' * 32, 'v2-x', {'avg_brightness': 0.5})
+        self.assertEqual(self.cache.get_features('ab' * 32, 'v2-x'), {'avg_brightness': 0.5})
+        self.assertIsNone(self.cache.get_features('ab' * 32, 'v3-x'))
+
+    def test_lru_eviction(self):
+        with patch('premium.db.thumbnail_cache.requests.get',
+                   side_effect=[response(content=bytes([i]) * 4000) for i in range(3)]):
+            old = self.cache.fetch('https://x/0.jpg')
+            time.sleep(0.01)
+            recent = self.cache.fetch('https://x/1.jpg')
+            time.sleep(0.01)
+            self.cache.fetch('https://x/2.jpg')
+        self.cache.evict()
+        self.assertFalse(os.path.exists(self.cache._image_path(old[0])))
+        self.assertTrue(os.path.exists(self.cache._image_path(recent[0])))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,203 @@
+import os
+import sys
+import tempfile
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from io import BytesIO
+from unittest.mock import patch
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from premium.thumbnail_extractor import (ImageContext, ThumbnailFeatureExtractor, ThumbnailFeatures,
+                                         delta_e, dominant_colors, palette_delta_e)
+
+# Five flat regions (as many real colors as the extractor's k=5), largest first
+BLOCKS = (((220, 40, 30), 0.40), ((30, 60, 200), 0.25), ((240, 230, 210), 0.15),
+          ((40, 160, 60), 0.12), ((20, 20, 20), 0.08))
+
+
+def block_image(h: int = 720, w: int = 1280) -> np.ndarray:
+    """Flat color regions covering 40/25/15/12/8% of the image, plus light noise."""
+    img = np.zeros((h, w, 3), dtype=np.uint8)
+    left = 0
+    for color, share in BLOCKS:
+        right = left + round(w * share)
+        img[:, left:right] = color
+        left = right
+    img[:, left:] = BLOCKS[-1][0]
+    noise = np.random.default_rng(0).integers(-6, 7, img.shape)
+    return np.clip(img.astype(int) + noise, 0, 255).astype(np.uint8)
+
+
+class TestDominantColors(unittest.TestCase):
+    def test_fast_path_matches_full_resolution(self):
+        img = block_image()
+        exact, shares = dominant_colors(img, fast=False, with_shares=True)
+        fast = dominant_colors(img, fast=True)
+        self.assertLess(palette_delta_e(exact, shares, fast), 3.0)
+        # Every real color is recovered and the largest region comes first
+        self.assertLess(palette_delta_e([c for c, _ in BLOCKS], [s for _, s in BLOCKS], fast), 3.0)
+        self.assertLess(delta_e(fast[0], BLOCKS[0][0]), 3.0)
+
+    def test_delta_e(self):
+        self.assertAlmostEqual(delta_e((10, 20, 30), (10, 20, 30)), 0.0, places=4)
+        self.assertGreater(delta_e((0, 0, 0), (255, 255, 255)), 90)
+
+    def test_palette_delta_e_ignores_rank(self):
+        palette = [(220, 40, 30), (30, 60, 200)]
+        self.assertAlmostEqual(palette_delta_e(palette, [0.6, 0.4], palette[::-1]), 0.0, places=4)
+        self.assertGreater(palette_delta_e(palette, [0.6, 0.4], [(220, 40, 30)]), 20)
+
+    def test_extractor_uses_fast_colors_flag(self):
+        from PIL import Image
+        img = Image.fromarray(block_image(360, 640))
+        fast = ThumbnailFeatureExtractor(use_ocr=False, use_face_detection=False, fast_colors=True)
+        full = ThumbnailFeatureExtractor(use_ocr=False, use_face_detection=False, fast_colors=False)
+        fast_features = fast.extract_from_image(img)
+        full_features = full.extract_from_image(img)
+        self.assertLess(palette_delta_e(full_features.palette, full_features.palette_shares,
+                                        fast_features.palette), 3.0)
+        self.assertLess(delta_e(fast_features.dominant_color_1, full_features.dominant_color_1), 3.0)
+
+
+class TestImageContext(unittest.TestCase):
+    def test_derived_arrays_computed_once(self):
+        ctx = ImageContext(block_image(90, 160))
+        self.assertIs(ctx.gray, ctx.gray)
+        self.assertIs(ctx.edges, ctx.edges)
+        self.assertAlmostEqual(float(ctx.val.max()), float(ctx.hsv[:, :, 2].max()) / 255.0, places=5)
+
+    def test_buffers_reused_across_images(self):
+        extractor = ThumbnailFeatureExtractor(use_ocr=False, use_face_detection=False)
+        from PIL import Image
+        extractor.extract_from_image(Image.fromarray(block_image(90, 160)))
+        first = {k: id(v) for k, v in extractor._buffers().items()}
+        extractor.extract_from_image(Image.fromarray(block_image(90, 160)))
+        self.assertTrue(first)
+        self.assertEqual(first, {k: id(v) for k, v in extractor._buffers().items()})
+
+    def test_feature_groups_toggle(self):
+        from PIL import Image
+        img = Image.fromarray(block_image(90, 160))
+        only_color = ThumbnailFeatureExtractor(use_ocr=False, use_face_detection=False, feature_groups=('color',))
+        features = only_color.extract_from_image(img)
+        self.assertGreater(features.avg_saturation, 0)
+        self.assertEqual(features.edge_density, ThumbnailFeatures().edge_density)
+        with self.assertRaises(ValueError):
+            ThumbnailFeatureExtractor(feature_groups=('colour',))
+
+
+class TestFeatureLevels(unittest.TestCase):
+    def test_levels_pick_groups_and_backends(self):
+        fast = ThumbnailFeatureExtractor(level='fast', use_vision_pool=True)
+        self.assertNotIn('advanced', fast.feature_groups)
+        self.assertEqual((fast.face_backend, fast.text_backend), ('haar', 'edges'))
+        self.assertEqual(fast.vision_groups, ())  # Haar/edges never go to the vision pool
+        full = ThumbnailFeatureExtractor(level='full', use_vision_pool=True)
+        self.assertEqual(full.vision_groups, ('face', 'text'))
+        with self.assertRaises(ValueError):
+            ThumbnailFeatureExtractor(level='turbo')
+
+    def test_fast_level_outputs(self):
+        from PIL import Image
+        features = ThumbnailFeatureExtractor(level='fast').extract_from_image(Image.fromarray(block_image(360, 640)))
+        self.assertEqual(features.palette[0], features.dominant_color_1)
+        self.assertAlmostEqual(sum(features.palette_shares), 1.0, places=2)
+        self.assertAlmostEqual(features.palette_shares[0], BLOCKS[0][1], delta=0.03)
+        self.assertEqual(features.estimated_style, 'unknown')  # Advanced group not run
+        # Descriptive extras stay out of the ML vector
+        self.assertEqual(len(features.to_feature_vector()), len(ThumbnailFeatures().to_feature_vector()))
+        self.assertEqual(ThumbnailFeatures.from_dict(features.to_dict()), features)
+
+    def test_fast_level_without_haar_cascade(self):
+        # OpenCV 5 ships no CascadeClassifier / cv2.data: face fields keep their defaults
+        from PIL import Image
+        import premium.thumbnail_extractor as thumbnail_extractor
+        real_cv2 = thumbnail_extractor.cv2
+
+        class NoCascadeCV2:
+            def __getattr__(self, name):
+                if name in ('CascadeClassifier', 'data'):
+                    raise AttributeError(name)
+                return getattr(real_cv2, name)
+
+        with patch.object(thumbnail_extractor, 'cv2', NoCascadeCV2()):
+            self.assertIsNone(thumbnail_extractor.get_face_cascade())
+            features = ThumbnailFeatureExtractor(level='fast').extract_from_image(Image.fromarray(block_image(90, 160)))
+        self.assertEqual(features.face_count, ThumbnailFeatures().face_count)
+
+
+class TestExtractBatch(unittest.TestCase):
+    def setUp(self):
+        from PIL import Image
+        buf = BytesIO()
+        Image.fromarray(block_image(90, 160)).save(buf, format='PNG')
+        png = buf.getvalue()
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                if self.path.startswith('/ok'):
+                    self.send_response(200)
+                    self.send_header('Content-Length', str(len(png)))
+                    self.end_headers()
+                    self.wfile.write(png)
+                else:
+                    self.send_error(404)
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.base = f"http://127.0.0.1:{self.server.server_address[1]}"
+
+        # Fresh thumbnail cache per test
+        import premium.db.thumbnail_cache as thumbnail_cache
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cache_patch = patch.object(thumbnail_cache, '_cache_instance',
+                                        thumbnail_cache.ThumbnailCache(root=self.tmp.name))
+        self.cache_patch.start()
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.cache_patch.stop()
+        self.tmp.cleanup()
+
+    def test_batch_matches_single_extraction_and_reports_failures(self):
+        from task_pools import TaskPools
+        extractor = ThumbnailFeatureExtractor(use_ocr=False, use_face_detection=False)
+        pools = TaskPools(io_workers=2, cpu_workers=1)
+        try:
+            batch = extractor.extract_batch([f"{self.base}/ok/1.png", f"{self.base}/missing.png"], pools=pools)
+        finally:
+            pools.close()
+
+        self.assertEqual(batch.failed, [1])
+        self.assertEqual(batch.matrix.shape[0], 2)
+        single = extractor.extract_from_url(f"{self.base}/ok/1.png")
+        self.assertAlmostEqual(batch.features[0].avg_brightness, single.avg_brightness, places=5)
+        self.assertEqual(batch.features[0].dominant_color_1, single.dominant_color_1)
+
+    def test_second_batch_served_from_feature_cache(self):
+        from premium.db.thumbnail_cache import get_thumbnail_cache
+        from task_pools import TaskPools
+        extractor = ThumbnailFeatureExtractor(use_ocr=False, use_face_detection=False)
+        pools = TaskPools(io_workers=2, cpu_workers=1)
+        try:
+            first = extractor.extract_batch([f"{self.base}/ok/1.png"], pools=pools)
+            second = extractor.extract_batch([f"{self.base}/ok/1.png"], pools=pools)
+        finally:
+            pools.close()
+        self.assertEqual(first.features, second.features)
+        self.assertEqual(get_thumbnail_cache().stats()['feature_hits'], 1)
+
+    def test_features_round_trip_through_dict(self):
+        features = ThumbnailFeatures(dominant_color_1=(1, 2, 3), has_text=True, word_count=4)
+        self.assertEqual(ThumbnailFeatures.from_dict(features.to_dict()), features)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,103 @@
+import os
+import sys
+import tempfile
+import unittest
+from unittest.mock import patch
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from premium.db import thumbnail_index
+from premium.db.thumbnail_index import ThumbnailIndex, describe_thumbnail, summarize_neighbors
+
+
+def thumbnail(color, split=0.5, seed=0) -> np.ndarray:
+    """Two-tone 90x160 RGB image with light noise."""
+    img = np.zeros((90, 160, 3), dtype=np.uint8)
+    img[:, :int(160 * split)] = color
+    img[:, int(160 * split):] = (250, 250, 250)
+    noise = np.random.default_rng(seed).integers(-4, 5, img.shape)
+    return np.clip(img.astype(int) + noise, 0, 255).astype(np.uint8)
+
+
+class TestThumbnailIndex(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.index = ThumbnailIndex(path=os.path.join(self.tmp.name, 'index.sqlite3'), max_age=3600)
+        self.index.enabled = True
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_near_duplicates_rank_first(self):
+        self.index.add('red', describe_thumbnail(thumbnail((220, 30, 30))), 'competitor', channel_id='A',
+                       performance=2.0, style='face-forward')
+        self.index.add('red_copy', describe_thumbnail(thumbnail((220, 30, 30), seed=1)), 'vision_analysis',
+                       channel_id='B', performance=1.5, style='vibrant')
+        self.index.add('blue', describe_thumbnail(thumbnail((30, 30, 220), split=0.2)), 'competitor', channel_id='B',
+                       performance=0.5)
+
+        query = describe_thumbnail(thumbnail((220, 30, 30), seed=2))
+        neighbors = self.index.similar(query, k=3)
+        self.assertEqual({n['video_id'] for n in neighbors[:2]}, {'red', 'red_copy'})
+        self.assertTrue(neighbors[0]['near_duplicate'])
+        self.assertEqual(neighbors[-1]['video_id'], 'blue')
+        self.assertEqual([n['video_id'] for n in self.index.similar(query, exclude_channel='A')], ['red_copy', 'blue'])
+        summary = summarize_neighbors(neighbors[:2], 'competitor')
+        self.assertEqual(summary['avg_performance'], 1.75)
+        self.assertEqual(summary['top_style'], 'face-forward')  # Not mixed with vision_analysis styles
+
+    def test_attributes_namespaced_by_producer(self):
+        descriptor = describe_thumbnail(thumbnail((220, 30, 30)))
+        self.index.add('v1', descriptor, 'vision_analysis', content_hash='h1',
+                       style='vibrant', attributes={'visual_style': 'vibrant'})
+        # Another producer's entry is a miss for the competitor path
+        self.assertIsNone(self.index.get('v1', producer='competitor', keys=('face_count',)))
+        self.index.add('v1', descriptor, 'competitor', channel_id='A', content_hash='h1', views=100,
+                       style='face-forward', attributes={'face_count': 1})
+        self.assertIsNone(self.index.get('v1', producer='competitor', keys=('face_count', 'has_text')))
+
+        reopened = ThumbnailIndex(path=self.index.path, max_age=3600)
+        reopened.enabled = True
+        entry = reopened.get('v1', producer='competitor', keys=('face_count',))
+        self.assertEqual(entry['attributes'], {'vision_analysis': {'visual_style': 'vibrant'},
+                                               'competitor': {'face_count': 1}})
+        self.assertEqual(entry['styles'], {'vision_analysis': 'vibrant', 'competitor': 'face-forward'})
+        self.assertEqual((entry['channel_id'], entry['views']), ('A', 100))
+        self.assertIsNone(reopened.get('v1', content_hash='h2'))  # Thumbnail changed
+
+    def test_writes_update_loaded_arrays(self):
+        red = describe_thumbnail(thumbnail((220, 30, 30)))
+        self.index.add('v1', red, 'competitor', attributes={'face_count': 0})
+        self.assertEqual(len(self.index), 1)
+        with patch('premium.db.thumbnail_index._namespaced', wraps=thumbnail_index._namespaced) as parsed:
+            self.index.add('v2', describe_thumbnail(thumbnail((30, 30, 220))), 'competitor', attributes={'face_count': 2})
+            self.index.add('v1', red, 'competitor', attributes={'face_count': 1})
+            neighbors = self.index.similar(red, k=2)
+        # Only v1's old row was parsed (to merge); the table was not reloaded
+        self.assertEqual(parsed.call_count, 2)
+        self.assertEqual([n['video_id'] for n in neighbors], ['v1', 'v2'])
+        self.assertEqual(neighbors[0]['attributes'], {'competitor': {'face_count': 1}})
+
+        reopened = ThumbnailIndex(path=self.index.path, max_age=3600)
+        reopened.enabled = True
+        self.assertEqual([e['attributes'] for e in reopened.similar(red, k=2)],
+                         [e['attributes'] for e in self.index.similar(red, k=2)])
+
+    def test_old_entries_pruned(self):
+        self.index.add('v1', describe_thumbnail(thumbnail((220, 30, 30))), 'competitor')
+        reopened = ThumbnailIndex(path=self.index.path, max_age=3600, retention=0)
+        reopened.enabled = True
+        self.assertEqual(len(reopened), 0)
+
+    def test_stale_entries_miss_but_still_match(self):
+        descriptor = describe_thumbnail(thumbnail((220, 30, 30)))
+        self.index.add('v1', descriptor, 'competitor')
+        self.index.max_age = 0
+        self.assertIsNone(self.index.get('v1'))
+        self.assertEqual(self.index.similar(descriptor, k=1)[0]['video_id'], 'v1')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,70 @@
+import json
+import os
+import sys
+import tempfile
+import unittest
+from unittest.mock import patch
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from premium.transcript_store import TranscriptStore, slice_segments
+from premium.hook_analyzer import HookAnalyzer
+
+
+SEGMENTS = [
+    {'start': 0.0, 'end': 4.0, 'text': 'What if I told you'},
+    {'start': 4.0, 'end': 30.0, 'text': 'everything you know is wrong?'},
+    {'start': 55.0, 'end': 62.0, 'text': 'stick around'},
+    {'start': 70.0, 'end': 80.0, 'text': 'past the hook'},
+]
+
+
+class TestTranscriptStore(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.store = TranscriptStore(cache_dir=self.tmp.name)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_slice_by_time_and_chars(self):
+        self.assertEqual(len(slice_segments(SEGMENTS, 60)), 3)
+        self.assertEqual(len(slice_segments(SEGMENTS, 60, max_chars=20)), 2)
+
+    def test_opening_from_ingested_videos(self):
+        added = self.store.add_videos([
+            {'video_info': {'id': 'abc'}, 'transcript_segments': SEGMENTS},
+            {'video_info': {'video_id': 'empty'}, 'transcript_segments': []},
+        ])
+        self.assertEqual(added, 1)
+        text, covered = self.store.get_opening('abc', seconds=60)
+        self.assertIn('stick around', text)
+        self.assertNotIn('past the hook', text)
+        self.assertEqual(covered, 60)
+        self.assertIsNone(self.store.get_opening('empty'))
+
+    def test_falls_back_to_ingest_cache(self):
+        with open(os.path.join(self.tmp.name, 'cached.json'), 'w') as f:
+            json.dump({'video_info': {'id': 'cached'}, 'transcript_segments': SEGMENTS}, f)
+        self.assertIsNotNone(self.store.get_opening('cached'))
+        # Read from disk each time, not copied into memory for the life of the process
+        self.assertNotIn('cached', self.store)
+        self.assertEqual(len(self.store), 0)
+
+
+class TestHookAnalyzerReuse(unittest.TestCase):
+    def test_no_download_when_store_has_segments(self):
+        store = TranscriptStore(cache_dir=tempfile.gettempdir())
+        store.add('abc', SEGMENTS)
+        analyzer = HookAnalyzer(transcript_store=store)
+
+        with patch.object(HookAnalyzer, 'fetch_captions') as fetch:
+            result = analyzer.analyze_single_video({'video_id': 'abc', 'title': 't', 'view_count': 10}, 10)
+
+        fetch.assert_not_called()
+        self.assertEqual(analyzer.store_hits, 1)
+        self.assertIn('question', [p.pattern_type for p in result.patterns])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,68 @@
+import os
+import sys
+import unittest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from transcription_pool import chunk_budget, plan_chunks, SAMPLING_RATE, WhisperPool
+
+
+def region(start_s, end_s):
+    return {'start': int(start_s * SAMPLING_RATE), 'end': int(end_s * SAMPLING_RATE)}
+
+
+class TestPlanChunks(unittest.TestCase):
+    def test_groups_regions_up_to_target(self):
+        regions = [region(0, 100), region(110, 250), region(260, 320), region(400, 500)]
+        chunks = plan_chunks(regions, 600 * SAMPLING_RATE, target_seconds=300)
+
+        self.assertEqual(len(chunks), 2)
+        # Cuts fall on speech boundaries, never inside a region
+        self.assertEqual(chunks[0], (regions[0]['start'], regions[2]['end']))
+        self.assertEqual(chunks[1], (regions[3]['start'], regions[3]['end']))
+
+    def test_max_seconds_limits_chunks(self):
+        regions = [region(0, 50), region(60, 150), region(200, 400)]
+        chunks = plan_chunks(regions, 600 * SAMPLING_RATE, target_seconds=60, max_seconds=120)
+
+        self.assertTrue(all(end <= 120 * SAMPLING_RATE for _, end in chunks))
+        self.assertEqual(chunks[-1][1], 120 * SAMPLING_RATE)
+
+    def test_no_speech(self):
+        self.assertEqual(plan_chunks([], 1000, target_seconds=300), [])
+
+
+class TestChunkBudget(unittest.TestCase):
+    def test_in_flight_chunks_share_the_budget(self):
+        # 4 chunks, 2 workers: the first two start with a quarter each, not the whole budget
+        first = chunk_budget(100, spent=0, reserved=0, chunks_left=4)
+        second = chunk_budget(100, spent=0, reserved=first, chunks_left=3)
+        self.assertEqual((first, second), (25, 25))
+        # A chunk that finished early leaves its unused share to the remaining ones
+        self.assertEqual(chunk_budget(100, spent=10, reserved=25, chunks_left=2), 32.5)
+
+    def test_spent_budget(self):
+        self.assertEqual(chunk_budget(100, spent=80, reserved=30, chunks_left=2), 0.0)
+        self.assertEqual(chunk_budget(100, spent=0, reserved=0, chunks_left=0), 100)
+
+
+class TestVideoBudget(unittest.TestCase):
+    def setUp(self):
+        self.pool = WhisperPool(workers=2, cpu_budget_seconds=100)  # No worker starts until a submit
+
+    def tearDown(self):
+        self.pool.close()
+
+    def test_concurrent_videos_split_the_budget(self):
+        first = self.pool._reserve()
+        second = self.pool._reserve()
+        self.assertEqual((first, second), (50, 50))
+
+        # First video used 20s: the next one gets its leftover, the running one keeps its share
+        self.pool._record('a', 'ok', {'cpu_seconds': 20})
+        self.pool._release(first)
+        self.assertEqual(self.pool._reserve(), 30)
+
+
+if __name__ == '__main__':
+    unittest.main()
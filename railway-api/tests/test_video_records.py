@@ -0,0 +1,100 @@
+import json
+import os
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from checkpoint_store import CheckpointStore
+from video_records import TranscriptCacheMissing, VideoRecord, compact_videos_data, transcript_excerpt
+
+
+class TestVideoRecord(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cache_dir = Path(self.tmp.name)
+        self.result = {
+            'video_info': {'id': 'vid_a', 'video_id': 'vid_a', 'title': 'Video A'},
+            'transcript': 'hello world',
+            'transcript_segments': [{'start': 0.0, 'end': 2.0, 'text': 'hello world'}],
+            'comments': [
+                {'author': 'u1', 'text': 'How do you do this?', 'likes': 10, 'published_at': '2024-01-01'},
+                {'author': 'u2', 'text': 'Great video', 'likes': 1, 'published_at': '2024-01-02'},
+            ],
+        }
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write_cache(self):
+        with open(self.cache_dir / 'vid_a.json', 'w', encoding='utf-8') as f:
+            json.dump(self.result, f)
+
+    def test_dict_compatible_access(self):
+        record = VideoRecord.from_ingest(self.result, cache_dir=self.cache_dir)
+        self.assertEqual(record['video_info']['title'], 'Video A')
+        self.assertEqual(len(record['comments']), 2)
+        self.assertEqual(list(record['comments']), self.result['comments'])
+        self.assertEqual(record['comments'][1]['text'], 'Great video')
+        self.assertEqual(record.get('engagement_rate', 0), 0)
+        self.assertEqual(dict(record)['transcript'], 'hello world')
+
+    def test_transcript_loaded_lazily_from_ingest_cache(self):
+        self.write_cache()
+        record = VideoRecord.from_ingest(self.result, cache_dir=self.cache_dir)
+        self.assertTrue(record.transcript_cached)
+        self.assertIsNone(record._transcript)
+        self.assertEqual(record['transcript'], 'hello world')
+        self.assertEqual(record.get('transcript_segments')[0]['text'], 'hello world')
+        self.assertEqual(record.transcript_chars, 11)
+
+    def test_cached_transcript_not_kept_on_record(self):
+        self.write_cache()
+        record = VideoRecord.from_ingest(self.result, cache_dir=self.cache_dir)
+        self.assertEqual(record['transcript'], 'hello world')
+        self.assertEqual(record.transcript_excerpt(5), 'hello')
+        self.assertEqual(transcript_excerpt(self.result, 5), 'hello')  # Legacy dicts too
+        # Reads leave nothing behind on the record: the file is the only copy
+        self.assertIsNone(record._transcript)
+        self.assertIsNone(record._segments)
+        with open(self.cache_dir / 'vid_a.json', 'w', encoding='utf-8') as f:
+            json.dump(dict(self.result, transcript='changed'), f)
+        self.assertEqual(record['transcript'], 'changed')
+        self.assertTrue(record.to_dict()['transcript_chars'])  # Still saved as a reference
+
+    def test_inline_transcript_without_cache_file(self):
+        record = VideoRecord.from_ingest(self.result, cache_dir=self.cache_dir)
+        self.assertFalse(record.transcript_cached)
+        self.assertEqual(record['transcript_segments'], self.result['transcript_segments'])
+
+    def test_checkpoint_round_trip(self):
+        self.write_cache()
+        videos_data = [VideoRecord.from_ingest(self.result, cache_dir=self.cache_dir)]
+
+        store = CheckpointStore('GAP-TEST', root=self.cache_dir / 'checkpoints')
+        digest = store.digest('ingest', [])
+        self.assertTrue(store.save('ingest', digest, {'videos_data': videos_data}))
+        hit, value = store.load('ingest', digest)
+        self.assertTrue(hit)
+        self.assertNotIn('transcript', value['videos_data'][0])
+
+        restored = compact_videos_data(value['videos_data'], cache_dir=self.cache_dir)
+        self.assertEqual(restored[0]['transcript'], 'hello world')
+        self.assertEqual(restored[0]['comments'][0]['author'], 'u1')
+        self.assertIs(compact_videos_data(restored)[0], restored[0])
+
+    def test_resume_without_cache_file_is_a_miss(self):
+        self.write_cache()
+        saved = VideoRecord.from_ingest(self.result, cache_dir=self.cache_dir).to_dict()
+        os.remove(self.cache_dir / 'vid_a.json')
+        with self.assertRaises(TranscriptCacheMissing):
+            compact_videos_data([saved], cache_dir=self.cache_dir)
+        # Records saved without a transcript don't need the cache
+        no_transcript = {'video_info': {'id': 'vid_b'}, 'comments': []}
+        self.assertEqual(compact_videos_data([no_transcript], cache_dir=self.cache_dir)[0]['transcript'], '')
+
+
+if __name__ == '__main__':
+    unittest.main()
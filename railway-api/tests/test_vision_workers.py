@@ -0,0 +1,105 @@
+import os
+import sys
+import unittest
+from io import BytesIO
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from premium.thumbnail_extractor import ThumbnailFeatureExtractor, ThumbnailFeatures
+import premium.vision_workers as vision_workers
+from premium.vision_workers import VisionWorkerPool, _VisionExecutor
+
+
+class TestVisionWorkerPool(unittest.TestCase):
+    def test_analyze_returns_only_requested_fields(self):
+        pool = VisionWorkerPool(workers=1, timeout=120, warm_groups=())
+        try:
+            # No model groups requested: exercises the worker round trip without OCR/mediapipe
+            self.assertEqual(pool.analyze(np.zeros((90, 160, 3), dtype=np.uint8), ()), {})
+        finally:
+            pool.close()
+        self.assertEqual(pool.stats()['completed'], 1)
+
+    def test_timeout_recycles_pool_and_returns_none(self):
+        # Worker start-up alone (spawn + imports) exceeds this timeout
+        pool = VisionWorkerPool(workers=1, timeout=0.01, warmup_timeout=0.01, warm_groups=())
+        try:
+            self.assertIsNone(pool.analyze(np.zeros((90, 160, 3), dtype=np.uint8), ()))
+            self.assertEqual(pool.stats()['timeouts'], 1)
+            self.assertIsNone(pool._pool)
+        finally:
+            pool.close()
+
+    def test_interactive_timeout_skips_cold_pool_without_recycling(self):
+        pool = VisionWorkerPool(workers=1, timeout=120, warmup_timeout=120, warm_groups=())
+        try:
+            # Spawn + imports take longer than the caller is willing to wait
+            self.assertIsNone(pool.analyze(np.zeros((90, 160, 3), dtype=np.uint8), (), timeout=0.01))
+            stats = pool.stats()
+            self.assertEqual((stats['abandoned'], stats['timeouts']), (1, 0))
+            self.assertIsNotNone(pool._pool)  # Still warming for the next request
+        finally:
+            pool.close(wait=False)
+
+    def test_cold_start_uses_warmup_timeout(self):
+        # Spawn + imports take far longer than the per-image timeout, but only warm workers are held to it
+        pool = VisionWorkerPool(workers=1, timeout=0.01, warmup_timeout=120, warm_groups=())
+        try:
+            self.assertEqual(pool.analyze(np.zeros((90, 160, 3), dtype=np.uint8), ()), {})
+            self.assertEqual(pool._wait_timeout(pool._pool), 0.01)
+        finally:
+            pool.close()
+        self.assertEqual(pool.stats()['timeouts'], 0)
+
+    def test_only_requested_groups_are_warmed(self):
+        with patch.object(vision_workers, '_pool_instance', None):
+            pool = vision_workers.get_vision_pool(('face',))
+            self.assertIs(vision_workers.get_vision_pool(('face', 'text')), pool)
+        self.assertEqual(pool.warm_groups, ('face',))
+        # Server-style extractor (OCR off) asks for face detection only
+        self.assertEqual(ThumbnailFeatureExtractor(use_ocr=False, use_face_detection=True).vision_groups, ('face',))
+
+        warm = _VisionExecutor.__new__(_VisionExecutor)
+        warm.warm_groups, warm.started, warm.ready = ('face',), SimpleNamespace(value=2), SimpleNamespace(value=1)
+        pool.timeout, pool.warmup_timeout = 5, 600
+        self.assertEqual(pool._wait_timeout(warm, ('face',)), 600)  # Second worker still loading
+        warm.ready.value = 2
+        self.assertEqual(pool._wait_timeout(warm, ('face',)), 5)
+        # OCR wasn't loaded up front: its first use may include the model load
+        self.assertEqual(pool._wait_timeout(warm, ('face', 'text')), 600)
+
+    def test_merge_refreshes_derived_features(self):
+        extractor = ThumbnailFeatureExtractor(use_vision_pool=True)
+        features = ThumbnailFeatures(has_arrows_or_circles=False)
+        extractor._merge_vision(features, {'face_count': 1, 'faces_are_large': True,
+                                           'has_text': True, 'word_count': 2, 'text_area_ratio': 0.05})
+        self.assertEqual(features.estimated_style, 'vlog')
+        self.assertEqual(features.mobile_readability_score, 1.0)
+
+    def test_degraded_vision_results_are_not_cached(self):
+        from PIL import Image
+        buf = BytesIO()
+        Image.fromarray(np.full((90, 160, 3), 128, dtype=np.uint8)).save(buf, format='PNG')
+        cache = MagicMock()
+        cache.fetch.return_value = ('ab' * 32, buf.getvalue())
+        cache.get_features.return_value = None
+        pool = MagicMock()
+        pool.submit.return_value = None  # Queue full / worker lost
+        pool.result.return_value = None
+
+        extractor = ThumbnailFeatureExtractor(level='full', use_vision_pool=True)
+        self.assertFalse(extractor._merge_vision(ThumbnailFeatures(), {'face_count': 1}))
+        with patch('premium.db.thumbnail_cache.get_thumbnail_cache', return_value=cache), \
+                patch('premium.vision_workers.get_vision_pool', return_value=pool):
+            features = extractor.extract_from_url('https://x/thumb.jpg')
+        self.assertEqual(features.face_count, 0)
+        self.assertGreater(features.avg_brightness, 0)  # Local groups still ran
+        cache.put_features.assert_not_called()
+
+
+if __name__ == '__main__':
+    unittest.main()
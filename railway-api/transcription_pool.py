@@ -0,0 +1,394 @@
+#!/usr/bin/env python3
+"""
+Local Transcription Pool - Opt-in Whisper fallback for caption-less videos
+
+Runs faster-whisper (int8) in a bounded process pool (WHISPER_WORKERS, by
+default the Whisper share of the job's process budget, see task_pools.py):
+- One model per worker process (loaded once in the initializer)
+- Each worker pinned to its own slice of CPUs
+- Audio is downloaded in the calling thread via ingest_manager.download_audio
+- Optional first-K-minutes mode for jobs that only need hooks
+- Per-job CPU-seconds budget; videos beyond the budget are skipped
+- Long audio is split at voice-activity boundaries (Silero VAD) into chunks
+  transcribed in parallel across the pool, then stitched back in order;
+  audio is only decoded in the parent when it is long enough to chunk, and
+  each chunk gets its share of the video's CPU budget
+
+Usage (as module):
+    from transcription_pool import WhisperPool
+    pool = WhisperPool(model_name="tiny", cpu_budget_seconds=600, max_minutes=2)
+    transcription = pool.transcribe_video(url, video_id, temp_dir)
+    pool.close()
+"""
+
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+from task_pools import get_task_pools
+
+
+SAMPLING_RATE = 16000
+
+
+# Worker-process globals (one model per process)
+_worker_model = None
+
+
+def _init_worker(model_name: str, cpu_threads: int, worker_counter, cpu_count: int):
+    """Process initializer: pin CPUs and load the Whisper model once."""
+    global _worker_model
+
+    with worker_counter.get_lock():
+        worker_index = worker_counter.value
+        worker_counter.value += 1
+
+    # Pin this worker to its own CPU slice so workers don't fight over cores
+    if hasattr(os, 'sched_setaffinity') and cpu_threads > 0:
+        first = (worker_index * cpu_threads) % max(cpu_count, 1)
+        cpus = {(first + i) % cpu_count for i in range(cpu_threads)}
+        try:
+            os.sched_setaffinity(0, cpus)
+        except OSError:
+            pass
+
+    os.environ['OMP_NUM_THREADS'] = str(cpu_threads)
+
+    try:
+        from faster_whisper import WhisperModel
+        _worker_model = WhisperModel(model_name, device="cpu", compute_type="int8",
+                                     cpu_threads=cpu_threads, num_workers=1)
+    except ImportError:
+        _worker_model = None
+
+
+def _transcribe_worker(audio, max_seconds: float = None, cpu_budget_seconds: float = None,
+                       offset_seconds: float = 0.0) -> dict:
+    """
+    Transcribe one audio file (path) or chunk (float32 array) in a worker process.
+
+    Segments are consumed lazily, so stopping at max_seconds or when the CPU
+    budget runs out also stops decoding. Timestamps are shifted by
+    offset_seconds so chunk results line up with the original audio.
+    """
+    cpu_start = time.process_time()
+    wall_start = time.perf_counter()
+
+    if _worker_model is None:
+        return {'text': '', 'language': 'unknown', 'segments': [], 'cpu_seconds': 0.0,
+                'wall_seconds': 0.0, 'truncated': False, 'error': 'faster-whisper not installed'}
+
+    segments, info = _worker_model.transcribe(audio, beam_size=5)
+
+    processed_segments = []
+    truncated = False
+    for segment in segments:
+        start = segment.start + offset_seconds
+        if max_seconds is not None and start >= max_seconds:
+            truncated = True
+            break
+        processed_segments.append({
+            'start': round(start, 2),
+            'end': round(segment.end + offset_seconds, 2),
+            'text': segment.text.strip(),
+        })
+        if cpu_budget_seconds is not None and time.process_time() - cpu_start > cpu_budget_seconds:
+            truncated = True
+            break
+
+    return {
+        'text': " ".join(s['text'] for s in processed_segments).strip(),
+        'language': info.language,
+        'segments': processed_segments,
+        'cpu_seconds': round(time.process_time() - cpu_start, 2),
+        'wall_seconds': round(time.perf_counter() - wall_start, 2),
+        'truncated': truncated,
+        'error': None,
+    }
+
+
+def probe_duration(audio_path: Path):
+    """Audio length in seconds from the container header (PyAV), without decoding; None if unknown."""
+    try:
+        import av
+        with av.open(str(audio_path)) as container:
+            if container.duration:
+                return container.duration / av.time_base
+    except Exception:
+        pass
+    return None
+
+
+def chunk_budget(cpu_budget_seconds: float, spent: float, reserved: float, chunks_left: int) -> float:
+    """
+    CPU seconds for the next chunk: what is neither spent nor reserved by
+    chunks still running, split evenly over the chunks not started yet.
+    """
+    return max(0.0, cpu_budget_seconds - spent - reserved) / max(1, chunks_left)
+
+
+def plan_chunks(speech_regions: list, total_samples: int, target_seconds: float,
+                max_seconds: float = None, sampling_rate: int = SAMPLING_RATE) -> list:
+    """
+    Group VAD speech regions into chunks of roughly target_seconds.
+
+    Chunks always start and end on speech-region boundaries, so cuts fall in
+    silence and the silence between chunks is not transcribed at all.
+
+    Args:
+        speech_regions: [{'start': sample, 'end': sample}, ...] sorted by start
+        total_samples: Length of the decoded audio
+        target_seconds: Preferred chunk length
+        max_seconds: Ignore speech after this point (hooks-only mode)
+
+    Returns:
+        List of (start_sample, end_sample) tuples
+    """
+    target = int(target_seconds * sampling_rate)
+    limit = int(max_seconds * sampling_rate) if max_seconds else total_samples
+
+    chunks = []
+    chunk_start = None
+    chunk_end = None
+    for region in speech_regions:
+        start = region['start']
+        end = min(region['end'], total_samples, limit)
+        if start >= limit:
+            break
+        if chunk_start is None:
+            chunk_start = start
+        chunk_end = end
+        if chunk_end - chunk_start >= target:
+            chunks.append((chunk_start, chunk_end))
+            chunk_start = None
+
+    if chunk_start is not None and chunk_end > chunk_start:
+        chunks.append((chunk_start, chunk_end))
+    return chunks
+
+
+class WhisperPool:
+    """
+    Bounded process pool for local transcription of caption-less videos.
+
+    Thread-safe: ingest worker threads call transcribe_video() concurrently;
+    at most `workers` videos are transcribed at once. Each video starts with
+    its share of the job-wide CPU budget (the part not spent or reserved by
+    videos in progress, split over the free slots), so concurrent videos
+    can't each spend the whole remainder.
+    """
+
+    def __init__(self, model_name: str = "tiny", workers: int = None, cpu_budget_seconds: float = None,
+                 max_minutes: float = None, chunk_seconds: float = None, min_chunked_seconds: float = None):
+        cpu_count = os.cpu_count() or 1
+        self.model_name = model_name
+        self.workers = workers or get_task_pools().whisper_workers  # Share of the job's process budget
+        self.cpu_threads = max(1, cpu_count // self.workers)
+        self.cpu_budget_seconds = cpu_budget_seconds if cpu_budget_seconds is not None else \
+            float(os.getenv('TRANSCRIPTION_CPU_BUDGET', 600))
+        self.max_seconds = max_minutes * 60 if max_minutes else None
+        # Audio longer than min_chunked_seconds is VAD-chunked into ~chunk_seconds pieces
+        self.chunk_seconds = chunk_seconds or float(os.getenv('WHISPER_CHUNK_SECONDS', 300))
+        self.min_chunked_seconds = min_chunked_seconds or float(os.getenv('WHISPER_MIN_CHUNKED_SECONDS', 600))
+
+        self._cpu_spent = 0.0
+        self._reserved = 0.0  # Budget held by videos being transcribed
+        self._active = 0
+        self._slots = threading.Semaphore(self.workers)  # Videos beyond `workers` wait for a slot
+        self._lock = threading.Lock()
+        self._records = []
+
+        ctx = multiprocessing.get_context('spawn')  # parent has live threads; don't fork
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=ctx,
+            initializer=_init_worker,
+            initargs=(model_name, self.cpu_threads, ctx.Value('i', 0), cpu_count),
+        )
+
+    @property
+    def budget_remaining(self) -> float:
+        with self._lock:
+            return max(0.0, self.cpu_budget_seconds - self._cpu_spent)
+
+    def _reserve(self) -> float:
+        """Take one video's share of the budget; release it with _release()."""
+        with self._lock:
+            share = chunk_budget(self.cpu_budget_seconds, self._cpu_spent, self._reserved,
+                                 self.workers - self._active)
+            self._reserved += share
+            self._active += 1
+            return share
+
+    def _release(self, share: float):
+        with self._lock:
+            self._reserved -= share
+            self._active -= 1
+
+    def _record(self, video_id: str, status: str, result: dict = None):
+        with self._lock:
+            if result:
+                self._cpu_spent += result.get('cpu_seconds', 0.0)
+            self._records.append({
+                'video_id': video_id,
+                'status': status,
+                'cpu_seconds': result.get('cpu_seconds', 0.0) if result else 0.0,
+                'wall_seconds': result.get('wall_seconds', 0.0) if result else 0.0,
+                'truncated': result.get('truncated', False) if result else False,
+                'chunks': result.get('chunks', 1) if result else 0,
+            })
+
+    def transcribe(self, audio_path: Path, video_id: str = '', duration: float = None) -> dict:
+        """
+        Transcribe a local audio file. Returns None if the CPU budget is spent.
+        duration (seconds, e.g. from the download metadata) saves probing the file.
+        """
+        with self._slots:
+            share = self._reserve()
+            try:
+                if share <= 0:
+                    self._record(video_id, 'budget_exhausted')
+                    return None
+                result = self._transcribe_chunked(audio_path, share, duration)
+                if result is None:
+                    future = self._executor.submit(_transcribe_worker, str(audio_path), self.max_seconds, share)
+                    result = future.result()
+                if result.get('error'):
+                    self._record(video_id, 'error')
+                    return None
+                # Record the CPU spent before releasing the reservation
+                self._record(video_id, 'ok', result)
+            finally:
+                self._release(share)
+        return {k: result[k] for k in ('text', 'language', 'segments')}
+
+    def _chunkable(self, duration: float) -> bool:
+        effective = min(duration, self.max_seconds) if self.max_seconds else duration
+        return effective > self.min_chunked_seconds
+
+    def _transcribe_chunked(self, audio_path: Path, cpu_budget_seconds: float, duration: float = None) -> dict:
+        """
+        Split long audio at voice-activity boundaries and transcribe the chunks
+        in parallel across the pool. Returns None when chunking does not apply
+        (short audio, or VAD unavailable) so the caller uses a single call;
+        short audio is recognized from its duration, without decoding it here.
+
+        At most `workers` chunks run at once; each starts with its share of
+        the budget left (chunk_budget), so together they stay within
+        cpu_budget_seconds and time a chunk didn't use goes to the later ones.
+        """
+        try:
+            from faster_whisper.audio import decode_audio
+            from faster_whisper.vad import VadOptions, get_speech_timestamps
+        except ImportError:
+            return None
+
+        duration = duration or probe_duration(audio_path)
+        if duration is not None and not self._chunkable(duration):
+            return None
+        audio = decode_audio(str(audio_path), sampling_rate=SAMPLING_RATE)
+        if not self._chunkable(len(audio) / SAMPLING_RATE):
+            return None
+
+        # Cap single speech regions at the chunk length so monologues still split
+        regions = get_speech_timestamps(audio, VadOptions(max_speech_duration_s=self.chunk_seconds))
+        chunks = plan_chunks(regions, len(audio), self.chunk_seconds, self.max_seconds)
+        if len(chunks) < 2:
+            return None
+
+        results = [None] * len(chunks)
+        waiting = list(enumerate(chunks))
+        running = {}  # future -> (chunk index, reserved CPU seconds)
+        cpu_seconds = 0.0
+        truncated = False
+        while waiting or running:
+            while waiting and len(running) < self.workers:
+                share = chunk_budget(cpu_budget_seconds, cpu_seconds,
+                                     sum(r for _, r in running.values()), len(waiting))
+                if share <= 0:
+                    # Budget spent: drop chunks that haven't started yet
+                    waiting, truncated = [], True
+                    break
+                index, (start, end) = waiting.pop(0)
+                future = self._executor.submit(_transcribe_worker, audio[start:end], self.max_seconds,
+                                               share, start / SAMPLING_RATE)
+                running[future] = (index, share)
+            if not running:
+                break
+            future = next(as_completed(running))
+            index, _ = running.pop(future)
+            result = future.result()
+            results[index] = result
+            cpu_seconds += result.get('cpu_seconds', 0.0)
+            truncated = truncated or result.get('truncated', False)
+
+        done = [r for r in results if r and not r.get('error')]
+        if not done:
+            return {'error': 'all chunks failed'}
+
+        # Chunks are in time order; concatenating keeps segments sorted
+        segments = [seg for r in done for seg in r['segments']]
+        languages = [r['language'] for r in done]
+        return {
+            'text': " ".join(s['text'] for s in segments).strip(),
+            'language': max(set(languages), key=languages.count),
+            'segments': segments,
+            'cpu_seconds': round(cpu_seconds, 2),
+            'wall_seconds': round(max(r.get('wall_seconds', 0.0) for r in done), 2),
+            'truncated': truncated or len(done) < len(chunks),
+            'chunks': len(chunks),
+            'error': None,
+        }
+
+    def transcribe_video(self, url: str, video_id: str, temp_dir: Path, verbose: bool = False) -> dict:
+        """
+        Download audio (first K minutes in hooks mode) and transcribe it.
+        Returns {text, language, segments} or None on failure / budget exhausted.
+        """
+        from ingest_manager import download_audio
+
+        if self.budget_remaining <= 0:
+            self._record(video_id, 'budget_exhausted')
+            return None
+
+        audio_path = None
+        try:
+            audio_path, info = download_audio(url, temp_dir, video_id, verbose=verbose, max_seconds=self.max_seconds)
+            return self.transcribe(audio_path, video_id, (info or {}).get('duration'))
+        except Exception as e:
+            if verbose:
+                print(f"   ⚠️ Local transcription failed for {video_id}: {str(e)[:80]}")
+            self._record(video_id, 'error')
+            return None
+        finally:
+            if audio_path and Path(audio_path).exists():
+                try:
+                    Path(audio_path).unlink()
+                except OSError:
+                    pass
+
+    def report(self) -> dict:
+        """Per-job summary of local transcription usage."""
+        with self._lock:
+            records = list(self._records)
+            spent = self._cpu_spent
+        return {
+            'videos': len(records),
+            'transcribed': sum(1 for r in records if r['status'] == 'ok'),
+            'skipped_budget': sum(1 for r in records if r['status'] == 'budget_exhausted'),
+            'errors': sum(1 for r in records if r['status'] == 'error'),
+            'truncated': sum(1 for r in records if r['truncated']),
+            'chunked': sum(1 for r in records if r['chunks'] > 1),
+            'cpu_seconds': round(spent, 2),
+            'cpu_budget_seconds': self.cpu_budget_seconds,
+            'workers': self.workers,
+            'cpu_threads_per_worker': self.cpu_threads,
+            'max_minutes': self.max_seconds / 60 if self.max_seconds else None,
+        }
+
+    def close(self):
+        """Shut down worker processes."""
+        self._executor.shutdown(wait=True, cancel_futures=True)
@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+"""
+Video Records - Compact per-video representation of ingest results
+
+`videos_data` used to hold every video as nested dicts: full transcript,
+every caption segment and one dict per comment, passed to every premium
+task, the LLM analysis and the report. On 100-video enterprise runs that
+dominated peak RSS.
+
+VideoRecord keeps:
+- video_info as-is (small metadata dict)
+- comments in columnar lists (one list per field instead of one dict per comment)
+- transcripts/segments only as a reference to the ingest JSON cache
+  (data/cache/<video_id>.json), read on each access and never kept on the
+  record, so a pass over every transcript doesn't pin them all in memory
+
+Records behave like read-only dicts (`v['comments']`, `v.get('transcript')`),
+so existing consumers keep working unchanged.
+
+Usage:
+    videos_data = [VideoRecord.from_ingest(result) for result in results]
+    excerpt = transcript_excerpt(videos_data[0], 3000)   # read from the ingest cache
+"""
+
+import json
+import os
+from collections.abc import Sequence
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+
+DEFAULT_INGEST_CACHE_DIR = Path(__file__).resolve().parent / "data" / "cache"
+
+COMMENT_FIELDS = ('author', 'text', 'likes', 'published_at')
+RECORD_KEYS = ('video_info', 'transcript', 'transcript_segments', 'comments')
+
+
+class TranscriptCacheMissing(LookupError):
+    """A checkpointed record references an ingest cache file that no longer exists."""
+
+
+class CommentColumns(Sequence):
+    """Comments stored column-wise; items are materialized as dicts on access."""
+
+    __slots__ = ('authors', 'texts', 'likes', 'published_at')
+
+    def __init__(self, comments: List[Dict] = ()):
+        self.authors = [c.get('author', '') for c in comments]
+        self.texts = [c.get('text', '') for c in comments]
+        self.likes = [c.get('likes', 0) for c in comments]
+        self.published_at = [c.get('published_at', '') for c in comments]
+
+    def __len__(self) -> int:
+        return len(self.texts)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        return {
+            'author': self.authors[index],
+            'text': self.texts[index],
+            'likes': self.likes[index],
+            'published_at': self.published_at[index],
+        }
+
+    def __iter__(self) -> Iterator[Dict]:
+        for author, text, likes, published_at in zip(self.authors, self.texts, self.likes, self.published_at):
+            yield {'author': author, 'text': text, 'likes': likes, 'published_at': published_at}
+
+    def to_list(self) -> List[Dict]:
+        return list(self)
+
+
+class VideoRecord:
+    """
+    Read-only, dict-compatible view of one ingested video.
+
+    Transcripts are held inline only when the ingest cache has no copy
+    (e.g. the cache write failed); otherwise every access reads them from
+    disk and the record keeps only the reference.
+    """
+
+    __slots__ = ('video_info', 'comments', 'transcript_chars', 'transcript_cached',
+                 '_cache_file', '_transcript', '_segments')
+
+    def __init__(self, video_info: Dict, comments: List[Dict] = (), transcript: str = '',
+                 transcript_segments: List[Dict] = None, cache_dir: Optional[Path] = None):
+        self.video_info = video_info or {}
+        self.comments = comments if isinstance(comments, CommentColumns) else CommentColumns(comments)
+        self.transcript_chars = len(transcript or '')
+
+        video_id = self.video_info.get('video_id') or self.video_info.get('id')
+        cache_dir = cache_dir or os.getenv('INGEST_CACHE_DIR') or DEFAULT_INGEST_CACHE_DIR
+        cache_file = Path(cache_dir) / f"{video_id}.json" if video_id else None
+        self.transcript_cached = bool(self.transcript_chars and cache_file and cache_file.exists())
+        self._cache_file = cache_file
+        if self.transcript_cached:
+            self._transcript, self._segments = None, None
+        else:
+            self._transcript, self._segments = transcript or '', transcript_segments or []
+
+    @classmethod
+    def from_ingest(cls, result: Dict, cache_dir: Optional[Path] = None) -> 'VideoRecord':
+        """Build from a process_video / comments-only ingest dict."""
+        if isinstance(result, VideoRecord):
+            return result
+        return cls(result.get('video_info', {}), result.get('comments', []), result.get('transcript', ''),
+                   result.get('transcript_segments', []), cache_dir=cache_dir)
+
+    @classmethod
+    def from_dict(cls, data: Dict, cache_dir: Optional[Path] = None) -> 'VideoRecord':
+        """
+        Rebuild from to_dict() output (e.g. a checkpoint) or a full ingest dict.
+        Raises TranscriptCacheMissing if the referenced ingest cache file is gone,
+        so callers can treat the checkpoint as stale instead of losing the transcript.
+        """
+        if 'transcript' in data:
+            return cls.from_ingest(data, cache_dir=cache_dir)
+        record = cls(data.get('video_info', {}), data.get('comments', []), cache_dir=cache_dir)
+        # Re-attach the cached transcript the record referenced when it was saved
+        record.transcript_chars = data.get('transcript_chars', 0)
+        if record.transcript_chars:
+            if not (record._cache_file and record._cache_file.exists()):
+                raise TranscriptCacheMissing(f"ingest cache file missing: {record._cache_file}")
+            record.transcript_cached = True
+            record._transcript, record._segments = None, None
+        return record
+
+    def _load_cached(self) -> Dict:
+        """Read the ingest cache file (not kept on the record)."""
+        try:
+            with open(self._cache_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"⚠️ Transcript cache read failed for {self._cache_file.stem}: {e}")
+            return {}
+
+    @property
+    def transcript(self) -> str:
+        if self._transcript is None:
+            return self._load_cached().get('transcript') or ''
+        return self._transcript
+
+    @property
+    def transcript_segments(self) -> List[Dict]:
+        if self._segments is None:
+            return self._load_cached().get('transcript_segments') or []
+        return self._segments
+
+    def transcript_excerpt(self, chars: int) -> str:
+        """First `chars` characters of the transcript; only the excerpt outlives the read."""
+        return self.transcript[:chars]
+
+    # --- dict compatibility ---
+
+    def __getitem__(self, key: str) -> Any:
+        if key == 'video_info':
+            return self.video_info
+        if key == 'comments':
+            return self.comments
+        if key == 'transcript':
+            return self.transcript
+        if key == 'transcript_segments':
+            return self.transcript_segments
+        raise KeyError(key)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return self[key] if key in RECORD_KEYS else default
+
+    def __contains__(self, key: str) -> bool:
+        return key in RECORD_KEYS
+
+    def keys(self):
+        return list(RECORD_KEYS)
+
+    def __iter__(self):
+        return iter(RECORD_KEYS)
+
+    def __len__(self) -> int:
+        return len(RECORD_KEYS)
+
+    def to_dict(self) -> Dict:
+        """
+        JSON form for checkpoints/hashing. Cached transcripts stay a reference
+        (transcript_chars), inline ones are written out in full.
+        """
+        data = {'video_info': self.video_info, 'comments': self.comments.to_list()}
+        if self.transcript_cached:
+            data['transcript_chars'] = self.transcript_chars
+        else:
+            data['transcript'] = self._transcript
+            data['transcript_segments'] = self._segments
+        return data
+
+    def __repr__(self) -> str:
+        return (f"VideoRecord({self.video_info.get('video_id') or self.video_info.get('id')!r}, "
+                f"comments={len(self.comments)}, transcript_chars={self.transcript_chars})")
+
+
+def transcript_excerpt(video: Any, chars: int) -> str:
+    """First `chars` transcript characters of a VideoRecord or a legacy ingest dict."""
+    if isinstance(video, VideoRecord):
+        return video.transcript_excerpt(chars)
+    return (video.get('transcript') or '')[:chars]
+
+
+def compact_videos_data(videos_data: List[Any], cache_dir: Optional[Path] = None) -> List[VideoRecord]:
+    """
+    Convert ingest dicts / checkpoint dicts to VideoRecords (records pass through).
+    Raises TranscriptCacheMissing for checkpoint dicts whose transcript cache is gone.
+    """
+    return [v if isinstance(v, VideoRecord) else VideoRecord.from_dict(v, cache_dir=cache_dir)
+            for v in videos_data or []]
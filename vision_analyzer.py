@@ -3,7 +3,8 @@
 Vision Analyzer - GapIntel v2 Module 1
 
 Analyzes YouTube thumbnails to extract visual patterns and correlate with performance.
-Uses OpenCV and PIL for local processing (no API costs).
+Features come from the shared thumbnail engine (railway-api/premium/thumbnail_extractor.py)
+at THUMBNAIL_FEATURE_LEVEL (fast by default: no model downloads, no API costs).
 
 Features:
 - Dominant color extraction
@@ -17,24 +18,70 @@ Usage:
     results = analyze_channel_thumbnails(youtube, channel_id, num_videos=50)
 """
 
+import hashlib
 import os
+import sys
+import threading
 import cv2
 import numpy as np
 from PIL import Image
 from io import BytesIO
 from pathlib import Path
-from collections import Counter
-import requests
 from typing import Optional
 import colorsys
 
-# Try to import optional face detection
-try:
-    face_cascade = cv2.CascadeClassifier(cv2.data.haarcascades + 'haarcascade_frontalface_default.xml')
-    FACE_DETECTION_AVAILABLE = True
-except:
-    FACE_DETECTION_AVAILABLE = False
-    print("⚠️ Face detection not available (missing cascade file)")
+# Shared I/O + CPU pools live in railway-api
+railway_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'railway-api')
+if railway_dir not in sys.path:
+    sys.path.append(railway_dir)
+
+# One feature engine for root scripts and premium modules (fast/standard/full)
+THUMBNAIL_FEATURE_LEVEL = os.getenv('THUMBNAIL_FEATURE_LEVEL', 'fast')
+
+# Namespace for our analyses (and visual_style taxonomy) in the shared thumbnail index
+INDEX_PRODUCER = 'vision_analysis'
+
+_engine = None
+_engine_lock = threading.Lock()
+
+
+def get_engine():
+    """Per-process thumbnail feature engine (models, if any, stay in this process)."""
+    global _engine
+    with _engine_lock:
+        if _engine is None:
+            from premium.thumbnail_extractor import ThumbnailFeatureExtractor
+            _engine = ThumbnailFeatureExtractor(level=THUMBNAIL_FEATURE_LEVEL, use_vision_pool=False)
+        return _engine
+
+
+def download_thumbnail_bytes(video_id: str, quality: str = "maxresdefault") -> Optional[bytes]:
+    """
+    Download a YouTube thumbnail's encoded bytes (via the shared thumbnail
+    cache), falling back to lower qualities.
+    
+    Returns:
+        JPEG bytes or None if every quality failed
+    """
+    from premium.db.thumbnail_cache import get_thumbnail_cache
+    cache = get_thumbnail_cache()
+    qualities = [quality, "hqdefault", "mqdefault", "default"]
+    
+    for q in qualities:
+        url = f"https://i.ytimg.com/vi/{video_id}/{q}.jpg"
+        data = cache.get_bytes(url, video_id=video_id)
+        if data and len(data) > 1000:
+            return data
+    
+    return None
+
+
+def decode_thumbnail(data: bytes) -> Optional[np.ndarray]:
+    """Decode image bytes to an OpenCV array (BGR), or None."""
+    if not data:
+        return None
+    img_array = np.frombuffer(data, dtype=np.uint8)
+    return cv2.imdecode(img_array, cv2.IMREAD_COLOR)
 
 
 def download_thumbnail(video_id: str, quality: str = "maxresdefault") -> Optional[np.ndarray]:
@@ -48,61 +95,25 @@ def download_thumbnail(video_id: str, quality: str = "maxresdefault") -> Optiona
     Returns:
         OpenCV image array (BGR) or None if failed
     """
-    qualities = [quality, "hqdefault", "mqdefault", "default"]
-    
-    for q in qualities:
-        url = f"https://i.ytimg.com/vi/{video_id}/{q}.jpg"
-        try:
-            response = requests.get(url, timeout=10)
-            if response.status_code == 200 and len(response.content) > 1000:
-                img_array = np.asarray(bytearray(response.content), dtype=np.uint8)
-                img = cv2.imdecode(img_array, cv2.IMREAD_COLOR)
-                if img is not None:
-                    return img
-        except Exception as e:
-            continue
-    
-    return None
+    return decode_thumbnail(download_thumbnail_bytes(video_id, quality))
 
 
-def extract_dominant_colors(img: np.ndarray, num_colors: int = 5) -> list[dict]:
+def colors_section(features) -> list[dict]:
     """
-    Extract dominant colors from an image using k-means clustering.
+    Dominant colors from the engine's palette.
     
     Returns:
         List of dicts with hex, rgb, percentage, and color_name
     """
-    # Resize for faster processing
-    img_small = cv2.resize(img, (150, 150))
-    img_rgb = cv2.cvtColor(img_small, cv2.COLOR_BGR2RGB)
-    
-    # Reshape to list of pixels
-    pixels = img_rgb.reshape(-1, 3).astype(np.float32)
-    
-    # K-means clustering
-    criteria = (cv2.TERM_CRITERIA_EPS + cv2.TERM_CRITERIA_MAX_ITER, 10, 1.0)
-    _, labels, centers = cv2.kmeans(pixels, num_colors, None, criteria, 10, cv2.KMEANS_RANDOM_CENTERS)
-    
-    # Count occurrences
-    label_counts = Counter(labels.flatten())
-    total_pixels = len(labels)
-    
     colors = []
-    for i, center in enumerate(centers):
-        r, g, b = int(center[0]), int(center[1]), int(center[2])
-        hex_code = f"#{r:02x}{g:02x}{b:02x}"
-        percentage = (label_counts[i] / total_pixels) * 100
-        
+    for (r, g, b), share in zip(features.palette, features.palette_shares):
         colors.append({
-            "hex": hex_code,
+            "hex": f"#{r:02x}{g:02x}{b:02x}",
             "rgb": (r, g, b),
-            "percentage": round(percentage, 1),
+            "percentage": round(share * 100, 1),
             "color_name": classify_color(r, g, b),
             "saturation": get_saturation(r, g, b)
         })
-    
-    # Sort by percentage
-    colors.sort(key=lambda x: x["percentage"], reverse=True)
     return colors
 
 
@@ -143,53 +154,39 @@ def get_saturation(r: int, g: int, b: int) -> float:
     return round(s * 100, 1)
 
 
-def detect_faces(img: np.ndarray) -> dict:
+def faces_section(features) -> dict:
     """
-    Detect faces in the image.
+    Face summary from the engine's face features.
     
     Returns:
-        Dict with face_count, face_area_percentage, face_positions
+        Dict with face_count, face_area_percentage (largest face), positions
     """
-    if not FACE_DETECTION_AVAILABLE:
-        return {"face_count": 0, "face_area_percentage": 0, "positions": [], "available": False}
-    
-    gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
-    faces = face_cascade.detectMultiScale(gray, 1.1, 4)
-    
-    img_area = img.shape[0] * img.shape[1]
-    total_face_area = sum(w * h for (x, y, w, h) in faces)
-    
     positions = []
-    for (x, y, w, h) in faces:
-        cx, cy = x + w//2, y + h//2
-        # Classify position (left, center, right)
-        if cx < img.shape[1] * 0.33:
-            pos = "left"
-        elif cx > img.shape[1] * 0.66:
-            pos = "right"
+    if features.face_count:
+        if features.face_in_left_third:
+            positions.append("left")
+        elif features.face_in_right_third:
+            positions.append("right")
         else:
-            pos = "center"
-        positions.append(pos)
+            positions.append("center")
     
     return {
-        "face_count": len(faces),
-        "face_area_percentage": round((total_face_area / img_area) * 100, 1),
+        "face_count": features.face_count,
+        "face_area_percentage": round(features.face_area_ratio * 100, 1),
         "positions": positions,
         "available": True
     }
 
 
-def analyze_brightness_contrast(img: np.ndarray) -> dict:
+def brightness_section(features) -> dict:
     """
-    Analyze image brightness and contrast.
+    Brightness and contrast on a 0-255 scale (HSV value channel).
     
     Returns:
-        Dict with brightness (0-255), contrast (0-100), is_dark, is_high_contrast
+        Dict with brightness, contrast, is_dark, is_high_contrast, brightness_category
     """
-    gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
-    
-    brightness = np.mean(gray)
-    contrast = np.std(gray)
+    brightness = features.avg_brightness * 255
+    contrast = features.contrast_score * 255
     
     return {
         "brightness": round(brightness, 1),
@@ -200,35 +197,19 @@ def analyze_brightness_contrast(img: np.ndarray) -> dict:
     }
 
 
-def estimate_text_density(img: np.ndarray) -> dict:
+def text_section(features) -> dict:
     """
-    Estimate text presence using edge detection heuristics.
-    (Full OCR would require pytesseract, this is a lightweight alternative)
+    Text presence: the engine's edge-based density score (fast/standard
+    levels) or OCR word coverage (full level).
     
     Returns:
         Dict with text_density_score (0-100), has_significant_text
     """
-    gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
-    
-    # Edge detection
-    edges = cv2.Canny(gray, 50, 150)
-    
-    # Calculate edge density
-    edge_density = (np.count_nonzero(edges) / edges.size) * 100
-    
-    # Text typically creates horizontal edge patterns
-    # Detect horizontal lines which often indicate text
-    horizontal_kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (25, 1))
-    detect_horizontal = cv2.morphologyEx(edges, cv2.MORPH_OPEN, horizontal_kernel, iterations=2)
-    horizontal_density = (np.count_nonzero(detect_horizontal) / detect_horizontal.size) * 100
-    
-    # Normalize to 0-100 score
-    text_score = min(100, (edge_density * 0.5 + horizontal_density * 10))
-    
+    score = features.text_density_score or min(100, features.text_area_ratio * 1000)
     return {
-        "text_density_score": round(text_score, 1),
-        "has_significant_text": text_score > 15,
-        "edge_density": round(edge_density, 1)
+        "text_density_score": round(score, 1),
+        "has_significant_text": features.has_text,
+        "edge_density": round(features.edge_density * 100, 1)
     }
 
 
@@ -242,14 +223,23 @@ def analyze_thumbnail(video_id: str) -> Optional[dict]:
     Returns:
         Dict with all visual analysis results, or None if download failed
     """
-    img = download_thumbnail(video_id)
-    if img is None:
+    return analyze_thumbnail_bytes(video_id, download_thumbnail_bytes(video_id))
+
+
+def analyze_thumbnail_bytes(video_id: str, data: Optional[bytes]) -> Optional[dict]:
+    """Analysis of already-downloaded thumbnail bytes (picklable for the CPU pool)."""
+    if not data:
+        return None
+    try:
+        img = Image.open(BytesIO(data)).convert('RGB')
+    except Exception:
         return None
     
-    colors = extract_dominant_colors(img)
-    faces = detect_faces(img)
-    brightness = analyze_brightness_contrast(img)
-    text = estimate_text_density(img)
+    features = get_engine().extract_from_image(img)
+    colors = colors_section(features)
+    faces = faces_section(features)
+    brightness = brightness_section(features)
+    text = text_section(features)
     
     # Calculate high-saturation color percentage
     high_sat_colors = [c for c in colors if c["saturation"] > 50]
@@ -264,10 +254,93 @@ def analyze_thumbnail(video_id: str) -> Optional[dict]:
         "faces": faces,
         "brightness": brightness,
         "text": text,
-        "visual_style": classify_visual_style(colors, brightness, faces, text)
+        "visual_style": classify_visual_style(colors, brightness, faces, text),
+        "feature_level": THUMBNAIL_FEATURE_LEVEL
     }
 
 
+def analyze_and_describe(video_id: str, data: bytes) -> tuple:
+    """(analysis, index descriptor) for downloaded bytes (runs on the CPU pool)."""
+    from premium.db.thumbnail_index import describe_thumbnail
+    analysis = analyze_thumbnail_bytes(video_id, data)
+    return analysis, describe_thumbnail(data) if analysis else None
+
+
+def analyze_thumbnails_batch(video_ids: list, pools=None, channel_id: str = None, views: list = None) -> list:
+    """
+    Analyze many thumbnails: downloads run on the shared I/O pool and each
+    finished download goes straight to the shared CPU process pool, so
+    analysis overlaps the remaining downloads. Same order as video_ids;
+    None for thumbnails that failed.
+    
+    Thumbnails analyzed recently (by any job) come straight from the
+    thumbnail index without a download; new analyses are added to it, with
+    views (same order as video_ids) as their performance.
+    """
+    from premium.db.thumbnail_index import get_thumbnail_index
+    from task_pools import get_task_pools, WORKLOAD_CPU, WORKLOAD_IO
+    pools = pools or get_task_pools()
+    index = get_thumbnail_index()
+    
+    def fetch_and_submit(video_id):
+        """
+        (analysis, descriptor, content_hash, from_index). For a new download,
+        analysis is the CPU-pool future of analyze_and_describe() instead.
+        """
+        entry = index.get(video_id, producer=INDEX_PRODUCER, keys=('visual_style', 'feature_level'))
+        cached = entry['attributes'][INDEX_PRODUCER] if entry else None
+        if cached and cached.get('feature_level') == THUMBNAIL_FEATURE_LEVEL:
+            return cached, None, None, True
+        data = download_thumbnail_bytes(video_id)
+        if not data:
+            return None
+        future = pools.submit(WORKLOAD_CPU, analyze_and_describe, video_id, data)
+        return future, None, hashlib.sha256(data).hexdigest(), False
+    
+    submitted = pools.map(WORKLOAD_IO, fetch_and_submit, video_ids, ignore_errors=True)
+    avg_views = np.mean(views) if views else 0
+    analyses = []
+    reused = 0
+    for i, item in enumerate(submitted):
+        analysis, descriptor, content_hash, from_index = item or (None, None, None, False)
+        if item and not from_index:
+            try:
+                analysis, descriptor = analysis.result()
+            except Exception as e:
+                print(f"   ⚠️ Thumbnail {video_ids[i]} failed: {e}")
+                analysis, descriptor = None, None
+        if analysis and from_index:
+            reused += 1
+        elif analysis:
+            # No descriptor (undecodable for the index): the analysis is kept, index.add skips it
+            video_views = views[i] if views else None
+            index.add(video_ids[i], descriptor, INDEX_PRODUCER, channel_id=channel_id, content_hash=content_hash,
+                      views=video_views,
+                      performance=round(float(video_views / avg_views), 3) if video_views is not None and avg_views else None,
+                      style=analysis["visual_style"], attributes=analysis)
+        analyses.append(analysis)
+    print(f"   📸 Analyzed {sum(1 for a in analyses if a)}/{len(video_ids)} thumbnails ({reused} from index)")
+    return analyses
+
+
+def find_similar_thumbnails(video_id: str, k: int = 10, exclude_channel: str = None) -> dict:
+    """
+    Indexed thumbnails that look like this video's, and how they performed.
+    
+    Returns:
+        Dict with neighbors (video_id, similarity, performance, styles, ...) and a summary
+    """
+    from premium.db.thumbnail_index import get_thumbnail_index, summarize_neighbors
+    index = get_thumbnail_index()
+    descriptor = index.descriptor(video_id)
+    if descriptor is None:
+        return {"neighbors": [], "summary": summarize_neighbors([], INDEX_PRODUCER)}
+    neighbors = index.similar(descriptor, k=k, exclude_channel=exclude_channel, exclude_video=video_id)
+    for n in neighbors:
+        n["attributes"] = {key: v for key, v in n["attributes"].items() if key != INDEX_PRODUCER}
+    return {"neighbors": neighbors, "summary": summarize_neighbors(neighbors, INDEX_PRODUCER)}
+
+
 def classify_visual_style(colors: list, brightness: dict, faces: dict, text: dict) -> str:
     """Classify the overall visual style of the thumbnail."""
     styles = []
@@ -351,10 +424,11 @@ def analyze_channel_thumbnails(youtube, channel_id: str, num_videos: int = 50) -
             break
     
     # Analyze thumbnails
+    videos = videos[:num_videos]
     analyses = []
-    for i, video in enumerate(videos[:num_videos]):
-        print(f"   📸 [{i+1}/{num_videos}] Analyzing: {video['title'][:40]}...")
-        analysis = analyze_thumbnail(video["video_id"])
+    batch = analyze_thumbnails_batch([v["video_id"] for v in videos], channel_id=channel_id,
+                                     views=[v["views"] for v in videos])
+    for video, analysis in zip(videos, batch):
         if analysis:
             analysis["views"] = video["views"]
             analysis["title"] = video["title"]
@@ -366,12 +440,19 @@ def analyze_channel_thumbnails(youtube, channel_id: str, num_videos: int = 50) -
     # Find winning patterns
     winning_patterns = find_winning_patterns(analyses, correlations)
     
+    # How lookalikes of the best thumbnail did on other channels
+    lookalikes = None
+    if analyses:
+        best = max(analyses, key=lambda a: a["views"])
+        lookalikes = find_similar_thumbnails(best["video_id"], exclude_channel=channel_id)["summary"]
+    
     print(f"   ✓ Analyzed {len(analyses)} thumbnails")
     
     return {
         "thumbnail_analyses": analyses,
         "performance_correlations": correlations,
         "winning_patterns": winning_patterns,
+        "lookalikes": lookalikes,
         "total_analyzed": len(analyses)
     }
 